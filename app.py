@@ -2,13 +2,30 @@
 GitBro - Streamlit Chat UI for GitHub repository analysis.
 Run with: streamlit run app.py
 """
-import json
+import re
 import streamlit as st
 from streamlit_mermaid import st_mermaid
-from langchain_openai import ChatOpenAI
 from src.github_client import GitHubClient
-from src.graph import run_analysis
-import os
+from src.graph import stream_analysis
+from src.events import StageStarted, StageFinished, AgentOutput, AnalysisComplete
+from src.llm import get_llm, invoke_llm_messages
+from src.rate_limit import PRIORITY_INTERACTIVE
+from src.retrieval import CodeIndex, build_chat_index
+from src.chat_tools import TOOL_SCHEMAS, RepoTools, build_repo_tools
+from src.analysis.search_index import SearchIndex, format_hits, parse_query
+from src.tracing import span
+
+# Retrieved chunks sent with each chat question; the model fetches anything else with tools
+CHAT_TOP_K = 4
+# Model turns per question that may call tools before it has to answer
+MAX_TOOL_ROUNDS = 6
+TOOLS_NOTE = (
+    "You can look at the whole repository with the tools read_file, search, list_dir and symbol. "
+    "When the excerpts above don't answer the question, use them instead of guessing, "
+    "and cite code as path:line."
+)
+# Chat messages starting with this are answered from the search index, without the LLM
+SEARCH_COMMAND = "/search "
 
 # --- Page config ---
 st.set_page_config(
@@ -186,65 +203,20 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- Set OpenAI API key ---
-# INSERT YOUR OPENAI API KEY HERE:
-os.environ["OPENAI_API_KEY"] = "eyJhbGciOiJSUzI1NiIsInR5cCIgOiAiSldUIiwia2lkIiA6ICJhZXNKN2kxNGNidnVuTU40MTJrOU5yZ2ROeENhTlJudTNPbC1TU08ycFlJIn0.eyJleHAiOjE3NzA0NDI4MTIsImlhdCI6MTc3MDQ0MTAxMiwiYXV0aF90aW1lIjoxNzcwNDQxMDExLCJqdGkiOiJmZjUxMTdhNC04NGE2LTRjMjktYjk0OC0wMTg3NzY2MWZkODciLCJpc3MiOiJodHRwczovL2F1dGgubWNraW5zZXkuaWQvYXV0aC9yZWFsbXMvciIsImF1ZCI6ImJjZDIzNzI4LTNkMjctNDQ3Yy1hMGE5LWVhY2FmMzkzYTZmNSIsInN1YiI6IjZhZjEyNDMxLWUzYWMtNGM3Mi1hYjZhLTY5ZjI4ODlmYzZmYSIsInR5cCI6IklEIiwiYXpwIjoiYmNkMjM3MjgtM2QyNy00NDdjLWEwYTktZWFjYWYzOTNhNmY1Iiwic2Vzc2lvbl9zdGF0ZSI6ImRiNzUwODQ5LWJlMmUtNDk4NC04NmZkLWMyOGY3MThjZWFhZiIsImF0X2hhc2giOiIzMlVsT3dMMm8wUlNvUmVtX3gzUDlRIiwibmFtZSI6IlJpY2hhcmQgQ291cGVydGh3YWl0ZSIsImdpdmVuX25hbWUiOiJSaWNoYXJkIiwiZmFtaWx5X25hbWUiOiJDb3VwZXJ0aHdhaXRlIiwicHJlZmVycmVkX3VzZXJuYW1lIjoiYjJiZWVkNDk3YjdkYzRmZiIsImVtYWlsIjoiUmljaGFyZF9Db3VwZXJ0aHdhaXRlQG1ja2luc2V5LmNvbSIsImFjciI6IjEiLCJzaWQiOiJkYjc1MDg0OS1iZTJlLTQ5ODQtODZmZC1jMjhmNzE4Y2VhYWYiLCJlbWFpbF92ZXJpZmllZCI6dHJ1ZSwiZm1ubyI6IjMxNjczNyIsImdyb3VwcyI6WyIyOTA3ZmExYy02ODNmLTRjZjctODU1NS04YzM0YTE2Yzg4ZDgiLCJBbGwgRmlybSBVc2VycyIsIjAzYjE1YTM0LTY1NWUtNGVjNC04MzRhLWI5ZGRhMTk3MjBmMCJdfQ.ZSSU7ZL8l5o3KFoU0fhBtwapRddVm5Nz9o1mnIBj_3XYifi77shBUsRVm2cVEL3uxLTwYpybBSet2Q64O4NZJYOlfjjlukZHUeiot79mL3iTDyprzns34ldBnWtIbUZD4S-VF7FCPbgsRmQIlPlm8BCR9UQhjgQ3Lt_fCOuyfQli5-RZU6ypESIzFsZ-X3ROKFzzmym1fif0paxcyfZiZx8gFrI_Py0fxa1pznuiSNGzJRcnSmuKQIARn0AfJGvm9VB07e5btuslRx4w1sexSy9vbJayPezt0EL3_-RDDsAUZ7u3Q3PjgVlcRfv0INgPpQjBncmSFvjsB-IPxkep8g"
-os.environ["OPENAI_BASE_URL"] = "https://openai.prod.ai-gateway.quantumblack.com/2907fa1c-683f-4cf7-8555-8c34a16c88d8/v1"
-
-# --- LLM for chat follow-ups ---
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.3,
-)
-
-
 def build_context(analysis: dict) -> str:
-    """Build a context string from analysis results for the chat LLM."""
-    nav = analysis.get("navigator_map", {})
-    ctx = analysis.get("context_output", {})
+    """
+    Build the fixed chat header from analysis results: repo info and the architecture summary.
+    Code, configs, commits and the rest are retrieved per question from the chat index.
+    """
+    nav = analysis.get("navigator_map") or {}
+    ctx = analysis.get("context_output") or {}
     meta = analysis.get("metadata", {})
 
-    # Include actual code samples so the LLM can reference them
-    code_section = ""
-    for filename, content in list(analysis.get("code_samples", {}).items())[:50]:  # Include 50 key files
-        code_section += f"\n### {filename}\n```\n{content}\n```\n"  # Full content, not truncated
-
-    # Include config file contents
-    config_section = ""
-    for fname, content in list(analysis.get("config_files", {}).items()):
-        config_section += f"\n### {fname}\n```\n{content}\n```\n"  # Full content, not truncated
-
-    # Include file tree for structure questions
-    file_tree = analysis.get("file_tree", [])
-    tree_paths = "\n".join(f["path"] for f in file_tree[:150])
-    if len(file_tree) > 150:
-        tree_paths += f"\n... and {len(file_tree) - 150} more files"
-
-    # Include recent commits
-    commits_section = ""
-    for c in analysis.get("recent_commits", [])[:10]:
-        commits_section += f"- {c.get('sha', '')[:7]} {c.get('message', '')} (by {c.get('author', 'unknown')})\n"
-
-    # Include PRs
-    prs_section = ""
-    for pr in analysis.get("pull_requests", [])[:10]:
-        prs_section += f"- #{pr.get('number', '')} {pr.get('title', '')} [{pr.get('state', '')}] by {pr.get('author', 'unknown')}\n"
-
     # Core modules detailed
     modules_detailed = ""
     for m in nav.get("core_modules_detailed", []):
         modules_detailed += f"- {m.get('path', '')}: {m.get('purpose', '')}\n"
 
-    # API endpoints from context
-    endpoints_section = ""
-    for ep in ctx.get("api_endpoints", []):
-        endpoints_section += f"- {ep.get('method', '')} {ep.get('path', '')} ({ep.get('file', '')}) - {ep.get('purpose', '')}\n"
-
-    # Data models from context
-    models_section = ""
-    for dm in ctx.get("data_models", []):
-        models_section += f"- {dm.get('name', '')} ({dm.get('file', '')}): {', '.join(dm.get('fields', []))}\n"
-
     return f"""You are GitBro, an AI assistant that helps developers understand GitHub repositories.
 You have analyzed the repository "{meta.get('full_name', 'unknown')}" and have the following information.
 Answer questions based ONLY on this data. Be specific and reference actual file names and code.
@@ -254,63 +226,28 @@ Answer questions based ONLY on this data. Be specific and reference actual file
 - Language: {meta.get('language')}
 - Stars: {meta.get('stars', 0)}
 - Description: {meta.get('description', 'N/A')}
+- Total Files: {len(analysis.get('file_tree', []))}
 
 ## Architecture (from Navigator Agent)
 - Entry Points: {nav.get('entry_points', [])}
 - Core Modules: {nav.get('core_modules', [])}
 - Dependencies: {nav.get('dependencies', [])}
 - Architecture Type: {nav.get('architecture_type', 'unknown')}
-- Confidence: {nav.get('confidence_score', 0)}
 - Project Summary: {nav.get('project_summary', 'N/A')}
-- README Summary: {nav.get('readme_summary', 'N/A')}
 
 ### Core Modules Detail
 {modules_detailed if modules_detailed else 'N/A'}
 
 ## Code Analysis (from Context Agent)
-- Files Analyzed: {ctx.get('files_analyzed', 0)}
 - Technologies: {ctx.get('technologies', [])}
 - Patterns: {ctx.get('patterns', [])}
 - Complexity: {ctx.get('complexity_score', 'N/A')}
-- Key Functions: {json.dumps(ctx.get('key_functions', []), indent=2)}
-- Key Classes: {json.dumps(ctx.get('key_classes', []), indent=2)}
-
-### API Endpoints
-{endpoints_section if endpoints_section else 'None detected'}
-
-### Data Models
-{models_section if models_section else 'None detected'}
-
-## Onboarding Guide (from Mentor Agent)
-{analysis.get('mentor_guide', 'N/A')}
-
-## Architecture Diagram (from Visualizer Agent)
-```mermaid
-{analysis.get('visualization', 'No diagram available')}
-```
-
-## Complete File Tree ({len(file_tree)} files)
-{tree_paths}
-
-## Recent Commits
-{commits_section if commits_section else 'None available'}
-
-## Pull Requests
-{prs_section if prs_section else 'None available'}
-
-## Config Files
-{config_section if config_section else 'None found'}
-
-## Code Samples
-{code_section}
 
 ## Instructions
-- When asked about code structure, reference the COMPLETE FILE TREE and core modules above
-- When asked about a specific file, look it up in the code samples above
+- Each question comes with the repository excerpts most relevant to it (source, configs,
+  file tree, commits, pull requests, onboarding guide, architecture diagram)
+- Answer from the header above and those excerpts; if they don't cover the question, say so
 - When asked for a diagram or visualization, output the mermaid diagram
-- When asked about onboarding, reference the learning path
-- When asked about commits or PRs, reference the recent commits and pull requests above
-- When asked about dependencies, reference the config files and dependencies list
 - Be concise, specific, and reference actual file names
 """
 
@@ -346,18 +283,91 @@ def render_message_with_mermaid(message: str):
         st.markdown(message[last_end:])
 
 
-def get_chat_response(context: str, chat_history: list, user_msg: str) -> str:
-    """Send user question to LLM with full analysis context."""
-    # Build conversation with context
-    conversation = context + "\n\n## Conversation\n"
-    for role, msg in chat_history[-6:]:  # Keep last 6 messages for context window
-        prefix = "User" if role == "user" else "GitBro"
-        conversation += f"{prefix}: {msg}\n\n"
-    conversation += f"User: {user_msg}\n\nGitBro:"
-
-    response = llm.invoke(conversation)
-    # Extract content from AIMessage object
-    return response.content if hasattr(response, 'content') else str(response)
+def render_agent_output(agent: str, update: dict):
+    """Show early agent results inside the status box while the pipeline is still running."""
+    if agent == "navigator" and update.get("navigator_map"):
+        nav = update["navigator_map"]
+        st.markdown(f"""**🗺️ Navigator**
+- **Architecture**: {nav.get('architecture_type', 'unknown')}
+- **Entry Points**: {', '.join(nav.get('entry_points', [])[:5]) or 'N/A'}
+- **Core Modules**: {', '.join(nav.get('core_modules', [])[:5]) or 'N/A'}
+- **Summary**: {nav.get('project_summary', 'N/A')}""")
+    elif agent == "context" and update.get("context_summary"):
+        st.markdown("**🔍 Code Analysis**")
+        st.text(update["context_summary"])
+
+
+def render_code_metrics(summary: dict):
+    """Show repo-level code metrics, per-module stats and the most complex files."""
+    cols = st.columns(4)
+    cols[0].metric("Lines of Code", f"{summary['code_loc']:,}", help=f"{summary['loc']:,} non-blank lines")
+    cols[1].metric("Comment Ratio", f"{summary['comment_ratio']:.0%}")
+    cols[2].metric("Complexity", f"{summary['complexity_score']:.2f}")
+    cols[3].metric("Max Nesting", summary["max_nesting"], help=f"90th percentile: {summary['nesting_p90']}")
+    cols = st.columns(4)
+    cols[0].metric("Files", f"{summary['files']:,}")
+    cols[1].metric("Cyclomatic (median)", summary["cyclomatic_median"], help=f"90th percentile: {summary['cyclomatic_p90']}")
+    cols[2].metric("Max Fan-in", summary["fan_in_max"])
+    cols[3].metric("Max Fan-out", summary["fan_out_max"], help=f"mean: {summary['fan_out_mean']}")
+
+    st.markdown("**Modules**")
+    st.dataframe(summary["modules"], use_container_width=True, hide_index=True)
+    st.markdown("**Most Complex Files**")
+    st.dataframe(summary["most_complex"], use_container_width=True, hide_index=True)
+
+
+def get_chat_response(context: str, index: CodeIndex, tools: RepoTools, chat_history: list, user_msg: str) -> str:
+    """
+    Answer a user question: the LLM gets the fixed header plus the chunks retrieved for it,
+    and may call tools (read_file, search, list_dir, symbol) to fetch more before answering.
+    """
+    with span("chat_turn", category="chat", history_messages=len(chat_history),
+              context_chars=len(context)) as s:
+        # Include the previous question so follow-ups ("and its tests?") still retrieve well
+        previous = [msg for role, msg in chat_history[:-1] if role == "user"][-1:]
+        with span("retrieve", category="chat") as r:
+            chunks = index.retrieve(" ".join(previous + [user_msg]), k=CHAT_TOP_K)
+            r.set_attributes({"chunks": len(chunks), "indexed_chunks": len(index)})
+        excerpts = "\n\n".join(chunk.render() for chunk in chunks) or "No matching excerpts."
+
+        system = context + "\n\n## Relevant Excerpts\n" + excerpts + "\n\n" + TOOLS_NOTE
+        messages = [{"role": "system", "content": system}]
+        for role, msg in chat_history[-7:-1]:  # Keep the last 6 earlier messages for context
+            messages.append({"role": role, "content": msg})
+        messages.append({"role": "user", "content": user_msg})
+        s.set_attribute("prompt_chars", sum(len(m["content"]) for m in messages))
+
+        llm = get_llm("chat").bind_tools(TOOL_SCHEMAS)
+        tool_calls = 0
+        for _ in range(MAX_TOOL_ROUNDS):
+            response = invoke_llm_messages(llm, messages, priority=PRIORITY_INTERACTIVE)
+            if not response.tool_calls:
+                s.set_attribute("tool_calls", tool_calls)
+                return response.content
+            messages.append(response)
+            for call in response.tool_calls:
+                with span("tool_call", category="chat", tool=call["name"]) as t:
+                    result = tools.run(call["name"], call["args"])
+                    t.set_attribute("result_chars", len(result))
+                messages.append({"role": "tool", "content": result, "tool_call_id": call["id"]})
+                tool_calls += 1
+
+        # Out of tool rounds: answer from what was gathered
+        s.set_attribute("tool_calls", tool_calls)
+        final = get_llm("chat").bind_tools(TOOL_SCHEMAS, tool_choice="none")
+        return invoke_llm_messages(final, messages, priority=PRIORITY_INTERACTIVE).content
+
+
+def search_response(index: SearchIndex, query: str) -> str:
+    """Answer a /search chat command: matching lines as a code block."""
+    if index is None:
+        return "No search index for this analysis."
+    pattern, regex = parse_query(query.strip())
+    try:
+        hits = index.search(pattern, regex=regex)
+    except re.error as e:
+        return f"Invalid regex: {e}"
+    return f"```\n{format_hits(hits)}\n```"
 
 
 # --- Initialize session state ---
@@ -369,6 +379,10 @@ if "repo_url" not in st.session_state:
     st.session_state.repo_url = ""
 if "context" not in st.session_state:
     st.session_state.context = ""
+if "index" not in st.session_state:
+    st.session_state.index = CodeIndex([])
+if "tools" not in st.session_state:
+    st.session_state.tools = RepoTools({}, [], {})
 
 # --- Sidebar ---
 with st.sidebar:
@@ -392,6 +406,11 @@ with st.sidebar:
         label_visibility="collapsed"
     )
 
+    use_cache = st.checkbox("Reuse cached LLM responses", value=True,
+                            help="Uncheck to force fresh LLM calls for this analysis")
+    history = st.checkbox("Analyze full git history", value=False,
+                          help="Churn hotspots and top authors from a local mirror (slow the first time)")
+
     analyze_btn = st.button("🚀 Analyze Repository", type="primary", use_container_width=True)
     
     # Help section
@@ -422,12 +441,22 @@ if analyze_btn and repo_url:
             st.write("⚙️ Initializing GitHub client...")
             github_client = GitHubClient()
 
-            st.write("📥 Fetching repository data...")
-            st.write("🤖 Running 5 AI agents...")
-            final_state = run_analysis(repo_url, github_client)
+            final_state = None
+            for event in stream_analysis(repo_url, github_client, use_cache=use_cache, history=history):
+                if isinstance(event, StageStarted):
+                    status.update(label=f"🔍 {event.description}")
+                elif isinstance(event, StageFinished):
+                    detail = f" - {event.summary}" if event.summary else ""
+                    st.write(f"✔️ {event.stage} ({event.elapsed:.1f}s){detail}")
+                elif isinstance(event, AgentOutput):
+                    render_agent_output(event.agent, event.update)
+                elif isinstance(event, AnalysisComplete):
+                    final_state = event.state
 
             st.session_state.analysis = final_state
             st.session_state.context = build_context(final_state)
+            st.session_state.index = build_chat_index(final_state)
+            st.session_state.tools = build_repo_tools(final_state)
 
             status.update(label="✅ Analysis complete!", state="complete")
             st.balloons()
@@ -551,9 +580,15 @@ I've analyzed **{meta.get('full_name')}** and here's what I discovered:
 - "What design patterns are used?"
 - "What are the recent commits?"
 - "List all the dependencies"
+- `/search get_user` or `/search /def \\w+_user/` to find code by substring or regex
 """
         st.session_state.chat_history.append(("assistant", welcome))
 
+    code_metrics = st.session_state.analysis.get("code_metrics")
+    if code_metrics is not None and len(code_metrics):
+        with st.expander("📏 Code Metrics", expanded=False):
+            render_code_metrics(code_metrics.summary())
+
     # Render chat history
     for role, msg in st.session_state.chat_history:
         with st.chat_message(role):
@@ -571,12 +606,18 @@ I've analyzed **{meta.get('full_name')}** and here's what I discovered:
 
         # Generate response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = get_chat_response(
-                    st.session_state.context,
-                    st.session_state.chat_history,
-                    user_input,
-                )
+            if user_input.startswith(SEARCH_COMMAND):
+                response = search_response(st.session_state.analysis.get("search_index"),
+                                           user_input[len(SEARCH_COMMAND):])
+            else:
+                with st.spinner("Thinking..."):
+                    response = get_chat_response(
+                        st.session_state.context,
+                        st.session_state.index,
+                        st.session_state.tools,
+                        st.session_state.chat_history,
+                        user_input,
+                    )
 
             render_message_with_mermaid(response)
             st.session_state.chat_history.append(("assistant", response))
@@ -3,10 +3,16 @@
 GitBro - A multi-agent system for analyzing GitHub repositories
 and generating onboarding guides.
 """
+import argparse
+import re
 import sys
 import time
 from src.github_client import GitHubClient
-from src.graph import run_analysis
+from src.graph import stream_analysis
+from src.analysis.search_index import SearchIndex, format_hits, index_path, parse_query
+from src.events import StageStarted, StageFinished, AgentOutput, AnalysisComplete
+from src.metrics import format_metrics_table, export_metrics_json
+from src.tracing import configure_tracing
 
 
 def print_repo_info(metadata: dict):
@@ -25,32 +31,63 @@ def print_repo_info(metadata: dict):
     print("-" * 80)
 
 
-def print_agent_outputs(state: dict):
-    """Display analysis results from all agents."""
-    if state.get("navigator_map"):
-        nav = state["navigator_map"]
-        print("\n[NAVIGATOR]")
-        print(f"  Entry Points: {', '.join(nav.get('entry_points', [])[:5])}")
-        print(f"  Core Modules: {', '.join(nav.get('core_modules', [])[:5])}")
-        print(f"  Architecture: {nav.get('architecture_type', 'unknown')}")
-        print(f"  Confidence: {nav.get('confidence_score', 0):.0%}")
+def print_navigator(nav: dict):
+    """Display the navigator map."""
+    print("\n[NAVIGATOR]")
+    print(f"  Entry Points: {', '.join(nav.get('entry_points', [])[:5])}")
+    print(f"  Core Modules: {', '.join(nav.get('core_modules', [])[:5])}")
+    print(f"  Architecture: {nav.get('architecture_type', 'unknown')}")
+    print(f"  Confidence: {nav.get('confidence_score', 0):.0%}")
 
-    if state.get("context_summary"):
-        print("\n[CONTEXT AGENT]")
-        print(state["context_summary"])
 
-    if state.get("mentor_guide"):
-        print("\n[MENTOR AGENT]")
-        print(state["mentor_guide"])
+def print_visualization(vis: str, diagrams: dict = None):
+    """Display the diagram: the ASCII rendering when there is one, else the start of the Mermaid source."""
+    print("\n[VISUALIZER]")
+    if diagrams and diagrams.get("ascii"):
+        print(diagrams["ascii"])
+        return
+    print("Mermaid diagram generated:")
+    if len(vis) > 200:
+        print(vis[:200] + "...")
+    else:
+        print(vis)
+
+
+def print_git_history(history: dict):
+    """Display churn hotspots and top authors from the git history."""
+    if not history:
+        return
+    print(f"\nGit History: {history['commits']} commits by {history['authors']} authors")
+    if history["hotspots"]:
+        print("  Hotspots (frequently changed, complex files):")
+        for h in history["hotspots"][:5]:
+            print(f"    {h['path']} - {h['commits']} commits, {h['authors']} authors, mostly {h['owner']}")
+    if history["top_authors"]:
+        print("  Top authors: " + ", ".join(f"{a['name']} ({a['commits']})" for a in history["top_authors"][:5]))
+
+
+def print_search(index: SearchIndex, query: str, ignore_case: bool):
+    """Display the lines matching a --search query."""
+    pattern, regex = parse_query(query)
+    print(f"\nSearch results for {query}:")
+    try:
+        print(format_hits(index.search(pattern, regex=regex, ignore_case=ignore_case)))
+    except re.error as e:
+        print(f"Invalid regex: {e}")
+
 
-    if state.get("visualization"):
-        print("\n[VISUALIZER]")
-        print("Mermaid diagram generated:")
-        vis = state["visualization"]
-        if len(vis) > 200:
-            print(vis[:200] + "...")
-        else:
-            print(vis)
+def print_agent_output(agent: str, update: dict):
+    """Display one agent's output as soon as it is produced."""
+    if agent == "navigator" and update.get("navigator_map"):
+        print_navigator(update["navigator_map"])
+    elif agent == "context" and update.get("context_summary"):
+        print("\n[CONTEXT AGENT]")
+        print(update["context_summary"])
+    elif agent == "mentor" and update.get("mentor_guide"):
+        print("\n[MENTOR AGENT]")
+        print(update["mentor_guide"])
+    elif agent == "visualizer" and update.get("visualization"):
+        print_visualization(update["visualization"], update.get("diagrams"))
 
 
 def print_final_report(report: str):
@@ -71,17 +108,45 @@ def print_agent_log(messages: list):
         print(f"  {i}. {msg}")
 
 
+def print_metrics(metrics: list):
+    """Display per-stage and per-LLM-call metrics."""
+    if not metrics:
+        return
+    print("\nStage Metrics:")
+    print(format_metrics_table(metrics))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="GitBro - Repository Analysis",
+        epilog="Example: python main.py https://github.com/tiangolo/fastapi",
+    )
+    parser.add_argument("repo_url", help="GitHub repository URL")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="write per-stage/LLM-call metrics to a JSON file")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="end-to-end time limit; slow stages fall back instead of hanging")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="export pipeline spans to a Chrome trace file (open in ui.perfetto.dev)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="call the LLM even when an identical prompt is in the response cache")
+    parser.add_argument("--history", action="store_true",
+                        help="analyze the full git history (churn, hotspots, authors) from a cached local mirror")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="search the repo's source for a substring, or a regex written as /.../; "
+                             "uses the index saved by an earlier analysis when there is one")
+    parser.add_argument("--ignore-case", action="store_true", help="make --search case-insensitive")
+    return parser.parse_args()
+
+
 def main():
     print("\n" + "=" * 80)
     print("GitBro - Repository Analysis")
 
-    if len(sys.argv) < 2:
-        print("Error: Missing GitHub repository URL")
-        print("\nUsage: python main.py <github_repo_url>")
-        print("Example: python main.py https://github.com/tiangolo/fastapi")
-        sys.exit(1)
-
-    repo_url = sys.argv[1]
+    args = parse_args()
+    repo_url = args.repo_url
+    if args.trace:
+        configure_tracing(args.trace)
     print(f"Analyzing: {repo_url}\n")
 
     try:
@@ -90,21 +155,41 @@ def main():
         print(f"Error: Failed to initialize GitHub client: {e}")
         sys.exit(1)
 
+    if args.search:
+        saved = SearchIndex.load(index_path(*github_client.parse_repo_url(repo_url)))
+        if saved is not None:
+            print_search(saved, args.search, args.ignore_case)
+            return
+
     start_time = time.time()
 
     try:
         print("Running multi-agent analysis...")
-        final_state = run_analysis(repo_url, github_client)
+        final_state = None
+        for event in stream_analysis(repo_url, github_client, args.deadline, use_cache=not args.no_cache,
+                                     history=args.history):
+            if isinstance(event, StageStarted):
+                print(event.description)
+            elif isinstance(event, StageFinished) and event.summary:
+                print(f"  {event.stage}: {event.summary} ({event.elapsed:.1f}s)")
+            elif isinstance(event, AgentOutput):
+                print_agent_output(event.agent, event.update)
+            elif isinstance(event, AnalysisComplete):
+                final_state = event.state
 
         elapsed_time = time.time() - start_time
         print(f"\nAnalysis complete in {elapsed_time:.1f}s")
 
         print_repo_info(final_state["metadata"])
-        print_agent_outputs(final_state)
 
         if final_state.get("final_report"):
             print_final_report(final_state["final_report"])
 
+        print_git_history(final_state.get("git_history"))
+
+        if args.search:
+            print_search(final_state["search_index"], args.search, args.ignore_case)
+
         print_agent_log(final_state.get("messages", []))
 
         if final_state.get("errors"):
@@ -112,6 +197,11 @@ def main():
             for error in final_state["errors"]:
                 print(f"  - {error}")
 
+        print_metrics(final_state.get("metrics", []))
+        if args.metrics_json:
+            export_metrics_json(final_state.get("metrics", []), args.metrics_json)
+            print(f"\nMetrics written to {args.metrics_json}")
+
         print(f"\nExecution time: {elapsed_time:.1f}s")
         print(f"Agents executed: {len(final_state.get('messages', []))}")
 
@@ -1,77 +1,507 @@
 """Context Agent - Analyzes source code and extracts key components."""
-from typing import Dict
-from langchain_openai import ChatOpenAI
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from src.aio import run_sync
 from src.state import AgentState
+from src.llm import LLM_CACHE_ENABLED, LLM_CONFIG, get_llm, ainvoke_llm
+from src.analysis.endpoints import is_scanned
+from src.analysis.ranking import rank_files
+from src.analysis.skeleton import skeletonize
+from src.analysis.symbols import count_symbols
+from src.cache import CACHE_DIR, SQLiteCache
+from src.tokens import PackResult, estimate_tokens, fit_text, pack
+from src.tracing import span
 from src.utils import extract_json
-import os
 
-# Set OpenAI configuration
-os.environ["OPENAI_API_KEY"] = "eyJhbGciOiJSUzI1NiIsInR5cCIgOiAiSldUIiwia2lkIiA6ICJhZXNKN2kxNGNidnVuTU40MTJrOU5yZ2ROeENhTlJudTNPbC1TU08ycFlJIn0.eyJleHAiOjE3NzA0NDI4MTIsImlhdCI6MTc3MDQ0MTAxMiwiYXV0aF90aW1lIjoxNzcwNDQxMDExLCJqdGkiOiJmZjUxMTdhNC04NGE2LTRjMjktYjk0OC0wMTg3NzY2MWZkODciLCJpc3MiOiJodHRwczovL2F1dGgubWNraW5zZXkuaWQvYXV0aC9yZWFsbXMvciIsImF1ZCI6ImJjZDIzNzI4LTNkMjctNDQ3Yy1hMGE5LWVhY2FmMzkzYTZmNSIsInN1YiI6IjZhZjEyNDMxLWUzYWMtNGM3Mi1hYjZhLTY5ZjI4ODlmYzZmYSIsInR5cCI6IklEIiwiYXpwIjoiYmNkMjM3MjgtM2QyNy00NDdjLWEwYTktZWFjYWYzOTNhNmY1Iiwic2Vzc2lvbl9zdGF0ZSI6ImRiNzUwODQ5LWJlMmUtNDk4NC04NmZkLWMyOGY3MThjZWFhZiIsImF0X2hhc2giOiIzMlVsT3dMMm8wUlNvUmVtX3gzUDlRIiwibmFtZSI6IlJpY2hhcmQgQ291cGVydGh3YWl0ZSIsImdpdmVuX25hbWUiOiJSaWNoYXJkIiwiZmFtaWx5X25hbWUiOiJDb3VwZXJ0aHdhaXRlIiwicHJlZmVycmVkX3VzZXJuYW1lIjoiYjJiZWVkNDk3YjdkYzRmZiIsImVtYWlsIjoiUmljaGFyZF9Db3VwZXJ0aHdhaXRlQG1ja2luc2V5LmNvbSIsImFjciI6IjEiLCJzaWQiOiJkYjc1MDg0OS1iZTJlLTQ5ODQtODZmZC1jMjhmNzE4Y2VhYWYiLCJlbWFpbF92ZXJpZmllZCI6dHJ1ZSwiZm1ubyI6IjMxNjczNyIsImdyb3VwcyI6WyIyOTA3ZmExYy02ODNmLTRjZjctODU1NS04YzM0YTE2Yzg4ZDgiLCJBbGwgRmlybSBVc2VycyIsIjAzYjE1YTM0LTY1NWUtNGVjNC04MzRhLWI5ZGRhMTk3MjBmMCJdfQ.ZSSU7ZL8l5o3KFoU0fhBtwapRddVm5Nz9o1mnIBj_3XYifi77shBUsRVm2cVEL3uxLTwYpybBSet2Q64O4NZJYOlfjjlukZHUeiot79mL3iTDyprzns34ldBnWtIbUZD4S-VF7FCPbgsRmQIlPlm8BCR9UQhjgQ3Lt_fCOuyfQli5-RZU6ypESIzFsZ-X3ROKFzzmym1fif0paxcyfZiZx8gFrI_Py0fxa1pznuiSNGzJRcnSmuKQIARn0AfJGvm9VB07e5btuslRx4w1sexSy9vbJayPezt0EL3_-RDDsAUZ7u3Q3PjgVlcRfv0INgPpQjBncmSFvjsB-IPxkep8g"
-os.environ["OPENAI_BASE_URL"] = "https://openai.prod.ai-gateway.quantumblack.com/2907fa1c-683f-4cf7-8555-8c34a16c88d8/v1"
+# Share of the prompt budget config/dependency files may use; source code gets the rest
+CONFIG_BUDGET_SHARE = 0.15
+# No single source file may take more than this share of the code budget
+MAX_FILE_SHARE = 0.2
+# Estimated tokens for each "=== path ===" header
+FILE_HEADER_TOKENS = 16
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.1,
-)
+# Statically indexed functions/classes without a docstring the LLM is asked to describe
+MAX_ANNOTATED_SYMBOLS = 60
 
+# Map-reduce mode: used when the ranked skeletons don't all fit one prompt.
+# Every uncached file is summarized; shards are analyzed concurrently with at most
+# MAP_CONCURRENCY calls in flight.
+MAP_CONCURRENCY = int(os.getenv("GITBRO_MAP_CONCURRENCY", "4"))
+# Cap on merged key_functions/key_classes after the reduce step
+MAX_MERGED_ITEMS = 20
 
-def _select_priority_files(code_samples: Dict[str, str], navigator_map: Dict, max_files: int = 50) -> Dict[str, str]:
-    """Pick the most important files for the LLM prompt, guided by navigator output."""
-    entry_points = set(navigator_map.get("entry_points", []))
-    core_modules = navigator_map.get("core_modules", [])
+# Per-file summaries from map-reduce mode are cached by content hash, shared across
+# repos. Bump SUMMARY_PROMPT_VERSION when the summary prompt or skeleton format changes.
+SUMMARY_PROMPT_VERSION = 1
+SUMMARY_FIELDS = ("key_functions", "key_classes", "technologies", "patterns",
+                  "complexity_score", "api_endpoints", "data_models")
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("GITBRO_SUMMARY_CACHE_MB", "100")) * 1024 * 1024
 
-    priority = {}
-    rest = {}
+_summaries: Optional[SQLiteCache] = None
+_summaries_lock = threading.Lock()
 
-    for path, content in code_samples.items():
-        # Entry points go first
-        if path in entry_points:
-            priority[path] = content
-        # Files inside core module directories
-        elif any(path.startswith(m.rstrip("/")) for m in core_modules):
-            priority[path] = content
-        else:
-            rest[path] = content
 
-    # Take all priority files (up to max), then fill remaining slots
-    selected = dict(list(priority.items())[:max_files])
-    remaining = max_files - len(selected)
-    if remaining > 0:
-        selected.update(dict(list(rest.items())[:remaining]))
+def _rank_files(state: AgentState) -> List[str]:
+    """Order source files most important first for the LLM prompt (see src/analysis/ranking.py)."""
+    navigator_map = state.get("navigator_map") or {}
+    return rank_files(state["code_samples"], state.get("import_graph"),
+                      navigator_map.get("entry_points", []), navigator_map.get("core_modules", []),
+                      state.get("file_churn"))
 
-    return selected
 
-
-def context_agent(state: AgentState) -> Dict:
+def _build_prompt(state: AgentState, skeletons: Dict[str, str], order: List[str]) -> Tuple[str, Dict]:
     """
-    CONTEXT/CODE AGENT: Analyzes actual source code in depth.
-    Reads code_samples, config_files, and navigator_map from state.
-    Selects the most important files to fit in the LLM prompt.
-    Returns context_output (structured) and context_summary (human-readable).
+    Build the code analysis prompt from state, packing source files (in order, most
+    important first) and config files into the context agent's token budget.
+    Returns (prompt, budget report).
     """
     code_samples = state["code_samples"]
     config_files = state.get("config_files", {})
-    navigator_map = state.get("navigator_map", {})
-
-    # Select top files guided by navigator output
-    selected = _select_priority_files(code_samples, navigator_map, max_files=25)
+    navigator_map = state.get("navigator_map") or {}
+    total_files = len(code_samples)
+    budget = LLM_CONFIG["context"]["prompt_budget"]
 
-    code_section = ""
-    for filename, content in selected.items():
-        code_section += f"\n=== {filename} ===\n{content[:2000]}\n"
+    symbols_section, annotated = _symbols_section(state, order)
+    indexed_exts = _indexed_extensions(state)
+    static_api = state.get("api_endpoints") is not None
+    available = budget - estimate_tokens(_render_prompt(navigator_map, "", "", 0, total_files,
+                                                        symbols_section, indexed_exts, static_api))
+    configs = pack(config_files.items(), int(available * CONFIG_BUDGET_SHARE), unit="line",
+                   overhead_tokens=FILE_HEADER_TOKENS)
+    code_budget = available - configs.used_tokens
+    max_file_tokens = int(code_budget * MAX_FILE_SHARE)
+    # Files go in as skeletons (bodies elided) so many more fit; leftover budget restores full text
+    ranked = ((path, skeletons[path]) for path in order)
+    code = pack(ranked, code_budget, max_item_tokens=max_file_tokens, overhead_tokens=FILE_HEADER_TOKENS)
+    files_full = _restore_full_text(code, code_samples, code_budget, max_file_tokens)
 
-    files_included = len(selected)
-    total_files = len(code_samples)
+    code_section = _code_section(code.sections)
 
     # Include config files so the LLM can see actual dependencies
     config_section = ""
-    if config_files:
+    if configs.sections:
         config_section = "\n\nCONFIG & DEPENDENCY FILES:\n"
-        for fname, content in config_files.items():
-            config_section += f"\n--- {fname} ---\n{content[:1000]}\n"
+        for fname, content in configs.sections:
+            config_section += f"\n--- {fname} ---\n{content}\n"
+
+    prompt = _render_prompt(navigator_map, code_section, config_section, code.included, total_files,
+                            symbols_section, indexed_exts, static_api)
+    report = {
+        "budget_tokens": budget,
+        "used_tokens": estimate_tokens(prompt),
+        "files_included": code.included,
+        "files_full": files_full,
+        "files_truncated": len(code.truncated),
+        "files_skipped": total_files - code.included,
+        "symbols_annotated": annotated,
+    }
+    return prompt, report
+
+
+def _restore_full_text(code: PackResult, code_samples: Dict[str, str], code_budget: int,
+                       max_file_tokens: int) -> int:
+    """
+    Swap packed skeletons back to full file text, most important first, while the
+    leftover budget allows. Returns how many files are shown in full.
+    """
+    leftover = code_budget - code.used_tokens
+    files_full = 0
+    for i, (path, text) in enumerate(code.sections):
+        full = code_samples[path]
+        full_tokens = estimate_tokens(full)
+        extra = full_tokens - estimate_tokens(text)
+        if full_tokens <= max_file_tokens and extra <= leftover:
+            code.sections[i] = (path, full)
+            code.used_tokens += extra
+            leftover -= extra
+            files_full += 1
+    return files_full
+
+
+def _code_section(sections: List[Tuple[str, str]]) -> str:
+    return "".join(f"\n=== {filename} ===\n{content}\n" for filename, content in sections)
+
+
+def _indexed_extensions(state: AgentState) -> List[str]:
+    return sorted({os.path.splitext(path)[1] for path in state.get("symbol_table") or {}})
+
+
+def _symbols_section(state: AgentState, order: List[str]) -> Tuple[str, int]:
+    """
+    Prompt section listing statically indexed public functions/classes that have no
+    docstring, most important files first, for the LLM to describe.
+    Returns (section, number of symbols listed).
+    """
+    table = state.get("symbol_table") or {}
+    lines = []
+    for path in order:
+        symbols = table.get(path)
+        if not symbols:
+            continue
+        for kind, items in (("function", symbols["functions"]), ("class", symbols["classes"])):
+            for item in items:
+                if not item["doc"] and not item["name"].startswith("_"):
+                    lines.append(f"- {path}:{item['name']} ({kind}, line {item['line']})")
+    lines = lines[:MAX_ANNOTATED_SYMBOLS]
+    if not lines:
+        return "", 0
+    return "\n\nINDEXED SYMBOLS WITHOUT DOCSTRINGS:\n" + "\n".join(lines), len(lines)
+
+
+def _purposes(items: List) -> Dict[str, str]:
+    """LLM-written purposes of key_functions/key_classes items, by "file:name"."""
+    return {f"{item['file']}:{item['name']}": str(item["purpose"]) for item in items
+            if isinstance(item, dict) and item.get("file") and item.get("name") and item.get("purpose")}
+
+
+def _apply_symbols(state: AgentState, result: Dict, purposes: Dict[str, str], order: List[str]) -> Dict:
+    """
+    Fill key_functions/key_classes from the static symbol table: every public
+    top-level function and class of an indexed file, in file rank order, with
+    the LLM's purpose (or the docstring's first line). Files that are not indexed
+    keep what the LLM extracted for them.
+    """
+    table = state.get("symbol_table") or {}
+    if not table:
+        return result
+
+    def merged(field: str, kind: str) -> List[Dict]:
+        by_file = defaultdict(list)
+        for item in result.get(field) or []:
+            if isinstance(item, dict) and item.get("file") not in table:
+                by_file[item.get("file")].append(item)
+        items = []
+        for path in order:
+            if path not in table:
+                items.extend(by_file.pop(path, []))
+                continue
+            for symbol in table[path][kind]:
+                if symbol["name"].startswith("_"):
+                    continue
+                item = {"name": symbol["name"], "file": path, "line": symbol["line"],
+                        "purpose": purposes.get(f"{path}:{symbol['name']}") or symbol["doc"]}
+                if kind == "functions":
+                    item["params"] = symbol["params"]
+                else:
+                    item["methods"] = [m for m in symbol["methods"] if not m.startswith("_")]
+                items.append(item)
+        # Items whose file the LLM got wrong or left out go last
+        return items + [item for rest in by_file.values() for item in rest]
+
+    result = dict(result)
+    result["key_functions"] = merged("key_functions", "functions")
+    result["key_classes"] = merged("key_classes", "classes")
+    return result
+
+
+def _apply_api(state: AgentState, result: Dict) -> Dict:
+    """
+    Replace api_endpoints/data_models with the static extraction over all files
+    (state["api_endpoints"], state["data_models"]). An endpoint's purpose is its
+    handler's docstring, else the LLM's for the same method and path; files of
+    languages the extractor doesn't scan keep what the LLM found in them.
+    """
+    if state.get("api_endpoints") is None and state.get("data_models") is None:
+        return result
+    table = state.get("symbol_table") or {}
+
+    def unscanned(field: str) -> List[Dict]:
+        return [item for item in result.get(field) or []
+                if isinstance(item, dict) and not is_scanned(str(item.get("file", "")))]
+
+    llm_purposes = {(str(item.get("method", "")).upper(), item.get("path")): item.get("purpose")
+                    for item in result.get("api_endpoints") or [] if isinstance(item, dict) and item.get("purpose")}
+    docs = {(path, f["name"]): f["doc"] for path, symbols in table.items() for f in symbols["functions"] if f["doc"]}
+    endpoints = [{**e, "purpose": docs.get((e["file"], e["handler"])) or llm_purposes.get((e["method"], e["path"]), "")}
+                 for e in state.get("api_endpoints") or []]
+
+    result = dict(result)
+    result["api_endpoints"] = endpoints + unscanned("api_endpoints")
+    result["data_models"] = list(state.get("data_models") or []) + unscanned("data_models")
+    return result
+
+
+def _apply_metrics(state: AgentState, result: Dict) -> Dict:
+    """Replace the LLM's complexity_score guess with the one computed from code metrics."""
+    metrics = state.get("code_metrics")
+    if metrics is None or not len(metrics):
+        return result
+    return {**result, "complexity_score": metrics.complexity_score()}
+
+
+def _apply_static(state: AgentState, result: Dict, purposes: Dict[str, str], order: List[str]) -> Dict:
+    """Overlay everything static analysis knows (symbols, API, metrics) on the LLM's result."""
+    return _apply_metrics(state, _apply_api(state, _apply_symbols(state, result, purposes, order)))
+
+
+def _summary_cache() -> Optional[SQLiteCache]:
+    """Per-file summary cache shared by all repos, or None when LLM caching is disabled."""
+    global _summaries
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _summaries_lock:
+        if _summaries is None:
+            try:
+                _summaries = SQLiteCache(os.path.join(CACHE_DIR, "file_summaries.sqlite"), "file_summaries",
+                                         max_bytes=SUMMARY_CACHE_MAX_BYTES)
+            except (OSError, sqlite3.Error):
+                return None  # an unusable cache dir only costs the reuse of summaries
+    return _summaries
+
+
+def _cached_summary(cache: Optional[SQLiteCache], key: str) -> Optional[Dict]:
+    """A file summary from the cache; a locked or corrupt cache counts as a miss."""
+    if cache is None:
+        return None
+    try:
+        hit = cache.get(key)
+        return json.loads(hit) if hit is not None else None
+    except (sqlite3.Error, ValueError):
+        return None
+
+
+def _summary_key(content: str) -> str:
+    """Cache key for a file summary: prompt version, model and a hash of the file content."""
+    digest = hashlib.sha256(f"{SUMMARY_PROMPT_VERSION}\0{LLM_CONFIG['context']['model']}\0".encode("utf-8"))
+    digest.update(content.encode("utf-8", "replace"))
+    return digest.hexdigest()
+
+
+@dataclass
+class _MapPlan:
+    """Work for map-reduce mode."""
+
+    files: List[Tuple[str, str, int]]  # (path, summary cache key, tokens sent) in rank order
+    cached: Dict[str, Dict]  # path -> summary found in the cache
+    shards: List[List[Tuple[str, str]]]  # (path, text) of the files still to summarize
+    prompts: List[str]
+
+
+def _plan_map_reduce(state: AgentState, skeletons: Dict[str, str], order: List[str]) -> Tuple[_MapPlan, Dict]:
+    """
+    Rank config and source files, take per-file summaries from the cache where the
+    content is unchanged, and split the rest into shards that fit the per-call budget.
+    Returns (plan, budget report).
+    """
+    code_samples = state["code_samples"]
+    budget = LLM_CONFIG["context"]["prompt_budget"]
+    shard_budget = budget - estimate_tokens(_render_shard_prompt("", 0))
+    max_file_tokens = int(shard_budget * MAX_FILE_SHARE)
+    cache = _summary_cache() if state.get("use_llm_cache", True) else None
+
+    # Config files first: they are small and carry most of the technology stack
+    ranked = [(path, content, content) for path, content in (state.get("config_files") or {}).items()]
+    ranked += [(path, code_samples[path], skeletons[path]) for path in order]
+
+    plan = _MapPlan([], {}, [[]], [])
+    used = 0
+    truncated = 0
+    for path, content, text in ranked:
+        key = _summary_key(content)
+        hit = _cached_summary(cache, key)
+        if hit is not None:
+            plan.cached[path] = hit
+            plan.files.append((path, key, estimate_tokens(text)))
+            continue
 
-    prompt = f"""You are a code analysis system. Analyze the provided source code thoroughly and return valid JSON only.
+        cost = estimate_tokens(text)
+        if cost > max_file_tokens:
+            text = fit_text(text, max_file_tokens, unit="code" if path in code_samples else "line")
+            cost = estimate_tokens(text)
+            truncated += 1
+        if used + cost + FILE_HEADER_TOKENS > shard_budget and plan.shards[-1]:
+            plan.shards.append([])
+            used = 0
+        plan.shards[-1].append((path, text))
+        plan.files.append((path, key, cost))
+        used += cost + FILE_HEADER_TOKENS
+
+    plan.shards = [shard for shard in plan.shards if shard]
+    plan.prompts = [_render_shard_prompt(_code_section(shard), len(shard)) for shard in plan.shards]
+    report = {
+        "budget_tokens": budget,
+        "used_tokens": sum(estimate_tokens(p) for p in plan.prompts),
+        "files_included": sum(1 for path, _, _ in plan.files if path in code_samples),
+        "files_full": 0,
+        "files_cached": len(plan.cached),
+        "files_truncated": truncated,
+        "files_skipped": len(code_samples) - sum(1 for path, _, _ in plan.files if path in code_samples),
+        "shards": len(plan.shards),
+    }
+    return plan, report
+
+
+def _file_result(path: str, summary: Dict) -> Dict:
+    """A per-file summary as an analysis result, with the file path filled into its items."""
+    result = {"files_analyzed": 1}
+    for field in SUMMARY_FIELDS:
+        value = summary.get(field)
+        if isinstance(value, list):
+            value = [dict(item, file=path) if isinstance(item, dict) else item for item in value]
+        result[field] = value
+    return result
+
+
+def _dedupe(items: List[Dict], key_fields: Tuple[str, ...], limit: Optional[int] = None) -> List[Dict]:
+    """Keep the first occurrence of each item by key_fields (earlier files rank higher)."""
+    seen = set()
+    merged = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        key = tuple(str(item.get(f, "")).lower() for f in key_fields)
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(item)
+    return merged[:limit] if limit else merged
+
+
+def _merge_results(results: List[Dict], weights: List[int]) -> Dict:
+    """
+    Merge per-file analyses. Lists are concatenated in rank order and
+    de-duplicated; technologies/patterns are ordered by how many files report
+    them; complexity is the token-weighted mean.
+    """
+    def ranked_union(field: str) -> List[str]:
+        counts: Dict[str, int] = {}
+        names: Dict[str, str] = {}
+        for result in results:
+            for value in result.get(field, []) or []:
+                key = str(value).strip().lower()
+                counts[key] = counts.get(key, 0) + 1
+                names.setdefault(key, str(value).strip())
+        return [names[k] for k in sorted(counts, key=lambda k: -counts[k])]
+
+    def concat(field: str) -> List[Dict]:
+        return [item for result in results for item in (result.get(field) or [])]
+
+    scores = [(float(r.get("complexity_score") or 0), w) for r, w in zip(results, weights)
+              if isinstance(r.get("complexity_score"), (int, float))]
+    total_weight = sum(w for _, w in scores)
+    return {
+        "files_analyzed": sum(int(r.get("files_analyzed") or 0) for r in results),
+        "key_functions": _dedupe(concat("key_functions"), ("name", "file"), MAX_MERGED_ITEMS),
+        "key_classes": _dedupe(concat("key_classes"), ("name", "file"), MAX_MERGED_ITEMS),
+        "technologies": ranked_union("technologies"),
+        "patterns": ranked_union("patterns"),
+        "complexity_score": round(sum(c * w for c, w in scores) / total_weight, 2) if total_weight else 0.5,
+        "api_endpoints": _dedupe(concat("api_endpoints"), ("method", "path")),
+        "data_models": _dedupe(concat("data_models"), ("name", "file")),
+    }
+
+
+def _reduce(state: AgentState, plan: _MapPlan, responses: List, budget: Dict, order: List[str]) -> Dict:
+    """
+    Reduce step: collect per-file summaries (cached and fresh, in rank order), store
+    the fresh ones in the summary cache and merge them. Failed shards are reported, not fatal;
+    their files are counted as skipped in the budget report.
+    """
+    summaries = dict(plan.cached)
+    errors = []
+    cache = _summary_cache()
+    keys = {path: key for path, key, _ in plan.files}
+    for i, (shard, response) in enumerate(zip(plan.shards, responses)):
+        try:
+            if isinstance(response, BaseException):
+                raise response
+            files = extract_json(response).get("files") or {}
+        except Exception as e:
+            errors.append(f"Context agent shard {i + 1}/{len(plan.shards)} failed: {e}")
+            continue
+        missing = 0
+        for path, _ in shard:
+            summary = files.get(path)
+            if not isinstance(summary, dict):
+                missing += 1
+                continue
+            summary = {field: summary.get(field) for field in SUMMARY_FIELDS if field in summary}
+            summaries[path] = summary
+            if cache is not None:
+                try:
+                    cache.set(keys[path], json.dumps(summary))
+                except sqlite3.Error:
+                    pass  # a full or locked cache must never fail the stage
+        if missing:
+            errors.append(f"Context agent shard {i + 1}/{len(plan.shards)}: no summary for {missing} files")
+
+    ordered = [(path, tokens) for path, _, tokens in plan.files if path in summaries]
+    if not ordered:
+        raise RuntimeError(errors[0] if errors else "no files to analyze")
+    analyzed = sum(1 for path, _ in ordered if path in state["code_samples"])
+    budget = {**budget, "files_included": analyzed, "files_skipped": len(state["code_samples"]) - analyzed}
+
+    with span("reduce", files=len(ordered), cached=len(plan.cached), failed=len(errors)):
+        results = [_file_result(path, summaries[path]) for path, _ in ordered]
+        merged = _merge_results(results, [tokens for _, tokens in ordered])
+        purposes = _purposes([item for r in results for f in ("key_functions", "key_classes")
+                              for item in r.get(f) or []])
+        update = _result_update(state, _apply_static(state, merged, purposes, order), budget)
+    if errors:
+        update["errors"] = errors
+    return update
+
+
+def _render_shard_prompt(code_section: str, files_included: int) -> str:
+    """
+    Fill the per-file summary prompt used in map-reduce mode. It carries no
+    repository context, so a file's summary depends only on its content and can
+    be reused across runs and repositories.
+    """
+    return f"""You are a code analysis system. Summarize EACH file below separately and return valid JSON only.
+
+FILES ({files_included}; large files are skeletons keeping imports, signatures, docstring first lines,
+fields and routes, with bodies elided as "..."):
+{code_section}
+
+Return valid JSON only (no markdown, no code blocks), with one entry per file keyed by its exact path:
+{{
+  "files": {{
+    "path/to/file.py": {{
+      "key_functions": [{{"name": "function_name", "purpose": "what it does", "params": ["param1"]}}],
+      "key_classes": [{{"name": "ClassName", "purpose": "what it represents", "methods": ["method1"]}}],
+      "technologies": ["frameworks/libraries imported or declared in this file"],
+      "patterns": ["design patterns visible in this file"],
+      "complexity_score": 0.5,
+      "api_endpoints": [{{"method": "GET", "path": "/api/users", "purpose": "List all users"}}],
+      "data_models": [{{"name": "User", "fields": ["id", "name", "email"]}}]
+    }}
+  }}
+}}
+
+RULES:
+- Extract ONLY what you can see in each file - do not invent or guess
+- Include up to 5 key functions and 5 key classes per file
+- Use empty lists for anything a file does not contain
+- complexity_score: 0.0 (trivial) to 1.0 (highly complex)
+"""
+
+
+def _render_prompt(navigator_map: Dict, code_section: str, config_section: str,
+                   files_included: int, total_files: int, symbols_section: str = "",
+                   indexed_exts: List[str] = (), static_api: bool = False) -> str:
+    """
+    Fill the code analysis prompt template. Functions and classes of files with
+    indexed_exts come from the static symbol table, so the LLM only describes the
+    ones in symbols_section; with static_api, so do endpoints and data models of
+    the languages src/analysis/endpoints.py scans.
+    """
+    index_rules = ""
+    if indexed_exts:
+        index_rules = (f"\n- Functions and classes of {', '.join(indexed_exts)} files are indexed statically: "
+                       f"do NOT list them in key_functions/key_classes"
+                       f"\n- \"purposes\": one line for each INDEXED SYMBOLS entry, keyed exactly as listed")
+    if static_api:
+        index_rules += ("\n- API endpoints and data models of Python, JavaScript/TypeScript, Java/Kotlin and Go "
+                        "files are extracted statically: only list those found in other files")
+    return f"""You are a code analysis system. Analyze the provided source code thoroughly and return valid JSON only.
 
 REPOSITORY CONTEXT:
 - Entry points: {navigator_map.get('entry_points', [])}
@@ -80,9 +510,10 @@ REPOSITORY CONTEXT:
 - Project summary: {navigator_map.get('project_summary', 'N/A')}
 - Total source files in repo: {total_files}
 
-SOURCE CODE ({files_included} most important files shown):
+SOURCE CODE ({files_included} most important files shown; files that don't fit in full are skeletons
+keeping imports, signatures, docstring first lines, fields and routes, with bodies elided as "..."):
 {code_section}
-{config_section}
+{config_section}{symbols_section}
 
 Analyze the code and extract:
 1. Key functions - important functions with their file, purpose, and parameters
@@ -110,24 +541,44 @@ Return valid JSON only (no markdown, no code blocks):
   ],
   "data_models": [
     {{"name": "User", "file": "models.py", "fields": ["id", "name", "email"]}}
-  ]
+  ],
+  "purposes": {{"path/to/file.py:function_name": "what it does"}}
 }}
 
 RULES:
 - Extract ONLY what you can see in the actual code above - do not invent or guess
-- Include up to 10 key functions and 10 key classes
+- Include up to 10 key functions and 10 key classes{index_rules}
 - Technologies must come from actual import statements or config files
 - If no API endpoints or data models exist, use empty lists
 - complexity_score: 0.0 (simple scripts) to 1.0 (highly complex system)
 """
 
-    try:
-        response = llm.invoke(prompt)
-        # Extract content from AIMessage object
-        response_text = response.content if hasattr(response, 'content') else str(response)
-        result = extract_json(response_text)
 
-        summary = f"""Analyzed {files_included} of {total_files} source files.
+def _parse_response(state: AgentState, response_text: str, budget: Dict, order: List[str]) -> Dict:
+    """Turn the LLM response into the context_output/context_summary state update."""
+    result = extract_json(response_text)
+    purposes = _purposes((result.get("key_functions") or []) + (result.get("key_classes") or []))
+    listed = result.pop("purposes", None)
+    if isinstance(listed, dict):
+        purposes.update((key, str(value)) for key, value in listed.items() if value)
+    return _result_update(state, _apply_static(state, result, purposes, order), budget)
+
+
+def _result_update(state: AgentState, result: Dict, budget: Dict) -> Dict:
+    """State update for a (single-shot or merged) analysis result."""
+    total_files = len(state["code_samples"])
+    files_included = budget["files_included"]
+    if "shards" in budget:
+        prompt_note = (f"{budget['shards']} shards, {budget['files_cached']} file summaries cached, "
+                       f"~{budget['used_tokens']:,} prompt tokens")
+    else:
+        prompt_note = f"prompt ~{budget['used_tokens']:,}/{budget['budget_tokens']:,} tokens"
+    indexed = sum(count_symbols(state.get("symbol_table") or {}))
+    if indexed:
+        prompt_note += f", {indexed} symbols indexed statically"
+
+    skipped_note = f" ({budget['files_skipped']} not analyzed)" if budget.get("files_skipped") else ""
+    summary = f"""Analyzed {files_included} of {total_files} source files{skipped_note}.
 Technologies: {', '.join(result.get('technologies', [])[:8])}
 Key Functions: {len(result.get('key_functions', []))}
 Key Classes: {len(result.get('key_classes', []))}
@@ -136,18 +587,79 @@ API Endpoints: {len(result.get('api_endpoints', []))}
 Data Models: {len(result.get('data_models', []))}
 Complexity: {result.get('complexity_score', 0):.1f}/1.0"""
 
-        return {
-            "context_output": result,
-            "context_summary": summary,
-            "messages": [f"CONTEXT: {files_included}/{total_files} files analyzed, "
-                         f"{len(result.get('technologies', []))} technologies, "
-                         f"{len(result.get('key_functions', []))} functions, "
-                         f"{len(result.get('key_classes', []))} classes"],
-        }
+    return {
+        "context_output": result,
+        "context_summary": summary,
+        "messages": [f"CONTEXT: {files_included}/{total_files} files analyzed, "
+                     f"{len(result.get('technologies', []))} technologies, "
+                     f"{len(result.get('key_functions', []))} functions, "
+                     f"{len(result.get('key_classes', []))} classes "
+                     f"({prompt_note}, {budget['files_truncated']} files shortened)"],
+    }
+
+
+def failure_update(e: Exception, state: Optional[AgentState] = None) -> Dict:
+    """Fallback state update when the context step fails."""
+    return {
+        "context_output": {},
+        "context_summary": "Error analyzing code",
+        "errors": [f"Context agent error: {e}"],
+        "messages": [f"CONTEXT: Failed - {e}"],
+    }
+
+
+def _plan(state: AgentState) -> Tuple[str, Dict, Optional[_MapPlan], List[str]]:
+    """
+    Prompt and budget report for one call when the ranked skeletons fit;
+    otherwise a map-reduce plan (the report then has "shards"). Also returns
+    the file ranking, computed once here and reused by the later steps.
+    """
+    with span("prompt_build") as s:
+        # Skeletons come from the pipeline's one pass over the sources; others are made here
+        known = state.get("skeletons") or {}
+        skeletons = {path: known[path] if path in known else skeletonize(path, content)
+                     for path, content in state["code_samples"].items()}
+        order = _rank_files(state)
+        prompt, budget = _build_prompt(state, skeletons, order)
+        plan = None
+        if budget["files_skipped"]:
+            plan, budget = _plan_map_reduce(state, skeletons, order)
+        s.set_attributes({"prompt_chars": sum(len(p) for p in plan.prompts) if plan else len(prompt), **budget})
+    return prompt, budget, plan, order
+
+
+def context_agent(state: AgentState) -> Dict:
+    """Sync wrapper over acontext_agent (runs on the shared background event loop)."""
+    return run_sync(acontext_agent(state))
+
+
+async def acontext_agent(state: AgentState) -> Dict:
+    """
+    CONTEXT/CODE AGENT: Analyzes actual source code in depth.
+    Reads code_samples, config_files, and navigator_map from state.
+    Packs the most important files into the agent's prompt token budget; when
+    they don't all fit, summarizes every file map-reduce style (reusing cached
+    per-file summaries) and merges the results.
+    Returns context_output (structured) and context_summary (human-readable).
+    """
+    use_cache = state.get("use_llm_cache", True)
+
+    try:
+        # Skeletons, packing, summary-cache lookups and the reduce step are CPU/SQLite work:
+        # they run in a worker thread so other analyses and chat on the shared loop keep going
+        prompt, budget, plan, order = await asyncio.to_thread(_plan, state)
+        llm = get_llm("context")
+        if plan is None:
+            response_text = await ainvoke_llm(llm, prompt, use_cache=use_cache)
+            return await asyncio.to_thread(_parse_response, state, response_text, budget, order)
+
+        semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+
+        async def analyze(shard_prompt: str) -> str:
+            async with semaphore:
+                return await ainvoke_llm(llm, shard_prompt, use_cache=use_cache)
+
+        responses = await asyncio.gather(*(analyze(p) for p in plan.prompts), return_exceptions=True)
+        return await asyncio.to_thread(_reduce, state, plan, responses, budget, order)
     except Exception as e:
-        return {
-            "context_output": {},
-            "context_summary": "Error analyzing code",
-            "errors": [f"Context agent error: {e}"],
-            "messages": [f"CONTEXT: Failed - {e}"],
-        }
+        return failure_update(e, state)
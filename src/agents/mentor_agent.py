@@ -1,29 +1,49 @@
 """Mentor Agent - Creates onboarding guide and learning path."""
-from typing import Dict
-from langchain_openai import ChatOpenAI
+from typing import Dict, Optional
+from src.analysis.ranking import rank_files
+from src.aio import run_sync
 from src.state import AgentState
+from src.llm import get_llm, ainvoke_llm
+from src.tracing import span
 from src.utils import extract_json
-import os
 
-# Set OpenAI configuration
-os.environ["OPENAI_API_KEY"] = "eyJhbGciOiJSUzI1NiIsInR5cCIgOiAiSldUIiwia2lkIiA6ICJhZXNKN2kxNGNidnVuTU40MTJrOU5yZ2ROeENhTlJudTNPbC1TU08ycFlJIn0.eyJleHAiOjE3NzA0NDI4MTIsImlhdCI6MTc3MDQ0MTAxMiwiYXV0aF90aW1lIjoxNzcwNDQxMDExLCJqdGkiOiJmZjUxMTdhNC04NGE2LTRjMjktYjk0OC0wMTg3NzY2MWZkODciLCJpc3MiOiJodHRwczovL2F1dGgubWNraW5zZXkuaWQvYXV0aC9yZWFsbXMvciIsImF1ZCI6ImJjZDIzNzI4LTNkMjctNDQ3Yy1hMGE5LWVhY2FmMzkzYTZmNSIsInN1YiI6IjZhZjEyNDMxLWUzYWMtNGM3Mi1hYjZhLTY5ZjI4ODlmYzZmYSIsInR5cCI6IklEIiwiYXpwIjoiYmNkMjM3MjgtM2QyNy00NDdjLWEwYTktZWFjYWYzOTNhNmY1Iiwic2Vzc2lvbl9zdGF0ZSI6ImRiNzUwODQ5LWJlMmUtNDk4NC04NmZkLWMyOGY3MThjZWFhZiIsImF0X2hhc2giOiIzMlVsT3dMMm8wUlNvUmVtX3gzUDlRIiwibmFtZSI6IlJpY2hhcmQgQ291cGVydGh3YWl0ZSIsImdpdmVuX25hbWUiOiJSaWNoYXJkIiwiZmFtaWx5X25hbWUiOiJDb3VwZXJ0aHdhaXRlIiwicHJlZmVycmVkX3VzZXJuYW1lIjoiYjJiZWVkNDk3YjdkYzRmZiIsImVtYWlsIjoiUmljaGFyZF9Db3VwZXJ0aHdhaXRlQG1ja2luc2V5LmNvbSIsImFjciI6IjEiLCJzaWQiOiJkYjc1MDg0OS1iZTJlLTQ5ODQtODZmZC1jMjhmNzE4Y2VhYWYiLCJlbWFpbF92ZXJpZmllZCI6dHJ1ZSwiZm1ubyI6IjMxNjczNyIsImdyb3VwcyI6WyIyOTA3ZmExYy02ODNmLTRjZjctODU1NS04YzM0YTE2Yzg4ZDgiLCJBbGwgRmlybSBVc2VycyIsIjAzYjE1YTM0LTY1NWUtNGVjNC04MzRhLWI5ZGRhMTk3MjBmMCJdfQ.ZSSU7ZL8l5o3KFoU0fhBtwapRddVm5Nz9o1mnIBj_3XYifi77shBUsRVm2cVEL3uxLTwYpybBSet2Q64O4NZJYOlfjjlukZHUeiot79mL3iTDyprzns34ldBnWtIbUZD4S-VF7FCPbgsRmQIlPlm8BCR9UQhjgQ3Lt_fCOuyfQli5-RZU6ypESIzFsZ-X3ROKFzzmym1fif0paxcyfZiZx8gFrI_Py0fxa1pznuiSNGzJRcnSmuKQIARn0AfJGvm9VB07e5btuslRx4w1sexSy9vbJayPezt0EL3_-RDDsAUZ7u3Q3PjgVlcRfv0INgPpQjBncmSFvjsB-IPxkep8g"
-os.environ["OPENAI_BASE_URL"] = "https://openai.prod.ai-gateway.quantumblack.com/2907fa1c-683f-4cf7-8555-8c34a16c88d8/v1"
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.1,
-)
-
-
-def mentor_agent(state: AgentState) -> Dict:
-    """
-    MENTOR: Creates onboarding guide and learning path.
-    Reads navigator_map and context_output from state.
-    """
+# Modules and top-ranked files whose metrics go into the prompt
+MAX_METRIC_MODULES = 8
+MAX_METRIC_FILES = 12
+
+
+def _metrics_section(state: AgentState) -> str:
+    """Size, complexity and first-read time of the main modules and files, to ground time estimates."""
+    metrics = state.get("code_metrics")
+    if metrics is None or not len(metrics):
+        return ""
+    navigator_map = state.get("navigator_map") or {}
+    summary = metrics.summary(top=0)
+    modules = "; ".join(f"{m['module']} {m['loc']} lines, complexity {m['complexity']}, ~{m['reading_hours']}h"
+                        for m in summary["modules"][:MAX_METRIC_MODULES])
+    ranked = rank_files(state["code_samples"], state.get("import_graph"), navigator_map.get("entry_points", []),
+                        navigator_map.get("core_modules", []), state.get("file_churn"))
+    files = ""
+    for path in ranked[:MAX_METRIC_FILES]:
+        f = metrics.file(path)
+        files += (f"  - {path}: {f['code_loc']} lines, cyclomatic {f['cyclomatic']}, nesting {f['nesting']}, "
+                  f"~{f['reading_minutes']} min\n")
+    return f"""
+CODE METRICS (measured):
+- Size: {summary['code_loc']} lines of code in {summary['files']} files, {summary['comment_ratio']:.0%} comments
+- Modules (size, complexity, reading time): {modules}
+- Key files (size, complexity, first-read time):
+{files}"""
+
+
+def _build_prompt(state: AgentState) -> str:
+    """Build the onboarding prompt from state."""
     navigator_map = state.get("navigator_map", {})
     context_output = state.get("context_output", {})
     metadata = state["metadata"]
+    import_graph = state.get("import_graph")
+    foundations = [f"{path} (imported by {n})" for path, n in import_graph.most_imported(8)] if import_graph else []
 
     prompt = f"""You are an engineering onboarding system. Create a learning path and return valid JSON only.
 
@@ -34,12 +54,13 @@ STRUCTURE:
 - Entry points: {navigator_map.get('entry_points', [])}
 - Core modules: {navigator_map.get('core_modules', [])}
 - Architecture: {navigator_map.get('architecture_type', 'unknown')}
+- Most imported files (foundations other code builds on): {foundations}
 
 CODE ANALYSIS:
 - Technologies: {context_output.get('technologies', [])}
 - Key patterns: {context_output.get('patterns', [])}
 - Complexity: {context_output.get('complexity_score', 0.5)}
-
+{_metrics_section(state)}
 Provide:
 1. Learning path (ordered steps with time estimates)
 2. Prerequisites (required knowledge)
@@ -58,39 +79,67 @@ Return valid JSON only (no markdown, no code blocks):
   "key_concepts": ["concept1", "concept2"]
 }}
 
-Base time estimates on actual code complexity. Use realistic estimates.
+Base time estimates on actual code complexity: start from the measured reading times of each step's
+files when they are listed, and make estimated_total_hours the sum of the steps. Use realistic estimates.
 """
 
-    try:
-        response = llm.invoke(prompt)
-        # Extract content from AIMessage object
-        response_text = response.content if hasattr(response, 'content') else str(response)
-        result = extract_json(response_text)
+    return prompt
+
 
-        # Create human-readable guide
-        guide = f"""ONBOARDING GUIDE - {metadata['full_name']}
+def _parse_response(state: AgentState, response_text: str) -> Dict:
+    """Turn the LLM response into the mentor_guide state update."""
+    metadata = state["metadata"]
+    result = extract_json(response_text)
+
+    # Create human-readable guide
+    guide = f"""ONBOARDING GUIDE - {metadata['full_name']}
 
 DIFFICULTY: {result['difficulty'].upper()}
 ESTIMATED TIME: {result['estimated_total_hours']} hours
 
 PREREQUISITES:
 """
-        for p in result["prerequisites"]:
-            guide += f"  - {p}\n"
+    for p in result["prerequisites"]:
+        guide += f"  - {p}\n"
+
+    guide += "\nLEARNING PATH:\n"
+    for step in result["learning_path"]:
+        guide += f"  {step['step']}. {step['file']} ({step['estimated_time']}) - {', '.join(step['concepts'])}\n"
 
-        guide += "\nLEARNING PATH:\n"
-        for step in result["learning_path"]:
-            guide += f"  {step['step']}. {step['file']} ({step['estimated_time']}) - {', '.join(step['concepts'])}\n"
+    guide += f"\nKEY CONCEPTS: {', '.join(result['key_concepts'])}"
 
-        guide += f"\nKEY CONCEPTS: {', '.join(result['key_concepts'])}"
+    return {
+        "mentor_guide": guide,
+        "messages": [f"MENTOR: {len(result['learning_path'])} steps, {result['estimated_total_hours']}h total"],
+    }
 
-        return {
-            "mentor_guide": guide,
-            "messages": [f"MENTOR: {len(result['learning_path'])} steps, {result['estimated_total_hours']}h total"],
-        }
+
+def failure_update(e: Exception, state: Optional[AgentState] = None) -> Dict:
+    """Fallback state update when the mentor step fails."""
+    return {
+        "mentor_guide": "Error creating onboarding guide",
+        "errors": [f"Mentor agent error: {e}"],
+        "messages": [f"MENTOR: Failed - {e}"],
+    }
+
+
+def mentor_agent(state: AgentState) -> Dict:
+    """Sync wrapper over amentor_agent (runs on the shared background event loop)."""
+    return run_sync(amentor_agent(state))
+
+
+async def amentor_agent(state: AgentState) -> Dict:
+    """
+    MENTOR: Creates onboarding guide and learning path.
+    Reads navigator_map and context_output from state.
+    """
+    with span("prompt_build") as s:
+        prompt = _build_prompt(state)
+        s.set_attribute("prompt_chars", len(prompt))
+
+    try:
+        response_text = await ainvoke_llm(get_llm("mentor"), prompt,
+                                          use_cache=state.get("use_llm_cache", True))
+        return _parse_response(state, response_text)
     except Exception as e:
-        return {
-            "mentor_guide": "Error creating onboarding guide",
-            "errors": [f"Mentor agent error: {e}"],
-            "messages": [f"MENTOR: Failed - {e}"],
-        }
+        return failure_update(e)
@@ -1,19 +1,41 @@
 """Navigator Agent - Maps repository structure and identifies entry points."""
-from typing import Dict, List
-from langchain_openai import ChatOpenAI
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+from src.aio import run_sync
 from src.state import AgentState
+from src.analysis.entry_points import detect_structure
+from src.analysis.manifests import format_dependency, is_manifest
+from src.llm import LLM_CONFIG, get_llm, ainvoke_llm
+from src.tokens import estimate_tokens, fit_text, pack
+from src.tracing import span
 from src.utils import extract_json
-import os
 
-# Set OpenAI configuration
-os.environ["OPENAI_API_KEY"] = "eyJhbGciOiJSUzI1NiIsInR5cCIgOiAiSldUIiwia2lkIiA6ICJhZXNKN2kxNGNidnVuTU40MTJrOU5yZ2ROeENhTlJudTNPbC1TU08ycFlJIn0.eyJleHAiOjE3NzA0NDI4MTIsImlhdCI6MTc3MDQ0MTAxMiwiYXV0aF90aW1lIjoxNzcwNDQxMDExLCJqdGkiOiJmZjUxMTdhNC04NGE2LTRjMjktYjk0OC0wMTg3NzY2MWZkODciLCJpc3MiOiJodHRwczovL2F1dGgubWNraW5zZXkuaWQvYXV0aC9yZWFsbXMvciIsImF1ZCI6ImJjZDIzNzI4LTNkMjctNDQ3Yy1hMGE5LWVhY2FmMzkzYTZmNSIsInN1YiI6IjZhZjEyNDMxLWUzYWMtNGM3Mi1hYjZhLTY5ZjI4ODlmYzZmYSIsInR5cCI6IklEIiwiYXpwIjoiYmNkMjM3MjgtM2QyNy00NDdjLWEwYTktZWFjYWYzOTNhNmY1Iiwic2Vzc2lvbl9zdGF0ZSI6ImRiNzUwODQ5LWJlMmUtNDk4NC04NmZkLWMyOGY3MThjZWFhZiIsImF0X2hhc2giOiIzMlVsT3dMMm8wUlNvUmVtX3gzUDlRIiwibmFtZSI6IlJpY2hhcmQgQ291cGVydGh3YWl0ZSIsImdpdmVuX25hbWUiOiJSaWNoYXJkIiwiZmFtaWx5X25hbWUiOiJDb3VwZXJ0aHdhaXRlIiwicHJlZmVycmVkX3VzZXJuYW1lIjoiYjJiZWVkNDk3YjdkYzRmZiIsImVtYWlsIjoiUmljaGFyZF9Db3VwZXJ0aHdhaXRlQG1ja2luc2V5LmNvbSIsImFjciI6IjEiLCJzaWQiOiJkYjc1MDg0OS1iZTJlLTQ5ODQtODZmZC1jMjhmNzE4Y2VhYWYiLCJlbWFpbF92ZXJpZmllZCI6dHJ1ZSwiZm1ubyI6IjMxNjczNyIsImdyb3VwcyI6WyIyOTA3ZmExYy02ODNmLTRjZjctODU1NS04YzM0YTE2Yzg4ZDgiLCJBbGwgRmlybSBVc2VycyIsIjAzYjE1YTM0LTY1NWUtNGVjNC04MzRhLWI5ZGRhMTk3MjBmMCJdfQ.ZSSU7ZL8l5o3KFoU0fhBtwapRddVm5Nz9o1mnIBj_3XYifi77shBUsRVm2cVEL3uxLTwYpybBSet2Q64O4NZJYOlfjjlukZHUeiot79mL3iTDyprzns34ldBnWtIbUZD4S-VF7FCPbgsRmQIlPlm8BCR9UQhjgQ3Lt_fCOuyfQli5-RZU6ypESIzFsZ-X3ROKFzzmym1fif0paxcyfZiZx8gFrI_Py0fxa1pznuiSNGzJRcnSmuKQIARn0AfJGvm9VB07e5btuslRx4w1sexSy9vbJayPezt0EL3_-RDDsAUZ7u3Q3PjgVlcRfv0INgPpQjBncmSFvjsB-IPxkep8g"
-os.environ["OPENAI_BASE_URL"] = "https://openai.prod.ai-gateway.quantumblack.com/2907fa1c-683f-4cf7-8555-8c34a16c88d8/v1"
+# Caps on the share of the prompt budget for the README and config files;
+# the directory tree gets whatever they leave
+README_BUDGET_SHARE = 0.3
+CONFIG_BUDGET_SHARE = 0.25
+# Estimated tokens for each "--- filename ---" header
+FILE_HEADER_TOKENS = 16
+# Parsed runtime dependency names listed in the prompt as architecture hints
+MAX_PROMPT_DEPENDENCIES = 60
 
-# Initialize LLM (OpenAI)
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.1,
-)
+# Local entry-point/architecture detection at or above SKIP_CONFIDENCE replaces the
+# LLM call; at or above SHRINK_CONFIDENCE the LLM only checks it, from a smaller prompt
+SKIP_CONFIDENCE = float(os.getenv("GITBRO_NAVIGATOR_SKIP_CONFIDENCE", "0.9"))
+SHRINK_CONFIDENCE = 0.6
+SHRUNK_BUDGET_SHARE = 0.5
+
+# Purposes for well-known directory names when the navigator map is built without the LLM
+MODULE_PURPOSES = {
+    "api": "API routes and handlers", "routes": "API routes and handlers", "controllers": "Request handlers",
+    "models": "Data models", "schemas": "Data schemas", "db": "Database access", "migrations": "Database migrations",
+    "services": "Business logic services", "core": "Core logic", "agents": "Agents",
+    "components": "UI components", "pages": "Pages", "views": "Views", "templates": "Templates",
+    "hooks": "UI hooks", "static": "Static assets", "utils": "Utility helpers", "helpers": "Utility helpers",
+    "lib": "Shared library code", "config": "Configuration", "cli": "Command-line interface",
+    "cmd": "Command entry points", "internal": "Internal packages", "analysis": "Analysis",
+}
 
 
 def _build_tree_view(file_tree: List[Dict]) -> str:
@@ -64,38 +86,105 @@ def _count_files(node: dict) -> int:
     return count
 
 
-def navigator_agent(state: AgentState) -> Dict:
+def _detect(state: AgentState) -> Tuple[Optional[Dict], List[str]]:
     """
-    NAVIGATOR: Maps repo structure and identifies entry points.
-    Reads file_tree, readme_content, and config_files from state.
-    Returns navigator_map with architecture info.
+    Local entry-point and architecture detection (see src/analysis/entry_points.py).
+    Returns (detection, errors); detection is None if it failed, and the LLM then works alone.
+    """
+    try:
+        with span("detect") as s:
+            detection = detect_structure(state.get("code_samples", {}), state.get("config_files", {}),
+                                         state.get("file_tree"), state.get("symbol_table"),
+                                         state.get("dependencies"))
+            s.set_attributes({"entry_points": len(detection["entry_points"]),
+                              "architecture_type": detection["architecture_type"], **detection["confidence"]})
+        return detection, []
+    except Exception as e:
+        return None, [f"Navigator detection error: {e}"]
+
+
+def _detected_section(detection: Dict) -> str:
+    """Prompt section with the local detection, for the LLM to confirm or correct."""
+    evidence = detection["evidence"]
+    entry_points = "\n".join(f"  - {p} ({', '.join(evidence['entry_points'][p])})"
+                              for p in detection["entry_points"]) or "  - none found"
+    return f"""
+DETECTED LOCALLY (confidence {detection['confidence']['overall']:.0%}; keep unless the tree or README contradicts it):
+- Entry points:
+{entry_points}
+- Architecture: {detection['architecture_type']} ({'; '.join(evidence['architecture_type']) or 'weak evidence'})
+"""
+
+
+def _dependency_section(state: AgentState) -> str:
+    """Runtime package names from the parsed manifests, as architecture hints."""
+    names = list(dict.fromkeys(d["name"] for d in state.get("dependencies") or [] if d["scope"] == "runtime"))
+    if not names:
+        return ""
+    more = f" (+{len(names) - MAX_PROMPT_DEPENDENCIES} more)" if len(names) > MAX_PROMPT_DEPENDENCIES else ""
+    return f"\nDEPENDENCIES (parsed from manifests): {', '.join(names[:MAX_PROMPT_DEPENDENCIES])}{more}\n"
+
+
+def _dependency_list(state: AgentState) -> List[str]:
+    """navigator_map["dependencies"]: runtime dependencies as "Flask==3.1.2" / "react ^19.2.0"."""
+    return [format_dependency(d) for d in state.get("dependencies") or [] if d["scope"] == "runtime"]
+
+
+def _build_prompt(state: AgentState, detection: Optional[Dict] = None) -> Tuple[str, Dict]:
+    """
+    Build the navigator prompt from state within the navigator's token budget.
+    The README and config files get capped shares; the directory tree gets the rest.
+    With a confident local detection the prompt carries it and gets a smaller budget.
+    Returns (prompt, budget report).
     """
     file_tree = state["file_tree"]
     metadata = state["metadata"]
     readme_content = state.get("readme_content")
     config_files = state.get("config_files", {})
     total_files = len(file_tree)
-
-    # Build full nested directory tree
-    tree_view = _build_tree_view(file_tree)
-    # Truncate if extremely large (keep first 200 lines)
-    tree_lines = tree_view.split("\n")
-    if len(tree_lines) > 200:
-        tree_view = "\n".join(tree_lines[:200]) + f"\n... and {len(tree_lines) - 200} more entries"
+    budget = LLM_CONFIG["navigator"]["prompt_budget"]
+    detected_section = ""
+    if detection and detection["confidence"]["overall"] >= SHRINK_CONFIDENCE:
+        budget = int(budget * SHRUNK_BUDGET_SHARE)
+        detected_section = _detected_section(detection)
+    available = budget - estimate_tokens(_render_prompt(metadata, total_files, "", "", "", detected_section))
 
     # README section
     readme_section = ""
-    if readme_content:
-        readme_section = f"\nREADME CONTENT:\n{readme_content[:3000]}\n"
+    readme = fit_text(readme_content or "", int(available * README_BUDGET_SHARE), unit="paragraph")
+    if readme:
+        readme_section = f"\nREADME CONTENT:\n{readme}\n"
+
+    # Config files section; dependency manifests are parsed locally, only their package names go in
+    config_section = _dependency_section(state)
+    configs = pack(((f, c) for f, c in config_files.items() if not is_manifest(f)),
+                   int(available * CONFIG_BUDGET_SHARE), unit="line", overhead_tokens=FILE_HEADER_TOKENS)
+    if configs.sections:
+        config_section += "\nCONFIG FILES:\n"
+        for fname, content in configs.sections:
+            config_section += f"\n--- {fname} ---\n{content}\n"
+
+    # Full nested directory tree, cut by whole lines if it doesn't fit the rest of the budget
+    tree_budget = available - estimate_tokens(readme_section) - estimate_tokens(config_section)
+    full_tree = _build_tree_view(file_tree)
+    tree_view = fit_text(full_tree, tree_budget, unit="line")
 
-    # Config/dependency files section
-    config_section = ""
-    if config_files:
-        config_section = "\nCONFIG & DEPENDENCY FILES:\n"
-        for fname, content in config_files.items():
-            config_section += f"\n--- {fname} ---\n{content[:1500]}\n"
+    prompt = _render_prompt(metadata, total_files, tree_view, readme_section, config_section, detected_section)
+    report = {
+        "budget_tokens": budget,
+        "shrunk": bool(detected_section),
+        "used_tokens": estimate_tokens(prompt),
+        "readme_truncated": readme != (readme_content or ""),
+        "tree_truncated": tree_view != full_tree,
+        "configs_truncated": len(configs.truncated) + len(configs.skipped),
+    }
+    return prompt, report
 
-    prompt = f"""You are a repository structure analyst. Analyze this GitHub repository and output valid JSON only.
+
+def _render_prompt(metadata: Dict, total_files: int, tree_view: str,
+                   readme_section: str, config_section: str, detected_section: str = "") -> str:
+    """Fill the navigator prompt template."""
+    return f"""You are a repository structure analyst. Analyze this GitHub repository and output valid JSON only.
 
 REPOSITORY: {metadata['full_name']}
 LANGUAGE: {metadata['language']}
@@ -105,12 +194,11 @@ TOTAL FILES: {total_files}
 COMPLETE FILE TREE:
 {tree_view}
 {readme_section}
-{config_section}
+{config_section}{detected_section}
 Analyze the repository and identify:
 1. Entry points - files that start the application (main.py, app.py, manage.py, index.js, server.js, etc.)
 2. Core modules - ALL important directories and files with their purpose
-3. Dependencies - ACTUAL libraries from the config/dependency files above (do NOT guess)
-4. Architecture type - choose the MOST SPECIFIC type that fits
+3. Architecture type - choose the MOST SPECIFIC type that fits
 
 RESPOND WITH VALID JSON ONLY (no markdown, no code blocks):
 {{
@@ -120,7 +208,6 @@ RESPOND WITH VALID JSON ONLY (no markdown, no code blocks):
     {{"path": "src/models/", "purpose": "Database models and ORM definitions"}},
     {{"path": "app.py", "purpose": "Main Flask application entry point"}}
   ],
-  "dependencies": ["actual dependencies from config files"],
   "architecture_type": "one of the types below",
   "project_summary": "2-3 sentence summary of what this project does and how it works",
   "confidence_score": 0.85
@@ -143,44 +230,124 @@ CRITICAL RULES:
 - Look at the ACTUAL file tree and README - do not guess or assume
 - If README says it's a GUI app or you see tkinter/PyQt/Kivy/wxPython imports, it is "Desktop GUI Application", NOT "CLI Tool"
 - List ALL major directories in core_modules, not just a few
-- Read dependencies from the config files provided, do not invent them
-- Dependencies MUST be simple strings like "Flask==3.1.2" or "react ^19.2.0". Do NOT use key:value object format
 - confidence_score: 0.0 to 1.0 based on how much data you have
 """
 
+
+def _readme_summary(readme_content: Optional[str]) -> str:
+    """README summary from actual content (not LLM-generated)."""
+    if not readme_content:
+        return "No README found"
+    readme_summary = readme_content[:500].strip()
+    if len(readme_content) > 500:
+        readme_summary += "..."
+    return readme_summary
+
+
+def _project_summary(metadata: Dict, readme_content: Optional[str]) -> str:
+    """Description plus the README's first prose paragraph, for navigator maps built without the LLM."""
+    paragraphs = [p.strip() for p in (readme_content or "").split("\n\n")]
+    prose = next((p for p in paragraphs if p and not p.startswith(("#", "!", "[", "<", "```", "|", "-", "*"))), "")
+    summary = " ".join(part for part in (metadata.get("description") or "", prose[:400]) if part)
+    return summary or "No description available"
+
+
+def _result_update(result: Dict, note: str) -> Dict:
+    return {
+        "navigator_map": result,
+        "messages": [f"NAVIGATOR: Mapped {len(result.get('entry_points', []))} entry points, "
+                     f"{len(result.get('core_modules', []))} modules, "
+                     f"architecture: {result.get('architecture_type', 'unknown')} ({note})"],
+    }
+
+
+def _local_result(state: AgentState, detection: Dict, note: str = "LLM skipped") -> Dict:
+    """navigator_map built from the local detection alone (no LLM call, or a failed one)."""
+    evidence = detection["evidence"]["entry_points"]
+    detailed = [{"path": m, "purpose": f"Entry point ({', '.join(evidence[m])})" if m in evidence
+                 else MODULE_PURPOSES.get(m.rstrip("/").split("/")[-1].lower(), "Source module")}
+                for m in detection["core_modules"]]
+    result = {
+        "entry_points": detection["entry_points"],
+        "core_modules": detection["core_modules"],
+        "core_modules_detailed": detailed,
+        "dependencies": _dependency_list(state),
+        "architecture_type": detection["architecture_type"],
+        "project_summary": _project_summary(state["metadata"], state.get("readme_content")),
+        "confidence_score": detection["confidence"]["overall"],
+        "readme_summary": _readme_summary(state.get("readme_content")),
+        "detection": detection,
+    }
+    return _result_update(result, f"detected locally at {detection['confidence']['overall']:.0%} confidence, "
+                                  f"{note}")
+
+
+def _parse_response(state: AgentState, response_text: str, budget: Dict, detection: Optional[Dict] = None) -> Dict:
+    """Turn the LLM response into the navigator_map state update."""
+    result = extract_json(response_text)
+    result["dependencies"] = _dependency_list(state)
+    result["readme_summary"] = _readme_summary(state.get("readme_content"))
+    if detection is not None:
+        result["detection"] = detection
+
+    return _result_update(result, f"prompt ~{budget['used_tokens']:,}/{budget['budget_tokens']:,} tokens"
+                                  + (", checked local detection" if budget.get("shrunk") else ""))
+
+
+def failure_update(e: Exception, state: Optional[AgentState] = None, detection: Optional[Dict] = None) -> Dict:
+    """
+    Fallback state update when the navigator step fails. With a state, the
+    local detection (run again if not given) and the parsed dependencies are kept.
+    """
+    if state is not None and detection is None:
+        detection, _ = _detect(state)
+    if detection is not None:
+        update = _local_result(state, detection, "LLM failed")
+        update["errors"] = [f"Navigator error: {e}"]
+        return update
+    return {
+        "navigator_map": {
+            "entry_points": [],
+            "core_modules": [],
+            "core_modules_detailed": [],
+            "dependencies": _dependency_list(state) if state is not None else [],
+            "architecture_type": "unknown",
+            "confidence_score": 0.0,
+            "project_summary": "Analysis failed",
+            "readme_summary": "No README found",
+        },
+        "errors": [f"Navigator error: {e}"],
+        "messages": [f"NAVIGATOR: Failed - {e}"],
+    }
+
+
+def navigator_agent(state: AgentState) -> Dict:
+    """Sync wrapper over anavigator_agent (runs on the shared background event loop)."""
+    return run_sync(anavigator_agent(state))
+
+
+async def anavigator_agent(state: AgentState) -> Dict:
+    """
+    NAVIGATOR: Maps repo structure and identifies entry points.
+    Reads file_tree, readme_content, and config_files from state.
+    Returns navigator_map with architecture info.
+    Skips the LLM when local detection is confident enough.
+    """
+    # Detection and prompt packing are CPU-bound; run them off the shared event loop
+    detection, errors = await asyncio.to_thread(_detect, state)
+    if detection and detection["confidence"]["overall"] >= SKIP_CONFIDENCE:
+        return _local_result(state, detection)
+
+    with span("prompt_build") as s:
+        prompt, budget = await asyncio.to_thread(_build_prompt, state, detection)
+        s.set_attributes({"prompt_chars": len(prompt), **budget})
+
     try:
-        response = llm.invoke(prompt)
-        # Extract content from AIMessage object
-        response_text = response.content if hasattr(response, 'content') else str(response)
-        result = extract_json(response_text)
-
-        # Add README summary from actual content (not LLM-generated)
-        if readme_content:
-            readme_summary = readme_content[:500].strip()
-            if len(readme_content) > 500:
-                readme_summary += "..."
-            result["readme_summary"] = readme_summary
-        else:
-            result["readme_summary"] = "No README found"
-
-        return {
-            "navigator_map": result,
-            "messages": [f"NAVIGATOR: Mapped {len(result.get('entry_points', []))} entry points, "
-                         f"{len(result.get('core_modules', []))} modules, "
-                         f"architecture: {result.get('architecture_type', 'unknown')}"],
-        }
+        response_text = await ainvoke_llm(get_llm("navigator"), prompt,
+                                          use_cache=state.get("use_llm_cache", True))
+        update = _parse_response(state, response_text, budget, detection)
     except Exception as e:
-        return {
-            "navigator_map": {
-                "entry_points": [],
-                "core_modules": [],
-                "core_modules_detailed": [],
-                "dependencies": [],
-                "architecture_type": "unknown",
-                "confidence_score": 0.0,
-                "project_summary": "Analysis failed",
-                "readme_summary": "No README found",
-            },
-            "errors": [f"Navigator error: {e}"],
-            "messages": [f"NAVIGATOR: Failed - {e}"],
-        }
+        update = failure_update(e, state, detection)
+    if errors:
+        update["errors"] = update.get("errors", []) + errors
+    return update
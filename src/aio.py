@@ -0,0 +1,62 @@
+"""Run the async pipeline from synchronous code on one shared background event loop.
+
+Using a single long-lived loop (rather than asyncio.run per call) lets loop-bound
+resources such as async HTTP connection pools be reused across sync calls.
+"""
+import asyncio
+import queue
+import threading
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+_DONE = object()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide background event loop, starting its thread on first use."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="gitbro-asyncio", daemon=True).start()
+    return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine on the background loop and block until it returns."""
+    return asyncio.run_coroutine_threadsafe(coro, background_loop()).result()
+
+
+def iterate_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    """
+    Iterate an async generator from sync code.
+    The generator runs as one task on the background loop (so its contextvars
+    persist across items) and hands items over through a thread-safe queue.
+    Closing the sync iterator early cancels the task.
+    """
+    items: queue.Queue = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((_DONE, e))
+            raise
+        items.put((_DONE, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), background_loop())
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None and not isinstance(error, asyncio.CancelledError):
+                    raise error
+                return
+            yield item
+    finally:
+        if not future.done():
+            future.cancel()
@@ -0,0 +1,360 @@
+"""Per-file code metrics and their repo/module aggregates, computed locally with NumPy.
+
+For every source file:
+- loc: non-blank lines, and comments: lines that start with a comment marker
+- cyclomatic: McCabe complexity, counted lexically as decision points
+  (if/for/while/case/catch/&&/||/...) plus one per function
+- nesting: deepest block nesting (brace depth, or indentation under a block
+  opener for Python and Ruby); class and function bodies count as a level
+- fan_in / fan_out: importers and imports in the import graph
+
+Files are concatenated into byte buffers of a few MB each, so line, comment and
+nesting analysis is a handful of array passes per batch instead of a Python
+loop per line; only the decision-point regex runs per file (over the buffer,
+with comment lines blanked out). Batches run in a process pool on large repos. 100k files take
+seconds. The numbers are estimates (keywords in strings count, as do braces in
+comments), which is plenty for ranking files and sizing onboarding steps.
+"""
+import math
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.analysis.import_graph import ImportGraph
+from src.analysis.pool import MAX_WORKERS, PARALLEL_MIN_FILES, pool_map
+
+# Decision points per language family
+_PY_DECISIONS = re.compile(rb"\b(?:if|elif|for|while|except|case|and|or)\b")
+_RUBY_DECISIONS = re.compile(rb"\b(?:if|elsif|unless|while|until|for|when|rescue|and|or)\b|&&|\|\|")
+_C_DECISIONS = re.compile(rb"\b(?:if|for|foreach|while|case|catch|when)\b|&&|\|\||\?\?|\s\?\s")
+
+_HASH_COMMENTS = {".py", ".rb", ".php"}
+_SLASH_COMMENTS = {".js", ".ts", ".jsx", ".tsx", ".java", ".go", ".rs", ".cpp", ".c", ".h",
+                   ".cs", ".php", ".swift", ".kt"}
+_INDENT_BLOCKS = {".py", ".rb"}
+
+# Directories that hold modules rather than being one
+_CONTAINER_DIRS = {"src", "lib", "libs", "packages", "apps", "pkg", "internal", "modules"}
+
+# Complexity score: per-file signals saturate at these values
+DENSITY_HIGH = 40.0  # decision points (plus one per function) per 100 lines of code
+NESTING_HIGH = 5  # levels below a method body (class + function)
+COUPLING_HIGH = 30  # imports + importers
+# Shorter files count as this long, so a one-line file isn't "dense"
+MIN_DENSITY_LOC = 20
+W_DENSITY = 0.5
+W_NESTING = 0.3
+W_COUPLING = 0.2
+# Repo score: LOC-weighted mean of file scores, plus size (1M lines of code saturate)
+W_FILES = 0.7
+W_SIZE = 0.3
+SIZE_HIGH_LOG10 = 6.0
+
+# Files are scanned in batches of about this many characters, which bounds the
+# size of the per-byte arrays (and lets large repos use a process pool)
+BATCH_CHARS = 8_000_000
+
+# First-read pace for onboarding estimates, slowed down by complexity
+LINES_PER_MINUTE = 10.0
+
+
+def module_of(path: str) -> str:
+    """The module a file belongs to: its top directory, or the one below src/, lib/, ... ("." at the root)."""
+    parts = path.split("/")
+    if len(parts) == 1:
+        return "."
+    if parts[0] in _CONTAINER_DIRS and len(parts) > 2:
+        return f"{parts[0]}/{parts[1]}/"
+    return parts[0] + "/"
+
+
+def reading_minutes(code_loc: float, complexity: float) -> float:
+    """Minutes for a careful first read of code_loc lines of the given complexity (0..1)."""
+    return code_loc / LINES_PER_MINUTE * (1 + complexity)
+
+
+def _decision_pattern(path: str) -> "re.Pattern":
+    ext = os.path.splitext(path)[1].lower()
+    return _PY_DECISIONS if ext == ".py" else _RUBY_DECISIONS if ext == ".rb" else _C_DECISIONS
+
+
+def _flags(paths: List[str], extensions: set) -> np.ndarray:
+    return np.fromiter((os.path.splitext(p)[1].lower() in extensions for p in paths), bool, len(paths))
+
+
+def _triple_quotes(buf: np.ndarray) -> np.ndarray:
+    """Positions where a \"\"\" or \'\'\' starts, in order (an empty docstring's run of six is two)."""
+    found = []
+    for quote in (ord('"'), ord("'")):
+        at = np.flatnonzero(buf == quote)
+        if not len(at):
+            continue
+        # Runs of consecutive quote bytes
+        first = np.concatenate(([0], np.flatnonzero(np.diff(at) != 1) + 1))
+        length = np.diff(np.concatenate((first, [len(at)])))
+        run_start = at[first]
+        found += [run_start[length >= 3], run_start[length >= 6] + 3]
+    return np.sort(np.concatenate(found)) if found else np.zeros(0, np.int64)
+
+
+def _segment_max(values: np.ndarray, segment: np.ndarray, n: int) -> np.ndarray:
+    out = np.zeros(n, np.int64)
+    np.maximum.at(out, segment, values)
+    return out
+
+
+class CodeMetrics:
+    """
+    Metrics of every file, as parallel arrays indexed by position in `paths`:
+    loc, comments, cyclomatic, nesting, fan_in, fan_out. `imports` holds the
+    import edges as (source, target) index arrays.
+    """
+
+    def __init__(self, paths: List[str], loc: np.ndarray, comments: np.ndarray, cyclomatic: np.ndarray,
+                 nesting: np.ndarray, imports: Tuple[np.ndarray, np.ndarray]):
+        n = len(paths)
+        self.paths = paths
+        self.index = {path: i for i, path in enumerate(paths)}
+        self.loc, self.comments, self.cyclomatic, self.nesting = loc, comments, cyclomatic, nesting
+        self.imports = imports
+        self.fan_out = np.bincount(imports[0], minlength=n)
+        self.fan_in = np.bincount(imports[1], minlength=n)
+        modules, self.module_ids = np.unique([module_of(p) for p in paths], return_inverse=True)
+        self.modules = [str(m) for m in modules]
+        self.module_ids = self.module_ids.astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def code_loc(self) -> np.ndarray:
+        return self.loc - self.comments
+
+    def file_scores(self) -> np.ndarray:
+        """Complexity of each file, 0 (trivial) to 1, from decision density, nesting and coupling."""
+        density = 100.0 * self.cyclomatic / np.maximum(self.code_loc, MIN_DENSITY_LOC)
+        nesting = np.maximum(self.nesting - 2, 0) / NESTING_HIGH
+        coupling = np.log1p(self.fan_in + self.fan_out) / math.log1p(COUPLING_HIGH)
+        return (W_DENSITY * np.minimum(density / DENSITY_HIGH, 1.0)
+                + W_NESTING * np.minimum(nesting, 1.0)
+                + W_COUPLING * np.minimum(coupling, 1.0))
+
+    def complexity_score(self) -> float:
+        """Repo complexity, 0 (simple scripts) to 1 (large, highly complex system)."""
+        code_loc = self.code_loc
+        total = int(code_loc.sum())
+        if not total:
+            return 0.0
+        files = float(np.average(self.file_scores(), weights=code_loc))
+        size = min(math.log10(1 + total) / SIZE_HIGH_LOG10, 1.0)
+        return round(W_FILES * files + W_SIZE * size, 2)
+
+    def file(self, path: str) -> Optional[Dict]:
+        """Metrics of one file, with its complexity and estimated reading time (None if unknown)."""
+        i = self.index.get(path)
+        if i is None:
+            return None
+        score = float(self.file_scores()[i])
+        return self._file_dict(i, score)
+
+    def _file_dict(self, i: int, score: float) -> Dict:
+        code_loc = int(self.code_loc[i])
+        return {"path": self.paths[i], "loc": int(self.loc[i]), "code_loc": code_loc,
+                "cyclomatic": int(self.cyclomatic[i]), "nesting": int(self.nesting[i]),
+                "fan_in": int(self.fan_in[i]), "fan_out": int(self.fan_out[i]),
+                "complexity": round(score, 2), "reading_minutes": round(reading_minutes(code_loc, score))}
+
+    def module_stats(self) -> List[Dict]:
+        """Per-module totals, largest module first. fan_in/fan_out count imports crossing the module boundary."""
+        m = len(self.modules)
+        ids = self.module_ids
+
+        def total(values=None) -> np.ndarray:
+            return np.bincount(ids, weights=values, minlength=m)
+
+        code_loc = self.code_loc
+        files, loc, comments, lines = total(), total(self.loc), total(self.comments), total(code_loc)
+        cyclomatic, max_nesting = total(self.cyclomatic), _segment_max(self.nesting, ids, m)
+        complexity = total(self.file_scores() * code_loc) / np.maximum(lines, 1)
+        src, dst = ids[self.imports[0]], ids[self.imports[1]]
+        crossing = src != dst
+        fan_out, fan_in = np.bincount(src[crossing], minlength=m), np.bincount(dst[crossing], minlength=m)
+
+        stats = [{"module": self.modules[k], "files": int(files[k]), "loc": int(loc[k]),
+                  "comment_ratio": round(float(comments[k] / loc[k]), 2) if loc[k] else 0.0,
+                  "cyclomatic": int(cyclomatic[k]), "max_nesting": int(max_nesting[k]),
+                  "fan_in": int(fan_in[k]), "fan_out": int(fan_out[k]),
+                  "complexity": round(float(complexity[k]), 2),
+                  "reading_hours": round(reading_minutes(float(lines[k]), float(complexity[k])) / 60, 1)}
+                 for k in range(m)]
+        return sorted(stats, key=lambda s: (-s["loc"], s["module"]))
+
+    def summary(self, top: int = 10) -> Dict:
+        """Repo-level statistics, per-module stats and the `top` most complex files."""
+        n = len(self.paths)
+        loc = int(self.loc.sum())
+        scores = self.file_scores()
+        most_complex = np.lexsort((np.arange(n), -scores))[:top]
+
+        def percentile(values: np.ndarray, q: float) -> float:
+            return round(float(np.percentile(values, q)), 1) if n else 0.0
+
+        return {
+            "files": n,
+            "loc": loc,
+            "code_loc": int(self.code_loc.sum()),
+            "comment_ratio": round(float(self.comments.sum()) / loc, 2) if loc else 0.0,
+            "cyclomatic": int(self.cyclomatic.sum()),
+            "cyclomatic_median": percentile(self.cyclomatic, 50),
+            "cyclomatic_p90": percentile(self.cyclomatic, 90),
+            "max_nesting": int(self.nesting.max()) if n else 0,
+            "nesting_p90": percentile(self.nesting, 90),
+            "fan_in_max": int(self.fan_in.max()) if n else 0,
+            "fan_out_max": int(self.fan_out.max()) if n else 0,
+            "fan_out_mean": round(float(self.fan_out.mean()), 1) if n else 0.0,
+            "complexity_score": self.complexity_score(),
+            "modules": self.module_stats(),
+            "most_complex": [self._file_dict(int(i), float(scores[i])) for i in most_complex],
+        }
+
+
+def _scan(batch: Tuple[List[str], List[str]]) -> Tuple[np.ndarray, ...]:
+    """(loc, comments, nesting, decision points) per file of a (paths, contents) batch, joined into one byte buffer."""
+    paths, contents = batch
+    n = len(paths)
+    encoded = [content.encode("utf-8", "replace") + b"\n" for content in contents]
+    sizes = np.fromiter((len(b) for b in encoded), np.int64, n)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    buf = np.frombuffer(b"".join(encoded), np.uint8)
+    del encoded
+
+    # Lines never span files: every file ends with its own newline
+    line_end = np.flatnonzero(buf == 10)
+    line_start = np.concatenate(([0], line_end[:-1] + 1))
+    line_file = np.searchsorted(starts, line_start, side="right") - 1
+
+    # First and last non-whitespace byte of each line
+    text = np.flatnonzero(buf > 32)
+    if not len(text):
+        zeros = np.zeros(n, np.int64)
+        return zeros, zeros.copy(), zeros.copy(), zeros.copy()
+    k = np.searchsorted(text, line_start)
+    first = text[np.minimum(k, len(text) - 1)]
+    blank = (k >= len(text)) | (first >= line_end)
+    last = text[np.maximum(np.searchsorted(text, line_end) - 1, 0)]
+    c1 = buf[first]
+    c2 = buf[np.minimum(first + 1, len(buf) - 1)]
+
+    hash_comments = _flags(paths, _HASH_COMMENTS)[line_file]
+    slash_comments = _flags(paths, _SLASH_COMMENTS)[line_file]
+    comment = ~blank & ((hash_comments & (c1 == ord("#")))
+                        | (slash_comments & (((c1 == ord("/")) & ((c2 == ord("/")) | (c2 == ord("*"))))
+                                             | (c1 == ord("*")))))
+
+    # Python: docstrings (lines opening or inside a triple-quoted string) count as comments
+    python = _flags(paths, {".py"})
+    quotes = _triple_quotes(buf)
+    quote_file = np.searchsorted(starts, quotes, side="right") - 1
+    quotes = quotes[python[quote_file]]
+    before_file = np.searchsorted(quotes, starts)
+    inside = (np.searchsorted(quotes, line_start) - before_file[line_file]) % 2 == 1
+    comment |= ~blank & (inside | (python[line_file] & np.isin(first, quotes)))
+    loc = np.bincount(line_file[~blank], minlength=n)
+    comments = np.bincount(line_file[comment], minlength=n)
+
+    # Decision points, with comment lines blanked so prose ("for", "if", "or") doesn't count
+    covered = np.zeros(len(buf) + 1, np.int8)
+    covered[line_start[comment]] = 1
+    covered[line_end[comment]] -= 1
+    code = buf.copy()
+    code[np.cumsum(covered[:-1], dtype=np.int8).view(bool)] = 32
+    code = code.tobytes()
+    ends = starts + sizes
+    decisions = np.fromiter((len(_decision_pattern(p).findall(code, start, end))
+                             for p, start, end in zip(paths, starts.tolist(), ends.tolist())), np.int64, n)
+
+    # Brace languages: running {/} depth, relative to the depth where the file starts
+    indent_blocks = _flags(paths, _INDENT_BLOCKS)
+    braces = np.flatnonzero((buf == ord("{")) | (buf == ord("}")))
+    brace_file = np.searchsorted(starts, braces, side="right") - 1
+    keep = ~indent_blocks[brace_file]
+    braces, brace_file = braces[keep], brace_file[keep]
+    delta = np.where(buf[braces] == ord("{"), 1, -1)
+    depth = np.cumsum(delta)
+    base = np.concatenate(([0], np.cumsum(np.bincount(brace_file, weights=delta, minlength=n))[:-1])).astype(np.int64)
+    nesting = _segment_max(depth - base[brace_file], brace_file, n)
+
+    # Python/Ruby: indentation of lines that open a block body. The line before must be a
+    # block opener (":" in Python) so continuation lines of long calls don't count as nesting.
+    code = ~blank & ~comment & indent_blocks[line_file]
+    rows = np.flatnonzero(code)
+    if len(rows):
+        indent = first[rows] - line_start[rows]
+        prev = np.concatenate(([-1], rows[:-1]))
+        same_file = np.concatenate(([False], line_file[rows[1:]] == line_file[rows[:-1]]))
+        opener = np.where(python[line_file[rows]], buf[last[np.maximum(prev, 0)]] == ord(":"), True)
+        opener_indent = np.concatenate(([0], indent[:-1]))
+        body = same_file & opener & (indent > opener_indent)
+        # The indent unit is the step into top-level blocks (usually 4 spaces or a tab)
+        top = body & (opener_indent == 0)
+        unit = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(unit, line_file[rows][top], indent[top])
+        files, indent = line_file[rows][body], indent[body]
+        deepest = _segment_max(indent, files, n)
+        has_blocks = deepest > 0
+        nesting[has_blocks] = deepest[has_blocks] // unit[has_blocks]
+    return loc, comments, nesting, decisions
+
+
+def _batches(paths: List[str], code_samples: Dict[str, str]) -> Iterator[Tuple[List[str], List[str]]]:
+    """Split files into (paths, contents) batches of about BATCH_CHARS characters."""
+    batch_paths, batch_contents, size = [], [], 0
+    for path in paths:
+        content = code_samples[path]
+        batch_paths.append(path)
+        batch_contents.append(content)
+        size += len(content)
+        if size >= BATCH_CHARS:
+            yield batch_paths, batch_contents
+            batch_paths, batch_contents, size = [], [], 0
+    if batch_paths:
+        yield batch_paths, batch_contents
+
+
+def compute_metrics(code_samples: Dict[str, str], import_graph: Optional[ImportGraph] = None,
+                    symbol_table: Optional[Dict[str, Dict]] = None, workers: Optional[int] = None) -> CodeMetrics:
+    """
+    Metrics for every file in code_samples. The symbol table supplies function
+    counts for McCabe's one-per-function term (else each file counts as one unit);
+    the import graph supplies fan-in/fan-out. Batches are scanned in the shared
+    process pool on large repos (workers=1 forces inline).
+    """
+    paths = sorted(code_samples)
+    n = len(paths)
+    batches = list(_batches(paths, code_samples))
+    results = None
+    if (workers or MAX_WORKERS) > 1 and n >= PARALLEL_MIN_FILES and len(batches) > 1:
+        results = pool_map(_scan, batches)
+    if results is None:
+        results = [_scan(batch) for batch in batches]
+    loc, comments, nesting, decisions = (np.concatenate([r[k] for r in results]) if results else np.zeros(0, np.int64)
+                                         for k in range(4))
+
+    table = symbol_table or {}
+    units = np.fromiter((max(1, len(table[p]["functions"]) + sum(len(c["methods"]) for c in table[p]["classes"]))
+                         if p in table else 1 for p in paths), np.int64, n)
+    cyclomatic = units + decisions
+
+    src = dst = np.zeros(0, np.int64)
+    if import_graph is not None and len(import_graph):
+        # Graph node index -> position in paths (-1 for files not in code_samples)
+        index = {path: i for i, path in enumerate(paths)}
+        position = np.array([index.get(p, -1) for p in import_graph.paths], np.int64)
+        out_degree = np.diff(np.array(import_graph.offsets, np.int64))
+        src = position[np.repeat(np.arange(len(import_graph)), out_degree)]
+        dst = position[np.array(import_graph.targets, np.int64)]
+        valid = (src >= 0) & (dst >= 0)
+        src, dst = src[valid], dst[valid]
+    return CodeMetrics(paths, loc, comments, cyclomatic, nesting, (src, dst))
@@ -0,0 +1,227 @@
+"""Architecture diagrams generated locally from the directory structure and the import graph.
+
+Files are seeded into clusters by directory, refined with label propagation
+over import edges (community detection: a file joins the cluster it is most
+connected to), then the smallest clusters are merged into their best-connected
+neighbour until at most max_nodes remain. The result renders to Mermaid,
+Graphviz DOT and ASCII; no LLM call is needed, and names come from the
+clusters' common directory unless labels are supplied.
+"""
+import os
+import posixpath
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.analysis.import_graph import ImportGraph
+
+MAX_NODES = 12
+# Edges drawn per diagram, strongest first
+MAX_EDGES = 30
+# Label propagation rounds (it usually settles in 2-3)
+MAX_ROUNDS = 10
+# Weight of a file's own directory against its (degree-normalised) import ties
+DIRECTORY_AFFINITY = 1.0
+
+
+@dataclass
+class Cluster:
+    id: str
+    name: str
+    files: List[str]
+    entry: bool = False
+
+
+@dataclass
+class Diagram:
+    clusters: List[Cluster]
+    edges: List[Tuple[int, int, int]] = field(default_factory=list)  # (from, to, import count), strongest first
+
+    def _label(self, cluster: Cluster, labels: Optional[Dict[str, str]]) -> str:
+        name = (labels or {}).get(cluster.id) or cluster.name
+        return f"{name} ({len(cluster.files)} files)"
+
+    def mermaid(self, labels: Optional[Dict[str, str]] = None) -> str:
+        lines = ["graph TD"]
+        for c in self.clusters:
+            lines.append(f'    {c.id}["{_mermaid_escape(self._label(c, labels))}"]')
+        for src, dst, weight in self.edges:
+            lines.append(f"    {self.clusters[src].id} -->|{weight}| {self.clusters[dst].id}")
+        entries = [c.id for c in self.clusters if c.entry]
+        if entries:
+            lines.append("    classDef entry fill:#ffe8a3,stroke:#d4a017,stroke-width:2px")
+            lines.append(f"    class {','.join(entries)} entry")
+        return "\n".join(lines)
+
+    def dot(self, labels: Optional[Dict[str, str]] = None) -> str:
+        lines = ["digraph architecture {", "    rankdir=LR;", '    node [shape=box, style=rounded];']
+        for c in self.clusters:
+            style = ', style="rounded,filled", fillcolor="#ffe8a3"' if c.entry else ""
+            lines.append(f'    {c.id} [label="{_dot_escape(self._label(c, labels))}"{style}];')
+        for src, dst, weight in self.edges:
+            lines.append(f'    {self.clusters[src].id} -> {self.clusters[dst].id} [label="{weight}"];')
+        lines.append("}")
+        return "\n".join(lines)
+
+    def ascii(self, labels: Optional[Dict[str, str]] = None) -> str:
+        outgoing = defaultdict(list)
+        for src, dst, weight in self.edges:
+            outgoing[src].append((dst, weight))
+        lines = []
+        for i, c in enumerate(self.clusters):
+            lines.append(f"[{self._label(c, labels)}]" + (" <- entry point" if c.entry else ""))
+            targets = outgoing.get(i, [])
+            for n, (dst, weight) in enumerate(targets):
+                branch = "└──" if n == len(targets) - 1 else "├──"
+                lines.append(f"  {branch}> {self._label(self.clusters[dst], labels)}  ({weight} imports)")
+        return "\n".join(lines)
+
+
+def _mermaid_escape(text: str) -> str:
+    return text.replace('"', "#quot;")
+
+
+def _dot_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _seed_depth(paths: List[str], max_seeds: int) -> int:
+    """Deepest directory level whose distinct directories number at most max_seeds."""
+    depth = 1
+    max_depth = max((p.count("/") for p in paths), default=0)
+    for d in range(1, max_depth + 1):
+        if len({_directory(p, d) for p in paths}) > max_seeds:
+            break
+        depth = d
+    return depth
+
+
+def _directory(path: str, depth: int) -> str:
+    parts = path.split("/")[:-1]
+    return "/".join(parts[:depth]) or "."
+
+
+def _common_directory(files: Iterable[str]) -> str:
+    """Name for a cluster: its files' common directory, else its largest top-level directories."""
+    dirs = [posixpath.dirname(f) for f in files]
+    common = posixpath.commonpath(dirs) if dirs and all(dirs) else ""
+    if common:
+        return common
+    tops = Counter(d.split("/")[0] if d else "(root)" for d in dirs).most_common()
+    return ", ".join(top for top, _ in tops[:2]) + (", …" if len(tops) > 2 else "")
+
+
+def _propagate(paths: List[str], neighbours: List[Dict[int, int]], labels: List[str]) -> List[str]:
+    """Label propagation: a file moves to the label holding most of its (normalised) import weight."""
+    seeds = list(labels)
+    # A neighbour's vote is split across all its ties, so hubs (llm.py, utils.py)
+    # that everything imports don't pull their importers into their own cluster
+    degree = [sum(n.values()) for n in neighbours]
+    for _ in range(MAX_ROUNDS):
+        changed = 0
+        for i in range(len(paths)):
+            if not neighbours[i]:
+                continue
+            scores = defaultdict(float)
+            scores[seeds[i]] += DIRECTORY_AFFINITY
+            for j, weight in neighbours[i].items():
+                scores[labels[j]] += weight / degree[j]
+            # Ties go to the lexicographically smallest label so the result is deterministic
+            best = min(scores, key=lambda label: (-scores[label], label))
+            # Only a strict majority of the file's ties moves it out of its directory,
+            # so a shared module (db, utils) isn't absorbed by its biggest caller
+            if best != labels[i] and scores[best] * 2 > sum(scores.values()):
+                labels[i] = best
+                changed += 1
+        if not changed:
+            break
+    return labels
+
+
+def _merge_small(members: Dict[str, List[int]], links: Dict[Tuple[str, str], int],
+                 max_nodes: int) -> Dict[str, List[int]]:
+    """Merge the smallest cluster into its best-connected (else nearest in the tree) cluster until max_nodes remain."""
+    while len(members) > max_nodes:
+        smallest = min(members, key=lambda label: (len(members[label]), label))
+        connected = Counter()
+        for (a, b), weight in links.items():
+            if a == smallest and b != smallest:
+                connected[b] += weight
+            elif b == smallest and a != smallest:
+                connected[a] += weight
+        if connected:
+            target = min(connected, key=lambda label: (-connected[label], label))
+        else:
+            target = max((label for label in members if label != smallest),
+                         key=lambda label: (len(os.path.commonprefix([label, smallest])), -len(members[label])))
+        members[target].extend(members.pop(smallest))
+        merged = Counter()
+        for (a, b), weight in links.items():
+            a = target if a == smallest else a
+            b = target if b == smallest else b
+            if a != b:
+                merged[(a, b)] += weight
+        links.clear()
+        links.update(merged)
+    return members
+
+
+def build_diagram(paths: Iterable[str], import_graph: Optional[ImportGraph] = None,
+                  entry_points: Iterable[str] = (), max_nodes: int = MAX_NODES) -> Diagram:
+    """Cluster the repo's source files into at most max_nodes components and connect them by imports."""
+    paths = sorted(paths)
+    if not paths:
+        return Diagram([])
+    index = {p: i for i, p in enumerate(paths)}
+
+    neighbours: List[Dict[int, int]] = [defaultdict(int) for _ in paths]
+    file_edges = []
+    if import_graph is not None:
+        for src, dst in import_graph.edges():
+            a, b = index.get(import_graph.paths[src]), index.get(import_graph.paths[dst])
+            if a is None or b is None:
+                continue
+            file_edges.append((a, b))
+            neighbours[a][b] += 1
+            neighbours[b][a] += 1
+
+    depth = _seed_depth(paths, max_nodes * 4)
+    labels = _propagate(paths, neighbours, [_directory(p, depth) for p in paths])
+
+    members: Dict[str, List[int]] = defaultdict(list)
+    for i, label in enumerate(labels):
+        members[label].append(i)
+    links: Dict[Tuple[str, str], int] = Counter()
+    for a, b in file_edges:
+        if labels[a] != labels[b]:
+            links[(labels[a], labels[b])] += 1
+    members = _merge_small(dict(members), links, max_nodes)
+
+    entry_points = {e[2:] if e.startswith("./") else e for e in entry_points}
+    order = sorted(members, key=lambda label: (-len(members[label]), label))
+    clusters = []
+    cluster_of = {}
+    for n, label in enumerate(order):
+        files = [paths[i] for i in members[label]]
+        clusters.append(Cluster(f"C{n}", _common_directory(files), sorted(files),
+                                entry=any(f in entry_points for f in files)))
+        for i in members[label]:
+            cluster_of[i] = n
+
+    weights = Counter()
+    for a, b in file_edges:
+        if cluster_of[a] != cluster_of[b]:
+            weights[(cluster_of[a], cluster_of[b])] += 1
+    edges = sorted(((a, b, w) for (a, b), w in weights.items()), key=lambda e: (-e[2], e[0], e[1]))[:MAX_EDGES]
+    return Diagram(clusters, edges)
+
+
+def render_all(diagram: Diagram, labels: Optional[Dict[str, str]] = None) -> Dict:
+    """All renderings plus the cluster membership, as stored in state["diagrams"]."""
+    return {
+        "mermaid": diagram.mermaid(labels),
+        "dot": diagram.dot(labels),
+        "ascii": diagram.ascii(labels),
+        "clusters": [{"id": c.id, "name": (labels or {}).get(c.id) or c.name, "files": c.files, "entry": c.entry}
+                     for c in diagram.clusters],
+    }
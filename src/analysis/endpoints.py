@@ -0,0 +1,387 @@
+"""Static extraction of API endpoints and data models from every source file.
+
+Endpoints ({method, path, file, line, handler}):
+- Python (ast): Flask/FastAPI route decorators with Blueprint url_prefix / APIRouter prefix,
+  add_url_rule / add_api_route, Django urls.py path()/re_path()/url(), DRF router.register()
+- JS/TS: Express-style app.get('/x'), router.route('/x').get(), NestJS @Controller/@Get,
+  Next.js app/**/route.ts handlers and pages/api files
+- Go: gin/echo/chi r.GET("/x"), http.HandleFunc("/x"); Java/Kotlin: Spring @RequestMapping/@GetMapping
+
+Models ({name, file, line, kind, fields}):
+- Python: SQLAlchemy (Base, db.Model, DeclarativeBase), Django models.Model, Pydantic BaseModel,
+  SQLModel and dataclasses/attrs classes, plus same-file subclasses of those
+- JS/TS: TypeORM @Entity classes, mongoose.model(), sequelize.define()
+"""
+import ast
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from src.analysis.pool import MAX_WORKERS, PARALLEL_MIN_FILES, pool_map
+
+HTTP_METHODS = ("get", "post", "put", "delete", "patch", "head", "options")
+JS_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs")
+JVM_EXTENSIONS = (".java", ".kt")
+
+# Files without any of these can't register a route or define a model; skipping them keeps the scan cheap
+_PY_HINTS = ("route", "get(", "post(", "put(", "delete(", "patch(", "path(", "url(", "register(",
+             "Model", "dataclass", "Column", "mapped_column", "Base", "attr")
+_JS_HINTS = (".get(", ".post(", ".put(", ".delete(", ".patch(", ".all(", ".route(", "@Controller",
+             "@Entity", "mongoose", ".define(", "export")
+
+# ---- Python ----
+
+_MODEL_BASES = {
+    "BaseModel": "pydantic", "SQLModel": "sqlmodel", "DeclarativeBase": "sqlalchemy",
+    "Base": "sqlalchemy", "db.Model": "sqlalchemy", "models.Model": "django",
+}
+_DATACLASS_DECORATORS = {"dataclass", "dataclasses.dataclass", "attr.s", "attrs.define", "define",
+                         "attr.attrs", "frozen", "attrs.frozen", "pydantic.dataclasses.dataclass"}
+_NOT_FIELDS = {"Meta", "Config", "model_config", "objects", "__tablename__", "__table_args__",
+               "__abstract__", "__slots__"}
+
+
+def _string(node) -> Optional[str]:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def _keyword(call: ast.Call, name: str):
+    return next((kw.value for kw in call.keywords if kw.arg == name), None)
+
+
+def _methods(node) -> List[str]:
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [s.upper() for s in (_string(e) for e in node.elts) if s]
+    return []
+
+
+def _join(prefix: str, path: str) -> str:
+    """Route under a router/controller prefix: ("/users", "/{id}") -> "/users/{id}"."""
+    if not prefix:
+        return path
+    return prefix.rstrip("/") + "/" + path.lstrip("/") if path else prefix
+
+
+def _prefixes(tree: ast.Module) -> Dict[str, str]:
+    """Module-level `bp = Blueprint(..., url_prefix=...)` / `router = APIRouter(prefix=...)` prefixes by name."""
+    prefixes = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name):
+            prefix = _string(_keyword(node.value, "url_prefix") or _keyword(node.value, "prefix"))
+            if prefix:
+                prefixes[node.targets[0].id] = prefix
+    return prefixes
+
+
+def _route(decorator, prefixes: Dict[str, str]) -> List[Tuple[str, str]]:
+    """(method, path) pairs registered by one decorator, if it is a route decorator."""
+    if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute) and decorator.args):
+        return []
+    path = _string(decorator.args[0])
+    if path is None or not (path == "" or path.startswith("/")):
+        return []
+    owner = decorator.func.value
+    path = _join(prefixes.get(owner.id, "") if isinstance(owner, ast.Name) else "", path)
+    attr = decorator.func.attr
+    if attr in HTTP_METHODS:
+        return [(attr.upper(), path)]
+    if attr == "websocket":
+        return [("WEBSOCKET", path)]
+    if attr in ("route", "api_route"):
+        methods = _methods(_keyword(decorator, "methods")) or (["GET"] if attr == "route" else ["ANY"])
+        return [(method, path) for method in methods]
+    return []
+
+
+def _python_endpoints(path: str, tree: ast.Module, content: str) -> List[Dict]:
+    prefixes = _prefixes(tree)
+    django_urls = "urlpatterns" in content
+    endpoints = []
+
+    def add(method: str, route: str, line: int, handler: str):
+        endpoints.append({"method": method, "path": route, "file": path, "line": line, "handler": handler})
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                for method, route in _route(decorator, prefixes):
+                    add(method, route, node.lineno, node.name)
+        elif isinstance(node, ast.Call) and isinstance(node.func, (ast.Attribute, ast.Name)) and node.args:
+            name = node.func.attr if isinstance(node.func, ast.Attribute) else node.func.id
+            route = _string(node.args[0])
+            if route is None:
+                continue
+            handler_node = node.args[1] if len(node.args) > 1 else (
+                _keyword(node, "view_func") or _keyword(node, "endpoint"))
+            handler = ast.unparse(handler_node) if handler_node is not None else ""
+            if name in ("add_url_rule", "add_api_route") and route.startswith("/"):
+                owner = node.func.value if isinstance(node.func, ast.Attribute) else None
+                route = _join(prefixes.get(owner.id, "") if isinstance(owner, ast.Name) else "", route)
+                default = ["GET"] if name == "add_url_rule" else ["ANY"]
+                for method in _methods(_keyword(node, "methods")) or default:
+                    add(method, route, node.lineno, handler)
+            elif name in ("path", "re_path", "url") and django_urls and isinstance(node.func, ast.Name) \
+                    and handler and not handler.startswith("include("):
+                add("ANY", route, node.lineno, handler)
+            elif name == "register" and handler and isinstance(node.func, ast.Attribute) \
+                    and "router" in ast.unparse(node.func.value).lower():
+                # DRF router.register(r"users", UserViewSet)
+                add("ANY", route.strip("^$").rstrip("/") + "/", node.lineno, handler)
+    return endpoints
+
+
+def _base_kind(base: str, imports_django: bool) -> Optional[str]:
+    if base in _MODEL_BASES:
+        return _MODEL_BASES[base]
+    if base.endswith(".Model") or base == "Model":
+        return "django" if imports_django else "sqlalchemy"
+    if base.endswith((".BaseModel", ".SQLModel", ".DeclarativeBase")):
+        return _MODEL_BASES[base.rsplit(".", 1)[1]]
+    return None
+
+
+def _fields(node: ast.ClassDef, kind: str) -> List[str]:
+    """Class-level annotated names, plus `name = Column(...)`-style assignments for ORM models."""
+    fields = []
+    for statement in node.body:
+        if isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name):
+            fields.append(statement.target.id)
+        elif isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Call) \
+                and kind in ("sqlalchemy", "django", "sqlmodel"):
+            fields += [t.id for t in statement.targets if isinstance(t, ast.Name)]
+    return [f for f in fields if f not in _NOT_FIELDS and not f.startswith("_")]
+
+
+def _has_columns(node: ast.ClassDef) -> bool:
+    """SQLAlchemy-style class body: __tablename__, Column()/mapped_column()/relationship() or Mapped[...]."""
+    for statement in node.body:
+        if isinstance(statement, ast.Assign) and any(getattr(t, "id", "") == "__tablename__" for t in statement.targets):
+            return True
+        if isinstance(statement, ast.AnnAssign) and ast.unparse(statement.annotation).startswith(("Mapped[", "so.Mapped[")):
+            return True
+        value = getattr(statement, "value", None)
+        if isinstance(value, ast.Call) and ast.unparse(value.func).split(".")[-1] in (
+                "Column", "mapped_column", "relationship"):
+            return True
+    return False
+
+
+def _python_models(path: str, tree: ast.Module, content: str) -> List[Dict]:
+    imports_django = "django" in content
+    kinds: Dict[str, str] = {}  # class name -> kind, for same-file subclasses
+    models = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ClassDef):
+            continue
+        kind, inherited = None, False
+        for base in node.bases:
+            name = ast.unparse(base)
+            inherited = name in kinds
+            kind = kinds.get(name) or _base_kind(name, imports_django)
+            if kind:
+                break
+        if kind is None and any(ast.unparse(d.func if isinstance(d, ast.Call) else d) in _DATACLASS_DECORATORS
+                                for d in node.decorator_list):
+            kind = "dataclass"
+        if kind is None:
+            continue
+        fields = _fields(node, kind)
+        # `Base` and bare `Model` are common class names: only count them with ORM columns
+        if kind == "sqlalchemy" and not inherited and not _has_columns(node):
+            continue
+        kinds[node.name] = kind
+        # Declarative bases and empty mixins are not models
+        if fields:
+            models.append({"name": node.name, "file": path, "line": node.lineno, "kind": kind, "fields": fields})
+    return models
+
+
+# ---- JS/TS, Go, Java/Kotlin (lexical) ----
+
+_JS_ROUTE = re.compile(r"\b(\w+)\.(get|post|put|delete|patch|options|head|all)\(\s*(['\"`])([^'\"`]+)\3")
+_JS_ROUTE_CHAIN = re.compile(r"\.route\(\s*(['\"`])([^'\"`]+)\1\s*\)")
+_CHAINED_METHOD = re.compile(r"\s*\.\s*(get|post|put|delete|patch|all)\(")
+_DECORATED_CONTROLLER = re.compile(r"@(?:Controller|RequestMapping)\(\s*(?:value\s*=\s*|path\s*=\s*)?['\"]([^'\"]*)['\"]")
+_DECORATED_ROUTE = re.compile(
+    r"@(Get|Post|Put|Delete|Patch|Options|Head|All)(?:Mapping)?\(\s*(?:value\s*=\s*|path\s*=\s*)?(?:['\"]([^'\"]*)['\"])?")
+_REQUEST_MAPPING = re.compile(r"@RequestMapping\([^)]*?(?:value|path)\s*=\s*['\"]([^'\"]*)['\"][^)]*?RequestMethod\.(\w+)")
+_NEXT_HANDLER = re.compile(r"export\s+(?:async\s+)?(?:function|const)\s+(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS)\b")
+_GO_ROUTE = re.compile(r"\b\w+\.(GET|POST|PUT|DELETE|PATCH|Get|Post|Put|Delete|Patch|HandleFunc|Handle)\(\s*\"([^\"]+)\"")
+_ENTITY = re.compile(r"@Entity\([^)]*\)\s*(?:export\s+)?class\s+(\w+)")
+_COLUMN = re.compile(r"@(?:\w*Column|ManyToOne|OneToMany|ManyToMany|OneToOne)\([^)]*\)\s*(\w+)[?!]?\s*:")
+_MONGOOSE = re.compile(r"\bmodel\(\s*['\"](\w+)['\"]\s*,\s*(\w+)")
+_SEQUELIZE = re.compile(r"\.define\(\s*['\"](\w+)['\"]\s*,\s*\{")
+_SCHEMA = r"\b{}\s*=\s*new\s+(?:mongoose\.)?Schema\(\s*\{{"
+_OBJECT_KEYS = re.compile(r"^\s{2,6}(\w+)\s*:", re.MULTILINE)
+
+# Names that are clearly not HTTP routers for `x.get('/...')` (maps, caches, headers, axios clients)
+_NOT_ROUTERS = {"map", "cache", "headers", "params", "searchParams", "axios", "http", "client", "api", "request",
+                "req", "res", "store", "localStorage", "sessionStorage", "cookies", "formData", "url", "env"}
+
+
+def _line(content: str, offset: int) -> int:
+    return content.count("\n", 0, offset) + 1
+
+
+def _object_keys(content: str, start: int) -> List[str]:
+    """Top-level keys of the object literal opening just before start."""
+    depth, i = 1, start
+    while i < len(content) and depth:
+        depth += {"{": 1, "}": -1}.get(content[i], 0)
+        i += 1
+    body = content[start:i - 1]
+    # Blank nested objects so only their keys at the outer level remain
+    flat = re.sub(r"\{[^{}]*\}", "{}", body)
+    return _OBJECT_KEYS.findall(flat)
+
+
+def _chained_methods(content: str, i: int) -> List[str]:
+    """Methods of a `.route('/x').get(...).post(...)` chain starting at i, skipping the handler arguments."""
+    methods = []
+    while True:
+        match = _CHAINED_METHOD.match(content, i)
+        if not match:
+            return methods
+        methods.append(match.group(1))
+        depth, i = 1, match.end()
+        while i < len(content) and depth:
+            depth += {"(": 1, ")": -1}.get(content[i], 0)
+            i += 1
+
+
+def _js_endpoints(path: str, content: str) -> List[Dict]:
+    endpoints = []
+
+    def add(method: str, route: str, offset: int, handler: str = ""):
+        endpoints.append({"method": method, "path": route, "file": path, "line": _line(content, offset),
+                          "handler": handler})
+
+    for match in _JS_ROUTE.finditer(content):
+        owner, route = match.group(1), match.group(4)
+        if owner not in _NOT_ROUTERS and route.startswith("/") and "${" not in route:
+            add("ANY" if match.group(2) == "all" else match.group(2).upper(), route, match.start())
+    for match in _JS_ROUTE_CHAIN.finditer(content):
+        for method in _chained_methods(content, match.end()):
+            add("ANY" if method == "all" else method.upper(), match.group(2), match.start())
+    endpoints += _decorated_endpoints(path, content)
+
+    # Next.js file-system routes
+    norm = "/" + path
+    app_route = re.search(r"/app/(.*?)/?route\.(?:js|ts)x?$", norm)
+    if app_route:
+        route = "/" + "/".join(part for part in app_route.group(1).split("/") if part and not part.startswith("("))
+        for match in _NEXT_HANDLER.finditer(content):
+            add(match.group(1), route, match.start(), match.group(1))
+    page = re.search(r"/pages(/api/.*?)(?:/index)?\.(?:js|ts)x?$", norm)
+    if page and "export default" in content:
+        add("ANY", page.group(1), content.index("export default"))
+    return endpoints
+
+
+def _decorated_endpoints(path: str, content: str) -> List[Dict]:
+    """NestJS / Spring controllers: a class-level prefix plus method-level mapping decorators."""
+    endpoints = []
+    request_mappings = list(_REQUEST_MAPPING.finditer(content))
+    mapped = {match.start() for match in request_mappings}
+    # A method-level @RequestMapping(method=...) is a route, not a controller prefix
+    controllers = [(m.start(), m.group(1)) for m in _DECORATED_CONTROLLER.finditer(content) if m.start() not in mapped]
+    for match in request_mappings:
+        prefix = next((p for start, p in reversed(controllers) if start < match.start()), "")
+        endpoints.append({"method": match.group(2).upper(), "path": _join(prefix, match.group(1)) or "/",
+                          "file": path, "line": _line(content, match.start()), "handler": ""})
+    for match in _DECORATED_ROUTE.finditer(content):
+        if match.start() in mapped:
+            continue
+        prefix = next((p for start, p in reversed(controllers) if start < match.start()), "")
+        route = _join("/" + prefix.strip("/") if prefix else "", match.group(2) or "") or "/"
+        method = "ANY" if match.group(1) == "All" else match.group(1).upper()
+        endpoints.append({"method": method, "path": route if route.startswith("/") else "/" + route,
+                          "file": path, "line": _line(content, match.start()), "handler": ""})
+    return endpoints
+
+
+def _js_models(path: str, content: str) -> List[Dict]:
+    models = []
+    entities = list(_ENTITY.finditer(content))
+    for i, match in enumerate(entities):
+        end = entities[i + 1].start() if i + 1 < len(entities) else len(content)
+        fields = _COLUMN.findall(content, match.end(), end)
+        models.append({"name": match.group(1), "file": path, "line": _line(content, match.start()),
+                       "kind": "typeorm", "fields": fields})
+    for match in _MONGOOSE.finditer(content):
+        schema = re.search(_SCHEMA.format(re.escape(match.group(2))), content)
+        models.append({"name": match.group(1), "file": path, "line": _line(content, match.start()),
+                       "kind": "mongoose", "fields": _object_keys(content, schema.end()) if schema else []})
+    for match in _SEQUELIZE.finditer(content):
+        models.append({"name": match.group(1), "file": path, "line": _line(content, match.start()),
+                       "kind": "sequelize", "fields": _object_keys(content, match.end())})
+    return models
+
+
+def _go_endpoints(path: str, content: str) -> List[Dict]:
+    return [{"method": "ANY" if m.group(1) in ("HandleFunc", "Handle") else m.group(1).upper(),
+             "path": m.group(2), "file": path, "line": _line(content, m.start()), "handler": ""}
+            for m in _GO_ROUTE.finditer(content) if m.group(2).startswith("/")]
+
+
+# ---- Public API ----
+
+def extract_api(path: str, content: str, tree: Optional[ast.Module] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    (endpoints, models) defined in one file; files that don't parse yield nothing.
+    tree is the already parsed module of a Python file, if the caller has it.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".py":
+        if not any(hint in content for hint in _PY_HINTS):
+            return [], []
+        if tree is None:
+            try:
+                tree = ast.parse(content)
+            except (SyntaxError, ValueError, RecursionError):
+                return [], []
+        return _python_endpoints(path, tree, content), _python_models(path, tree, content)
+    if ext in JS_EXTENSIONS:
+        if not any(hint in content for hint in _JS_HINTS):
+            return [], []
+        return _js_endpoints(path, content), _js_models(path, content)
+    if ext == ".go":
+        return _go_endpoints(path, content), []
+    if ext in JVM_EXTENSIONS:
+        return _decorated_endpoints(path, content), []
+    return [], []
+
+
+def _extract_item(item: Tuple[str, str]) -> Tuple[List[Dict], List[Dict]]:
+    return extract_api(*item)
+
+
+def is_scanned(path: str) -> bool:
+    """Whether extract_api looks at this file type (others keep the LLM's endpoints/models)."""
+    ext = os.path.splitext(path)[1].lower()
+    return ext == ".py" or ext == ".go" or ext in JS_EXTENSIONS or ext in JVM_EXTENSIONS
+
+
+def extract_all(code_samples: Dict[str, str], workers: Optional[int] = None,
+                known: Optional[Dict[str, Tuple[List[Dict], List[Dict]]]] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    (endpoints, models) across all of code_samples, in path order. Like
+    build_symbol_table, runs in the shared process pool on large repos.
+    known holds results already extracted per file (the Python files of
+    SourceIndex.python_api); only the other files are scanned.
+    """
+    known = known or {}
+    items = sorted((path, content) for path, content in code_samples.items()
+                   if is_scanned(path) and path not in known)
+    scanned = None
+    if (workers or MAX_WORKERS) > 1 and len(items) >= PARALLEL_MIN_FILES:
+        scanned = pool_map(_extract_item, items, max(1, len(items) // (MAX_WORKERS * 4)))
+    if scanned is None:
+        scanned = [_extract_item(item) for item in items]
+    by_path = {**dict(zip((path for path, _ in items), scanned)),
+               **{path: api for path, api in known.items() if path in code_samples}}
+    results = [by_path[path] for path in sorted(by_path)]
+    endpoints = [e for file_endpoints, _ in results for e in file_endpoints]
+    models = [m for _, file_models in results for m in file_models]
+    return endpoints, models
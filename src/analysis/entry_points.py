@@ -0,0 +1,341 @@
+"""Local entry-point and architecture detection, so the navigator can skip or shrink its LLM call.
+
+Entry-point signals (each with a weight; a file's signals combine as 1 - prod(1 - w)):
+- `if __name__ == "__main__"`, `__main__.py`, `func main` in `package main`, `fn main` in src/main.rs,
+  `static void main` and other language-level mains
+- console_scripts / [project.scripts], package.json `main`/`bin`/`scripts`, Dockerfile `CMD`/`ENTRYPOINT`
+- files that build and run an app (`Flask(__name__)`, `uvicorn.run`, `.listen(`, `mainloop()`)
+- conventional names (main.py, app.py, manage.py, index.js, ...) near the root
+
+The architecture type comes from framework imports (symbol table) and declared
+dependencies, notebooks, Dockerfiles and infrastructure files, with a confidence
+that drops when the evidence is thin or points two ways.
+"""
+import json
+import os
+import re
+import shlex
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.analysis.import_graph import python_modules
+from src.analysis.manifests import parse_manifests
+
+MAX_ENTRY_POINTS = 10
+# Combined weight a file needs to be reported as an entry point
+MIN_ENTRY_SCORE = 0.5
+MAX_CORE_MODULES = 12
+
+# Directories whose mains are demos or tooling, not the application
+_SKIPPED_DIRS = {"test", "tests", "__tests__", "spec", "docs", "doc", "site-packages"}
+_MINOR_DIRS = {"examples", "example", "samples", "benchmarks", "scripts", "tools"}
+
+_CONVENTIONAL_NAMES = {
+    "main.py", "app.py", "manage.py", "run.py", "server.py", "wsgi.py", "asgi.py", "__main__.py",
+    "index.js", "index.ts", "server.js", "server.ts", "app.js", "app.ts", "main.js", "main.ts",
+    "main.go", "main.rs", "Program.cs", "Main.java", "Main.kt", "main.c", "main.cpp",
+}
+
+# (regex, weight, signal) over file contents, by extension
+_CONTENT_SIGNALS = {
+    ".py": [
+        (re.compile(r"""^if\s+__name__\s*==\s*['"]__main__['"]\s*:""", re.MULTILINE), 0.6, "__main__ guard"),
+        (re.compile(r"^\s*(?:app|application)\s*=\s*(?:Flask|FastAPI|Quart|Sanic|Starlette)\(", re.MULTILINE),
+         0.6, "creates the web app"),
+        (re.compile(r"\b(?:uvicorn|app|socketio)\.run\(|\.mainloop\(\)|\bexecute_from_command_line\("),
+         0.5, "runs the app"),
+        (re.compile(r"^import streamlit|^from streamlit import|^import gradio", re.MULTILINE), 0.5, "UI script"),
+    ],
+    ".js": [(re.compile(r"\.listen\(|ReactDOM\.(?:render|createRoot)\(|createRoot\("), 0.6, "starts the app")],
+    ".go": [(re.compile(r"^package main\b[\s\S]*^func main\(\)", re.MULTILINE), 0.85, "func main")],
+    ".rs": [(re.compile(r"^\s*(?:async\s+)?fn main\(\)", re.MULTILINE), 0.5, "fn main")],
+    ".java": [(re.compile(r"\bpublic\s+static\s+void\s+main\s*\("), 0.7, "static main")],
+    ".kt": [(re.compile(r"^fun main\(", re.MULTILINE), 0.7, "fun main")],
+    ".cs": [(re.compile(r"\bstatic\s+(?:async\s+)?(?:void|int|Task(?:<int>)?)\s+Main\s*\("), 0.7, "static Main")],
+    ".c": [(re.compile(r"^int\s+main\s*\(", re.MULTILINE), 0.7, "int main")],
+    ".swift": [(re.compile(r"^@main\b", re.MULTILINE), 0.8, "@main")],
+}
+for _ext in (".ts", ".jsx", ".tsx", ".mjs"):
+    _CONTENT_SIGNALS[_ext] = _CONTENT_SIGNALS[".js"]
+_CONTENT_SIGNALS[".cpp"] = _CONTENT_SIGNALS[".c"]
+
+# Import / dependency name prefixes per application kind
+FRAMEWORKS = {
+    "backend": ("flask", "fastapi", "django", "starlette", "tornado", "aiohttp", "sanic", "bottle", "falcon",
+                "pyramid", "quart", "express", "koa", "fastify", "@nestjs/core", "@hapi/hapi",
+                "github.com/gin-gonic/gin", "github.com/labstack/echo", "github.com/gofiber/fiber",
+                "github.com/gorilla/mux", "org.springframework", "io.ktor", "actix_web", "actix-web", "axum",
+                "rocket", "sinatra", "rails", "laravel", "Microsoft.AspNetCore"),
+    "frontend": ("react", "react-dom", "vue", "svelte", "@angular/core", "next", "nuxt", "solid-js", "preact"),
+    "web_ui": ("streamlit", "gradio", "dash", "nicegui"),
+    "gui": ("tkinter", "customtkinter", "PyQt5", "PyQt6", "PySide2", "PySide6", "kivy", "wx", "electron",
+            "javafx", "javax.swing", "dearpygui", "pygame"),
+    "mobile": ("react-native", "expo", "UIKit", "SwiftUI", "androidx", "android"),
+    "data": ("sklearn", "scikit-learn", "torch", "tensorflow", "keras", "xgboost", "lightgbm", "transformers",
+             "pandas", "matplotlib", "seaborn"),
+    "cli": ("argparse", "click", "typer", "fire", "docopt", "commander", "yargs", "github.com/spf13/cobra", "clap"),
+}
+_APP_KINDS = ("backend", "frontend", "web_ui", "gui", "mobile", "data")
+
+_SCRIPT_SECTIONS = re.compile(r"^\[(?:project\.(?:gui-)?scripts|tool\.poetry\.scripts)\]\s*$(.*?)(?=^\[|\Z)",
+                              re.MULTILINE | re.DOTALL)
+_SCRIPT_ENTRY = re.compile(r"""[\w.-]+\s*=\s*["']?\s*([A-Za-z_][\w.]*)\s*:\s*[A-Za-z_][\w.]*""")
+_DOCKER_COMMAND = re.compile(r"^\s*(?:CMD|ENTRYPOINT)\s+(.+)$", re.MULTILINE | re.IGNORECASE)
+
+
+def _skipped(path: str) -> bool:
+    return any(part in _SKIPPED_DIRS for part in path.split("/")[:-1])
+
+
+def _minor(path: str) -> bool:
+    return any(part in _MINOR_DIRS for part in path.split("/")[:-1])
+
+
+def _matches(name: str, prefixes: Iterable[str]) -> Optional[str]:
+    for prefix in prefixes:
+        if name == prefix or name.startswith((prefix + ".", prefix + "/")):
+            return prefix
+    return None
+
+
+def _load_json(text: str) -> Dict:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+class _EntryPoints:
+    """Collects weighted entry-point signals per file."""
+
+    def __init__(self, code_samples: Dict[str, str]):
+        self.files = set(code_samples)
+        self.modules = python_modules(code_samples)
+        self.signals: Dict[str, List[Tuple[float, str]]] = {}
+
+    def add(self, path: Optional[str], weight: float, signal: str):
+        if path is None or path not in self.files or _skipped(path):
+            return
+        if _minor(path):
+            weight *= 0.5
+        self.signals.setdefault(path, []).append((weight, signal))
+
+    def module(self, name: str) -> Optional[str]:
+        """File for a dotted module (`pkg.cli`), preferring pkg/cli/__main__.py for `python -m`."""
+        return self.modules.get(name + ".__main__") or self.modules.get(name)
+
+    def file(self, token: str, base_dir: str = "") -> Optional[str]:
+        """File named by a command-line token, relative to base_dir or anywhere in the repo."""
+        token = token.strip("\"'").lstrip("/")
+        if token.startswith("./"):
+            token = token[2:]
+        for candidate in (os.path.normpath(os.path.join(base_dir, token)) if base_dir else token, token):
+            if candidate in self.files:
+                return candidate
+        # Containers usually copy the repo into a WORKDIR such as /app or /usr/src/app
+        suffix = [f for f in self.files if f.endswith("/" + token)] if "." in os.path.basename(token) else []
+        return min(suffix, key=len) if suffix else None
+
+    def command(self, command: str, base_dir: str, weight: float, signal: str):
+        """Entry points named in a shell command (node server.js, python -m pkg, uvicorn app.main:app)."""
+        try:
+            tokens = shlex.split(command)
+        except ValueError:
+            tokens = command.split()
+        for i, token in enumerate(tokens):
+            if token == "-m" and i + 1 < len(tokens):
+                self.add(self.module(tokens[i + 1]), weight, signal)
+            elif re.fullmatch(r"[A-Za-z_][\w.]*:[A-Za-z_]\w*(?:\(\))?", token):
+                self.add(self.module(token.split(":")[0]), weight, signal)
+            elif "." in os.path.basename(token):
+                self.add(self.file(token, base_dir), weight, signal)
+
+    def scores(self) -> Dict[str, float]:
+        combined = {}
+        for path, signals in self.signals.items():
+            remaining = 1.0
+            for weight, _ in signals:
+                remaining *= 1 - weight
+            combined[path] = 1 - remaining
+        return combined
+
+
+def _collect_entry_points(code_samples: Dict[str, str], config_files: Dict[str, str]) -> _EntryPoints:
+    found = _EntryPoints(code_samples)
+    for path, content in code_samples.items():
+        name = os.path.basename(path)
+        if name in _CONVENTIONAL_NAMES and path.count("/") <= 2:
+            found.add(path, 0.8 if name == "__main__.py" else 0.4, f"conventional name {name}")
+        if path.endswith(("src/main.rs", "/main.rs")) or "/src/bin/" in f"/{path}":
+            found.add(path, 0.9, "Rust binary target")
+        for pattern, weight, signal in _CONTENT_SIGNALS.get(os.path.splitext(path)[1], ()):
+            if pattern.search(content):
+                found.add(path, weight, signal)
+
+    for path, content in config_files.items():
+        name, base_dir = os.path.basename(path), os.path.dirname(path)
+        if name == "pyproject.toml":
+            for section in _SCRIPT_SECTIONS.finditer(content):
+                for match in _SCRIPT_ENTRY.finditer(section.group(1)):
+                    found.add(found.module(match.group(1)), 0.9, "console script")
+        elif name in ("setup.py", "setup.cfg") and "console_scripts" in content:
+            for match in _SCRIPT_ENTRY.finditer(content[content.index("console_scripts"):]):
+                found.add(found.module(match.group(1)), 0.9, "console script")
+        elif name == "package.json":
+            data = _load_json(content)
+            if isinstance(data.get("main"), str):
+                found.add(found.file(data["main"], base_dir), 0.7, "package.json main")
+            bins = data.get("bin")
+            for target in ([bins] if isinstance(bins, str) else list(bins.values()) if isinstance(bins, dict) else []):
+                if isinstance(target, str):
+                    found.add(found.file(target, base_dir), 0.9, "package.json bin")
+            scripts = data.get("scripts") if isinstance(data.get("scripts"), dict) else {}
+            for key in ("start", "dev", "serve", "server"):
+                if isinstance(scripts.get(key), str):
+                    found.command(scripts[key], base_dir, 0.8, f"npm {key} script")
+        elif name == "Dockerfile":
+            for match in _DOCKER_COMMAND.finditer(content):
+                command = match.group(1).strip()
+                if command.startswith("["):
+                    parts = _load_json(f'{{"c": {command}}}').get("c")
+                    command = " ".join(shlex.quote(str(p)) for p in parts) if isinstance(parts, list) else command
+                found.command(command, base_dir, 0.85, "Dockerfile CMD/ENTRYPOINT")
+    return found
+
+
+def _imported_names(symbol_table: Dict[str, Dict]) -> Counter:
+    """Files importing each third-party/stdlib name (relative imports skipped)."""
+    counts = Counter()
+    for symbols in symbol_table.values():
+        counts.update({name for name in symbols.get("imports", []) if not name.startswith(".")})
+    return counts
+
+
+def _framework_evidence(symbol_table: Dict[str, Dict], packages: List[str]) -> Dict[str, Tuple[float, List[str]]]:
+    """Strength (0..1) and named frameworks per application kind."""
+    imported = _imported_names(symbol_table)
+    declared = {p.lower() for p in packages}
+    evidence = {}
+    for kind, prefixes in FRAMEWORKS.items():
+        files, names = 0, Counter()
+        for name, count in imported.items():
+            prefix = _matches(name, prefixes)
+            if prefix:
+                files += count
+                names[prefix] += count
+        hits = files + 2 * sum(1 for p in prefixes if p.lower() in declared)
+        names.update({p: 1 for p in prefixes if p.lower() in declared})
+        if hits:
+            evidence[kind] = (1 - 0.5 ** hits, [n for n, _ in names.most_common(3)])
+    return evidence
+
+
+def _architecture(evidence: Dict[str, Tuple[float, List[str]]], file_tree: List[Dict], code_samples: Dict[str, str],
+                  config_files: Dict[str, str], entry_scores: Dict[str, float],
+                  console_scripts: bool) -> Tuple[str, float, List[str]]:
+    """(architecture type, confidence, signals) using the navigator's architecture vocabulary."""
+    strength = {kind: evidence[kind][0] for kind in evidence}
+
+    def named(*kinds: str) -> List[str]:
+        return [f"{kind}: {', '.join(evidence[kind][1])}" for kind in kinds if kind in evidence]
+
+    def contested(chosen: Tuple[str, ...]) -> float:
+        # Strong evidence for a different kind of application lowers confidence
+        others = [strength[k] for k in _APP_KINDS if k not in chosen and k in strength and k != "data"]
+        return 1 - 0.3 * max(others, default=0)
+
+    paths = [item["path"] for item in file_tree if item.get("type", "blob") == "blob"] or list(code_samples)
+    extensions = Counter(os.path.splitext(p)[1].lower() for p in paths)
+    dockerfiles = {os.path.dirname(p) for p in config_files if os.path.basename(p) == "Dockerfile"}
+    compose_builds = sum(len(re.findall(r"^\s+build:", c, re.MULTILINE))
+                         for p, c in config_files.items() if os.path.basename(p).startswith("docker-compose"))
+
+    if strength.get("mobile", 0) >= 0.5:
+        return "Mobile Application", strength["mobile"], named("mobile")
+    if len(dockerfiles) >= 3 or compose_builds >= 3:
+        services = max(len(dockerfiles), compose_builds)
+        return "Microservices", 0.8, [f"{services} separately built services"]
+    if strength.get("backend", 0) >= 0.5 and strength.get("frontend", 0) >= 0.5:
+        return ("Web Application (Full-Stack)", min(strength["backend"], strength["frontend"]),
+                named("backend", "frontend"))
+    if strength.get("web_ui", 0) >= 0.5:
+        return "Web Application (Full-Stack)", strength["web_ui"] * contested(("web_ui",)), named("web_ui")
+    if strength.get("gui", 0) >= 0.5:
+        return "Desktop GUI Application", strength["gui"] * contested(("gui",)), named("gui")
+    if strength.get("backend", 0) >= 0.5:
+        return "Web API / REST Service", strength["backend"] * contested(("backend",)), named("backend")
+    if strength.get("frontend", 0) >= 0.5:
+        # A SPA without its own backend; the vocabulary has no closer type
+        return "Web Application (Full-Stack)", strength["frontend"] * 0.7, named("frontend")
+
+    notebooks = extensions.get(".ipynb", 0)
+    data = 1 - (1 - strength.get("data", 0)) * 0.5 ** notebooks
+    if data >= 0.75:
+        return "Data Science / ML Pipeline", data, named("data") + ([f"{notebooks} notebooks"] if notebooks else [])
+    if console_scripts or (strength.get("cli", 0) >= 0.5 and entry_scores):
+        signals = named("cli") + (["console scripts"] if console_scripts else [])
+        return "CLI Tool", max(strength.get("cli", 0), 0.75 if console_scripts else 0) * 0.9, signals
+
+    infra = extensions.get(".tf", 0) + sum(1 for p in paths if "/roles/" in p or "playbook" in p)
+    if infra and infra >= len(code_samples):
+        return "DevOps / Infrastructure", 0.8, [f"{infra} Terraform/Ansible files"]
+    web_static = extensions.get(".html", 0) + extensions.get(".css", 0)
+    if web_static and not any(ext in extensions for ext in (".py", ".go", ".java", ".rs", ".rb", ".php", ".cs")):
+        return "Static Website", 0.7, [f"{web_static} HTML/CSS files, no server code"]
+    packaging = {"setup.py", "pyproject.toml", "setup.cfg", "Cargo.toml", "package.json"}
+    if not entry_scores and any(os.path.basename(p) in packaging for p in config_files):
+        return "Library / Package", 0.6, ["packaging config, no entry points"]
+    return "unknown", 0.0, []
+
+
+def _core_modules(code_samples: Dict[str, str], entry_points: List[str]) -> List[str]:
+    """Directories holding the most source files (one level into src/-style roots), then entry points."""
+    counts = Counter()
+    for path in code_samples:
+        parts = path.split("/")[:-1]
+        if not parts or _skipped(path):
+            continue
+        depth = 2 if parts[0] in ("src", "lib", "app", "pkg", "internal", "packages") and len(parts) > 1 else 1
+        counts["/".join(parts[:depth]) + "/"] += 1
+    modules = [d for d, n in counts.most_common() if n >= 2][:MAX_CORE_MODULES]
+    return modules + [e for e in entry_points if e not in modules]
+
+
+def detect_structure(code_samples: Dict[str, str], config_files: Dict[str, str],
+                     file_tree: Optional[List[Dict]] = None,
+                     symbol_table: Optional[Dict[str, Dict]] = None,
+                     dependencies: Optional[List[Dict]] = None) -> Dict:
+    """
+    Detect entry points and the architecture type locally. dependencies are the
+    parsed manifests (parsed from config_files when not given).
+    Returns {entry_points, architecture_type, core_modules, frameworks,
+    confidence: {entry_points, architecture_type, overall}, evidence: {entry_points, architecture_type}}.
+    """
+    found = _collect_entry_points(code_samples, config_files)
+    scores = {p: s for p, s in found.scores().items() if s >= MIN_ENTRY_SCORE}
+    entry_points = sorted(scores, key=lambda p: (-scores[p], p))[:MAX_ENTRY_POINTS]
+    console_scripts = any(sig == "console script" for signals in found.signals.values() for _, sig in signals)
+
+    if dependencies is None:
+        dependencies = parse_manifests(config_files)
+    evidence = _framework_evidence(symbol_table or {}, [d["name"] for d in dependencies])
+    architecture, arch_confidence, arch_signals = _architecture(
+        evidence, file_tree or [], code_samples, config_files, scores, console_scripts)
+    entry_confidence = scores[entry_points[0]] if entry_points else 0.0
+
+    return {
+        "entry_points": entry_points,
+        "architecture_type": architecture,
+        "core_modules": _core_modules(code_samples, entry_points),
+        "frameworks": sorted({name for kind in _APP_KINDS if kind in evidence for name in evidence[kind][1]}),
+        "confidence": {
+            "entry_points": round(entry_confidence, 2),
+            "architecture_type": round(arch_confidence, 2),
+            "overall": round(min(entry_confidence, arch_confidence), 2),
+        },
+        "evidence": {
+            "entry_points": {p: [sig for _, sig in found.signals[p]] for p in entry_points},
+            "architecture_type": arch_signals,
+        },
+    }
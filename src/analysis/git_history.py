@@ -0,0 +1,346 @@
+"""Git history analytics from a local mirror: churn, hotspots and ownership, without API calls.
+
+`git log --numstat` is streamed through an incremental parser into compact
+columnar arrays: one entry per commit (time, author) and one row per changed
+file per commit (commit, file, lines added, lines deleted). Paths and author
+names are interned, and renames are recorded so a file's history follows it.
+
+The log is saved in the cache directory together with the newest commit it
+covers. A later run only parses `<saved head>..<new head>` and appends it, so a
+nightly refresh costs as much as the day's commits; if history was rewritten
+(the saved head is no longer an ancestor) the log is rebuilt.
+
+Aggregates are computed with NumPy over the row arrays:
+- file_churn: commits touching each file in the last CHURN_WINDOW_DAYS
+- hotspots: recency-weighted churn (half-life HALF_LIFE_DAYS) times complexity
+- authors: commits and lines changed per author, and each file's main author
+All windows are measured back from the newest commit, so a dormant repo still
+shows what was active when it was last worked on.
+"""
+import os
+import re
+import subprocess
+import tempfile
+import time
+import zipfile
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.cache import CACHE_DIR
+
+HISTORY_DIR = os.path.join(CACHE_DIR, "history")
+# Commits read when a log is first built (0 = all); increments are never capped
+MAX_COMMITS = int(os.getenv("GITBRO_HISTORY_MAX_COMMITS", "10000"))
+CHURN_WINDOW_DAYS = 365
+HALF_LIFE_DAYS = 90
+MAX_HOTSPOTS = 20
+MAX_AUTHORS = 10
+
+_DAY = 86400
+# Commit header line: record separator, then sha, author time and author name
+_FORMAT = "--format=%x1e%H%x09%at%x09%aN"
+# "dir/{old => new}/file" or "old => new"
+_BRACED_RENAME = re.compile(r"^(.*)\{(.*) => (.*)\}(.*)$")
+# CommitLog's array attributes, as saved
+_ARRAYS = ("commit_time", "commit_author", "row_commit", "row_file", "row_added", "row_deleted")
+
+
+def _rename(path: str):
+    """(old, new) for a numstat rename path, None for a plain path."""
+    match = _BRACED_RENAME.match(path)
+    if match:
+        prefix, old, new, suffix = match.groups()
+        # An empty side ("{ => sub}") leaves a double slash behind
+        return (prefix + old + suffix).replace("//", "/"), (prefix + new + suffix).replace("//", "/")
+    if " => " in path:
+        old, new = path.split(" => ", 1)
+        return old, new
+    return None
+
+
+def _pack(strings: List[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(strings).encode("utf-8"), np.uint8)
+
+
+def _unpack(packed: np.ndarray) -> List[str]:
+    text = packed.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+
+class CommitLog:
+    """
+    Parsed `git log --numstat`, as columnar arrays. Commits: commit_time,
+    commit_author. Changed-file rows: row_commit, row_file, row_added,
+    row_deleted. files/authors are the interned strings; renames maps an old
+    path index to the index it was renamed to. head is the newest commit parsed.
+    """
+
+    def __init__(self):
+        self.head = ""
+        self.files: List[str] = []
+        self.authors: List[str] = []
+        self._file_index: Dict[str, int] = {}
+        self._author_index: Dict[str, int] = {}
+        self.renames: Dict[int, int] = {}
+        self.commit_time = array("q")
+        self.commit_author = array("I")
+        self.row_commit = array("I")
+        self.row_file = array("I")
+        self.row_added = array("I")
+        self.row_deleted = array("I")
+
+    def __len__(self) -> int:
+        return len(self.commit_time)
+
+    def _intern(self, value: str, values: List[str], index: Dict[str, int]) -> int:
+        i = index.get(value)
+        if i is None:
+            i = index[value] = len(values)
+            values.append(value)
+        return i
+
+    def feed(self, line: str):
+        """Parse one line of `git log --numstat` output (in the _FORMAT header format)."""
+        line = line.rstrip("\n")
+        if line.startswith("\x1e"):
+            sha, timestamp, author = line[1:].split("\t", 2)
+            if not self.head:
+                self.head = sha
+            self.commit_time.append(int(timestamp))
+            self.commit_author.append(self._intern(author, self.authors, self._author_index))
+            return
+        parts = line.split("\t", 2)
+        if len(parts) != 3 or not len(self.commit_time):
+            return
+        added, deleted, path = parts
+        renamed = _rename(path)
+        if renamed:
+            old, path = renamed
+            self.renames[self._intern(old, self.files, self._file_index)] = \
+                self._intern(path, self.files, self._file_index)
+        self.row_commit.append(len(self.commit_time) - 1)
+        self.row_file.append(self._intern(path, self.files, self._file_index))
+        # Binary files show "-" for both counts
+        self.row_added.append(int(added) if added.isdigit() else 0)
+        self.row_deleted.append(int(deleted) if deleted.isdigit() else 0)
+
+    def extend(self, newer: "CommitLog"):
+        """Append a log of later commits (parsed from `<self.head>..<newer head>`)."""
+        offset = len(self.commit_time)
+        authors = array("I", (self._intern(a, self.authors, self._author_index) for a in newer.authors))
+        files = array("I", (self._intern(f, self.files, self._file_index) for f in newer.files))
+        self.commit_time.extend(newer.commit_time)
+        self.commit_author.extend(authors[a] for a in newer.commit_author)
+        self.row_commit.extend(c + offset for c in newer.row_commit)
+        self.row_file.extend(files[f] for f in newer.row_file)
+        self.row_added.extend(newer.row_added)
+        self.row_deleted.extend(newer.row_deleted)
+        self.renames.update({files[old]: files[new] for old, new in newer.renames.items()})
+        self.head = newer.head or self.head
+
+    # ---- Persistence ----
+
+    def save(self, path: str):
+        """Write the log to path (.npz), atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        renames = np.array(sorted(self.renames.items()), np.int64).reshape(-1, 2)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp, head=_pack([self.head]), files=_pack(self.files), authors=_pack(self.authors), renames=renames,
+            **{name: np.frombuffer(getattr(self, name), getattr(self, name).typecode) for name in _ARRAYS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CommitLog"]:
+        """The log saved at path, or None if there is none (or it can't be read)."""
+        try:
+            with np.load(path) as data:
+                log = cls()
+                log.head = _unpack(data["head"])[0]
+                log.files, log.authors = _unpack(data["files"]), _unpack(data["authors"])
+                log.renames = {int(old): int(new) for old, new in data["renames"]}
+                for name in _ARRAYS:
+                    getattr(log, name).frombytes(data[name].tobytes())
+        except (OSError, KeyError, ValueError, IndexError, zipfile.BadZipFile):
+            return None
+        log._file_index = {f: i for i, f in enumerate(log.files)}
+        log._author_index = {a: i for i, a in enumerate(log.authors)}
+        return log
+
+    # ---- Aggregates ----
+
+    def _rows(self):
+        """(resolved file, time, author, lines changed) per row, as arrays."""
+        final = np.arange(len(self.files))
+        for old in self.renames:
+            seen, new = {old}, self.renames[old]
+            while new in self.renames and new not in seen:
+                seen.add(new)
+                new = self.renames[new]
+            final[old] = new
+        commits = np.frombuffer(self.row_commit, np.uint32)
+        files = final[np.frombuffer(self.row_file, np.uint32)]
+        times = np.frombuffer(self.commit_time, np.int64)[commits]
+        authors = np.frombuffer(self.commit_author, np.uint32)[commits].astype(np.int64)
+        lines = (np.frombuffer(self.row_added, np.uint32).astype(np.int64)
+                 + np.frombuffer(self.row_deleted, np.uint32))
+        return files, times, authors, lines
+
+    def _newest(self) -> int:
+        return int(max(self.commit_time)) if len(self.commit_time) else 0
+
+    def file_churn(self, window_days: int = CHURN_WINDOW_DAYS) -> Dict[str, int]:
+        """Commits touching each file in the window_days before the newest commit."""
+        files, times, _, _ = self._rows()
+        recent = files[times >= self._newest() - window_days * _DAY]
+        counts = np.bincount(recent, minlength=len(self.files))
+        return {self.files[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+    def owners(self) -> Dict[str, str]:
+        """Main author of each file: the one who changed the most lines of it."""
+        files, _, authors, lines = self._rows()
+        if not len(files):
+            return {}
+        n_authors = len(self.authors)
+        pairs, inverse = np.unique(files * n_authors + authors, return_inverse=True)
+        changed = np.bincount(inverse, weights=lines)
+        # Per file, the pair with most lines sorts last
+        order = np.lexsort((changed, pairs // n_authors))
+        pair_files = pairs[order] // n_authors
+        last = np.flatnonzero(np.append(pair_files[1:] != pair_files[:-1], True))
+        return {self.files[int(pair_files[i])]: self.authors[int(pairs[order][i] % n_authors)] for i in last}
+
+    def hotspots(self, complexity: Optional[Dict[str, float]] = None, paths: Optional[Iterable[str]] = None,
+                 top: int = MAX_HOTSPOTS) -> List[Dict]:
+        """
+        Files that change often and recently (and, given per-file complexity
+        0..1, are complex), limited to `paths` when given. Returns
+        [{path, commits, lines_changed, authors, owner, score}] best first.
+        """
+        files, times, authors, lines = self._rows()
+        if not len(files):
+            return []
+        n = len(self.files)
+        decay = np.power(0.5, (self._newest() - times) / (HALF_LIFE_DAYS * _DAY))
+        recency = np.bincount(files, weights=decay, minlength=n)
+        commits = np.bincount(files, minlength=n)
+        changed = np.bincount(files, weights=lines, minlength=n)
+        distinct = np.unique(files * len(self.authors) + authors) // len(self.authors)
+        author_counts = np.bincount(distinct, minlength=n)
+
+        score = recency / recency.max()
+        if complexity is not None:
+            score = score * np.array([complexity.get(f, 0.0) for f in self.files])
+        if paths is not None:
+            keep = set(paths)
+            score = score * np.array([f in keep for f in self.files])
+        owners = self.owners()
+        best = [i for i in np.lexsort((np.arange(n), -score))[:top] if score[i] > 0]
+        return [{"path": self.files[i], "commits": int(commits[i]), "lines_changed": int(changed[i]),
+                 "authors": int(author_counts[i]), "owner": owners.get(self.files[i], ""),
+                 "score": round(float(score[i]), 3)} for i in best]
+
+    def top_authors(self, top: int = MAX_AUTHORS) -> List[Dict]:
+        """Authors with the most commits: [{name, commits, lines_changed, files}]."""
+        if not len(self.commit_time):
+            return []
+        files, _, authors, lines = self._rows()
+        m = len(self.authors)
+        commits = np.bincount(np.frombuffer(self.commit_author, np.uint32), minlength=m)
+        changed = np.bincount(authors, weights=lines, minlength=m)
+        touched = np.bincount(np.unique(authors * len(self.files) + files) // len(self.files), minlength=m)
+        best = np.lexsort((-changed, -commits))[:top]
+        return [{"name": self.authors[i], "commits": int(commits[i]), "lines_changed": int(changed[i]),
+                 "files": int(touched[i])} for i in best]
+
+    def summary(self, complexity: Optional[Dict[str, float]] = None,
+                paths: Optional[Iterable[str]] = None) -> Dict:
+        """JSON-friendly overview: commit/author counts, time span, hotspots and top authors."""
+        times = np.frombuffer(self.commit_time, np.int64)
+        return {
+            "head": self.head,
+            "commits": len(self),
+            "authors": len(self.authors),
+            "first_commit_at": int(times.min()) if len(times) else None,
+            "last_commit_at": int(times.max()) if len(times) else None,
+            "hotspots": self.hotspots(complexity, paths),
+            "top_authors": self.top_authors(),
+        }
+
+
+def parse_log(lines: Iterable[str]) -> CommitLog:
+    """Parse `git log --numstat` output (with the _FORMAT header) line by line."""
+    log = CommitLog()
+    for line in lines:
+        log.feed(line)
+    return log
+
+
+def _stream_log(git_dir: str, revisions: str, max_commits: int = 0, deadline: Optional[float] = None) -> CommitLog:
+    """
+    Run git log over revisions and parse its output as it streams in.
+    Past a time.monotonic() deadline git is killed and TimeoutError raised.
+    """
+    args = ["git", "--git-dir", git_dir, "-c", "core.quotepath=off", "log", "--no-merges",
+            "--numstat", "-M", _FORMAT]
+    if max_commits:
+        args.append(f"--max-count={max_commits}")
+    # stderr goes to a file: a full stderr pipe would stall git while we read stdout
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(args + [revisions, "--"], stdout=subprocess.PIPE, stderr=stderr,
+                              text=True, encoding="utf-8", errors="replace") as proc:
+            log = CommitLog()
+            for line in proc.stdout:
+                if deadline is not None and time.monotonic() > deadline:
+                    proc.kill()
+                    raise TimeoutError("git log did not finish within the history time budget")
+                log.feed(line)
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"git log failed: {stderr.read().decode(errors='ignore').strip()}")
+    return log
+
+
+def _git(git_dir: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "--git-dir", git_dir, *args], capture_output=True, text=True)
+
+
+def history_path(owner: str, repo: str) -> str:
+    """Where the commit log of owner/repo is cached."""
+    return os.path.join(HISTORY_DIR, f"{owner}__{repo}.npz")
+
+
+def load_history(git_dir: str, cache_path: str, max_commits: int = MAX_COMMITS,
+                 deadline: Optional[float] = None) -> CommitLog:
+    """
+    The commit log of the mirror at git_dir up to its HEAD, reusing the log
+    cached at cache_path and parsing only the commits added since.
+    Raises TimeoutError if parsing isn't done by the time.monotonic() deadline.
+    """
+    head = _git(git_dir, "rev-parse", "HEAD")
+    if head.returncode != 0:
+        raise RuntimeError(f"git rev-parse failed: {head.stderr.strip()}")
+    head = head.stdout.strip()
+
+    log = CommitLog.load(cache_path)
+    if log is not None and log.head == head:
+        return log
+    if log is not None and log.head and _git(git_dir, "merge-base", "--is-ancestor", log.head, head).returncode == 0:
+        log.extend(_stream_log(git_dir, f"{log.head}..{head}", deadline=deadline))
+    else:
+        log = _stream_log(git_dir, head, max_commits, deadline)
+    log.head = head
+    log.save(cache_path)
+    return log
+
+
+def recent_commits(git_dir: str, max_commits: int = 15) -> List[Dict]:
+    """Latest commits from the mirror, shaped like GitHubClient.get_recent_commits."""
+    result = _git(git_dir, "log", f"--max-count={max_commits}", "--format=%h%x09%an%x09%as%x09%s")
+    commits = []
+    for line in result.stdout.splitlines() if result.returncode == 0 else []:
+        sha, author, date, message = line.split("\t", 3)
+        commits.append({"sha": sha[:7], "message": message[:120], "author": author, "date": date})
+    return commits
@@ -0,0 +1,202 @@
+"""Import graph of the analyzed repo: which source file imports which, resolved to paths.
+
+Python and JS/TS imports are resolved to files in code_samples; imports of
+third-party packages and the standard library are not edges. The graph is
+stored as compressed sparse rows (CSR) in `array` buffers, both directions,
+so a 100k-file repo costs a few bytes per edge and neighbour queries are a
+slice.
+"""
+import os
+import posixpath
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.analysis.symbols import extract_symbols
+
+PYTHON_EXTENSIONS = {".py"}
+JS_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs")
+# Directories commonly put on sys.path / used as a TS baseUrl, so `pkg.x` can live in `src/pkg/x.py`
+SOURCE_ROOTS = ("src", "lib", "python", "source")
+# Path aliases that conventionally mean "the source root" in JS/TS projects
+JS_ALIASES = ("@/", "~/", "src/")
+
+_PY_IMPORT = re.compile(r"^[ \t]*import[ \t]+([\w. \t,]+)", re.MULTILINE)
+_PY_FROM = re.compile(r"^[ \t]*from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^\n#;]+)", re.MULTILINE)
+
+
+class ImportGraph:
+    """
+    Directed graph over source files, edges from importer to imported file.
+    Nodes are indexed by position in `paths`; out-edges of node i are
+    targets[offsets[i]:offsets[i + 1]], in-edges likewise in the reverse arrays.
+    """
+
+    def __init__(self, paths: List[str], edges: List[Tuple[int, int]]):
+        self.paths = paths
+        self.index = {path: i for i, path in enumerate(paths)}
+        self.offsets, self.targets = _csr(len(paths), edges)
+        self.rev_offsets, self.rev_targets = _csr(len(paths), [(dst, src) for src, dst in edges])
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def _neighbours(self, offsets: array, targets: array, path: str) -> List[str]:
+        i = self.index.get(path)
+        if i is None:
+            return []
+        return [self.paths[j] for j in targets[offsets[i]:offsets[i + 1]]]
+
+    def imports(self, path: str) -> List[str]:
+        """Files that path imports."""
+        return self._neighbours(self.offsets, self.targets, path)
+
+    def importers(self, path: str) -> List[str]:
+        """Files that import path."""
+        return self._neighbours(self.rev_offsets, self.rev_targets, path)
+
+    def in_degree(self, path: str) -> int:
+        i = self.index.get(path)
+        return 0 if i is None else self.rev_offsets[i + 1] - self.rev_offsets[i]
+
+    def out_degree(self, path: str) -> int:
+        i = self.index.get(path)
+        return 0 if i is None else self.offsets[i + 1] - self.offsets[i]
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        """All edges as (source index, target index)."""
+        for i in range(len(self.paths)):
+            for j in self.targets[self.offsets[i]:self.offsets[i + 1]]:
+                yield i, j
+
+    def most_imported(self, k: int = 10) -> List[Tuple[str, int]]:
+        """The k files with the most importers, as (path, in-degree)."""
+        degrees = [(self.rev_offsets[i + 1] - self.rev_offsets[i], i) for i in range(len(self.paths))]
+        degrees.sort(key=lambda item: (-item[0], self.paths[item[1]]))
+        return [(self.paths[i], d) for d, i in degrees[:k] if d]
+
+
+def _csr(n: int, edges: List[Tuple[int, int]]) -> Tuple[array, array]:
+    """Counting sort of edges by source into (offsets, targets)."""
+    offsets = array("I", [0]) * (n + 1)
+    for src, _ in edges:
+        offsets[src + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    targets = array("I", [0]) * len(edges)
+    cursor = array("I", offsets[:n])
+    for src, dst in edges:
+        targets[cursor[src]] = dst
+        cursor[src] += 1
+    return offsets, targets
+
+
+# ---- Python ----
+
+def _python_module_names(path: str) -> List[str]:
+    """Dotted names a .py file can be imported as: from the repo root and from any source root."""
+    parts = path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    if not parts:
+        return []
+    names = [".".join(parts)]
+    for i, part in enumerate(parts[:-1]):
+        if part in SOURCE_ROOTS:
+            names.append(".".join(parts[i + 1:]))
+    return names
+
+
+def python_modules(paths) -> Dict[str, str]:
+    """Dotted module name -> .py file, for every name each file can be imported as."""
+    # Names from the repo root win over the same name under a source root
+    python_names = [(path, _python_module_names(path)) for path in paths if path.endswith(".py")]
+    modules: Dict[str, str] = {names[0]: path for path, names in python_names if names}
+    for path, names in python_names:
+        for name in names[1:]:
+            modules.setdefault(name, path)
+    return modules
+
+
+def _python_imports(content: str) -> List[Tuple[str, List[str]]]:
+    """(module, imported names) per import statement; names is [] for `import x`."""
+    found = []
+    for match in _PY_IMPORT.finditer(content):
+        for item in match.group(1).split(","):
+            module = item.split(" as ")[0].strip()
+            if module:
+                found.append((module, []))
+    for match in _PY_FROM.finditer(content):
+        names = [n.split(" as ")[0].strip() for n in match.group(2).strip("() \t").replace("\n", " ").split(",")]
+        found.append((match.group(1), [n for n in names if n and n != "*"]))
+    return found
+
+
+def _resolve_python(importer: str, module: str, names: List[str], modules: Dict[str, str]) -> List[str]:
+    """Files imported by one import statement (modules are registered by their repo-root dotted name)."""
+    base = module
+    if module.startswith("."):
+        level = len(module) - len(module.lstrip("."))
+        package = importer.split("/")[:-1]
+        package = package[:max(0, len(package) - (level - 1))]
+        base = ".".join(package + ([module[level:]] if module[level:] else []))
+
+    # `from pkg import mod` imports the submodule pkg.mod when there is one
+    submodules = [modules.get(f"{base}.{name}" if base else name) for name in names]
+    resolved = [path for path in submodules if path is not None]
+    if not resolved and base in modules:
+        resolved.append(modules[base])
+    return resolved
+
+
+# ---- JS/TS ----
+
+def _resolve_js(importer: str, specifier: str, files: set) -> Optional[str]:
+    if specifier.startswith("."):
+        bases = [posixpath.normpath(posixpath.join(posixpath.dirname(importer), specifier))]
+    else:
+        bases = [specifier]
+        for alias in JS_ALIASES:
+            if specifier.startswith(alias):
+                bases.append("src/" + specifier[len(alias):])
+    for base in bases:
+        if base in files:
+            return base
+        stem = os.path.splitext(base)[0] if base.endswith((".js", ".jsx", ".mjs", ".cjs")) else base
+        for ext in JS_EXTENSIONS:
+            # TS sources are imported with a .js extension under ESM resolution
+            for candidate in (stem + ext, f"{base}/index{ext}"):
+                if candidate in files:
+                    return candidate
+    return None
+
+
+def build_import_graph(code_samples: Dict[str, str], symbol_table: Optional[Dict[str, Dict]] = None) -> ImportGraph:
+    """
+    Build the import graph in one pass over code_samples. JS/TS imports are taken
+    from symbol_table when given (they are already extracted there).
+    Nodes are every Python and JS/TS file; edges are imports that resolve to one.
+    """
+    paths = sorted(p for p in code_samples
+                   if os.path.splitext(p)[1].lower() in PYTHON_EXTENSIONS or p.endswith(JS_EXTENSIONS))
+    index = {path: i for i, path in enumerate(paths)}
+    files = set(paths)
+
+    modules = python_modules(paths)
+
+    edges = set()
+    for path in paths:
+        src = index[path]
+        if path.endswith(".py"):
+            targets = [t for module, names in _python_imports(code_samples[path])
+                       for t in _resolve_python(path, module, names, modules)]
+        else:
+            symbols = (symbol_table or {}).get(path) or extract_symbols(path, code_samples[path]) or {}
+            targets = [_resolve_js(path, spec, files) for spec in symbols.get("imports", [])]
+        edges.update((src, index[t]) for t in targets if t is not None and t != path)
+
+    return ImportGraph(paths, sorted(edges))
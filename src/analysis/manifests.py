@@ -0,0 +1,402 @@
+"""Dependency manifests parsed into one normalized list, no LLM involved.
+
+Each dependency is {name, spec, scope, ecosystem, manifest}: spec is the version
+constraint as written ("" when unpinned), scope one of runtime, dev, test,
+optional, peer, build, provided, indirect. Supported manifests:
+requirements.txt, pyproject.toml (PEP 621, PEP 735 groups, Poetry), setup.cfg,
+Pipfile, package.json, go.mod, Cargo.toml, Gemfile and pom.xml.
+"""
+import configparser
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+SCOPES = ("runtime", "dev", "test", "optional", "peer", "build", "provided", "indirect")
+
+# name, extras, then everything up to an environment marker is the version spec
+_PEP508 = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(?:@\s*(\S+)|([^;]*))")
+_EGG = re.compile(r"#egg=([A-Za-z0-9][A-Za-z0-9._-]*)")
+_EDITABLE = re.compile(r"^(?:-e|--editable)(?:\s+|=)")
+# Per-requirement options after the requirement itself (--hash=..., --config-settings ...)
+_REQUIREMENT_OPTION = re.compile(r"\s+--?[A-Za-z]")
+# A backslash at the end of a line continues the requirement on the next line
+_CONTINUATION = re.compile(r"\\[ \t]*\r?\n")
+
+
+def _dependency(name: str, spec: str, scope: str, ecosystem: str, manifest: str) -> Dict:
+    return {"name": name, "spec": spec.strip(), "scope": scope, "ecosystem": ecosystem, "manifest": manifest}
+
+
+def _group_scope(group: str) -> str:
+    """Scope for a named dependency group (Poetry groups, extras, PEP 735)."""
+    group = group.lower()
+    if group in ("dev", "develop", "development", "lint", "docs", "typing"):
+        return "dev"
+    if group in ("test", "tests", "testing"):
+        return "test"
+    return "optional"
+
+
+def _table(value) -> Dict:
+    """value if it is a TOML table, else an empty one (manifests in fixtures and examples can be odd)."""
+    return value if isinstance(value, dict) else {}
+
+
+def _array(value) -> List:
+    return value if isinstance(value, list) else []
+
+
+# ---- TOML ----
+
+def _toml_value(text: str):
+    """Value of a TOML scalar, array or inline table (subset: strings, bools, numbers, nesting)."""
+    text = text.strip()
+    if text.startswith("["):
+        return [_toml_value(item) for item in _split_toml(text[1:text.rfind("]")])]
+    if text.startswith("{"):
+        table = {}
+        for item in _split_toml(text[1:text.rfind("}")]):
+            key, _, value = item.partition("=")
+            table[key.strip().strip("\"'")] = _toml_value(value)
+        return table
+    if text[:1] in ("'", '"'):
+        return text[1:text.find(text[0], 1)]
+    if text in ("true", "false"):
+        return text == "true"
+    return text
+
+
+def _split_toml(text: str) -> List[str]:
+    """Split an array/inline-table body on top-level commas."""
+    items, depth, quote, start = [], 0, "", 0
+    for i, ch in enumerate(text):
+        if quote:
+            quote = "" if ch == quote else quote
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            items.append(text[start:i])
+            start = i + 1
+    items.append(text[start:])
+    return [item for item in items if item.strip()]
+
+
+def _strip_comment(line: str) -> str:
+    quote = ""
+    for i, ch in enumerate(line):
+        if quote:
+            quote = "" if ch == quote else quote
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "#":
+            return line[:i]
+    return line
+
+
+def _parse_toml_subset(text: str) -> Dict:
+    """
+    Line-based TOML reader for the tables manifests use, tolerant of input
+    tomllib rejects (a file cut off mid-way, unsupported syntax).
+    """
+    root: Dict = {}
+    table = root
+    pending_key, pending = None, ""
+    for raw in text.splitlines():
+        line = _strip_comment(raw).strip()
+        if pending_key is not None:
+            pending += " " + line
+            if pending.count("[") <= pending.count("]") and pending.count("{") <= pending.count("}"):
+                table[pending_key] = _toml_value(pending)
+                pending_key = None
+            continue
+        if not line:
+            continue
+        header = re.match(r"^\[\[?([^\]]+)\]\]?$", line)
+        if header:
+            table = root
+            for part in re.findall(r'"[^"]*"|\'[^\']*\'|[^.]+', header.group(1)):
+                table = table.setdefault(part.strip().strip("\"'"), {})
+                if not isinstance(table, dict):
+                    table = {}
+            continue
+        key, eq, value = line.partition("=")
+        if not eq:
+            continue
+        key = key.strip().strip("\"'")
+        value = value.strip()
+        if value.count("[") > value.count("]") or value.count("{") > value.count("}"):
+            pending_key, pending = key, value
+        else:
+            table[key] = _toml_value(value)
+    return root
+
+
+def _load_toml(text: str) -> Dict:
+    if tomllib is not None:
+        try:
+            return tomllib.loads(text)
+        except (tomllib.TOMLDecodeError, ValueError):
+            pass
+    return _parse_toml_subset(text)
+
+
+# ---- Python ----
+
+def _pep508(requirement: str, scope: str, manifest: str) -> Optional[Dict]:
+    requirement = requirement.strip()
+    egg = _EGG.search(requirement)
+    if egg:
+        return _dependency(egg.group(1), requirement.split("#", 1)[0], scope, "pypi", manifest)
+    # A bare URL (no "name @" in front) names no package
+    if "://" in requirement.split("@", 1)[0]:
+        return None
+    match = _PEP508.match(requirement)
+    if not match:
+        return None
+    spec = match.group(3) or match.group(4) or ""
+    return _dependency(match.group(1), spec, scope, "pypi", manifest)
+
+
+def parse_requirements(content: str, manifest: str = "requirements.txt", scope: str = "runtime") -> List[Dict]:
+    deps = []
+    for line in _CONTINUATION.sub(" ", content).splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if _EDITABLE.match(line):
+            line = _EDITABLE.sub("", line, count=1)
+        elif not line or line.startswith(("#", "-r", "-c", "--")):
+            continue
+        line = _REQUIREMENT_OPTION.split(line, 1)[0]
+        dep = _pep508(line, scope, manifest)
+        if dep:
+            deps.append(dep)
+    return deps
+
+
+def _poetry_spec(value) -> str:
+    if isinstance(value, dict):
+        return str(value.get("version") or value.get("git") or value.get("path") or value.get("url") or "")
+    return "" if value == "*" else str(value)
+
+
+def parse_pyproject(content: str, manifest: str = "pyproject.toml") -> List[Dict]:
+    data = _load_toml(content)
+    deps = []
+    project = _table(data.get("project"))
+    for requirement in _array(project.get("dependencies")):
+        deps.append(_pep508(str(requirement), "runtime", manifest))
+    for group, requirements in _table(project.get("optional-dependencies")).items():
+        for requirement in _array(requirements):
+            deps.append(_pep508(str(requirement), _group_scope(group), manifest))
+    for group, requirements in _table(data.get("dependency-groups")).items():
+        for requirement in _array(requirements):
+            if isinstance(requirement, str):  # skip {include-group = ...}
+                deps.append(_pep508(requirement, _group_scope(group), manifest))
+
+    poetry = _table(_table(data.get("tool")).get("poetry"))
+    tables = [("runtime", poetry.get("dependencies")), ("dev", poetry.get("dev-dependencies"))]
+    tables += [(_group_scope(name), group.get("dependencies"))
+               for name, group in _table(poetry.get("group")).items() if isinstance(group, dict)]
+    for scope, table in tables:
+        for name, value in _table(table).items():
+            if name.lower() == "python":
+                continue
+            optional = isinstance(value, dict) and value.get("optional") is True
+            deps.append(_dependency(name, _poetry_spec(value), "optional" if optional else scope, "pypi", manifest))
+    return [d for d in deps if d]
+
+
+def parse_setup_cfg(content: str, manifest: str = "setup.cfg") -> List[Dict]:
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read_string(content)
+    except configparser.Error:
+        return []
+    deps = []
+    if parser.has_section("options"):
+        for key, scope in (("install_requires", "runtime"), ("tests_require", "test"),
+                           ("setup_requires", "build")):
+            deps += parse_requirements(parser.get("options", key, fallback=""), manifest, scope)
+    if parser.has_section("options.extras_require"):
+        for group, requirements in parser.items("options.extras_require"):
+            deps += parse_requirements(requirements, manifest, _group_scope(group))
+    return deps
+
+
+def parse_pipfile(content: str, manifest: str = "Pipfile") -> List[Dict]:
+    data = _load_toml(content)
+    return [_dependency(name, _poetry_spec(value), scope, "pypi", manifest)
+            for table, scope in (("packages", "runtime"), ("dev-packages", "dev"))
+            for name, value in _table(data.get(table)).items()]
+
+
+# ---- JavaScript ----
+
+def parse_package_json(content: str, manifest: str = "package.json") -> List[Dict]:
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return []
+    if not isinstance(data, dict):
+        return []
+    deps = []
+    for key, scope in (("dependencies", "runtime"), ("devDependencies", "dev"),
+                       ("peerDependencies", "peer"), ("optionalDependencies", "optional")):
+        table = data.get(key)
+        if isinstance(table, dict):
+            deps += [_dependency(name, str(spec), scope, "npm", manifest)
+                     for name, spec in table.items() if spec is not None]
+    return deps
+
+
+# ---- Go / Rust / Ruby / Java ----
+
+def parse_go_mod(content: str, manifest: str = "go.mod") -> List[Dict]:
+    deps = []
+    in_block = False
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("require ("):
+            in_block = True
+            continue
+        if in_block and stripped == ")":
+            in_block = False
+            continue
+        if stripped.startswith("require "):
+            stripped = stripped[len("require "):]
+        elif not in_block:
+            continue
+        parts = stripped.split("//", 1)
+        fields = parts[0].split()
+        if len(fields) >= 2:
+            scope = "indirect" if len(parts) > 1 and "indirect" in parts[1] else "runtime"
+            deps.append(_dependency(fields[0], fields[1], scope, "go", manifest))
+    return deps
+
+
+def parse_cargo_toml(content: str, manifest: str = "Cargo.toml") -> List[Dict]:
+    data = _load_toml(content)
+    # Top level, [workspace.dependencies] and platform-specific [target.'cfg(...)'.dependencies]
+    tables = [data, _table(data.get("workspace"))]
+    tables += [target for target in _table(data.get("target")).values() if isinstance(target, dict)]
+    deps = []
+    for table in tables:
+        for key, scope in (("dependencies", "runtime"), ("dev-dependencies", "dev"), ("build-dependencies", "build")):
+            for name, value in _table(table.get(key)).items():
+                optional = isinstance(value, dict) and value.get("optional") is True
+                deps.append(_dependency(name, _poetry_spec(value), "optional" if optional else scope,
+                                        "cargo", manifest))
+    return deps
+
+
+_GEM = re.compile(r"""^\s*gem\s+["']([^"']+)["']((?:\s*,\s*["'][^"']*["'])*)(.*)$""")
+_GEM_GROUP = re.compile(r"""^\s*group\s+(.+?)\s+do\b""")
+
+
+def parse_gemfile(content: str, manifest: str = "Gemfile") -> List[Dict]:
+    deps = []
+    groups: List[str] = []
+    for line in content.splitlines():
+        group = _GEM_GROUP.match(line)
+        if group:
+            names = re.findall(r":(\w+)|['\"](\w+)['\"]", group.group(1))
+            groups.append((names[0][0] or names[0][1]) if names else "")
+            continue
+        if re.match(r"^\s*end\b", line) and groups:
+            groups.pop()
+            continue
+        gem = _GEM.match(line)
+        if not gem:
+            continue
+        spec = ", ".join(re.findall(r"""["']([^"']*)["']""", gem.group(2)))
+        inline = re.search(r"group:\s*\[?\s*:(\w+)", gem.group(3))
+        group_name = inline.group(1) if inline else (groups[-1] if groups else "")
+        scope = _group_scope(group_name) if group_name else "runtime"
+        deps.append(_dependency(gem.group(1), spec, scope, "rubygems", manifest))
+    return deps
+
+
+def parse_pom_xml(content: str, manifest: str = "pom.xml") -> List[Dict]:
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError:
+        return []
+    ns = root.tag[:root.tag.index("}") + 1] if root.tag.startswith("{") else ""
+    properties = {}
+    props = root.find(f"{ns}properties")
+    if props is not None:
+        properties = {child.tag[len(ns):]: (child.text or "").strip() for child in props}
+    if root.find(f"{ns}version") is not None:
+        properties.setdefault("project.version", (root.findtext(f"{ns}version") or "").strip())
+
+    def text(node, tag: str) -> str:
+        value = (node.findtext(f"{ns}{tag}") or "").strip()
+        return re.sub(r"\$\{([^}]+)\}", lambda m: properties.get(m.group(1), m.group(0)), value)
+
+    deps = []
+    for dep in root.findall(f"{ns}dependencies/{ns}dependency"):
+        scope = text(dep, "scope") or "compile"
+        scope = {"compile": "runtime", "runtime": "runtime", "system": "provided"}.get(scope, scope)
+        if text(dep, "optional") == "true":
+            scope = "optional"
+        if not text(dep, "artifactId"):
+            continue
+        deps.append(_dependency(f"{text(dep, 'groupId')}:{text(dep, 'artifactId')}", text(dep, "version"),
+                                scope if scope in SCOPES else "runtime", "maven", manifest))
+    return deps
+
+
+PARSERS: Dict[str, Callable[[str, str], List[Dict]]] = {
+    "requirements.txt": parse_requirements,
+    "pyproject.toml": parse_pyproject,
+    "setup.cfg": parse_setup_cfg,
+    "Pipfile": parse_pipfile,
+    "package.json": parse_package_json,
+    "go.mod": parse_go_mod,
+    "Cargo.toml": parse_cargo_toml,
+    "Gemfile": parse_gemfile,
+    "pom.xml": parse_pom_xml,
+}
+
+
+def is_manifest(path: str) -> bool:
+    return os.path.basename(path) in PARSERS
+
+
+def parse_manifests(config_files: Dict[str, str], errors: Optional[List[str]] = None) -> List[Dict]:
+    """
+    All dependencies declared in the repo's manifests, in manifest path order.
+    A manifest that fails to parse is skipped, with a message appended to errors.
+    """
+    deps = []
+    for path in sorted(config_files):
+        parser = PARSERS.get(os.path.basename(path))
+        if parser is None:
+            continue
+        try:
+            deps += parser(config_files[path], path)
+        except Exception as e:
+            if errors is not None:
+                errors.append(f"Parsing {path} failed: {e}")
+    return deps
+
+
+def format_dependency(dep: Dict) -> str:
+    """Display form: "Flask==3.1.2", "react ^19.2.0"."""
+    spec = dep["spec"]
+    if not spec:
+        return dep["name"]
+    return f"{dep['name']}{spec}" if spec[0] in "<>=!~" else f"{dep['name']} {spec}"
@@ -0,0 +1,88 @@
+"""Process pool shared by the CPU-bound analysis stages (symbols, endpoints, metrics).
+
+One lazily created pool serves every stage of every analysis in the process, so
+concurrent analyses share MAX_WORKERS processes instead of each stage starting
+its own. Workers are started with forkserver (spawn where it is unavailable):
+the pipeline process runs threads (the event loop, asyncio.to_thread workers),
+and a fork taken while another thread holds a lock can deadlock the child.
+
+A stage run through run_until() stops waiting at its deadline and cancels its
+chunks that haven't started, so an overrunning stage doesn't keep the pool busy.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Sequence
+
+# Below this many files a pool costs more to use than it saves
+PARALLEL_MIN_FILES = 64
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_deadline: ContextVar[Optional[float]] = ContextVar("gitbro_pool_deadline", default=None)
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared pool, started on first use."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=_mp_context())
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the shared pool's workers; the next pool_map() starts a new pool."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard(pool: ProcessPoolExecutor):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_until(deadline_at: Optional[float], func: Callable, *args):
+    """Call func(*args) with pool_map() calls inside it bounded by deadline_at (time.monotonic())."""
+    token = _deadline.set(deadline_at)
+    try:
+        return func(*args)
+    finally:
+        _deadline.reset(token)
+
+
+def pool_map(func: Callable, items: Sequence, chunksize: int = 1) -> Optional[List]:
+    """
+    func over items in the shared pool, results in order. Returns None when the
+    pool can't be used (processes can't be started, or a worker died), and the
+    caller then runs inline. Raises TimeoutError past the run_until() deadline.
+    """
+    deadline_at = _deadline.get()
+    timeout = max(0.0, deadline_at - time.monotonic()) if deadline_at is not None else None
+    try:
+        pool = get_pool()
+        # map() cancels the chunks still queued if it stops early (e.g. on timeout)
+        return list(pool.map(func, items, chunksize=chunksize, timeout=timeout))
+    except TimeoutError:
+        raise
+    except BrokenProcessPool:
+        _discard(pool)
+        return None
+    except OSError:
+        return None
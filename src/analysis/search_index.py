@@ -0,0 +1,275 @@
+"""Trigram index over the repo's source files for substring and regex search.
+
+Every file is reduced to the set of (case-folded) byte trigrams it contains,
+and the index stores, per trigram, the sorted array of files containing it:
+three flat NumPy arrays (trigram keys, offsets, file ids), like a CSR matrix.
+
+A query is turned into the trigrams any match must contain. A substring needs
+all of its own; for a regex the literal runs are pulled out of the parsed
+pattern (`foo.*bar` needs foo and bar, `(get|set)_user` needs get or set, and
+_user), so posting arrays are intersected or merged accordingly. Only the
+candidate files left are then scanned with the real pattern, which is what
+makes queries take milliseconds on large repos. Patterns without any literal
+of three characters or more fall back to scanning every file.
+
+The index and the file contents are saved together in the cache directory,
+so the CLI can search a repo analyzed earlier without cloning it again.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+from src.cache import CACHE_DIR
+
+SEARCH_DIR = os.path.join(CACHE_DIR, "search")
+MAX_RESULTS = 100
+# Files are indexed in batches of about this many characters
+BATCH_CHARS = 8_000_000
+
+_EMPTY = np.zeros(0, np.uint32)
+
+
+@dataclass
+class SearchHit:
+    """A matching line."""
+
+    path: str
+    line: int
+    text: str
+
+    def render(self) -> str:
+        return f"{self.path}:{self.line}: {self.text.strip()}"
+
+
+def _pack(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Strings as one UTF-8 byte array plus (n + 1) offsets."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), np.uint8), offsets
+
+
+def _unpack(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def _trigram_keys(text: str) -> np.ndarray:
+    """Distinct trigram ids (24 bits: three case-folded bytes) of a query literal."""
+    data = np.frombuffer(text.lower().encode("utf-8"), np.uint8).astype(np.uint32)
+    if len(data) < 3:
+        return _EMPTY
+    return np.unique((data[:-2] << 16) | (data[1:-1] << 8) | data[2:])
+
+
+def _file_trigrams(contents: List[str], first_id: int) -> np.ndarray:
+    """Sorted distinct (trigram << 32 | file id) pairs of a batch of files."""
+    encoded = [content.lower().encode("utf-8") for content in contents]
+    data = np.frombuffer(b"".join(encoded), np.uint8).astype(np.uint64)
+    if len(data) < 3:
+        return np.zeros(0, np.uint64)
+    file_ids = np.repeat(np.arange(first_id, first_id + len(encoded), dtype=np.uint64),
+                         [len(b) for b in encoded])
+    # Trigrams that would straddle two files are dropped
+    within = file_ids[:-2] == file_ids[2:]
+    keys = ((data[:-2] << np.uint64(48)) | (data[1:-1] << np.uint64(40)) | (data[2:] << np.uint64(32))
+            | file_ids[:-2])
+    return np.unique(keys[within])
+
+
+# ---- Query planning ----
+# A plan is None (no constraint), ("lit", text), ("and", [plans]) or ("or", [plans])
+
+def _and(plans: list):
+    plans = [p for p in plans if p is not None]
+    if not plans:
+        return None
+    return plans[0] if len(plans) == 1 else ("and", plans)
+
+
+def _plan_sequence(items) -> Optional[tuple]:
+    """Plan for a parsed regex sequence: its literal runs and the plans of its groups, ANDed."""
+    plans, run = [], ""
+    for op, value in items:
+        if op is sre_parse.LITERAL:
+            run += chr(value)
+            continue
+        if run:
+            plans.append(("lit", run))
+            run = ""
+        if op is sre_parse.SUBPATTERN:
+            plans.append(_plan_sequence(value[-1]))
+        elif op is sre_parse.BRANCH:
+            branches = [_plan_sequence(branch) for branch in value[1]]
+            # One unconstrained alternative makes the whole branch unconstrained
+            plans.append(None if any(b is None for b in branches) else ("or", branches))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and value[0] >= 1:
+            plans.append(_plan_sequence(value[2]))
+    if run:
+        plans.append(("lit", run))
+    return _and(plans)
+
+
+def plan_query(pattern: str, regex: bool = False) -> Optional[tuple]:
+    """The literal constraints any match of the query must satisfy (None: none usable)."""
+    if not regex:
+        return ("lit", pattern) if pattern else None
+    try:
+        return _plan_sequence(sre_parse.parse(pattern))
+    except (re.error, OverflowError, RecursionError):
+        return None
+
+
+class SearchIndex:
+    """
+    Trigram index over files. Posting list of trigram keys[i] is
+    postings[offsets[i]:offsets[i + 1]], sorted file ids into paths/contents.
+    """
+
+    def __init__(self, paths: List[str], contents: List[str], keys: np.ndarray, offsets: np.ndarray,
+                 postings: np.ndarray):
+        self.paths = paths
+        self.contents = contents
+        self.keys, self.offsets, self.postings = keys, offsets, postings
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @classmethod
+    def build(cls, files: Dict[str, str]) -> "SearchIndex":
+        """Index files ({path: content}); paths are kept in sorted order."""
+        paths = sorted(files)
+        contents = [files[p] for p in paths]
+        pairs, batch_start, size = [], 0, 0
+        for i, content in enumerate(contents):
+            size += len(content)
+            if size >= BATCH_CHARS or i == len(contents) - 1:
+                pairs.append(_file_trigrams(contents[batch_start:i + 1], batch_start))
+                batch_start, size = i + 1, 0
+        # Batches hold different files, so their pairs are already distinct
+        pairs = np.sort(np.concatenate(pairs)) if pairs else np.zeros(0, np.uint64)
+        trigrams = (pairs >> np.uint64(32)).astype(np.uint32)
+        postings = (pairs & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        starts = np.flatnonzero(np.diff(trigrams, prepend=np.uint32(0xFFFFFFFF)) != 0) if len(trigrams) else _EMPTY
+        offsets = np.append(starts, len(postings)).astype(np.int64)
+        return cls(paths, contents, trigrams[starts], offsets, postings)
+
+    # ---- Persistence ----
+
+    def save(self, path: str):
+        """Write the index and file contents to path (.npz), atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        path_data, path_offsets = _pack(self.paths)
+        content_data, content_offsets = _pack(self.contents)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, keys=self.keys, offsets=self.offsets, postings=self.postings,
+                            path_data=path_data, path_offsets=path_offsets,
+                            content_data=content_data, content_offsets=content_offsets)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SearchIndex"]:
+        """The index saved at path, or None if there is none (or it can't be read)."""
+        try:
+            with np.load(path) as data:
+                return cls(_unpack(data["path_data"], data["path_offsets"]),
+                           _unpack(data["content_data"], data["content_offsets"]),
+                           data["keys"], data["offsets"], data["postings"])
+        except (OSError, KeyError, ValueError, UnicodeDecodeError):
+            return None
+
+    # ---- Queries ----
+
+    def _posting(self, key: int) -> np.ndarray:
+        i = int(np.searchsorted(self.keys, key))
+        if i == len(self.keys) or self.keys[i] != key:
+            return _EMPTY
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def _candidates(self, plan) -> Optional[np.ndarray]:
+        """Sorted ids of files that can match the plan (None: every file)."""
+        if plan is None:
+            return None
+        kind, value = plan
+        if kind == "lit":
+            keys = _trigram_keys(value)
+            if not len(keys):
+                return None
+            lists = sorted((self._posting(int(k)) for k in keys), key=len)
+            result = lists[0]
+            for posting in lists[1:]:
+                if not len(result):
+                    break
+                result = np.intersect1d(result, posting, assume_unique=True)
+            return result
+        children = [self._candidates(child) for child in value]
+        if kind == "or":
+            return None if any(c is None for c in children) else np.unique(np.concatenate(children))
+        result = None
+        for c in children:
+            if c is not None:
+                result = c if result is None else np.intersect1d(result, c, assume_unique=True)
+        return result
+
+    def candidates(self, query: str, regex: bool = False) -> List[str]:
+        """Paths of the files the index can't rule out for the query."""
+        ids = self._candidates(plan_query(query, regex))
+        return list(self.paths) if ids is None else [self.paths[i] for i in ids]
+
+    def search(self, query: str, regex: bool = False, ignore_case: bool = False,
+               max_results: int = MAX_RESULTS) -> List[SearchHit]:
+        """
+        Lines matching query (a substring, or a Python regex with regex=True),
+        in path then line order, at most max_results (one hit per line).
+        Raises re.error for an invalid regex.
+        """
+        pattern = re.compile(query if regex else re.escape(query),
+                             re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        if not query:
+            return []
+        ids = self._candidates(plan_query(query, regex))
+        hits = []
+        for i in range(len(self.paths)) if ids is None else ids.tolist():
+            content = self.contents[i]
+            line, line_start, last_line = 1, 0, 0
+            for match in pattern.finditer(content):
+                line += content.count("\n", line_start, match.start())
+                line_start = content.rfind("\n", 0, match.start()) + 1
+                if line == last_line:
+                    continue
+                last_line = line
+                line_end = content.find("\n", match.start())
+                hits.append(SearchHit(self.paths[i], line, content[line_start:line_end if line_end >= 0 else None]))
+                if len(hits) >= max_results:
+                    return hits
+        return hits
+
+
+def index_path(owner: str, repo: str) -> str:
+    """Where the search index of owner/repo is saved."""
+    return os.path.join(SEARCH_DIR, f"{owner}__{repo}.npz")
+
+
+def parse_query(query: str) -> Tuple[str, bool]:
+    """(pattern, is_regex) for a search box query: /.../ is a regex, anything else a substring."""
+    if len(query) > 2 and query.startswith("/") and query.endswith("/"):
+        return query[1:-1], True
+    return query, False
+
+
+def format_hits(hits: List[SearchHit], max_results: int = MAX_RESULTS) -> str:
+    """Hits as grep-style lines, noting when the result list was cut off."""
+    if not hits:
+        return "No matches."
+    lines = [hit.render() for hit in hits]
+    if len(hits) >= max_results:
+        lines.append(f"... (first {max_results} matches)")
+    return "\n".join(lines)
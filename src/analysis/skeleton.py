@@ -0,0 +1,232 @@
+"""Compress source files into skeletons: the structure an analysis prompt needs, without bodies.
+
+A skeleton keeps imports, decorators, class and function signatures, the
+first line of docstrings, class-level fields and route registrations, and
+replaces bodies with "...". Python is parsed with ast; other languages use
+a line tokenizer that recognises the same constructs.
+"""
+import ast
+import os
+import re
+from typing import List, Optional
+
+ELISION = "..."
+
+# Call names that register routes/handlers (Flask, FastAPI, Django, Express, Go net/http, ...)
+ROUTE_CALLS = {
+    "route", "add_url_rule", "add_api_route", "add_route", "include_router", "register_blueprint",
+    "path", "re_path", "url", "get", "post", "put", "patch", "delete", "head", "options",
+    "websocket", "api_route", "mount", "HandleFunc", "Handle", "use",
+}
+
+# Module/class-level assignments longer than this are cut to their first line
+MAX_ASSIGN_LINES = 3
+
+
+def skeletonize(path: str, content: str, tree: Optional[ast.Module] = None) -> str:
+    """
+    Skeleton of one source file; falls back to the line tokenizer if Python fails to parse.
+    tree is the already parsed module of a Python file, if the caller has it.
+    """
+    if os.path.splitext(path)[1] == ".py":
+        try:
+            return _PythonSkeleton(content, tree).render()
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+    return _generic_skeleton(content)
+
+
+# ---- Python (ast) ----
+
+class _PythonSkeleton:
+    def __init__(self, source: str, tree: Optional[ast.Module] = None):
+        self.tree = tree if tree is not None else ast.parse(source)
+        self.lines = source.splitlines()
+        self.out: List[str] = []
+        self._in_class = False
+
+    def render(self) -> str:
+        doc = ast.get_docstring(self.tree, clean=True)
+        if doc:
+            self.out.append(f'"""{doc.strip().splitlines()[0]}"""')
+        self._body(self.tree.body, top_level=True)
+        return "\n".join(self.out)
+
+    def _segment(self, node: ast.AST) -> List[str]:
+        return self.lines[node.lineno - 1:node.end_lineno]
+
+    def _short(self, node: ast.AST) -> List[str]:
+        """Source lines of a statement, cut to its first line when long."""
+        lines = self._segment(node)
+        if len(lines) > MAX_ASSIGN_LINES:
+            return [lines[0], " " * (_indent(lines[0]) + 4) + ELISION]
+        return lines
+
+    def _body(self, body: List[ast.stmt], top_level: bool = False):
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.out.extend(self._segment(node))
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self._function(node)
+            elif isinstance(node, ast.ClassDef):
+                self._class(node)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and (top_level or self._in_class):
+                self.out.extend(self._short(node))
+            elif isinstance(node, ast.Expr) and _is_route_call(node.value):
+                self.out.extend(self._short(node))
+            elif top_level and isinstance(node, (ast.If, ast.Try)):
+                # e.g. `if __name__ == "__main__":` or guarded imports
+                self.out.append(self.lines[node.lineno - 1])
+                inner = len(self.out)
+                self._body(node.body, top_level=True)
+                if len(self.out) == inner:
+                    self.out.append(" " * (node.col_offset + 4) + ELISION)
+
+    def _header(self, node) -> List[str]:
+        """Decorator lines plus the def/class line(s) up to the body."""
+        start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+        first_body = node.body[0]
+        end = first_body.lineno - 1
+        if first_body.lineno == node.lineno:
+            # One-line definition (`def f(): pass`)
+            return self.lines[start - 1:node.lineno]
+        header = self.lines[start - 1:end]
+        # Drop comment/blank lines between the signature and the body
+        while len(header) > 1 and (not header[-1].strip() or header[-1].lstrip().startswith("#")):
+            header.pop()
+        return header
+
+    def _docstring(self, node, indent: int):
+        doc = ast.get_docstring(node, clean=True)
+        if doc:
+            self.out.append(" " * indent + f'"""{doc.strip().splitlines()[0]}"""')
+
+    def _function(self, node):
+        self.out.extend(self._header(node))
+        indent = node.col_offset + 4
+        self._docstring(node, indent)
+        for call in _route_calls_in(node):
+            self.out.extend(" " * indent + line.strip() for line in self._short(call))
+        self.out.append(" " * indent + ELISION)
+
+    def _class(self, node: ast.ClassDef):
+        self.out.extend(self._header(node))
+        indent = node.col_offset + 4
+        self._docstring(node, indent)
+        was_in_class, self._in_class = self._in_class, True
+        before = len(self.out)
+        self._body(node.body)
+        self._in_class = was_in_class
+        if len(self.out) == before:
+            self.out.append(" " * indent + ELISION)
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _call_name(call: ast.Call) -> str:
+    func = call.func
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return ""
+
+
+def _is_route_call(node: ast.AST) -> bool:
+    """A call registering a route with a literal path, e.g. app.add_url_rule("/x", ...)."""
+    if not isinstance(node, ast.Call) or _call_name(node) not in ROUTE_CALLS:
+        return False
+    first = node.args[0] if node.args else None
+    return isinstance(first, ast.Constant) and isinstance(first.value, str)
+
+
+def _route_calls_in(func) -> List[ast.Expr]:
+    """Route registrations made inside a function body (app factories, setup functions)."""
+    calls = []
+    for child in ast.walk(func):
+        if child is not func and isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        if isinstance(child, ast.Expr) and _is_route_call(child.value):
+            calls.append(child)
+    return calls
+
+
+# ---- Other languages (line tokenizer) ----
+
+_IMPORT = re.compile(
+    r"^\s*(import\s|from\s+\S+\s+import\s|#include\s|using\s+[\w.]+\s*;|package\s|use\s+[\w:]+|"
+    r"require\s|(?:const|let|var)\s+.*=\s*require\()"
+)
+_DECORATOR = re.compile(r"^\s*@\w")
+_DEFINITION = re.compile(
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\([^)]*\))?\s+)?(?:(?:public|private|protected|internal|static|"
+    r"abstract|final|override|async|virtual|sealed|open|suspend|inline|unsafe|extern|const)\s+)*"
+    r"(?:def|class|function\*?|func|fn|interface|struct|enum|trait|impl|type|module|record|object|fun|"
+    r"namespace|protocol|extension)\b"
+)
+# Methods/functions without a keyword: `foo(a, b) {`, `public int foo(...)`, `const foo = (x) =>`
+_METHOD = re.compile(
+    r"^\s*(?!(?:if|for|while|switch|catch|return|else|do|try|new|throw)\b)"
+    r"(?:[\w<>\[\],.?]+\s+)*[A-Za-z_$][\w$]*\s*\([^;]*\)\s*(?::\s*[\w<>\[\]|., ]+)?\s*(?:throws [\w., ]+)?\{\s*$"
+)
+_ARROW = re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+\w+\s*(?::[^=]+)?=\s*(?:async\s+)?(?:\([^)]*\)|\w+)\s*=>")
+_ROUTE = re.compile(
+    r"""(?:\.(?:get|post|put|patch|delete|route|all|use|HandleFunc|Handle|GET|POST|PUT|DELETE)\s*\(\s*["'`/])"""
+    r"""|@(?:Get|Post|Put|Patch|Delete|Request)Mapping|@(?:Get|Post|Put|Patch|Delete)\("""
+)
+_TYPE_BLOCK = re.compile(
+    r"^\s*(?:export\s+)?(?:pub\s+)?(?:type\s+\w+\s+struct|type\s+\w+\s+interface|interface\s+\w+|struct\s+\w+|"
+    r"enum\s+\w+|data\s+class\s+\w+|record\s+\w+)[^{]*\{\s*$"
+)
+_COMMENT = re.compile(r"^\s*(?://+|/\*+|\*+/?|#)\s?")
+MAX_TYPE_FIELDS = 20
+
+
+def _doc_summary(lines: List[str], i: int) -> str:
+    """First text line of the comment block directly above line i ("" if none)."""
+    j = i
+    while j > 0 and _COMMENT.match(lines[j - 1]) and not _DECORATOR.match(lines[j - 1]):
+        j -= 1
+    for line in lines[j:i]:
+        text = _COMMENT.sub("", line, count=1).strip().rstrip("*/").strip()
+        if text:
+            return " " * _indent(lines[i]) + "// " + text
+    return ""
+
+
+def _generic_skeleton(content: str) -> str:
+    lines = content.splitlines()
+    out: List[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            i += 1
+            continue
+        if _TYPE_BLOCK.match(line):
+            # Keep struct/interface fields: they are the data model
+            out.append(line)
+            indent = _indent(line)
+            j = i + 1
+            while j < len(lines) and not (lines[j].strip().startswith("}") and _indent(lines[j]) <= indent):
+                if lines[j].strip() and j - i <= MAX_TYPE_FIELDS:
+                    out.append(lines[j])
+                j += 1
+            if j - i > MAX_TYPE_FIELDS:
+                out.append(" " * (indent + 4) + ELISION)
+            if j < len(lines):
+                out.append(lines[j])
+            i = j + 1
+            continue
+        if (_IMPORT.match(line) or _DECORATOR.match(line) or _DEFINITION.match(line) or _METHOD.match(line)
+                or _ARROW.match(line) or _ROUTE.search(line)):
+            if not _IMPORT.match(line):
+                doc = _doc_summary(lines, i)
+                if doc:
+                    out.append(doc)
+            out.append(line)
+        i += 1
+    return "\n".join(out)
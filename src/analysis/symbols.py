@@ -0,0 +1,680 @@
+"""Static symbol index: functions, classes, imports and exports of every source file, without an LLM.
+
+Python files are parsed with ast, which gives an exact, complete table with
+line numbers in milliseconds per file. The other supported languages (JS/TS,
+Java, Kotlin, C#, Go, Rust, C/C++, Swift, PHP, Ruby) use a lexical extractor:
+comments and string contents are blanked out, brace (or def/end) nesting is
+tracked to tell top-level definitions from methods and nested code, and
+per-language patterns recognise definitions, imports and exports. No grammar
+downloads or native parsers are needed. Large repos are indexed in the shared
+process pool (extraction is CPU bound, so threads would not help).
+
+index_sources() is the pipeline's one pass over the sources: each Python file
+is parsed once, and the tree serves its symbols, API endpoints/data models
+(src/analysis/endpoints.py) and skeleton (src/analysis/skeleton.py).
+
+The table maps each indexed path to
+    {"functions": [{name, line, params, decorators, doc}],
+     "classes": [{name, line, kind, bases, methods, doc}],
+     "imports": [module, ...],
+     "exports": [name, ...]}
+where doc is the first docstring/doc-comment line ("" if none) and kind is
+class, interface, struct, enum, trait, ...
+"""
+import ast
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from src.analysis.endpoints import extract_api
+from src.analysis.pool import MAX_WORKERS, PARALLEL_MIN_FILES, pool_map
+from src.analysis.skeleton import skeletonize
+
+
+def _first_line(doc: Optional[str]) -> str:
+    return doc.strip().splitlines()[0] if doc and doc.strip() else ""
+
+
+def _params(args: ast.arguments) -> List[str]:
+    """Parameter names as written, with * / ** markers; self and cls are dropped."""
+    params = [a.arg for a in args.posonlyargs + args.args]
+    if args.vararg:
+        params.append("*" + args.vararg.arg)
+    params += [a.arg for a in args.kwonlyargs]
+    if args.kwarg:
+        params.append("**" + args.kwarg.arg)
+    return params[1:] if params[:1] in (["self"], ["cls"]) else params
+
+
+def _function(node) -> Dict:
+    return {
+        "name": node.name,
+        "line": node.lineno,
+        "params": _params(node.args),
+        "decorators": [ast.unparse(d) for d in node.decorator_list],
+        "doc": _first_line(ast.get_docstring(node)),
+    }
+
+
+def _class(node: ast.ClassDef) -> Dict:
+    return {
+        "name": node.name,
+        "line": node.lineno,
+        "kind": "class",
+        "bases": [ast.unparse(b) for b in node.bases],
+        "methods": [n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))],
+        "doc": _first_line(ast.get_docstring(node)),
+    }
+
+
+def _imports(tree: ast.Module) -> List[str]:
+    """Imported module names; relative imports keep their leading dots."""
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.append("." * node.level + (node.module or ""))
+    return list(dict.fromkeys(modules))
+
+
+def _all_names(tree: ast.Module) -> Optional[List[str]]:
+    """Names in a literal module-level __all__, or None if there is none."""
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets)
+                and isinstance(node.value, (ast.List, ast.Tuple))):
+            return [e.value for e in node.value.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)]
+    return None
+
+
+def extract_python_symbols(content: str, tree: Optional[ast.Module] = None) -> Dict:
+    """Top-level functions, classes (with methods), imports and exports of a Python module."""
+    if tree is None:
+        tree = ast.parse(content)
+    functions, classes = [], []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.append(_function(node))
+        elif isinstance(node, ast.ClassDef):
+            classes.append(_class(node))
+    exports = _all_names(tree)
+    if exports is None:
+        exports = [s["name"] for s in functions + classes if not s["name"].startswith("_")]
+    return {"functions": functions, "classes": classes, "imports": _imports(tree), "exports": exports}
+
+
+# ---- Other languages (lexical) ----
+
+_LANGUAGES = {
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".java": "java", ".kt": "kotlin", ".kts": "kotlin", ".cs": "csharp", ".go": "go", ".rs": "rust",
+    ".c": "c", ".cc": "c", ".cpp": "c", ".cxx": "c", ".h": "h", ".hh": "h", ".hpp": "h",
+    ".swift": "swift", ".php": "php", ".rb": "ruby",
+}
+
+# Comments and string literals, blanked before matching so braces and keywords inside them don't count
+_LEXEMES = {
+    "c_like": re.compile(r'//[^\n]*|/\*.*?\*/|"""[\s\S]*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`',
+                         re.DOTALL),
+    "rust": re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])\'', re.DOTALL),
+    "php": re.compile(r'//[^\n]*|#(?!\[)[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.DOTALL),
+    "ruby": re.compile(r'#[^\n]*|^=begin.*?^=end|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'',
+                       re.DOTALL | re.MULTILINE),
+}
+
+_NAME = r"[A-Za-z_$][\w$]*"
+_JS_MODIFIERS = r"(?:(?:public|private|protected|static|async|override|readonly|abstract|declare|get|set|\*)\s+)*"
+_C_TYPES = r"(?:[\w:<>\[\],.*&?]+\s+)+?[*&]*"
+
+# Definitions that start with a keyword: (kind, pattern with a "name" group)
+_CLASS_PATTERNS = {
+    "js": rf"^\s*(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?(?P<kind>class|interface|enum)\s+(?P<name>{_NAME})",
+    "java": r"^\s*(?:(?:public|private|protected|static|abstract|final|sealed|non-sealed|strictfp)\s+)*"
+            r"(?P<kind>class|interface|enum|record|@interface)\s+(?P<name>\w+)",
+    "kotlin": r"^\s*(?:(?:public|private|protected|internal|open|abstract|sealed|data|enum|inner|value|annotation|"
+              r"final|inline|expect|actual)\s+)*(?P<kind>class|interface|object)\s+(?P<name>\w+)",
+    "csharp": r"^\s*(?:\[[^\]]*\]\s*)*(?:(?:public|private|protected|internal|static|abstract|sealed|partial|readonly|"
+              r"unsafe|new|ref)\s+)*(?P<kind>class|interface|struct|enum|record)\s+(?:struct\s+|class\s+)?(?P<name>\w+)",
+    "go": r"^(?:type\s+|\s+)(?P<name>\w+)(?:\[[^\]]*\])?\s+(?P<kind>struct|interface)\b",
+    "rust": r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?P<kind>struct|enum|trait|union)\s+(?P<name>\w+)",
+    "c": r"^\s*(?:typedef\s+)?(?:template\s*<[^>]*>\s*)?(?P<kind>class|struct|union|enum)(?:\s+class)?\s+(?P<name>\w+)"
+         r"(?!\s*[;*\w])",
+    "swift": r"^\s*(?:@\w+\s+)*(?:(?:public|private|fileprivate|internal|open|final|indirect)\s+)*"
+             r"(?P<kind>class|struct|enum|protocol|extension|actor)\s+(?P<name>[\w.]+)",
+    "php": r"^\s*(?:(?:abstract|final|readonly)\s+)*(?P<kind>class|interface|trait|enum)\s+(?P<name>\w+)",
+    "ruby": r"^\s*(?P<kind>class|module)\s+(?P<name>[A-Z][\w:]*)",
+}
+_CLASS_PATTERNS["h"] = _CLASS_PATTERNS["c"]
+
+_FUNCTION_PATTERNS = {
+    "js": [
+        rf"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(?P<name>{_NAME})",
+        rf"^\s*(?:export\s+)?(?:const|let|var)\s+(?P<name>{_NAME})\s*(?::[^=]+)?=\s*(?:async\s+)?"
+        rf"(?:function\b|(?:\([^)]*\)|{_NAME})\s*(?::[^=]+)?=>|\([^)]*$)",
+    ],
+    "go": [r"^func\s+(?:\(\s*(?:\w+\s+)?\*?\s*(?P<receiver>\w+)(?:\[[^\]]*\])?\s*\)\s*)?(?P<name>\w+)"],
+    "rust": [r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:(?:const|async|unsafe|default)\s+)*(?:extern\s+(?:\"[^\"]*\"\s+)?)?"
+             r"fn\s+(?P<name>\w+)"],
+    "kotlin": [r"^\s*(?:(?:public|private|protected|internal|open|override|abstract|final|suspend|inline|operator|"
+               r"infix|tailrec|external|actual|expect)\s+)*fun\s+(?:<[^>]*>\s*)?(?:[\w.<>?]+\.)?(?P<name>\w+)\s*\("],
+    "swift": [r"^\s*(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|private|fileprivate|internal|open|override|static|class|"
+              r"final|mutating|nonmutating|convenience|required|dynamic)\s+)*(?:func\s+(?P<name>\w+)|(?P<init>init)\??)"
+              r"\s*(?:<[^>]*>)?\s*\("],
+    "php": [r"^\s*(?:(?:public|private|protected|static|abstract|final)\s+)*function\s+&?(?P<name>\w+)\s*\("],
+    "ruby": [r"^\s*def\s+(?:self\.)?(?P<name>[\w?!=]+|\[\]=?|[-+*/<>=!~%&|^]+)"],
+    # Return type, then name: `public static int parse(`, `std::string Repo::name(`
+    "c": [rf"^\s*(?!(?:return|else|case|new|delete|throw|goto)\b){_C_TYPES}(?P<name>~?\w+(?:::~?\w+)*)\s*\("],
+}
+_FUNCTION_PATTERNS["h"] = _FUNCTION_PATTERNS["c"]
+_FUNCTION_PATTERNS["java"] = _FUNCTION_PATTERNS["c"]
+_FUNCTION_PATTERNS["csharp"] = _FUNCTION_PATTERNS["c"]
+
+# Members without a keyword, only looked for directly inside a class body
+_METHOD_PATTERNS = {
+    "js": [rf"^\s*{_JS_MODIFIERS}#?(?P<name>{_NAME})\s*(?:<[^>]*>)?\s*\(",
+           rf"^\s*{_JS_MODIFIERS}#?(?P<name>{_NAME})\s*(?::[^=]+)?=\s*(?:async\s+)?(?:\([^)]*\)|{_NAME})\s*=>"],
+    "java": [r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|synchronized|native|override|virtual|"
+             r"sealed|async|unsafe|extern|new|partial)\s+)*(?:<[^>]*>\s*)?(?P<name>\w+)\s*\("],
+}
+_METHOD_PATTERNS["go"] = [r"^\s+(?P<name>[A-Za-z_]\w*)\s*\("]  # interface methods
+_METHOD_PATTERNS["csharp"] = _METHOD_PATTERNS["java"]
+_METHOD_PATTERNS["c"] = _METHOD_PATTERNS["h"] = _METHOD_PATTERNS["java"]
+
+_IMPL = re.compile(r"^\s*(?:unsafe\s+)?impl(?:\s*<[^{]*?>)?\s+(?:(?P<trait>[\w:]+(?:<[^{]*?>)?)\s+for\s+)?"
+                   r"(?P<name>[\w:]+)")
+_NOT_A_NAME = {"if", "for", "while", "switch", "catch", "return", "sizeof", "new", "else", "do", "throw", "case",
+               "typeof", "delete", "await", "yield", "function", "super", "this", "using", "lock", "fixed", "foreach",
+               "elif", "when", "guard", "match", "loop", "defer", "go", "select", "synchronized", "assert"}
+
+_IMPORT_PATTERNS = {
+    "js": [r"(?:^|[\n;])[ \t]*(?:import|export)\s[^;()=]*?\bfrom\s*['\"]([^'\"]+)['\"]", r"^[ \t]*import\s*['\"]([^'\"]+)['\"]",
+           r"\brequire\(\s*['\"]([^'\"]+)['\"]\s*\)", r"\bimport\(\s*['\"]([^'\"]+)['\"]\s*\)"],
+    "go": [r'^import\s+(?:[\w.]+\s+)?"([^"]+)"'],
+    "rust": [r"^[ \t]*(?:pub(?:\([^)]*\))?\s+)?use\s+([^;]+);", r"^[ \t]*extern\s+crate\s+(\w+)"],
+    "java": [r"^[ \t]*import\s+(?:static\s+)?(\w+(?:\.\w+)*(?:\.\*)?)"],
+    "kotlin": [r"^[ \t]*import\s+(\w+(?:\.\w+)*(?:\.\*)?)"],
+    "csharp": [r"^[ \t]*(?:global\s+)?using\s+(?:static\s+)?(?:\w+\s*=\s*)?([\w.]+)\s*;"],
+    "c": [r"^[ \t]*#\s*include\s*[<\"]([^>\"]+)[>\"]"],
+    "swift": [r"^[ \t]*(?:@testable\s+)?import\s+(?:(?:class|struct|enum|protocol|func|var|typealias)\s+)?([\w.]+)"],
+    "php": [r"^[ \t]*use\s+([\w\\]+)", r"\b(?:require|include)(?:_once)?\s*\(?\s*['\"]([^'\"]+)['\"]"],
+    "ruby": [r"^[ \t]*(?:require|load)\s*\(?\s*['\"]([^'\"]+)['\"]", r"^[ \t]*require_relative\s*\(?\s*['\"]([^'\"]+)['\"]"],
+}
+_IMPORT_PATTERNS["h"] = _IMPORT_PATTERNS["c"]
+_GO_IMPORT_BLOCK = re.compile(r"^import\s*\(([^)]*)\)", re.MULTILINE)
+_RUST_MOD = re.compile(r"^[ \t]*(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)\s*;", re.MULTILINE)
+
+_JS_EXPORTS = [
+    rf"^[ \t]*export\s+(?:default\s+)?(?:declare\s+)?(?:async\s+)?(?:abstract\s+)?"
+    rf"(?:function\s*\*?|class|const|let|var|interface|type|enum|namespace)\s+({_NAME})",
+    rf"^[ \t]*export\s+default\s+({_NAME})\s*;?\s*$",
+    rf"\bexports\.({_NAME})\s*=",
+    rf"\bmodule\.exports\s*=\s*({_NAME})\s*;?\s*$",
+]
+_JS_EXPORT_LIST = re.compile(r"^[ \t]*export\s*\{([^}]*)\}|\bmodule\.exports\s*=\s*\{([^}]*)\}", re.MULTILINE)
+
+_DECORATOR = re.compile(r"^\s*(?:@(?P<at>[\w.]+(?:\(.*\))?)|#\[(?P<attr>.*)\]|\[(?P<cs>[A-Z][^\]]*)\])\s*$")
+_COMMENT = re.compile(r"^\s*(?://+!?|/\*+|\*+/?)\s?")
+_HASH_COMMENT = re.compile(r"^\s*(?://+|/\*+|\*+/?|#)\s?")
+_XML_TAG = re.compile(r"</?\w+[^>]*>")
+_BASE_NOISE = re.compile(r"<[^<>]*>|\([^()]*\)")
+_BASE_KEYWORDS = {"extends", "implements", "public", "private", "protected", "virtual", "final", "open", "where",
+                  "with", "for"}
+
+_BRACES = re.compile(r"[{}]")
+
+_compiled: Dict[str, Dict] = {}
+
+
+def _patterns(lang: str) -> Dict:
+    """Compiled patterns for a language (compiled once per process)."""
+    if lang not in _compiled:
+        _compiled[lang] = {
+            "class": re.compile(_CLASS_PATTERNS[lang]),
+            "function": [re.compile(p) for p in _FUNCTION_PATTERNS.get(lang, [])],
+            "method": [re.compile(p) for p in _METHOD_PATTERNS.get(lang, [])],
+            "import": [re.compile(p, re.MULTILINE) for p in _IMPORT_PATTERNS[lang]],
+        }
+    return _compiled[lang]
+
+
+def _spaces(text: str) -> str:
+    """text with every character but newlines replaced by a space."""
+    if "\n" not in text:
+        return " " * len(text)
+    return "\n".join(" " * len(part) for part in text.split("\n"))
+
+
+def _blank(content: str, lang: str) -> Tuple[str, str]:
+    """
+    Two views of content with newlines kept: (comments and string contents
+    blanked out, comments only blanked out). The first is matched for
+    structure, the second for imports and exports, which name modules in strings.
+    """
+    code, text = [], []
+    last = 0
+    family = lang if lang in _LEXEMES else "c_like"
+    for match in _LEXEMES[family].finditer(content):
+        start, end = match.span()
+        lexeme = match.group(0)
+        code.append(content[last:start])
+        text.append(content[last:start])
+        if lexeme[0] in "\"'`":
+            code.append(lexeme[0] + _spaces(lexeme[1:-1]) + lexeme[-1] if len(lexeme) > 1 else lexeme)
+            text.append(lexeme)
+        else:
+            blank = _spaces(lexeme)
+            code.append(blank)
+            text.append(blank)
+        last = end
+    code.append(content[last:])
+    text.append(content[last:])
+    return "".join(code), "".join(text)
+
+
+def _split_params(text: str) -> List[str]:
+    """Split a parameter list at top-level commas."""
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch in "([{<":
+            depth += 1
+        elif ch in ")]}>" and depth:
+            depth -= 1
+        elif ch == "," and not depth:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def _param_name(part: str, lang: str) -> str:
+    if part[0] in "{[":
+        return part.split("=")[0].strip()
+    prefix = next((m for m in ("...", "**", "*", "&") if part.startswith(m)), "")
+    if lang == "go":
+        words = re.findall(r"[A-Za-z_]\w*", part)
+        return words[0] if words else part
+    head = re.split(r"(?<!:):(?!:)", part.split("=")[0])[0] if lang in ("js", "rust", "kotlin", "swift") \
+        else part.split("=")[0]
+    words = re.findall(r"\$?[A-Za-z_]\w*", head)
+    words = [w for w in words if w not in ("mut", "ref", "out", "in", "params", "val", "var", "this")]
+    return prefix + words[-1].lstrip("$") if words else part
+
+
+def _params_at(lines: List[str], row: int, col: int, lang: str) -> List[str]:
+    """Parameters of the definition whose "(" is at or after lines[row][col] (may span lines)."""
+    depth, text = 0, []
+    for line in lines[row:row + 30]:
+        for ch in line[col:]:
+            if ch == "(":
+                depth += 1
+                if depth == 1:
+                    continue
+            elif ch == ")":
+                depth -= 1
+                if depth == 0:
+                    parts = _split_params("".join(text))
+                    names = [_param_name(p, lang) for p in parts]
+                    return [n for n in names if n not in ("self", "&self", "&mut self", "cls")]
+            if depth:
+                text.append(ch)
+        if depth:
+            text.append(" ")
+        elif lang == "ruby" and line[col:].strip():
+            # `def name a, b` without parentheses
+            rest = line[col:].split("#")[0].strip()
+            return [_param_name(p, lang) for p in _split_params(rest)] if rest else []
+        col = 0
+    return []
+
+
+def _annotations(lines: List[str], row: int, lang: str) -> Tuple[List[str], str]:
+    """Decorators/attributes directly above lines[row] and the first line of the doc comment above them."""
+    comment = _HASH_COMMENT if lang in ("ruby", "php") else _COMMENT
+    decorators = []
+    i = row
+    while i > 0:
+        match = _DECORATOR.match(lines[i - 1])
+        if not match:
+            break
+        decorators.insert(0, next(g for g in match.groups() if g is not None).strip())
+        i -= 1
+    j = i
+    while j > 0 and comment.match(lines[j - 1]) and lines[j - 1].strip():
+        j -= 1
+    for line in lines[j:i]:
+        text = _XML_TAG.sub("", comment.sub("", line, count=1)).strip().rstrip("*/").strip()
+        if text and not text.startswith("@"):
+            return decorators, text
+    return decorators, ""
+
+
+def _bases(rest: str) -> List[str]:
+    """Base classes/interfaces from the text after a class name (generics and arguments dropped)."""
+    rest = rest.split("{")[0].split(" where ")[0]
+    while True:
+        stripped = _BASE_NOISE.sub("", rest)
+        if stripped == rest:
+            break
+        rest = stripped
+    return [t for t in re.findall(r"[A-Za-z_][\w.$]*(?:::\w+)*", rest) if t not in _BASE_KEYWORDS]
+
+
+def _exported(lang: str, line: str, name: str) -> bool:
+    """Whether a top-level definition is visible outside its file/package."""
+    if lang == "js":
+        return line.lstrip().startswith("export")
+    if lang == "go":
+        return name[:1].isupper()
+    if lang == "rust":
+        return line.lstrip().startswith("pub")
+    if lang in ("java", "csharp"):
+        return re.search(r"\bpublic\b", line) is not None
+    if lang in ("c", "h"):
+        return re.search(r"\bstatic\b", line) is None
+    return re.search(r"\b(?:private|fileprivate)\b", line) is None
+
+
+class _LexicalExtractor:
+    """One pass over a blanked file, tracking which class/function each line is nested in."""
+
+    def __init__(self, content: str, lang: str):
+        self.lang = lang
+        self.lines = content.splitlines()
+        code, self.text = _blank(content, lang)
+        self.code = code.splitlines()
+        self.patterns = _patterns(lang)
+        self.functions: List[Dict] = []
+        self.classes: List[Dict] = []
+        self.by_name: Dict[str, Dict] = {}
+        self.exports: List[str] = []
+        # Open scopes, innermost last: ("class", entry) | ("function", None) | ("block", None)
+        self.stack: List[Tuple[str, Optional[Dict]]] = []
+
+    def _owner(self) -> Tuple[str, Optional[Dict]]:
+        """Innermost enclosing class or function, skipping plain blocks (namespaces, companions, ifs)."""
+        for kind, entry in reversed(self.stack):
+            if kind != "block":
+                return kind, entry
+        return "top", None
+
+    def _class_entry(self, name: str, row: int, kind: str, rest: str) -> Dict:
+        decorators, doc = _annotations(self.lines, row, self.lang)
+        entry = {"name": name, "line": row + 1, "kind": kind, "bases": _bases(rest),
+                 "methods": [], "doc": doc}
+        if decorators:
+            entry["decorators"] = decorators
+        return entry
+
+    def _add_class(self, entry: Dict, row: int) -> Dict:
+        """Record a top-level type, merging with an earlier impl/receiver placeholder of the same name."""
+        existing = self.by_name.get(entry["name"])
+        if existing is not None and existing["kind"] == "impl":
+            existing.update({k: v for k, v in entry.items() if k != "methods"})
+            return existing
+        self.classes.append(entry)
+        self.by_name.setdefault(entry["name"], entry)
+        if _exported(self.lang, self.lines[row], entry["name"]):
+            self.exports.append(entry["name"])
+        return entry
+
+    def _type_named(self, name: str, row: int) -> Dict:
+        """The class entry methods of `name` attach to (Rust impl, Go receivers, C++ Type::method)."""
+        name = name.split("::")[-1].split("<")[0]
+        if name not in self.by_name:
+            entry = {"name": name, "line": row + 1, "kind": "impl", "bases": [], "methods": [], "doc": ""}
+            self.classes.append(entry)
+            self.by_name[name] = entry
+        return self.by_name[name]
+
+    def _definition(self, row: int) -> Optional[Tuple[str, Optional[Dict]]]:
+        """Scope opened by a definition on this line, recording the symbol; None if there is none."""
+        line = self.code[row]
+        owner, owner_entry = self._owner()
+        if owner == "function":
+            return None
+
+        match = self.patterns["class"].match(line)
+        if match:
+            name, kind = match.group("name"), match.group("kind")
+            if kind == "extension":
+                return "class", self._type_named(name, row)
+            entry = self._class_entry(name, row, kind, line[match.end():])
+            if owner == "top":
+                entry = self._add_class(entry, row)
+            return "class", entry
+
+        if self.lang == "rust":
+            match = _IMPL.match(line)
+            if match:
+                entry = self._type_named(match.group("name"), row)
+                if match.group("trait"):
+                    entry["bases"].append(match.group("trait").split("<")[0])
+                return "class", entry
+
+        keywordless = list(self.patterns["method"]) if owner == "class" else []
+        if self.lang in ("java", "csharp", "c", "h"):
+            keywordless += self.patterns["function"]
+        for pattern in keywordless + [p for p in self.patterns["function"] if p not in keywordless]:
+            match = pattern.match(line)
+            if not match:
+                continue
+            group = "name" if match.group("name") else "init" if "init" in pattern.groupindex else None
+            if group is None or (pattern in keywordless and match.group(group) in _NOT_A_NAME):
+                continue
+            if "=" in line[:match.start(group)]:
+                continue  # `x = call(...)`: an assignment, not a definition
+            if owner == "top" and self.lang in ("java", "csharp"):
+                continue  # no free functions: a match outside a class is a stray call
+            paren = line.find("(", match.start(group))
+            self._function(row, match.group(group), paren if paren >= 0 else match.end(), owner, owner_entry,
+                           match.groupdict().get("receiver"))
+            return "function", None
+        return None
+
+    def _function(self, row: int, name: str, params_col: int, owner: str, owner_entry: Optional[Dict],
+                  receiver: Optional[str]):
+        if receiver:
+            owner, owner_entry = "class", self._type_named(receiver, row)
+        elif "::" in name:
+            type_name, name = name.rsplit("::", 1)
+            owner, owner_entry = "class", self._type_named(type_name, row)
+        if owner == "class" and owner_entry is not None:
+            owner_entry["methods"].append(name)
+            return
+        decorators, doc = _annotations(self.lines, row, self.lang)
+        self.functions.append({
+            "name": name,
+            "line": row + 1,
+            "params": _params_at(self.code, row, params_col, self.lang),
+            "decorators": decorators,
+            "doc": doc,
+        })
+        if _exported(self.lang, self.lines[row], name):
+            self.exports.append(name)
+
+    def run(self) -> Dict:
+        if self.lang == "ruby":
+            self._run_ruby()
+        else:
+            self._run_braces()
+        return {"functions": self.functions, "classes": self.classes, "exports": list(dict.fromkeys(self.exports))}
+
+    def _run_braces(self):
+        pending, pending_row = None, -1
+        for row, line in enumerate(self.code):
+            if not line.strip():
+                continue
+            opened = self._definition(row)
+            if opened is not None:
+                pending, pending_row = opened, row
+            elif row > pending_row + 1 or not line.lstrip().startswith("{"):
+                pending = None  # the body opens on the signature line or the next one
+            for ch in _BRACES.findall(line):
+                if ch == "{":
+                    self.stack.append(pending or ("block", None))
+                    pending = None
+                elif ch == "}" and self.stack:
+                    self.stack.pop()
+            if pending is not None and line.rstrip().endswith(";"):
+                pending = None  # declaration only (prototype, abstract or interface method)
+
+    _RUBY_OPENERS = re.compile(r"^\s*(?:if|unless|while|until|case|begin|for)\b|\bdo\s*(?:\|[^|]*\|)?\s*$")
+
+    def _run_ruby(self):
+        for row, line in enumerate(self.code):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if re.match(r"end\b", stripped):
+                if self.stack:
+                    self.stack.pop()
+                continue
+            opened = self._definition(row)
+            one_liner = re.search(r"\bend\s*$", stripped) or (opened and opened[0] == "function"
+                                                                and re.search(r"\)\s*=|^def\s+[\w?!]+\s*=", stripped))
+            if opened is not None:
+                if not one_liner:
+                    self.stack.append(opened)
+            elif self._RUBY_OPENERS.search(line) and not one_liner:
+                self.stack.append(("block", None))
+
+
+def _imports_lexical(text: str, lang: str) -> List[str]:
+    modules = []
+    for pattern in _patterns(lang)["import"]:
+        for match in pattern.finditer(text):
+            module = re.sub(r"\s+", "", match.group(1))
+            if lang == "ruby" and match.group(0).lstrip().startswith("require_relative"):
+                module = "./" + module
+            modules.append(module)
+    if lang == "go":
+        for block in _GO_IMPORT_BLOCK.finditer(text):
+            modules.extend(re.findall(r'"([^"]+)"', block.group(1)))
+    elif lang == "rust":
+        modules.extend("self::" + m for m in _RUST_MOD.findall(text))
+    return list(dict.fromkeys(modules))
+
+
+def _exports_js(text: str) -> List[str]:
+    names = []
+    for pattern in _JS_EXPORTS:
+        names.extend(re.findall(pattern, text, re.MULTILINE))
+    for match in _JS_EXPORT_LIST.finditer(text):
+        listed = match.group(1) if match.group(1) is not None else match.group(2)
+        for item in listed.split(","):
+            # `a as b` exports b; `key: value` exports key
+            words = re.findall(_NAME, item.split(":")[0])
+            if words:
+                names.append(words[-1])
+    return names
+
+
+def _lexical_extractor(lang: str):
+    def extract(content: str) -> Dict:
+        extractor = _LexicalExtractor(content, lang)
+        symbols = extractor.run()
+        symbols["imports"] = _imports_lexical(extractor.text, lang)
+        if lang == "js":
+            symbols["exports"] = list(dict.fromkeys(symbols["exports"] + _exports_js(extractor.text)))
+        return {key: symbols[key] for key in ("functions", "classes", "imports", "exports")}
+
+    extract.__name__ = f"extract_{lang}_symbols"
+    return extract
+
+
+EXTRACTORS = {
+    ".py": extract_python_symbols,
+    **{ext: _lexical_extractor(lang) for ext, lang in _LANGUAGES.items()},
+}
+
+
+def is_indexable(path: str) -> bool:
+    """Whether files like path have a symbol extractor."""
+    return os.path.splitext(path)[1].lower() in EXTRACTORS
+
+
+def extract_symbols(path: str, content: str) -> Optional[Dict]:
+    """Symbols of one file, or None if its language is not indexed or it fails to parse."""
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        return None
+    try:
+        return extractor(content)
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+
+
+def _extract_item(item: Tuple[str, str]) -> Tuple[str, Optional[Dict]]:
+    path, content = item
+    return path, extract_symbols(path, content)
+
+
+def _chunksize(items: List) -> int:
+    return max(1, len(items) // (MAX_WORKERS * 4))
+
+
+def build_symbol_table(code_samples: Dict[str, str], workers: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Index every supported file in code_samples. Runs in the shared process pool
+    once there are PARALLEL_MIN_FILES files (workers=1 forces inline), inline
+    otherwise or where processes can't be started. Files that fail to parse are left out.
+    """
+    items = [(path, content) for path, content in code_samples.items() if is_indexable(path)]
+    results = None
+    if (workers or MAX_WORKERS) > 1 and len(items) >= PARALLEL_MIN_FILES:
+        results = pool_map(_extract_item, items, _chunksize(items))
+    if results is None:
+        results = [_extract_item(item) for item in items]
+    return {path: symbols for path, symbols in results if symbols is not None}
+
+
+@dataclass
+class SourceIndex:
+    """Results of the one pass over the sources (see index_sources)."""
+
+    symbol_table: Dict[str, Dict]
+    python_api: Dict[str, Tuple[List[Dict], List[Dict]]]  # Python file -> (endpoints, models)
+    skeletons: Dict[str, str]  # every file -> skeleton
+
+
+def _index_item(item: Tuple[str, str]) -> Tuple[str, Optional[Dict], Optional[Tuple[List[Dict], List[Dict]]], str]:
+    """(path, symbols, Python API or None for other languages, skeleton) of one file, parsing Python once."""
+    path, content = item
+    if os.path.splitext(path)[1].lower() != ".py":
+        return path, extract_symbols(path, content), None, skeletonize(path, content)
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError, RecursionError):
+        return path, None, ([], []), skeletonize(path, content)
+    try:
+        symbols = extract_python_symbols(content, tree)
+    except (ValueError, RecursionError):
+        symbols = None
+    return path, symbols, extract_api(path, content, tree), skeletonize(path, content, tree)
+
+
+def index_sources(code_samples: Dict[str, str], workers: Optional[int] = None) -> SourceIndex:
+    """
+    Symbol table, Python endpoints/models and skeletons of code_samples in one
+    pass, in the shared process pool on large repos (like build_symbol_table).
+    """
+    items = list(code_samples.items())
+    results = None
+    if (workers or MAX_WORKERS) > 1 and len(items) >= PARALLEL_MIN_FILES:
+        results = pool_map(_index_item, items, _chunksize(items))
+    if results is None:
+        results = [_index_item(item) for item in items]
+    return SourceIndex(
+        symbol_table={path: symbols for path, symbols, _, _ in results if symbols is not None},
+        python_api={path: api for path, _, api, _ in results if api is not None},
+        skeletons={path: skeleton for path, _, _, skeleton in results},
+    )
+
+
+def count_symbols(table: Dict[str, Dict]) -> Tuple[int, int]:
+    """(functions, classes) in a symbol table."""
+    return (sum(len(s["functions"]) for s in table.values()),
+            sum(len(s["classes"]) for s in table.values()))
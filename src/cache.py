@@ -0,0 +1,144 @@
+"""Small persistent key/value caches backed by SQLite, with TTL and LRU eviction."""
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+CACHE_DIR = os.path.expanduser(os.getenv("GITBRO_CACHE_DIR", "~/.cache/gitbro"))
+
+
+class SQLiteCache:
+    """
+    String cache in one SQLite table.
+    Entries older than ttl_s are ignored and purged; when max_entries or max_bytes
+    is exceeded, the least recently read entries are evicted first, down to
+    EVICT_TO of the cap so a full cache doesn't run an eviction pass on every write.
+    Safe to share between threads; WAL mode lets several processes use the same file.
+    """
+
+    # Eviction frees this much headroom below the caps
+    EVICT_TO = 0.9
+    # Entry/byte totals are kept as running counts; they are recounted from the table
+    # this often (other processes may write the same file) and before every eviction
+    RECOUNT_EVERY = 1000
+
+    def __init__(self, path: str, table: str, ttl_s: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.path = path
+        self.table = table
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = 0
+        self._bytes = 0
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_created ON {table} (created_at)")
+            self._recount()
+
+    def _recount(self):
+        self._entries, self._bytes = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_s is not None and now - created_at > self.ttl_s
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str):
+        """Store a value, then purge expired entries and evict down to the size caps."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            old = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._entries += 0 if old else 1
+            self._bytes += size - (old[0] if old else 0)
+            self._writes += 1
+            if self._writes % self.RECOUNT_EVERY == 0:
+                self._recount()
+            self._evict(now)
+
+    def _over_cap(self) -> bool:
+        return ((self.max_entries is not None and self._entries > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes))
+
+    def _evict(self, now: float):
+        if self.ttl_s is not None:
+            # Indexed range: costs nothing when no entry has expired
+            cutoff = now - self.ttl_s
+            expired, expired_bytes = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table} WHERE created_at < ?", (cutoff,)
+            ).fetchone()
+            if expired:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (cutoff,))
+                self._entries -= expired
+                self._bytes -= expired_bytes
+        if not self._over_cap():
+            return
+        self._recount()  # another process may have written or evicted since our last count
+        if not self._over_cap():
+            return
+        target_entries = self._entries if self.max_entries is None else math.ceil(self.max_entries * self.EVICT_TO)
+        target_bytes = self._bytes if self.max_bytes is None else math.ceil(self.max_bytes * self.EVICT_TO)
+        # Walk from least recently used, deleting until under both targets
+        doomed = []
+        for key, size in self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"):
+            if self._entries <= target_entries and self._bytes <= target_bytes:
+                break
+            doomed.append((key,))
+            self._entries -= 1
+            self._bytes -= size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._entries = self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus current entry count and size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
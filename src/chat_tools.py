@@ -0,0 +1,220 @@
+"""Tools the chat model can call to look at the repo while answering.
+
+Instead of packing everything into the prompt, the chat sends a small header
+plus a few retrieved excerpts and lets the model fetch more on demand:
+read_file, search, list_dir and symbol. They are served from what the analysis
+already holds locally (file contents, file tree, symbol table and the trigram
+search index), so every call answers in milliseconds without network access.
+Files the analysis didn't load (README, docs, YAML, SQL, shell scripts, ...) are
+read lazily from the copy saved during ingestion (GitHubClient.save_text_files).
+Results are capped so a single call can't blow up the prompt.
+"""
+import os
+import posixpath
+import re
+from typing import Dict, List, Optional
+
+from src.analysis.search_index import SearchIndex, format_hits
+from src.github_client import saved_files_path
+
+# Lines returned by read_file when no range is asked for, and at most per call
+READ_DEFAULT_LINES = 200
+READ_MAX_LINES = 400
+SEARCH_MAX_RESULTS = 30
+LIST_MAX_ENTRIES = 200
+SYMBOL_MAX_RESULTS = 20
+
+# Marker GitHubClient.read_local_file leaves at the end of a file it read only partly
+# (config files; source files are read whole)
+_TRUNCATED = re.compile(r"\n\.\.\. \[truncated at (\d+) lines\]$")
+
+# OpenAI function-calling schemas, as accepted by the chat model's bind_tools()
+TOOL_SCHEMAS = [
+    {"type": "function", "function": {
+        "name": "read_file",
+        "description": "Read a file of the repository, with line numbers.",
+        "parameters": {"type": "object", "properties": {
+            "path": {"type": "string", "description": "File path relative to the repo root"},
+            "lines": {"type": "string",
+                      "description": f"Line range like '40-120' (default: the first {READ_DEFAULT_LINES} lines)"},
+        }, "required": ["path"]},
+    }},
+    {"type": "function", "function": {
+        "name": "search",
+        "description": "Find the lines of the repository's source files that contain a string or match a regex.",
+        "parameters": {"type": "object", "properties": {
+            "query": {"type": "string", "description": "Text to look for (case-sensitive)"},
+            "regex": {"type": "boolean", "description": "Treat query as a Python regular expression"},
+        }, "required": ["query"]},
+    }},
+    {"type": "function", "function": {
+        "name": "list_dir",
+        "description": "List the files and subdirectories of a repository directory.",
+        "parameters": {"type": "object", "properties": {
+            "path": {"type": "string", "description": "Directory relative to the repo root ('' for the root)"},
+        }, "required": []},
+    }},
+    {"type": "function", "function": {
+        "name": "symbol",
+        "description": "Find where a function, class or method is defined, with its parameters and docstring.",
+        "parameters": {"type": "object", "properties": {
+            "name": {"type": "string", "description": "Symbol name, or Class.method"},
+        }, "required": ["name"]},
+    }},
+]
+
+
+def _normalize(path: str) -> str:
+    path = path.strip().lstrip("/")
+    while path.startswith("./"):
+        path = path[2:]
+    return "" if path == "." else path
+
+
+def _line_range(lines: str, total: int) -> Optional[range]:
+    """0-based line range for a 'start-end' (or 'start') string, clipped to READ_MAX_LINES."""
+    if not lines:
+        return range(0, min(total, READ_DEFAULT_LINES))
+    match = re.fullmatch(r"\s*(\d+)\s*(?:-\s*(\d+)\s*)?", lines)
+    if not match:
+        return None
+    start = max(int(match.group(1)), 1)
+    end = int(match.group(2)) if match.group(2) else start + READ_DEFAULT_LINES - 1
+    return range(start - 1, min(end, total, start - 1 + READ_MAX_LINES))
+
+
+class RepoTools:
+    """The chat tools over one analysis."""
+
+    def __init__(self, files: Dict[str, str], file_tree: List[Dict], symbol_table: Dict[str, Dict],
+                 search_index: Optional[SearchIndex] = None, saved_dir: Optional[str] = None):
+        self.files = files
+        self.saved_dir = saved_dir
+        self.paths = [f["path"] for f in file_tree] or sorted(files)
+        self.sizes = {f["path"]: f.get("size", 0) for f in file_tree}
+        self.symbol_table = symbol_table
+        self.search_index = search_index if search_index is not None else SearchIndex.build(files)
+
+    def _suggest(self, path: str) -> str:
+        name = posixpath.basename(path.rstrip("/"))
+        similar = [p for p in self.paths if posixpath.basename(p) == name][:5]
+        return f" Did you mean: {', '.join(similar)}?" if similar else ""
+
+    def _read_saved(self, path: str) -> Optional[str]:
+        """A file of the tree from the saved copy, or None if it wasn't saved."""
+        if not self.saved_dir or path not in self.sizes:
+            return None
+        try:
+            with open(os.path.join(self.saved_dir, path), "r", encoding="utf-8", errors="ignore") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def read_file(self, path: str, lines: str = "") -> str:
+        path = _normalize(path)
+        content = self.files.get(path)
+        if content is None:
+            content = self._read_saved(path)
+        if content is None:
+            if path in self.sizes:
+                return f"{path} was not read during the analysis (binary or too large)."
+            return f"No file {path}.{self._suggest(path)}"
+        cut = _TRUNCATED.search(content)
+        all_lines = content[:cut.start()].splitlines() if cut else content.splitlines()
+        # Said whenever the end of what was read is reached, so the model doesn't take it for the end of the file
+        partly_read = ""
+        if cut:
+            partly_read = f"\nOnly the first {cut.group(1)} lines of {path} were read during the analysis."
+        selected = _line_range(lines, len(all_lines))
+        if selected is None:
+            return f"Invalid line range {lines!r}; use e.g. '40-120'."
+        if not len(selected):
+            return partly_read.strip() or f"{path} has only {len(all_lines)} lines."
+        body = "\n".join(f"{i + 1:5}| {all_lines[i]}" for i in selected)
+        more = partly_read
+        if selected.stop < len(all_lines):
+            more = f"\n... ({len(all_lines) - selected.stop} more lines)"
+        return f"{path} (lines {selected.start + 1}-{selected.stop} of {len(all_lines)}):\n{body}{more}"
+
+    def search(self, query: str, regex: bool = False) -> str:
+        try:
+            hits = self.search_index.search(query, regex=regex, max_results=SEARCH_MAX_RESULTS)
+        except re.error as e:
+            return f"Invalid regex: {e}"
+        return format_hits(hits, SEARCH_MAX_RESULTS)
+
+    def list_dir(self, path: str = "") -> str:
+        prefix = _normalize(path).rstrip("/")
+        prefix = prefix + "/" if prefix else ""
+        dirs, files = {}, []
+        for p in self.paths:
+            if not p.startswith(prefix):
+                continue
+            rest = p[len(prefix):]
+            if "/" in rest:
+                name = rest.split("/", 1)[0] + "/"
+                dirs[name] = dirs.get(name, 0) + 1
+            else:
+                files.append(f"{rest} ({self.sizes.get(p, 0)} bytes)")
+        if not dirs and not files:
+            return f"No directory {path}.{self._suggest(path)}"
+        entries = [f"{name} ({count} files)" for name, count in sorted(dirs.items())] + files
+        more = f"\n... ({len(entries) - LIST_MAX_ENTRIES} more)" if len(entries) > LIST_MAX_ENTRIES else ""
+        return "\n".join(entries[:LIST_MAX_ENTRIES]) + more
+
+    def _method_line(self, path: str, class_line: int, method: str) -> int:
+        """Line of a method's definition: the first call-like use of its name after the class line."""
+        pattern = re.compile(rf"\b{re.escape(method)}\s*[(<]")
+        for i, line in enumerate(self.files.get(path, "").splitlines()[class_line:], class_line + 1):
+            if pattern.search(line):
+                return i
+        return class_line
+
+    def symbol(self, name: str) -> str:
+        owner, _, name = name.strip().rpartition(".")
+        found = []
+        for path, symbols in self.symbol_table.items():
+            for cls in symbols.get("classes", []):
+                if not owner and cls["name"] == name:
+                    bases = f"({', '.join(cls['bases'])})" if cls.get("bases") else ""
+                    methods = f"; methods: {', '.join(cls['methods'])}" if cls.get("methods") else ""
+                    doc = f" - {cls['doc']}" if cls.get("doc") else ""
+                    found.append(f"{path}:{cls['line']}: {cls['kind']} {name}{bases}{doc}{methods}")
+                if name in cls.get("methods", []) and owner in ("", cls["name"]):
+                    line = self._method_line(path, cls["line"], name)
+                    found.append(f"{path}:{line}: method {cls['name']}.{name}")
+            if owner:
+                continue
+            for fn in symbols.get("functions", []):
+                if fn["name"] == name:
+                    doc = f" - {fn['doc']}" if fn.get("doc") else ""
+                    found.append(f"{path}:{fn['line']}: function {name}({', '.join(fn['params'])}){doc}")
+        if not found:
+            return f"No function, class or method named {name}. Try search to find other uses."
+        more = f"\n... ({len(found) - SYMBOL_MAX_RESULTS} more)" if len(found) > SYMBOL_MAX_RESULTS else ""
+        return "\n".join(found[:SYMBOL_MAX_RESULTS]) + more
+
+    def run(self, name: str, args: Dict) -> str:
+        """Result of a tool call, as text for the model; bad calls get an error message, not an exception."""
+        tool = {"read_file": self.read_file, "search": self.search,
+                "list_dir": self.list_dir, "symbol": self.symbol}.get(name)
+        if tool is None:
+            return f"Unknown tool {name}."
+        try:
+            return tool(**(args or {}))
+        except TypeError as e:
+            return f"Invalid arguments for {name}: {e}"
+
+
+def build_repo_tools(analysis: Dict) -> RepoTools:
+    """
+    Chat tools over an analysis: its source and config files, the other text files
+    saved during ingestion, file tree, symbols and search index.
+    """
+    files = dict(analysis.get("config_files") or {})
+    files.update(analysis.get("code_samples") or {})
+    saved_dir = None
+    if analysis.get("owner") and analysis.get("repo_name"):
+        saved_dir = saved_files_path(analysis["owner"], analysis["repo_name"])
+    return RepoTools(files, analysis.get("file_tree") or [], analysis.get("symbol_table") or {},
+                     analysis.get("search_index"), saved_dir)
@@ -0,0 +1,59 @@
+"""End-to-end deadline split into per-stage time budgets.
+
+A deadline is an absolute time.monotonic() value carried in state as
+"deadline_at". Each stage gets a share of the time that is *left* when it
+starts, proportional to its weight among the stages still to run, so time
+saved by a fast stage flows to the later ones.
+"""
+import time
+from typing import Optional
+
+# Relative share of the end-to-end deadline, in pipeline order.
+# Quick local steps (scan, README, configs) are not budgeted.
+STAGE_BUDGET_WEIGHTS = {
+    "metadata": 0.03,
+    "clone": 0.20,
+    "read": 0.08,
+    "symbols": 0.02,
+    "imports": 0.01,
+    "metrics": 0.01,
+    "manifests": 0.01,
+    "endpoints": 0.02,
+    "search_index": 0.02,
+    "history": 0.06,
+    "git_api": 0.03,
+    "navigator": 0.11,
+    "context": 0.16,
+    "mentor": 0.08,
+    "visualizer": 0.05,
+    "orchestrator": 0.11,
+}
+
+
+def deadline_from_now(deadline_s: Optional[float]) -> Optional[float]:
+    """Turn a relative deadline in seconds into an absolute monotonic deadline."""
+    return time.monotonic() + deadline_s if deadline_s else None
+
+
+def remaining(deadline_at: Optional[float]) -> Optional[float]:
+    """Seconds left before the deadline (None when there is no deadline)."""
+    if deadline_at is None:
+        return None
+    return max(0.0, deadline_at - time.monotonic())
+
+
+def stage_budget(deadline_at: Optional[float], stage: str) -> Optional[float]:
+    """Time budget in seconds for `stage` starting now (None when there is no deadline)."""
+    left = remaining(deadline_at)
+    if left is None:
+        return None
+    stages = list(STAGE_BUDGET_WEIGHTS)
+    if stage not in STAGE_BUDGET_WEIGHTS:
+        return left
+    pending = sum(STAGE_BUDGET_WEIGHTS[s] for s in stages[stages.index(stage):])
+    return left * STAGE_BUDGET_WEIGHTS[stage] / pending
+
+
+def capped(timeout: float, budget: Optional[float]) -> float:
+    """The smaller of a fixed timeout and a stage budget."""
+    return timeout if budget is None else min(timeout, budget)
@@ -0,0 +1,39 @@
+"""Typed progress events emitted while the analysis pipeline runs."""
+from dataclasses import dataclass, field
+from typing import Dict, Union
+
+
+@dataclass
+class StageStarted:
+    """A pipeline stage (ingestion step or agent) has started."""
+
+    stage: str
+    description: str
+
+
+@dataclass
+class StageFinished:
+    """A pipeline stage has finished; elapsed is wall-clock seconds."""
+
+    stage: str
+    elapsed: float
+    summary: str = ""
+
+
+@dataclass
+class AgentOutput:
+    """Partial state update returned by an agent node (e.g. navigator_map)."""
+
+    agent: str
+    update: Dict = field(default_factory=dict)
+
+
+@dataclass
+class AnalysisComplete:
+    """The pipeline finished; state is the final AgentState."""
+
+    state: Dict
+    elapsed: float
+
+
+PipelineEvent = Union[StageStarted, StageFinished, AgentOutput, AnalysisComplete]
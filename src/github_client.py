@@ -1,8 +1,13 @@
 """GitHub client: clones repos locally for file reading, uses API for metadata/commits/PRs."""
+import asyncio
 import os
 import subprocess
 import tempfile
+import threading
+import time
 import shutil
+import weakref
+import httpx
 import requests
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
@@ -10,6 +15,9 @@ from pypdf import PdfReader
 from docx import Document
 from PIL import Image
 import pytesseract
+from src.analysis.manifests import is_manifest
+from src.cache import CACHE_DIR
+from src.tracing import span
 
 load_dotenv()
 
@@ -21,6 +29,20 @@ CONFIG_FILE_NAMES = {
     "Makefile", "CMakeLists.txt", "Dockerfile", "docker-compose.yml",
     "docker-compose.yaml", ".env.example", "tox.ini", "pytest.ini",
 }
+CONFIG_MAX_LINES = 150
+MANIFEST_MAX_LINES = 5000
+
+# Larger files are skipped as likely generated or minified; smaller source files are read
+# whole, so local analyses see every line (prompts are cut to their token budgets later)
+MAX_FILE_BYTES = 200_000
+
+# Full-history bare clones for git history analytics, kept between runs
+MIRROR_DIR = os.path.join(CACHE_DIR, "mirrors")
+
+# Text files the analysis doesn't load (README, docs, YAML, SQL, shell scripts, ...) are
+# copied here before the clone is deleted, so the chat can read them on demand
+SAVED_FILES_DIR = os.path.join(CACHE_DIR, "files")
+SAVED_FILES_MAX_BYTES = 50 * 1024 * 1024
 
 SOURCE_EXTENSIONS = {
     ".py", ".js", ".ts", ".jsx", ".tsx", ".java", ".go", ".rs",
@@ -52,6 +74,17 @@ BINARY_EXTENSIONS = {
 }
 
 
+def saved_files_path(owner: str, repo: str) -> str:
+    """Where the text files of owner/repo are saved (see GitHubClient.save_text_files)."""
+    return os.path.join(SAVED_FILES_DIR, f"{owner}__{repo}")
+
+
+# Async connection pools are bound to an event loop, so there is one per loop,
+# shared by every GitHubClient (each sends its own auth headers per request)
+_loop_http_clients = weakref.WeakKeyDictionary()
+_http_lock = threading.Lock()
+
+
 class GitHubClient:
     """Clones repos locally for file access. Uses GitHub API for metadata, commits, PRs."""
 
@@ -75,13 +108,8 @@ class GitHubClient:
 
     # ---- GitHub API methods (metadata, commits, PRs) ----
 
-    def get_repo_metadata(self, owner: str, repo: str) -> Dict:
-        """Fetch repository metadata via GitHub API."""
-        url = f"{self.base_url}/repos/{owner}/{repo}"
-        response = requests.get(url, headers=self.headers, timeout=10)
-        response.raise_for_status()
-
-        data = response.json()
+    @staticmethod
+    def _parse_metadata(data: Dict) -> Dict:
         return {
             "name": data.get("name"),
             "full_name": data.get("full_name"),
@@ -97,6 +125,39 @@ class GitHubClient:
             "default_branch": data.get("default_branch", "main"),
         }
 
+    @staticmethod
+    def _parse_commits(data: List[Dict]) -> List[Dict]:
+        commits = []
+        for c in data:
+            commits.append({
+                "sha": c["sha"][:7],
+                "message": c["commit"]["message"].split("\n")[0][:120],
+                "author": c["commit"]["author"]["name"],
+                "date": c["commit"]["author"]["date"][:10],
+            })
+        return commits
+
+    @staticmethod
+    def _parse_pull_requests(data: List[Dict]) -> List[Dict]:
+        prs = []
+        for pr in data:
+            prs.append({
+                "number": pr["number"],
+                "title": pr["title"][:120],
+                "state": pr["state"],
+                "author": pr["user"]["login"],
+                "created": pr["created_at"][:10],
+                "labels": [l["name"] for l in pr.get("labels", [])],
+            })
+        return prs
+
+    def get_repo_metadata(self, owner: str, repo: str) -> Dict:
+        """Fetch repository metadata via GitHub API."""
+        url = f"{self.base_url}/repos/{owner}/{repo}"
+        response = requests.get(url, headers=self.headers, timeout=10)
+        response.raise_for_status()
+        return self._parse_metadata(response.json())
+
     def get_recent_commits(self, owner: str, repo: str, max_commits: int = 15) -> List[Dict]:
         """Fetch recent commits via GitHub API."""
         url = f"{self.base_url}/repos/{owner}/{repo}/commits"
@@ -104,15 +165,7 @@ class GitHubClient:
         try:
             response = requests.get(url, headers=self.headers, params=params, timeout=10)
             response.raise_for_status()
-            commits = []
-            for c in response.json():
-                commits.append({
-                    "sha": c["sha"][:7],
-                    "message": c["commit"]["message"].split("\n")[0][:120],
-                    "author": c["commit"]["author"]["name"],
-                    "date": c["commit"]["author"]["date"][:10],
-                })
-            return commits
+            return self._parse_commits(response.json())
         except Exception:
             return []
 
@@ -123,17 +176,48 @@ class GitHubClient:
         try:
             response = requests.get(url, headers=self.headers, params=params, timeout=10)
             response.raise_for_status()
-            prs = []
-            for pr in response.json():
-                prs.append({
-                    "number": pr["number"],
-                    "title": pr["title"][:120],
-                    "state": pr["state"],
-                    "author": pr["user"]["login"],
-                    "created": pr["created_at"][:10],
-                    "labels": [l["name"] for l in pr.get("labels", [])],
-                })
-            return prs
+            return self._parse_pull_requests(response.json())
+        except Exception:
+            return []
+
+    # ---- Async GitHub API methods (same results, non-blocking) ----
+
+    def _async_http(self) -> httpx.AsyncClient:
+        """The running loop's pooled async HTTP client, created on first use."""
+        loop = asyncio.get_running_loop()
+        with _http_lock:
+            if loop not in _loop_http_clients:
+                _loop_http_clients[loop] = httpx.AsyncClient(timeout=10)
+            return _loop_http_clients[loop]
+
+    async def aget_repo_metadata(self, owner: str, repo: str, timeout: float = 10) -> Dict:
+        """Async variant of get_repo_metadata."""
+        response = await self._async_http().get(f"{self.base_url}/repos/{owner}/{repo}", headers=self.headers,
+                                                timeout=timeout)
+        response.raise_for_status()
+        return self._parse_metadata(response.json())
+
+    async def aget_recent_commits(self, owner: str, repo: str, max_commits: int = 15,
+                                  timeout: float = 10) -> List[Dict]:
+        """Async variant of get_recent_commits."""
+        url = f"{self.base_url}/repos/{owner}/{repo}/commits"
+        try:
+            response = await self._async_http().get(url, params={"per_page": max_commits}, headers=self.headers,
+                                                    timeout=timeout)
+            response.raise_for_status()
+            return self._parse_commits(response.json())
+        except Exception:
+            return []
+
+    async def aget_pull_requests(self, owner: str, repo: str, max_prs: int = 10,
+                                 timeout: float = 10) -> List[Dict]:
+        """Async variant of get_pull_requests."""
+        url = f"{self.base_url}/repos/{owner}/{repo}/pulls"
+        params = {"state": "all", "per_page": max_prs, "sort": "updated", "direction": "desc"}
+        try:
+            response = await self._async_http().get(url, params=params, headers=self.headers, timeout=timeout)
+            response.raise_for_status()
+            return self._parse_pull_requests(response.json())
         except Exception:
             return []
 
@@ -142,15 +226,66 @@ class GitHubClient:
     def clone_repo(self, repo_url: str) -> str:
         """Shallow clone a repo into a temp directory. Returns the directory path."""
         temp_dir = tempfile.mkdtemp(prefix="gitbro_")
-        result = subprocess.run(
-            ["git", "clone", "--depth", "1", repo_url, temp_dir],
-            capture_output=True, text=True, timeout=120,
-        )
+        with span("clone", category="ingest", repo_url=repo_url):
+            result = subprocess.run(
+                ["git", "clone", "--depth", "1", repo_url, temp_dir],
+                capture_output=True, text=True, timeout=120,
+            )
         if result.returncode != 0:
             shutil.rmtree(temp_dir, ignore_errors=True)
             raise RuntimeError(f"git clone failed: {result.stderr.strip()}")
         return temp_dir
 
+    async def aclone_repo(self, repo_url: str, timeout: float = 120) -> str:
+        """Async variant of clone_repo; runs git without blocking the event loop."""
+        temp_dir = tempfile.mkdtemp(prefix="gitbro_")
+        with span("clone", category="ingest", repo_url=repo_url):
+            proc = await asyncio.create_subprocess_exec(
+                "git", "clone", "--depth", "1", repo_url, temp_dir,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+            except BaseException:
+                # Timed out or cancelled: don't leave git running or the temp dir behind
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise
+        if proc.returncode != 0:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise RuntimeError(f"git clone failed: {stderr.decode(errors='ignore').strip()}")
+        return temp_dir
+
+    def update_mirror(self, repo_url: str, owner: str, repo: str, timeout: float = 600) -> str:
+        """
+        Full-history bare clone of the repo under MIRROR_DIR: cloned on first use,
+        fetched (branches only) afterwards. Returns the mirror's git directory.
+        """
+        git_dir = os.path.join(MIRROR_DIR, f"{owner}__{repo}.git")
+        with span("mirror", category="ingest", repo_url=repo_url):
+            if os.path.isdir(git_dir):
+                result = subprocess.run(["git", "--git-dir", git_dir, "fetch", "--prune", "--quiet", "origin"],
+                                        capture_output=True, text=True, timeout=timeout)
+            else:
+                os.makedirs(MIRROR_DIR, exist_ok=True)
+                try:
+                    result = subprocess.run(["git", "clone", "--bare", "--quiet", repo_url, git_dir],
+                                            capture_output=True, text=True, timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    shutil.rmtree(git_dir, ignore_errors=True)
+                    raise
+                if result.returncode == 0:
+                    # A bare clone has no fetch refspec; track branches so fetch updates them
+                    result = subprocess.run(["git", "--git-dir", git_dir, "config", "remote.origin.fetch",
+                                             "+refs/heads/*:refs/heads/*"], capture_output=True, text=True)
+                if result.returncode != 0:
+                    shutil.rmtree(git_dir, ignore_errors=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"git mirror update failed: {result.stderr.strip()}")
+        return git_dir
+
     def cleanup_clone(self, repo_dir: str):
         """Remove the cloned repo directory."""
         if repo_dir and os.path.exists(repo_dir):
@@ -159,38 +294,41 @@ class GitHubClient:
     def walk_local_repo(self, repo_dir: str) -> List[Dict]:
         """Walk a local repo directory and return file tree (same format agents expect)."""
         file_tree = []
-        for root, dirs, files in os.walk(repo_dir):
-            # Skip ignored directories in-place so os.walk doesn't descend
-            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        with span("walk", category="ingest") as s:
+            for root, dirs, files in os.walk(repo_dir):
+                # Skip ignored directories in-place so os.walk doesn't descend
+                dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
 
-            for filename in sorted(files):
-                if filename.startswith("."):
-                    continue
+                for filename in sorted(files):
+                    if filename.startswith("."):
+                        continue
 
-                full_path = os.path.join(root, filename)
-                rel_path = os.path.relpath(full_path, repo_dir).replace(os.sep, "/")
+                    full_path = os.path.join(root, filename)
+                    rel_path = os.path.relpath(full_path, repo_dir).replace(os.sep, "/")
 
-                try:
-                    size = os.path.getsize(full_path)
-                except OSError:
-                    size = 0
+                    try:
+                        size = os.path.getsize(full_path)
+                    except OSError:
+                        size = 0
+
+                    file_tree.append({
+                        "path": rel_path,
+                        "type": "blob",
+                        "size": size,
+                    })
 
-                file_tree.append({
-                    "path": rel_path,
-                    "type": "blob",
-                    "size": size,
-                })
+            s.set_attributes({"files": len(file_tree), "total_bytes": sum(f["size"] for f in file_tree)})
 
         return file_tree
 
-    def read_local_file(self, repo_dir: str, file_path: str, max_lines: int = 500) -> Optional[str]:
-        """Read a text file from the local clone. Returns None if unreadable."""
+    def read_local_file(self, repo_dir: str, file_path: str, max_lines: Optional[int] = 500) -> Optional[str]:
+        """Read a text file from the local clone (max_lines=None: all of it). Returns None if unreadable."""
         full_path = os.path.join(repo_dir, file_path)
         try:
             with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
                 lines = []
                 for i, line in enumerate(f):
-                    if i >= max_lines:
+                    if max_lines is not None and i >= max_lines:
                         lines.append(f"\n... [truncated at {max_lines} lines]")
                         break
                     lines.append(line)
@@ -245,43 +383,63 @@ class GitHubClient:
     def read_document_file(self, repo_dir: str, file_path: str) -> Optional[str]:
         """Read a document file (PDF, DOCX, or image) and extract its text content."""
         ext = os.path.splitext(file_path)[1].lower()
-        
-        if ext == ".pdf":
-            return self.extract_pdf_text(repo_dir, file_path)
-        elif ext in {".docx", ".doc"}:
-            return self.extract_docx_text(repo_dir, file_path)
-        elif ext in {".png", ".jpg", ".jpeg", ".gif", ".bmp"}:
-            return self.extract_image_text(repo_dir, file_path)
-        
-        return None
 
-    def read_all_source_files(self, repo_dir: str, file_tree: List[Dict], max_lines: int = 500) -> Dict[str, str]:
-        """Read all source code files and documents from the local clone."""
+        with span("extract", category="ingest", file=file_path, ext=ext) as s:
+            text = None
+            if ext == ".pdf":
+                text = self.extract_pdf_text(repo_dir, file_path)
+            elif ext in {".docx", ".doc"}:
+                text = self.extract_docx_text(repo_dir, file_path)
+            elif ext in {".png", ".jpg", ".jpeg", ".gif", ".bmp"}:
+                text = self.extract_image_text(repo_dir, file_path)
+            s.set_attribute("chars", len(text) if text else 0)
+
+        return text
+
+    def read_all_source_files(self, repo_dir: str, file_tree: List[Dict], max_lines: Optional[int] = None,
+                              deadline: Optional[float] = None) -> Dict[str, str]:
+        """
+        Read all source code files and documents from the local clone.
+        Source files are read whole unless max_lines is given.
+        If a time.monotonic() deadline is given, stop early and return what was read.
+        """
         code_samples = {}
 
-        for item in file_tree:
-            path = item["path"]
-            ext = os.path.splitext(path)[1].lower()
+        with span("read", category="ingest", files_in_tree=len(file_tree)) as s:
+            documents = 0
+            for item in file_tree:
+                if deadline is not None and time.monotonic() > deadline:
+                    s.set_attribute("stopped_at_deadline", True)
+                    break
+                path = item["path"]
+                ext = os.path.splitext(path)[1].lower()
+
+                # Skip binary files we can't parse
+                if ext in BINARY_EXTENSIONS:
+                    continue
 
-            # Skip binary files we can't parse
-            if ext in BINARY_EXTENSIONS:
-                continue
+                # Skip very large files (likely generated/minified)
+                if item.get("size", 0) > MAX_FILE_BYTES:
+                    continue
 
-            # Skip very large files (likely generated/minified)
-            if item.get("size", 0) > 200_000:
-                continue
-
-            # Read source code files
-            if ext in SOURCE_EXTENSIONS:
-                content = self.read_local_file(repo_dir, path, max_lines)
-                if content:
-                    code_samples[path] = content
-            
-            # Read document files (PDFs, Word docs, images)
-            elif ext in DOCUMENT_EXTENSIONS:
-                content = self.read_document_file(repo_dir, path)
-                if content:
-                    code_samples[path] = content
+                # Read source code files
+                if ext in SOURCE_EXTENSIONS:
+                    content = self.read_local_file(repo_dir, path, max_lines)
+                    if content:
+                        code_samples[path] = content
+
+                # Read document files (PDFs, Word docs, images)
+                elif ext in DOCUMENT_EXTENSIONS:
+                    documents += 1
+                    content = self.read_document_file(repo_dir, path)
+                    if content:
+                        code_samples[path] = content
+
+            s.set_attributes({
+                "files_read": len(code_samples),
+                "documents": documents,
+                "bytes_read": sum(item.get("size", 0) for item in file_tree if item["path"] in code_samples),
+            })
 
         return code_samples
 
@@ -292,12 +450,50 @@ class GitHubClient:
         for item in file_tree:
             filename = item["path"].split("/")[-1]
             if filename in CONFIG_FILE_NAMES:
-                content = self.read_local_file(repo_dir, item["path"], max_lines=150)
+                # Manifests are parsed, so they are read whole (within reason)
+                max_lines = MANIFEST_MAX_LINES if is_manifest(filename) else CONFIG_MAX_LINES
+                content = self.read_local_file(repo_dir, item["path"], max_lines=max_lines)
                 if content:
                     config_files[item["path"]] = content
 
         return config_files
 
+    def save_text_files(self, repo_dir: str, file_tree: List[Dict], skip, dest: str) -> int:
+        """
+        Copy the clone's text files not in skip (paths already held in memory) to dest,
+        replacing what an earlier run saved there. Binary, oversized and document files
+        are left out, as is everything past SAVED_FILES_MAX_BYTES. Returns the number saved.
+        """
+        staging = f"{dest}.tmp-{os.getpid()}-{id(file_tree)}"
+        saved = 0
+        total = 0
+        with span("save_text", category="ingest") as s:
+            for item in file_tree:
+                path = item["path"]
+                size = item.get("size", 0)
+                ext = os.path.splitext(path)[1].lower()
+                if (path in skip or ext in BINARY_EXTENSIONS or ext in DOCUMENT_EXTENSIONS
+                        or size > MAX_FILE_BYTES or total + size > SAVED_FILES_MAX_BYTES):
+                    continue
+                try:
+                    with open(os.path.join(repo_dir, path), "rb") as f:
+                        data = f.read()
+                    if b"\0" in data[:8192]:
+                        continue  # binary despite its extension
+                    target = os.path.join(staging, path)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with open(target, "wb") as f:
+                        f.write(data)
+                except OSError:
+                    continue
+                saved += 1
+                total += len(data)
+            shutil.rmtree(dest, ignore_errors=True)
+            if saved:
+                os.replace(staging, dest)
+            s.set_attributes({"files": saved, "bytes": total})
+        return saved
+
     def read_local_readme(self, repo_dir: str) -> Optional[str]:
         """Read the README file from the local clone."""
         for name in ["README.md", "README.rst", "README.txt", "README"]:
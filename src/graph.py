@@ -1,73 +1,292 @@
 """LangGraph workflow orchestrating 5 agents sequentially."""
+import asyncio
+import subprocess
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from langgraph.graph import StateGraph, END
 from src.state import AgentState
-from src.agents.navigator_agent import navigator_agent
-from src.agents.context_agent import context_agent
-from src.agents.mentor_agent import mentor_agent
-from src.agents.visualizer_agent import visualizer_agent
-from src.agents.orchestrator_agent import orchestrator_agent
+from src.aio import iterate_sync
+from src.deadline import capped, deadline_from_now, stage_budget
+from src.github_client import saved_files_path
+from src.events import PipelineEvent, StageStarted, StageFinished, AgentOutput, AnalysisComplete
+from src.metrics import collect_metrics, stage_record
+from src.tracing import span
+from src.analysis.code_metrics import CodeMetrics, compute_metrics
+from src.analysis.endpoints import extract_all
+from src.analysis.git_history import history_path, load_history, recent_commits
+from src.analysis.import_graph import build_import_graph
+from src.analysis.manifests import parse_manifests
+from src.analysis.pool import run_until
+from src.analysis.search_index import SearchIndex, index_path
+from src.analysis.symbols import SourceIndex, count_symbols, index_sources
+from src.agents import navigator_agent, context_agent, mentor_agent, visualizer_agent, orchestrator_agent
+
+# Agent nodes in execution order: (node name, async function, fallback update, progress description).
+# The fallback is called as fallback(error, state) when an agent runs out of time.
+AGENT_SEQUENCE = [
+    ("navigator", navigator_agent.anavigator_agent, navigator_agent.failure_update,
+     "Mapping repository structure..."),
+    ("context", context_agent.acontext_agent, context_agent.failure_update,
+     "Analyzing source code..."),
+    ("mentor", mentor_agent.amentor_agent, mentor_agent.failure_update,
+     "Building onboarding guide..."),
+    ("visualizer", visualizer_agent.avisualizer_agent, visualizer_agent.failure_update,
+     "Generating architecture diagram..."),
+    ("orchestrator", orchestrator_agent.aorchestrator_agent, orchestrator_agent.failure_update,
+     "Synthesizing final report..."),
+]
+
+
+async def _run_within_budget(name: str, agent, fallback, state: AgentState) -> dict:
+    """Run an agent within its share of the deadline; on overrun use its normal failure fallback."""
+    budget = stage_budget(state.get("deadline_at"), name)
+    if budget is not None and budget <= 0:
+        return fallback(TimeoutError(f"skipped, deadline already passed before {name} started"), state)
+    try:
+        return await asyncio.wait_for(agent(state), budget)
+    except asyncio.TimeoutError:
+        return fallback(TimeoutError(f"{name} exceeded its {budget:.1f}s time budget"), state)
+
+
+def _instrumented(name: str, agent, fallback):
+    """
+    Wrap an agent node so it runs within its time budget and its wall/queue time
+    and LLM call metrics land in state["metrics"].
+    """
+    async def node(state: AgentState):
+        started_at = time.time()
+        previous = state.get("metrics") or []
+        # Queue time: gap between the previous stage finishing and this one starting
+        queue_s = max(0.0, started_at - previous[-1]["ended_at"]) if previous else 0.0
+
+        with span(name, category="agent"), collect_metrics(name) as calls:
+            t = time.perf_counter()
+            update = await _run_within_budget(name, agent, fallback, state)
+            wall_s = time.perf_counter() - t
+
+        update = dict(update or {})
+        update["metrics"] = calls + [stage_record(name, started_at, wall_s, queue_s, calls)]
+        return update
+
+    return node
 
 
 def create_agent_graph():
     """
     Create the LangGraph workflow with sequential agent execution.
+    Nodes are async, so the compiled graph is driven with ainvoke/astream.
 
     Flow: Navigator -> Context -> Mentor -> Visualizer -> Orchestrator -> END
     """
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("navigator", navigator_agent)
-    workflow.add_node("context", context_agent)
-    workflow.add_node("mentor", mentor_agent)
-    workflow.add_node("visualizer", visualizer_agent)
-    workflow.add_node("orchestrator", orchestrator_agent)
+    for name, agent, fallback, _ in AGENT_SEQUENCE:
+        workflow.add_node(name, _instrumented(name, agent, fallback))
 
-    workflow.set_entry_point("navigator")
-    workflow.add_edge("navigator", "context")
-    workflow.add_edge("context", "mentor")
-    workflow.add_edge("mentor", "visualizer")
-    workflow.add_edge("visualizer", "orchestrator")
-    workflow.add_edge("orchestrator", END)
+    workflow.set_entry_point(AGENT_SEQUENCE[0][0])
+    for (name, *_), (next_name, *_) in zip(AGENT_SEQUENCE, AGENT_SEQUENCE[1:]):
+        workflow.add_edge(name, next_name)
+    workflow.add_edge(AGENT_SEQUENCE[-1][0], END)
 
     return workflow.compile()
 
 
-def run_analysis(repo_url: str, github_client) -> AgentState:
+async def _run_local(stage: str, deadline_at: Optional[float], errors: List[str], fallback, func, *args):
     """
-    Execute full analysis workflow on a GitHub repository.
+    Run a local analysis step in a worker thread within its share of the deadline.
+    If it fails or overruns, the pipeline goes on with fallback (the step's empty
+    result) and notes it in errors. An overrunning step's process pool work is
+    cancelled at the deadline (see src/analysis/pool.py); other work finishes in the background.
+    """
+    budget = stage_budget(deadline_at, stage)
+    stage_deadline = time.monotonic() + budget if budget is not None else None
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(run_until, stage_deadline, func, *args), budget)
+    except asyncio.TimeoutError:
+        errors.append(f"{stage} stage exceeded its {budget:.1f}s time budget; analysis continues without it")
+    except Exception as e:
+        errors.append(f"{stage} stage failed: {e}; analysis continues without it")
+    return fallback
+
+
+def _read_history(github_client, repo_url: str, owner: str, repo_name: str, code_samples: Dict[str, str],
+                  code_metrics: CodeMetrics, budget: Optional[float] = None) -> Tuple[Dict[str, int], Dict, List[Dict]]:
+    """
+    Update the repo's local mirror and its cached commit log, then return
+    (file churn, history summary with complexity-weighted hotspots, recent commits).
+    The mirror update and log parsing together stop after budget seconds, if given.
+    """
+    deadline = time.monotonic() + budget if budget is not None else None
+    git_dir = github_client.update_mirror(repo_url, owner, repo_name, timeout=capped(600, budget))
+    log = load_history(git_dir, history_path(owner, repo_name), deadline=deadline)
+    complexity = dict(zip(code_metrics.paths, code_metrics.file_scores().tolist()))
+    return log.file_churn(), log.summary(complexity, code_samples), recent_commits(git_dir)
+
+
+async def astream_analysis(repo_url: str, github_client, deadline_s: Optional[float] = None,
+                           use_cache: bool = True, history: bool = False) -> AsyncIterator[PipelineEvent]:
+    """
+    Execute the analysis workflow, yielding progress events as it goes.
     Clones the repo locally for file reading, uses API for metadata/commits/PRs.
+    Network calls and the clone are awaited and file I/O runs in worker threads,
+    so many analyses can share one event loop.
+
+    deadline_s bounds the whole run: it is split into per-stage budgets and a
+    stage that overruns degrades (partial read, empty commits, agent fallback)
+    instead of holding up the rest of the pipeline.
+
+    use_cache=False makes every agent call the LLM even when an identical
+    prompt is in the persistent response cache.
+
+    history=True also analyzes the full git history from a mirror kept in the
+    cache directory (churn, hotspots, authors); recent commits then come from
+    the mirror instead of the API.
+
+    Yields StageStarted/StageFinished for every ingestion step and agent,
+    AgentOutput as soon as each agent returns, and AnalysisComplete last.
     """
+    with span("analysis", category="pipeline", repo_url=repo_url):
+        async for event in _astream_analysis(repo_url, github_client, deadline_from_now(deadline_s), use_cache,
+                                             history):
+            yield event
+
+
+async def _astream_analysis(repo_url: str, github_client, deadline_at: Optional[float],
+                            use_cache: bool, history: bool) -> AsyncIterator[PipelineEvent]:
+    """Body of astream_analysis, run inside the root "analysis" span."""
+    run_start = time.perf_counter()
     owner, repo_name = github_client.parse_repo_url(repo_url)
+    metrics = []
+    errors = []
+
+    def finished(stage: str, t: float, summary: str = "") -> StageFinished:
+        elapsed = time.perf_counter() - t
+        metrics.append(stage_record(stage, time.time() - elapsed, elapsed))
+        return StageFinished(stage, elapsed, summary)
 
-    print("Fetching repository metadata...")
-    metadata = github_client.get_repo_metadata(owner, repo_name)
+    yield StageStarted("metadata", "Fetching repository metadata...")
+    t = time.perf_counter()
+    metadata = await github_client.aget_repo_metadata(
+        owner, repo_name, timeout=capped(10, stage_budget(deadline_at, "metadata")))
+    yield finished("metadata", t)
 
-    print("Cloning repository...")
-    repo_dir = github_client.clone_repo(repo_url)
+    yield StageStarted("clone", "Cloning repository...")
+    t = time.perf_counter()
+    repo_dir = await github_client.aclone_repo(repo_url, timeout=capped(120, stage_budget(deadline_at, "clone")))
+    yield finished("clone", t)
 
     try:
-        print("Scanning file tree...")
-        file_tree = github_client.walk_local_repo(repo_dir)
+        yield StageStarted("scan", "Scanning file tree...")
+        t = time.perf_counter()
+        file_tree = await asyncio.to_thread(github_client.walk_local_repo, repo_dir)
+        yield finished("scan", t, f"{len(file_tree)} files")
+
+        yield StageStarted("read", f"Reading source code ({len(file_tree)} files in repo)...")
+        t = time.perf_counter()
+        budget = stage_budget(deadline_at, "read")
+        read_deadline = time.monotonic() + budget if budget is not None else None
+        code_samples = await asyncio.to_thread(
+            github_client.read_all_source_files, repo_dir, file_tree, deadline=read_deadline)
+        if read_deadline is not None and time.monotonic() > read_deadline:
+            errors.append(f"Read stage hit its {budget:.1f}s time budget; analysis uses "
+                          f"{len(code_samples)} files read so far")
+        yield finished("read", t, f"{len(code_samples)} source files")
 
-        print(f"Reading source code ({len(file_tree)} files in repo)...")
-        code_samples = github_client.read_all_source_files(repo_dir, file_tree)
+        yield StageStarted("readme", "Reading README...")
+        t = time.perf_counter()
+        readme_content = await asyncio.to_thread(github_client.read_local_readme, repo_dir)
+        yield finished("readme", t)
 
-        print("Reading README...")
-        readme_content = github_client.read_local_readme(repo_dir)
+        yield StageStarted("config", "Reading config & dependency files...")
+        t = time.perf_counter()
+        config_files = await asyncio.to_thread(github_client.read_local_config_files, repo_dir, file_tree)
+        yield finished("config", t, f"{len(config_files)} config files")
 
-        print("Reading config & dependency files...")
-        config_files = github_client.read_local_config_files(repo_dir, file_tree)
+        yield StageStarted("docs", "Saving docs and other text files for chat...")
+        t = time.perf_counter()
+        try:
+            saved = await asyncio.to_thread(github_client.save_text_files, repo_dir, file_tree,
+                                            code_samples.keys() | config_files.keys(),
+                                            saved_files_path(owner, repo_name))
+            yield finished("docs", t, f"{saved} text files")
+        except OSError as e:
+            errors.append(f"Saving text files for chat failed: {e}")
+            yield finished("docs", t, "failed")
     finally:
-        print("Cleaning up clone...")
-        github_client.cleanup_clone(repo_dir)
+        await asyncio.to_thread(github_client.cleanup_clone, repo_dir)
+
+    yield StageStarted("symbols", "Indexing functions and classes...")
+    t = time.perf_counter()
+    # One pass parses each Python file once for its symbols, endpoints/models and skeleton
+    sources = await _run_local("symbols", deadline_at, errors, SourceIndex({}, {}, {}), index_sources, code_samples)
+    symbol_table = sources.symbol_table
+    functions, classes = count_symbols(symbol_table)
+    yield finished("symbols", t, f"{functions} functions, {classes} classes in {len(symbol_table)} files")
+
+    yield StageStarted("imports", "Resolving imports between files...")
+    t = time.perf_counter()
+    import_graph = await _run_local("imports", deadline_at, errors, build_import_graph({}),
+                                    build_import_graph, code_samples, symbol_table)
+    yield finished("imports", t, f"{import_graph.edge_count} imports between {len(import_graph)} files")
+
+    yield StageStarted("metrics", "Measuring code size and complexity...")
+    t = time.perf_counter()
+    code_metrics = await _run_local("metrics", deadline_at, errors, compute_metrics({}),
+                                    compute_metrics, code_samples, import_graph, symbol_table)
+    yield finished("metrics", t, f"{int(code_metrics.code_loc.sum())} lines of code, "
+                                 f"complexity {code_metrics.complexity_score():.2f}")
+
+    yield StageStarted("manifests", "Parsing dependency manifests...")
+    t = time.perf_counter()
+    dependencies = await _run_local("manifests", deadline_at, errors, [], parse_manifests, config_files, errors)
+    manifest_count = len({d["manifest"] for d in dependencies})
+    yield finished("manifests", t, f"{len(dependencies)} dependencies from {manifest_count} manifests")
+
+    yield StageStarted("endpoints", "Extracting API endpoints and data models...")
+    t = time.perf_counter()
+    api_endpoints, data_models = await _run_local("endpoints", deadline_at, errors, ([], []),
+                                                  extract_all, code_samples, None, sources.python_api)
+    yield finished("endpoints", t, f"{len(api_endpoints)} endpoints, {len(data_models)} data models")
 
-    # Git data via API (commits, PRs)
-    print("Fetching commits & pull requests...")
-    recent_commits = github_client.get_recent_commits(owner, repo_name)
-    pull_requests = github_client.get_pull_requests(owner, repo_name)
+    yield StageStarted("search_index", "Building the search index...")
+    t = time.perf_counter()
+    empty_index = SearchIndex.build({})
+    search_index = await _run_local("search_index", deadline_at, errors, empty_index, SearchIndex.build, code_samples)
+    try:
+        # Saved so the CLI can search this repo later without analyzing it again
+        if search_index is not empty_index:
+            await asyncio.to_thread(search_index.save, index_path(owner, repo_name))
+    except OSError as e:
+        errors.append(f"Saving the search index failed: {e}")
+    yield finished("search_index", t, f"{len(search_index.keys)} trigrams over {len(search_index)} files")
+
+    file_churn, git_history, history_commits = {}, None, None
+    if history:
+        yield StageStarted("history", "Analyzing git history...")
+        t = time.perf_counter()
+        summary = "unavailable"
+        try:
+            file_churn, git_history, history_commits = await asyncio.to_thread(
+                _read_history, github_client, repo_url, owner, repo_name, code_samples, code_metrics,
+                stage_budget(deadline_at, "history"))
+            summary = f"{git_history['commits']} commits by {git_history['authors']} authors"
+        except (OSError, RuntimeError, subprocess.TimeoutExpired) as e:
+            errors.append(f"Git history analysis failed: {e}")
+        yield finished("history", t, summary)
 
-    print(f"Data collected: {len(code_samples)} source files, {len(config_files)} config files, "
-          f"{len(recent_commits)} commits, {len(pull_requests)} PRs")
+    # Git data via API (commits, PRs), fetched concurrently
+    yield StageStarted("git_api", "Fetching commits & pull requests...")
+    t = time.perf_counter()
+    api_timeout = capped(10, stage_budget(deadline_at, "git_api"))
+    if history_commits is None:
+        commits, pull_requests = await asyncio.gather(
+            github_client.aget_recent_commits(owner, repo_name, timeout=api_timeout),
+            github_client.aget_pull_requests(owner, repo_name, timeout=api_timeout),
+        )
+    else:
+        commits = history_commits
+        pull_requests = await github_client.aget_pull_requests(owner, repo_name, timeout=api_timeout)
+    yield finished("git_api", t, f"{len(commits)} commits, {len(pull_requests)} PRs")
 
     initial_state: AgentState = {
         "repo_url": repo_url,
@@ -78,22 +297,84 @@ def run_analysis(repo_url: str, github_client) -> AgentState:
         "code_samples": code_samples,
         "readme_content": readme_content,
         "config_files": config_files,
-        "recent_commits": recent_commits,
+        "recent_commits": commits,
         "pull_requests": pull_requests,
+        "symbol_table": symbol_table,
+        "skeletons": sources.skeletons,
+        "import_graph": import_graph,
+        "dependencies": dependencies,
+        "api_endpoints": api_endpoints,
+        "data_models": data_models,
+        "code_metrics": code_metrics,
+        "file_churn": file_churn,
+        "git_history": git_history,
+        "search_index": search_index,
         "navigator_map": None,
         "context_output": None,
         "context_summary": None,
         "mentor_guide": None,
         "visualization": None,
+        "diagrams": None,
         "final_report": None,
         "messages": [],
-        "errors": [],
+        "errors": errors,
+        "metrics": metrics,
+        "deadline_at": deadline_at,
+        "use_llm_cache": use_cache,
     }
 
     app = create_agent_graph()
+    descriptions = {name: description for name, _, _, description in AGENT_SEQUENCE}
+    next_agent = {name: next_name for (name, *_), (next_name, *_) in zip(AGENT_SEQUENCE, AGENT_SEQUENCE[1:])}
+
+    # "updates" gives each node's partial output as soon as it returns;
+    # "values" gives the merged state, the last of which is the final state.
+    final_state = initial_state
+    first = AGENT_SEQUENCE[0][0]
+    yield StageStarted(first, descriptions[first])
+    t = time.perf_counter()
+    async for mode, chunk in app.astream(initial_state, stream_mode=["updates", "values"]):
+        if mode == "values":
+            final_state = chunk
+            continue
+        for name, update in chunk.items():
+            yield StageFinished(name, time.perf_counter() - t)
+            yield AgentOutput(name, update or {})
+            if name in next_agent:
+                yield StageStarted(next_agent[name], descriptions[next_agent[name]])
+                t = time.perf_counter()
 
-    print("Running 5-agent analysis pipeline...\n")
+    yield AnalysisComplete(final_state, time.perf_counter() - run_start)
+
+
+async def arun_analysis(repo_url: str, github_client, deadline_s: Optional[float] = None,
+                        use_cache: bool = True, history: bool = False) -> AgentState:
+    """Async variant of run_analysis: await the full workflow and return the final state."""
+    final_state = None
+    async for event in astream_analysis(repo_url, github_client, deadline_s, use_cache, history):
+        if isinstance(event, AnalysisComplete):
+            final_state = event.state
+    return final_state
 
-    final_state = app.invoke(initial_state)
 
+def stream_analysis(repo_url: str, github_client, deadline_s: Optional[float] = None,
+                    use_cache: bool = True, history: bool = False) -> Iterator[PipelineEvent]:
+    """Sync wrapper over astream_analysis (runs on the shared background event loop)."""
+    return iterate_sync(astream_analysis(repo_url, github_client, deadline_s, use_cache, history))
+
+
+def run_analysis(repo_url: str, github_client, deadline_s: Optional[float] = None,
+                 use_cache: bool = True, history: bool = False) -> AgentState:
+    """
+    Execute full analysis workflow on a GitHub repository.
+    Thin wrapper over stream_analysis that prints progress and returns the final state.
+    deadline_s optionally bounds the whole run; use_cache=False bypasses the
+    LLM response cache and history=True adds git history analytics (see astream_analysis).
+    """
+    final_state = None
+    for event in stream_analysis(repo_url, github_client, deadline_s, use_cache, history):
+        if isinstance(event, StageStarted):
+            print(event.description)
+        elif isinstance(event, AnalysisComplete):
+            final_state = event.state
     return final_state
@@ -0,0 +1,260 @@
+"""Central LLM client factory and shared helpers for calling the LLM from agents and chat."""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Dict, Optional, Tuple
+import httpx
+from dotenv import load_dotenv
+from src.aio import run_sync
+from src.cache import CACHE_DIR, SQLiteCache
+from src.metrics import current_stage, estimate_cost, make_record, record_call
+from src.rate_limit import PRIORITY_BATCH, estimate_call_tokens, get_rate_limiter
+from src.tracing import span
+
+load_dotenv()
+
+# Retries are done here (not inside the client) so they can be counted
+MAX_RETRIES = 2
+RETRY_BACKOFF_S = 1.0
+
+DEFAULT_MODEL = os.getenv("GITBRO_LLM_MODEL", "gpt-4o-mini")
+
+# Per-agent model settings; timeout is seconds per request. prompt_budget is the
+# estimated-token budget the agent packs repo content into (see src/tokens.py).
+LLM_CONFIG = {
+    "navigator": {"model": DEFAULT_MODEL, "temperature": 0.1, "timeout": 60, "prompt_budget": 8000},
+    "context": {"model": DEFAULT_MODEL, "temperature": 0.1, "timeout": 90, "prompt_budget": 16000},
+    "mentor": {"model": DEFAULT_MODEL, "temperature": 0.1, "timeout": 60},
+    "visualizer": {"model": DEFAULT_MODEL, "temperature": 0.1, "timeout": 60},
+    "orchestrator": {"model": DEFAULT_MODEL, "temperature": 0.2, "timeout": 90},
+    "chat": {"model": DEFAULT_MODEL, "temperature": 0.3, "timeout": 60},
+}
+
+# Persistent response cache: identical (model, params, prompt) calls are answered locally.
+# GITBRO_LLM_CACHE=0 disables it for the process; use_cache=False bypasses it per call.
+LLM_CACHE_ENABLED = os.getenv("GITBRO_LLM_CACHE", "1") != "0"
+LLM_CACHE_TTL_S = float(os.getenv("GITBRO_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = 10_000
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Connection pool shared by every client (keep-alive reused across agents and chat)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_lock = threading.Lock()
+_http_client = None
+_llms: Dict[str, object] = {}
+# Async connection pools are bound to an event loop, so async-capable clients are cached per loop
+_loop_http_clients = weakref.WeakKeyDictionary()
+_loop_llms = weakref.WeakKeyDictionary()
+_response_cache: Optional[SQLiteCache] = None
+
+
+def _shared_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(limits=HTTP_LIMITS)
+    return _http_client
+
+
+def get_llm(name: str):
+    """
+    Return the chat model configured for `name` (an agent or "chat"), creating it on first use.
+    langchain_openai is imported here rather than at module import, so commands that never
+    call the LLM don't pay for it. All clients share one HTTP connection pool; when called
+    inside an event loop the client also shares that loop's async pool.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _lock:
+        cache = _llms if loop is None else _loop_llms.setdefault(loop, {})
+        if name not in cache:
+            from langchain_openai import ChatOpenAI
+
+            config = LLM_CONFIG[name]
+            async_http = None
+            if loop is not None:
+                if loop not in _loop_http_clients:
+                    _loop_http_clients[loop] = httpx.AsyncClient(limits=HTTP_LIMITS)
+                async_http = _loop_http_clients[loop]
+
+            cache[name] = ChatOpenAI(
+                model=config["model"],
+                temperature=config["temperature"],
+                timeout=config["timeout"],
+                max_retries=0,  # retried (and counted) by invoke_llm
+                http_client=_shared_http_client(),
+                http_async_client=async_http,
+            )
+        return cache[name]
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Read prompt/completion token counts from an AIMessage, if the provider reported them."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return {"prompt": usage.get("input_tokens", 0), "completion": usage.get("output_tokens", 0)}
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return {"prompt": token_usage.get("prompt_tokens", 0), "completion": token_usage.get("completion_tokens", 0)}
+
+
+def _model_name(llm) -> str:
+    return getattr(llm, "model_name", "") or getattr(llm, "model", "")
+
+
+def get_llm_cache() -> Optional[SQLiteCache]:
+    """The persistent LLM response cache, or None when disabled or the cache dir is unusable."""
+    global _response_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _lock:
+        if _response_cache is None:
+            try:
+                _response_cache = SQLiteCache(
+                    os.path.join(CACHE_DIR, "llm_responses.sqlite"), "llm_responses",
+                    ttl_s=LLM_CACHE_TTL_S, max_entries=LLM_CACHE_MAX_ENTRIES, max_bytes=LLM_CACHE_MAX_BYTES,
+                )
+            except (OSError, sqlite3.Error):
+                return None  # calls go uncached, they never fail over the cache
+    return _response_cache
+
+
+def _cache_key(llm, prompt: str) -> str:
+    """Hash of everything that determines the response: model, sampling params and prompt."""
+    params = {
+        "model": _model_name(llm),
+        "temperature": getattr(llm, "temperature", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _cached_response(llm, prompt: str, s, started_at: float, start: float) -> Optional[str]:
+    """Return a cached response (recording a zero-cost call) or None on a miss."""
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    try:
+        text = cache.get(_cache_key(llm, prompt))
+    except sqlite3.Error:
+        return None
+    s.set_attribute("cached", text is not None)
+    if text is not None:
+        record_call(make_record(current_stage(), "llm_call", started_at, time.perf_counter() - start,
+                                model=_model_name(llm), cached=True))
+    return text
+
+
+def _store_response(llm, prompt: str, text: str):
+    cache = get_llm_cache()
+    if cache is not None and text:
+        try:
+            cache.set(_cache_key(llm, prompt), text)
+        except sqlite3.Error:
+            pass  # a full or locked cache must never fail the call
+
+
+def _finish_call(llm, response, s, started_at: float, start: float, retries: int,
+                 queue_s: float, estimated_tokens: int) -> str:
+    """Record metrics/span attributes for a completed call and return the response text."""
+    model = _model_name(llm)
+    usage = _token_usage(response)
+    get_rate_limiter().settle(estimated_tokens, usage["prompt"] + usage["completion"])
+    s.set_attributes({"prompt_tokens": usage["prompt"], "completion_tokens": usage["completion"],
+                      "retries": retries, "queue_s": round(queue_s, 4)})
+    record_call(make_record(
+        current_stage(), "llm_call", started_at, time.perf_counter() - start, queue_s,
+        prompt_tokens=usage["prompt"], completion_tokens=usage["completion"], retries=retries,
+        cost_usd=estimate_cost(model, usage["prompt"], usage["completion"]), model=model,
+    ))
+
+    # Extract content from AIMessage object
+    return response.content if hasattr(response, "content") else str(response)
+
+
+async def _send(llm, payload, estimated_tokens: int, max_retries: int, priority: str) -> Tuple[object, int, float]:
+    """
+    Send payload (a prompt or message list) through the shared rate limiter,
+    retrying failures with exponential backoff. Returns (response, retries, queue seconds).
+    """
+    limiter = get_rate_limiter()
+    retries = 0
+    queue_s = 0.0
+    while True:
+        queue_s += await limiter.aacquire(estimated_tokens, priority)
+        try:
+            return await llm.ainvoke(payload), retries, queue_s
+        except Exception:
+            if retries >= max_retries:
+                raise
+            retries += 1
+            await asyncio.sleep(RETRY_BACKOFF_S * 2 ** (retries - 1))
+
+
+async def ainvoke_llm(llm, prompt: str, max_retries: int = MAX_RETRIES, priority: str = PRIORITY_BATCH,
+                      use_cache: bool = True) -> str:
+    """
+    Invoke the LLM with retries and return the response text.
+    Identical earlier calls are answered from the persistent response cache
+    unless use_cache is False (the fresh response is still stored).
+    Every attempt first acquires from the shared rate limiter in the given
+    priority lane; time spent waiting there is reported as queue time.
+    Records wall time, tokens, retry count and estimated cost for the current stage.
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    estimated_tokens = estimate_call_tokens(prompt)
+
+    with span("llm_call", model=_model_name(llm), prompt_chars=len(prompt), priority=priority) as s:
+        # SQLite reads and writes (including LRU eviction) run off the event loop
+        if use_cache and (cached := await asyncio.to_thread(
+                _cached_response, llm, prompt, s, started_at, start)) is not None:
+            return cached
+        response, retries, queue_s = await _send(llm, prompt, estimated_tokens, max_retries, priority)
+        text = _finish_call(llm, response, s, started_at, start, retries, queue_s, estimated_tokens)
+        await asyncio.to_thread(_store_response, llm, prompt, text)
+        return text
+
+
+def invoke_llm(llm, prompt: str, max_retries: int = MAX_RETRIES, priority: str = PRIORITY_BATCH,
+               use_cache: bool = True) -> str:
+    """Sync wrapper over ainvoke_llm (runs on the shared background event loop)."""
+    return run_sync(ainvoke_llm(llm, prompt, max_retries, priority, use_cache))
+
+
+def _messages_text(messages: list) -> str:
+    """The text content of a message list (dicts or message objects), for size estimates."""
+    return "\n".join(str(m.get("content", "") if isinstance(m, dict) else getattr(m, "content", m))
+                     for m in messages)
+
+
+async def ainvoke_llm_messages(llm, messages: list, max_retries: int = MAX_RETRIES, priority: str = PRIORITY_BATCH):
+    """
+    Invoke the LLM on a message list (a tool-calling conversation) and return the response
+    message itself, so its tool_calls can be run. Rate limited, retried and recorded like
+    ainvoke_llm, but never cached: tool results make every conversation different.
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    prompt_text = _messages_text(messages)
+    estimated_tokens = estimate_call_tokens(prompt_text)
+
+    with span("llm_call", model=_model_name(llm), prompt_chars=len(prompt_text), priority=priority,
+              messages=len(messages)) as s:
+        response, retries, queue_s = await _send(llm, messages, estimated_tokens, max_retries, priority)
+        _finish_call(llm, response, s, started_at, start, retries, queue_s, estimated_tokens)
+        s.set_attribute("tool_calls", len(getattr(response, "tool_calls", None) or []))
+        return response
+
+
+def invoke_llm_messages(llm, messages: list, max_retries: int = MAX_RETRIES, priority: str = PRIORITY_BATCH):
+    """Sync wrapper over ainvoke_llm_messages (runs on the shared background event loop)."""
+    return run_sync(ainvoke_llm_messages(llm, messages, max_retries, priority))
@@ -0,0 +1,127 @@
+"""Per-stage and per-LLM-call latency, token and cost metrics."""
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# USD per 1M tokens: (prompt, completion)
+MODEL_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+# (stage name, list collecting LLM call records) for the node currently running
+_current: ContextVar[Optional[tuple]] = ContextVar("gitbro_metrics", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of a call from the pricing table (0.0 for unknown models)."""
+    prompt_price, completion_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def make_record(stage: str, kind: str, started_at: float, wall_s: float, queue_s: float = 0.0,
+                prompt_tokens: int = 0, completion_tokens: int = 0, retries: int = 0,
+                cost_usd: float = 0.0, model: str = "", cached: bool = False) -> Dict:
+    """Build one metrics record. kind is "stage" or "llm_call"; cached marks a response-cache hit."""
+    return {
+        "stage": stage,
+        "kind": kind,
+        "model": model,
+        "started_at": started_at,
+        "ended_at": started_at + wall_s,
+        "wall_s": round(wall_s, 4),
+        "queue_s": round(queue_s, 4),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "retries": retries,
+        "cost_usd": round(cost_usd, 6),
+        "cached": cached,
+    }
+
+
+def stage_record(stage: str, started_at: float, wall_s: float, queue_s: float = 0.0,
+                 calls: Optional[List[Dict]] = None) -> Dict:
+    """Build a stage record, rolling up tokens, retries and cost of its LLM calls."""
+    calls = calls or []
+    return make_record(
+        stage, "stage", started_at, wall_s, queue_s,
+        prompt_tokens=sum(c["prompt_tokens"] for c in calls),
+        completion_tokens=sum(c["completion_tokens"] for c in calls),
+        retries=sum(c["retries"] for c in calls),
+        cost_usd=sum(c["cost_usd"] for c in calls),
+        model=calls[-1]["model"] if calls else "",
+    )
+
+
+@contextmanager
+def collect_metrics(stage: str) -> Iterator[List[Dict]]:
+    """Collect the LLM call records made while `stage` runs into the yielded list."""
+    calls: List[Dict] = []
+    token = _current.set((stage, calls))
+    try:
+        yield calls
+    finally:
+        _current.reset(token)
+
+
+def current_stage() -> str:
+    """Name of the stage currently collecting metrics ("" outside a stage)."""
+    current = _current.get()
+    return current[0] if current else ""
+
+
+def record_call(record: Dict):
+    """Append an LLM call record to the active collector (no-op outside a stage)."""
+    current = _current.get()
+    if current is not None:
+        current[1].append(record)
+
+
+def totals(metrics: List[Dict]) -> Dict:
+    """Sum stage-level records into run totals."""
+    stages = [m for m in metrics if m["kind"] == "stage"]
+    calls = [m for m in metrics if m["kind"] == "llm_call"]
+    cache_hits = sum(1 for m in calls if m.get("cached"))
+    return {
+        "wall_s": round(sum(m["wall_s"] for m in stages), 4),
+        "queue_s": round(sum(m["queue_s"] for m in stages), 4),
+        "prompt_tokens": sum(m["prompt_tokens"] for m in stages),
+        "completion_tokens": sum(m["completion_tokens"] for m in stages),
+        "retries": sum(m["retries"] for m in stages),
+        "cost_usd": round(sum(m["cost_usd"] for m in stages), 6),
+        "llm_calls": len(calls),
+        "cache_hits": cache_hits,
+        "cache_hit_rate": round(cache_hits / len(calls), 4) if calls else 0.0,
+    }
+
+
+def format_metrics_table(metrics: List[Dict]) -> str:
+    """Render stage and LLM call records as a fixed-width text table."""
+    header = f"{'STAGE':<16}{'KIND':<10}{'WALL':>9}{'QUEUE':>9}{'PROMPT':>9}{'COMPL':>8}{'RETRY':>7}{'COST $':>11}"
+    lines = [header, "-" * len(header)]
+    for m in metrics:
+        kind = "cache_hit" if m.get("cached") else m["kind"]
+        lines.append(
+            f"{m['stage']:<16}{kind:<10}{m['wall_s']:>8.2f}s{m['queue_s']:>8.2f}s"
+            f"{m['prompt_tokens']:>9,}{m['completion_tokens']:>8,}{m['retries']:>7}{m['cost_usd']:>11.5f}"
+        )
+    t = totals(metrics)
+    lines.append("-" * len(header))
+    lines.append(
+        f"{'TOTAL':<16}{str(t['llm_calls']) + ' calls':<10}{t['wall_s']:>8.2f}s{t['queue_s']:>8.2f}s"
+        f"{t['prompt_tokens']:>9,}{t['completion_tokens']:>8,}{t['retries']:>7}{t['cost_usd']:>11.5f}"
+    )
+    if t["cache_hits"]:
+        lines.append(f"LLM cache: {t['cache_hits']}/{t['llm_calls']} calls served from cache "
+                     f"({t['cache_hit_rate']:.0%})")
+    return "\n".join(lines)
+
+
+def export_metrics_json(metrics: List[Dict], path: str):
+    """Write metrics records plus run totals to a JSON file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"exported_at": time.time(), "totals": totals(metrics), "records": metrics}, f, indent=2)
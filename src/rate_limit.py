@@ -0,0 +1,121 @@
+"""Process-wide LLM rate limiter: token buckets for requests/min and tokens/min.
+
+Every LLM call (agents and chat) acquires from the same limiter before it is
+sent. Interactive calls (chat) have priority: while one is waiting, batch calls
+(analysis agents) hold back, and batch calls may not drain the last
+INTERACTIVE_RESERVE of either bucket, so a chat turn rarely waits behind a
+queue of analyses.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+from src.tokens import estimate_tokens
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+
+DEFAULT_RPM = int(os.getenv("GITBRO_LLM_RPM", "500"))
+DEFAULT_TPM = int(os.getenv("GITBRO_LLM_TPM", "200000"))
+INTERACTIVE_RESERVE = 0.1
+
+# Tokens budgeted for the completion when estimating a call up front
+COMPLETION_ALLOWANCE = 1000
+
+
+def estimate_call_tokens(prompt: str) -> int:
+    """Token estimate for a call: estimated prompt tokens plus a completion allowance."""
+    return estimate_tokens(prompt) + COMPLETION_ALLOWANCE
+
+
+class RateLimiter:
+    """Thread-safe dual token bucket usable from both threads and event loops."""
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM,
+                 interactive_reserve: float = INTERACTIVE_RESERVE):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.interactive_reserve = interactive_reserve
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _try_acquire(self, tokens: int, priority: str) -> float:
+        """Take capacity and return 0.0, or return how long to wait before retrying."""
+        with self._lock:
+            self._refill()
+            if priority == PRIORITY_INTERACTIVE:
+                floor_requests, floor_tokens = 0.0, 0.0
+            else:
+                if self._interactive_waiting:
+                    return 0.05
+                # The reserve never leaves a batch call less than one request to draw on
+                floor_requests = min(self.rpm * self.interactive_reserve, self.rpm - 1.0)
+                floor_tokens = self.tpm * self.interactive_reserve
+            # A call larger than the bucket can ever hold above the floor takes all of it
+            tokens = min(tokens, self.tpm - floor_tokens)
+
+            need_requests = floor_requests + 1 - self._requests
+            need_tokens = floor_tokens + tokens - self._tokens
+            if need_requests <= 0 and need_tokens <= 0:
+                self._requests -= 1
+                self._tokens -= tokens
+                return 0.0
+            return max(need_requests * 60 / self.rpm, need_tokens * 60 / self.tpm, 0.01)
+
+    def _waiting(self, priority: str, delta: int):
+        if priority == PRIORITY_INTERACTIVE:
+            with self._lock:
+                self._interactive_waiting += delta
+
+    def acquire(self, tokens: int, priority: str = PRIORITY_BATCH) -> float:
+        """Block until the call may be sent. Returns seconds spent waiting."""
+        start = time.monotonic()
+        self._waiting(priority, 1)
+        try:
+            while (wait := self._try_acquire(tokens, priority)) > 0:
+                time.sleep(min(wait, 1.0))
+        finally:
+            self._waiting(priority, -1)
+        return time.monotonic() - start
+
+    async def aacquire(self, tokens: int, priority: str = PRIORITY_BATCH) -> float:
+        """Async variant of acquire; waits without blocking the event loop."""
+        start = time.monotonic()
+        self._waiting(priority, 1)
+        try:
+            while (wait := self._try_acquire(tokens, priority)) > 0:
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            self._waiting(priority, -1)
+        return time.monotonic() - start
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the token bucket once the real usage of a call is known."""
+        if actual <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.tpm, self._tokens + min(estimated, self.tpm) - actual)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The limiter shared by every LLM call in this process."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+    return _limiter
@@ -0,0 +1,195 @@
+"""Local BM25 index over code and analysis chunks, used to build chat prompts per question."""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Chunking: cut at a top-level definition once a chunk has MIN_CHUNK_LINES, always by MAX_CHUNK_LINES
+MIN_CHUNK_LINES = 20
+MAX_CHUNK_LINES = 60
+TREE_CHUNK_PATHS = 100
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_TOP_LEVEL = re.compile(
+    r"^(def |async def |class |function |export |const |let |var |func |fn |pub |public |private |"
+    r"interface |type |struct |impl |module |package |@)"
+)
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it its me of on or so that "
+    "the this to was what when where which who why will with you your".split()
+)
+
+
+@dataclass
+class Chunk:
+    """A retrievable piece of the repo: lines of a file, or a section of the analysis."""
+
+    path: str
+    start_line: int
+    end_line: int
+    text: str
+
+    def render(self) -> str:
+        if self.start_line:
+            return f"### {self.path} (lines {self.start_line}-{self.end_line})\n```\n{self.text}\n```"
+        return f"### {self.path}\n{self.text}"
+
+
+def _stem(token: str) -> str:
+    """Strip a common English suffix so "clone", "cloned", "cloning" and "clones" match."""
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased identifier tokens. snake_case and camelCase identifiers also yield
+    their parts, so "get_repo_metadata" and "getRepoMetadata" both match "metadata".
+    """
+    tokens = []
+    for word in _IDENTIFIER.findall(text):
+        lower = word.lower()
+        if lower in _STOPWORDS:
+            continue
+        tokens.append(_stem(lower))
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(_stem(p) for p in parts if p not in _STOPWORDS)
+    return tokens
+
+
+def chunk_file(path: str, content: str) -> List[Chunk]:
+    """Split a file into line windows, preferring to cut where a top-level definition starts."""
+    lines = content.splitlines()
+    chunks = []
+    start = 0
+    for i, line in enumerate(lines):
+        size = i - start
+        if size >= MAX_CHUNK_LINES or (size >= MIN_CHUNK_LINES and _TOP_LEVEL.match(line)):
+            chunks.append(Chunk(path, start + 1, i, "\n".join(lines[start:i])))
+            start = i
+    if start < len(lines):
+        chunks.append(Chunk(path, start + 1, len(lines), "\n".join(lines[start:])))
+    return chunks
+
+
+class CodeIndex:
+    """In-memory BM25 index over chunks. Built once per analysis; no network or model needed."""
+
+    def __init__(self, chunks: List[Chunk]):
+        self.chunks = chunks
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+        for chunk_id, chunk in enumerate(chunks):
+            # The path is indexed with the body so questions naming a file find it
+            counts = Counter(tokenize(chunk.path) + tokenize(chunk.text))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings[term].append((chunk_id, tf))
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self.chunks) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 8) -> List[Tuple[float, Chunk]]:
+        """Top-k chunks for the query by BM25 score, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term, qtf in Counter(tokenize(query)).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for chunk_id, tf in postings:
+                norm = 1 - BM25_B + BM25_B * self._lengths[chunk_id] / self._avg_length
+                scores[chunk_id] += qtf * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self.chunks[chunk_id]) for chunk_id, score in best]
+
+    def retrieve(self, query: str, k: int = 8, max_chars: int = 12000) -> List[Chunk]:
+        """
+        Chunks to put in the prompt: files named in the query first (their opening chunk),
+        then BM25 hits, stopping at k chunks or max_chars of text.
+        """
+        lowered = query.lower()
+        named = []
+        for chunk in self.chunks:
+            if chunk.start_line != 1:
+                continue
+            path = chunk.path.lower()
+            basename = path.rsplit("/", 1)[-1]
+            if path in lowered or re.search(rf"\b{re.escape(basename)}\b", lowered):
+                named.append(chunk)
+        selected, seen, used = [], set(), 0
+        for chunk in named + [chunk for _, chunk in self.search(query, k)]:
+            key = (chunk.path, chunk.start_line)
+            if key in seen or len(selected) >= k:
+                continue
+            if used + len(chunk.text) > max_chars and selected:
+                break
+            seen.add(key)
+            selected.append(chunk)
+            used += len(chunk.text)
+        return selected
+
+
+def _section(path: str, lines: List[str]) -> Optional[Chunk]:
+    lines = [line for line in lines if line]
+    return Chunk(path, 0, 0, "\n".join(lines)) if lines else None
+
+
+def build_chat_index(analysis: Dict) -> CodeIndex:
+    """
+    Index everything the chat may need beyond the fixed header: source and config
+    files, the file tree, commits, PRs, endpoints, models, the onboarding guide
+    and the diagram. Analysis sections use a bracketed pseudo-path.
+    """
+    chunks: List[Chunk] = []
+    for path, content in analysis.get("code_samples", {}).items():
+        chunks.extend(chunk_file(path, content))
+    for path, content in analysis.get("config_files", {}).items():
+        chunks.extend(chunk_file(path, content))
+
+    tree = [f["path"] for f in analysis.get("file_tree", [])]
+    for i in range(0, len(tree), TREE_CHUNK_PATHS):
+        chunks.append(Chunk("[file tree]", 0, 0, "\n".join(tree[i:i + TREE_CHUNK_PATHS])))
+
+    ctx = analysis.get("context_output") or {}
+    sections = [
+        _section("[recent commits]", [
+            f"- {c.get('sha', '')[:7]} {c.get('message', '')} (by {c.get('author', 'unknown')}, {c.get('date', '')})"
+            for c in analysis.get("recent_commits", [])]),
+        _section("[pull requests]", [
+            f"- #{pr.get('number', '')} {pr.get('title', '')} [{pr.get('state', '')}] by {pr.get('author', 'unknown')}"
+            for pr in analysis.get("pull_requests", [])]),
+        _section("[git hotspots]", [
+            f"- {h['path']}: {h['commits']} commits, {h['lines_changed']} lines changed, "
+            f"{h['authors']} authors, mostly {h['owner']}"
+            for h in (analysis.get("git_history") or {}).get("hotspots", [])]),
+        _section("[top authors]", [
+            f"- {a['name']}: {a['commits']} commits, {a['lines_changed']} lines changed in {a['files']} files"
+            for a in (analysis.get("git_history") or {}).get("top_authors", [])]),
+        _section("[api endpoints]", [
+            f"- {ep.get('method', '')} {ep.get('path', '')} ({ep.get('file', '')}) - {ep.get('purpose', '')}"
+            for ep in ctx.get("api_endpoints", [])]),
+        _section("[data models]", [
+            f"- {dm.get('name', '')} ({dm.get('file', '')}): {', '.join(dm.get('fields', []))}"
+            for dm in ctx.get("data_models", [])]),
+        _section("[onboarding guide]", [analysis.get("mentor_guide") or ""]),
+        _section("[architecture diagram]", [
+            f"```mermaid\n{analysis['visualization']}\n```" if analysis.get("visualization") else ""]),
+    ]
+    chunks.extend(s for s in sections if s is not None)
+    return CodeIndex(chunks)
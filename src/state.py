@@ -1,6 +1,9 @@
 """State schema for LangGraph multi-agent workflow."""
 from typing import Dict, List, Optional, TypedDict, Annotated
 from operator import add
+from src.analysis.code_metrics import CodeMetrics
+from src.analysis.import_graph import ImportGraph
+from src.analysis.search_index import SearchIndex
 
 
 class AgentState(TypedDict):
@@ -20,14 +23,30 @@ class AgentState(TypedDict):
     recent_commits: List[Dict]  # [{sha, message, author, date}]
     pull_requests: List[Dict]  # [{number, title, state, author}]
 
+    # Static analysis (local, no LLM)
+    symbol_table: Dict[str, Dict]  # {filename: {functions, classes, imports, exports}} (see src/analysis/symbols.py)
+    skeletons: Dict[str, str]  # {filename: skeleton} for the context agent's prompt (see src/analysis/skeleton.py)
+    import_graph: Optional[ImportGraph]  # file -> imported files, resolved within the repo
+    dependencies: List[Dict]  # [{name, spec, scope, ecosystem, manifest}] (see src/analysis/manifests.py)
+    api_endpoints: List[Dict]  # [{method, path, file, line, handler}] (see src/analysis/endpoints.py)
+    data_models: List[Dict]  # [{name, file, line, kind, fields}]
+    code_metrics: Optional[CodeMetrics]  # per-file LOC, complexity, nesting, fan-in/out (see src/analysis/code_metrics.py)
+    file_churn: Dict[str, int]  # {filename: commits in the last year}; empty unless git history was analyzed
+    git_history: Optional[Dict]  # {commits, authors, hotspots, top_authors, ...} (see src/analysis/git_history.py)
+    search_index: Optional[SearchIndex]  # trigram index over code_samples for substring/regex search
+
     # Agent Outputs
     navigator_map: Optional[Dict]  # entry_points, core_modules, dependencies
     context_output: Optional[Dict]  # structured code analysis (functions, classes, etc.)
     context_summary: Optional[str]  # human-readable code analysis summary
     mentor_guide: Optional[str]  # onboarding sequence
     visualization: Optional[str]  # Mermaid diagram
+    diagrams: Optional[Dict]  # {mermaid, dot, ascii, clusters} (see src/analysis/diagrams.py)
     final_report: Optional[str]  # orchestrator synthesis
 
     # Workflow Control
+    deadline_at: Optional[float]  # time.monotonic() deadline for the whole run, None = no limit
+    use_llm_cache: bool  # False forces fresh LLM calls (responses are still cached)
     messages: Annotated[List[str], add]  # agent communication log
     errors: Annotated[List[str], add]  # error tracking
+    metrics: Annotated[List[Dict], add]  # per-stage and per-LLM-call timings, tokens, cost
@@ -0,0 +1,187 @@
+"""Token estimation and a budget packer for building agent prompts.
+
+The estimator is a fast local approximation of BPE tokenizers (no model
+download): words cost about one token per 4 characters and every
+punctuation character costs one. The packer fills a token budget from
+content ranked most-important-first, cutting code at function/class
+boundaries and keeping signatures of what doesn't fit instead of slicing
+mid-function.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_SYMBOL = re.compile(r"[^\sA-Za-z0-9]")
+
+# A line starting a definition. Unindented matches split a file into blocks;
+# indented matches split a block that does not fit into members (methods).
+_DEFINITION = re.compile(
+    r"^\s*(?:@|(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:def|class|function|func|fn|interface|struct|"
+    r"impl|trait|enum|type|module)\b|(?:pub(?:\([^)]*\))?|public|private|protected|static|abstract|final)\s)"
+)
+
+# Smallest remainder worth filling with a partial (truncated) item
+MIN_PARTIAL_TOKENS = 120
+
+ELISION = "..."
+# Reserved for the "... (N more lines)" trailer
+_TRAILER_TOKENS = 8
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of text as sent to the model."""
+    if not text:
+        return 0
+    return sum((len(word) + 3) // 4 for word in _WORD.findall(text)) + len(_SYMBOL.findall(text))
+
+
+def _split_blocks(lines: List[str], unit: str) -> List[List[str]]:
+    """Group lines into the units a cut may fall between."""
+    if unit == "line":
+        return [[line] for line in lines]
+    blocks: List[List[str]] = [[]]
+    for i, line in enumerate(lines):
+        if unit == "paragraph":
+            starts = not line.strip() and bool(blocks[-1])
+        else:
+            # New block at an unindented definition, keeping its decorators/comments attached
+            starts = (bool(line) and not line[0].isspace() and _DEFINITION.match(line) is not None
+                      and not (i and lines[i - 1].lstrip().startswith("@")))
+        if starts and blocks[-1]:
+            blocks.append([])
+        blocks[-1].append(line)
+    return [b for b in blocks if b]
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _elided(line: str) -> List[str]:
+    """A definition line followed by an indented elision marker."""
+    return [line, " " * (_indent(line) + 4) + ELISION]
+
+
+def _fit_members(block: List[str], budget: int) -> List[str]:
+    """
+    Shorten a top-level block that doesn't fit whole: keep its header, then each
+    member (method) whole if it fits, otherwise just its signature.
+    Returns [] when not even the header fits.
+    """
+    starts = [i for i, line in enumerate(block) if i and _indent(line) and _DEFINITION.match(line)]
+    if not starts:
+        header = _elided(block[0])
+        return header if estimate_tokens("\n".join(header)) <= budget else []
+
+    member_indent = min(_indent(block[i]) for i in starts)
+    starts = [i for i in starts
+              if _indent(block[i]) == member_indent and not block[i - 1].lstrip().startswith("@")]
+    head = block[:starts[0]]
+    if estimate_tokens("\n".join(head)) > budget // 4:
+        head = [block[0]]
+    out = list(head)
+    used = estimate_tokens("\n".join(out))
+    if used > budget:
+        return []
+
+    for start, end in zip(starts, starts[1:] + [len(block)]):
+        member = block[start:end]
+        signature = next((line for line in member if not line.lstrip().startswith("@")), member[0])
+        for candidate in (member, _elided(signature)):
+            cost = estimate_tokens("\n".join(candidate)) + 1
+            if used + cost <= budget:
+                out.extend(candidate)
+                used += cost
+                break
+        else:
+            out.append(" " * member_indent + ELISION)
+            break
+    return out
+
+
+def fit_text(text: str, max_tokens: int, unit: str = "code") -> str:
+    """
+    Shorten text to at most max_tokens without cutting mid-unit.
+    unit is "code" (whole top-level definitions; one that doesn't fit keeps its header
+    and as many whole members as fit, with signatures for the rest),
+    "paragraph" (blank-line separated) or "line".
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.splitlines()
+    out: List[str] = []
+    used = _TRAILER_TOKENS
+    shown = 0
+    for block in _split_blocks(lines, unit):
+        cost = estimate_tokens("\n".join(block)) + 1
+        if used + cost <= max_tokens:
+            out.extend(block)
+            used += cost
+            shown += len(block)
+            continue
+        if unit == "code":
+            members = _fit_members(block, max_tokens - used)
+            if members:
+                out.extend(members)
+                used += estimate_tokens("\n".join(members)) + 1
+                shown += len(block)
+                continue
+        break
+
+    if shown < len(lines):
+        out.append(f"{ELISION} ({len(lines) - shown} more lines)")
+    return "\n".join(out)
+
+
+@dataclass
+class PackResult:
+    """Packed content plus how much of the budget it used."""
+
+    budget_tokens: int
+    used_tokens: int = 0
+    sections: List[Tuple[str, str]] = field(default_factory=list)  # (key, possibly shortened text)
+    truncated: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+
+    @property
+    def included(self) -> int:
+        return len(self.sections)
+
+    def report(self) -> Dict:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "used_tokens": self.used_tokens,
+            "included": self.included,
+            "truncated": len(self.truncated),
+            "skipped": len(self.skipped),
+        }
+
+
+def pack(items: Iterable[Tuple[str, str]], budget_tokens: int, unit: str = "code",
+         max_item_tokens: Optional[int] = None, overhead_tokens: int = 0) -> PackResult:
+    """
+    Fill budget_tokens from (key, text) items ranked most important first.
+    An item that doesn't fit whole is shortened with fit_text when enough budget is
+    left, otherwise skipped; smaller later items can still use the remainder.
+    max_item_tokens caps any one item; overhead_tokens is charged per item for headers.
+    """
+    result = PackResult(budget_tokens)
+    for key, text in items:
+        left = budget_tokens - result.used_tokens - overhead_tokens
+        if left <= 0:
+            result.skipped.append(key)
+            continue
+        cap = left if max_item_tokens is None else min(left, max_item_tokens)
+        cost = estimate_tokens(text)
+        if cost > cap:
+            if cap < MIN_PARTIAL_TOKENS:
+                result.skipped.append(key)
+                continue
+            text = fit_text(text, cap, unit)
+            cost = estimate_tokens(text)
+            result.truncated.append(key)
+        result.sections.append((key, text))
+        result.used_tokens += cost + overhead_tokens
+    return result
@@ -0,0 +1,117 @@
+"""Nested, OpenTelemetry-style spans exported locally in Chrome trace format.
+
+Tracing is off unless configure_tracing() is called or GITBRO_TRACE_FILE is set.
+The output file is a JSON array with one complete ("X") event per line; the
+closing bracket is optional in the Chrome trace format, so the file can be
+opened in chrome://tracing or https://ui.perfetto.dev at any point.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_span_ids = itertools.count(1)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("gitbro_span", default=None)
+
+
+class ChromeTraceExporter:
+    """Appends finished spans to a file, one Chrome trace event per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # Start a new JSON array unless we are appending to an existing trace
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("[\n")
+
+    def export(self, span: "Span"):
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": span.start_us,
+            "dur": span.end_us - span.start_us,
+            "pid": self._pid,
+            # One row per trace so concurrent analyses don't interleave
+            "tid": span.trace_id,
+            "args": {"span_id": span.span_id, "parent_id": span.parent_id, **span.attributes},
+        }
+        line = json.dumps(event, default=str) + ",\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class Span:
+    """A timed operation; attributes become the event's args in the trace."""
+
+    def __init__(self, name: str, category: str, parent: Optional["Span"], attributes: Dict):
+        self.name = name
+        self.category = category
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.attributes = dict(attributes)
+        self.start_us = time.time_ns() // 1000
+        self.end_us = self.start_us
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict):
+        self.attributes.update(attributes)
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled so call sites don't need to check."""
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def set_attributes(self, attributes: Dict):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_exporter: Optional[ChromeTraceExporter] = None
+_configured = False
+
+
+def configure_tracing(path: Optional[str]):
+    """Export spans to `path` (Chrome trace JSON). Pass None to disable tracing."""
+    global _exporter, _configured
+    _exporter = ChromeTraceExporter(path) if path else None
+    _configured = True
+
+
+def _get_exporter() -> Optional[ChromeTraceExporter]:
+    if not _configured:
+        configure_tracing(os.getenv("GITBRO_TRACE_FILE"))
+    return _exporter
+
+
+@contextmanager
+def span(name: str, category: str = "gitbro", **attributes) -> Iterator[Span]:
+    """Time a block as a child of the current span and export it when the block exits."""
+    exporter = _get_exporter()
+    if exporter is None:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, category, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set_attribute("error", repr(e))
+        raise
+    finally:
+        current.end_us = time.time_ns() // 1000
+        _current_span.reset(token)
+        exporter.export(current)
@@ -0,0 +1,61 @@
+"""Tests for the SQLite key/value cache."""
+from src import cache as cache_module
+from src.cache import SQLiteCache
+
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "c.sqlite"), "t", ttl_s=60)
+    cache.set("a", "1")
+    now[0] += 30
+    assert cache.get("a") == "1"
+    now[0] += 31
+    assert cache.get("a") is None
+    # Expired entries are purged on the next write
+    cache.set("b", "2")
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1, "bytes": 1}
+
+
+def test_least_recently_read_entries_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "c.sqlite"), "t", max_entries=2, max_bytes=10)
+    for key in "ab":
+        now[0] += 1
+        cache.set(key, "xxx")
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", "xxx")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("xxx", None, "xxx")
+
+    # The byte cap evicts from the least recently read end until the table fits
+    now[0] += 1
+    cache.set("big", "y" * 8)
+    assert cache.get("big") == "y" * 8
+    assert cache.stats()["bytes"] <= 10
+    assert cache.get("a") is None
+
+    # Reopening the file sees the same entries
+    assert SQLiteCache(str(tmp_path / "c.sqlite"), "t").get("big") == "y" * 8
+
+
+def test_a_full_cache_evicts_below_the_cap_and_tracks_totals(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = SQLiteCache(str(tmp_path / "c.sqlite"), "t", max_entries=20)
+    for i in range(21):
+        now[0] += 1
+        cache.set(f"k{i}", "xx")
+    # One pass evicts down to 90% of the cap, so the next writes don't evict again
+    assert cache.stats()["entries"] == 18
+    cache.set("k21", "xx")
+    cache.set("k0", "xxxx")  # replacing an entry keeps the count and updates the size
+    assert cache.stats()["entries"] == 20 and cache.get("k3") == "xx"
+    assert (cache._entries, cache._bytes) == (20, cache.stats()["bytes"])
+
+    # A second handle on the same file (another process) starts from the table's totals
+    other = SQLiteCache(str(tmp_path / "c.sqlite"), "t", max_entries=20)
+    other.set("new", "xx")
+    assert other.stats()["entries"] == 18 and other.get("k4") is None
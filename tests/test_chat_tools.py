@@ -0,0 +1,80 @@
+"""Tests for the chat's repository tools."""
+from src.analysis.symbols import build_symbol_table
+from src.chat_tools import RepoTools, build_repo_tools
+
+SERVER = '''class Server(Base):
+    """HTTP server."""
+
+    def start(self, port):
+        pass
+
+
+def main(argv):
+    """Run the server."""
+    Server().start(80)
+'''
+
+FILES = {"src/server.py": SERVER, "src/util/helpers.py": "def helper():\n    return 1\n"}
+TREE = [{"path": p, "size": len(c)} for p, c in FILES.items()] + [{"path": "logo.png", "size": 9}]
+
+
+def _tools():
+    return RepoTools(FILES, TREE, build_symbol_table(FILES))
+
+
+def test_read_file_and_list_dir():
+    tools = _tools()
+    assert tools.read_file("./src/server.py", "4-5") == (
+        "src/server.py (lines 4-5 of 10):\n    4|     def start(self, port):\n    5|         pass\n"
+        "... (5 more lines)")
+    assert tools.read_file("server.py") == "No file server.py. Did you mean: src/server.py?"
+    assert "not read" in tools.read_file("logo.png")
+    assert tools.read_file("src/server.py", "x").startswith("Invalid line range")
+
+    assert tools.list_dir("") == "src/ (2 files)\nlogo.png (9 bytes)"
+    assert tools.list_dir("src/") == f"util/ (1 files)\nserver.py ({len(SERVER)} bytes)"
+    assert tools.list_dir("docs").startswith("No directory")
+
+
+def test_search_symbol_and_dispatch():
+    tools = _tools()
+    assert tools.search("start(") == "src/server.py:4: def start(self, port):\nsrc/server.py:10: Server().start(80)"
+    assert tools.search("(", regex=True).startswith("Invalid regex")
+
+    assert tools.symbol("Server") == "src/server.py:1: class Server(Base) - HTTP server.; methods: start"
+    assert tools.symbol("Server.start") == "src/server.py:4: method Server.start"
+    assert tools.symbol("main") == "src/server.py:8: function main(argv) - Run the server."
+    assert tools.symbol("missing").startswith("No function")
+
+    assert tools.run("list_dir", {"path": "src/util"}) == f"helpers.py ({len(FILES['src/util/helpers.py'])} bytes)"
+    assert tools.run("delete_repo", {}) == "Unknown tool delete_repo."
+    assert tools.run("read_file", {"file": "x"}).startswith("Invalid arguments for read_file")
+
+    analysis = {"code_samples": FILES, "config_files": {"setup.cfg": "[metadata]\n"}, "file_tree": TREE}
+    assert build_repo_tools(analysis).read_file("setup.cfg").endswith("1| [metadata]")
+
+
+def test_files_not_loaded_are_read_from_the_saved_copy(tmp_path):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "setup.md").write_text("# Setup\n\nRun make.\n")
+    tree = TREE + [{"path": "docs/setup.md", "size": 20}, {"path": "schema.sql", "size": 5}]
+    tools = RepoTools(FILES, tree, build_symbol_table(FILES), saved_dir=str(tmp_path))
+    assert tools.read_file("docs/setup.md") == "docs/setup.md (lines 1-3 of 3):\n    1| # Setup\n    2| \n    3| Run make."
+    assert "not read" in tools.read_file("schema.sql")
+    assert tools.read_file("docs/other.md").startswith("No file")
+
+
+def test_large_and_partly_read_files():
+    big = "".join(f"x_{i} = {i}\n" for i in range(900)) + "def late_fn():\n    pass\n"
+    config = "".join(f"line {i}\n" for i in range(150)) + "\n... [truncated at 150 lines]"
+    files = {"big.py": big, "Makefile": config}
+    tools = RepoTools(files, [{"path": p, "size": len(c)} for p, c in files.items()], build_symbol_table(files))
+    assert tools.read_file("big.py", "900-905").endswith("901| def late_fn():\n  902|     pass")
+    assert tools.symbol("late_fn") == "big.py:901: function late_fn()"
+    assert tools.search("late_fn") == "big.py:901: def late_fn():"
+
+    assert tools.read_file("Makefile", "149-200") == (
+        "Makefile (lines 149-150 of 150):\n  149| line 148\n  150| line 149\n"
+        "Only the first 150 lines of Makefile were read during the analysis.")
+    assert tools.read_file("Makefile", "300") == "Only the first 150 lines of Makefile were read during the analysis."
+    assert "more lines" in tools.read_file("Makefile", "1-10")
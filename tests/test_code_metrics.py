@@ -0,0 +1,82 @@
+"""Tests for the local code metrics engine."""
+from src.analysis import code_metrics
+from src.analysis.code_metrics import compute_metrics, module_of
+from src.analysis.import_graph import build_import_graph
+
+PYTHON = '''"""Module docstring: if this or that."""
+from app import util
+
+
+def handle(x, y):
+    """Handle a request.
+
+    Returns:
+        the result for x or y
+    """
+    # if there is nothing to do, return early
+    if x and y:
+        for i in range(3):
+            print(i)
+    return util.call(x,
+                     y)
+'''
+
+JAVASCRIPT = '''// if comment
+function g(a) {
+  if (a && b) {
+    return a ? 1 : 2;
+  }
+  /* block
+   * for nothing
+   */
+  return 0;
+}
+'''
+
+
+def test_per_file_metrics():
+    files = {"app/views.py": PYTHON, "web/g.js": JAVASCRIPT, "app/util.py": "def call(a, b):\n    return a\n"}
+    metrics = compute_metrics(files, build_import_graph(files))
+
+    views = metrics.file("app/views.py")
+    # Docstrings and comment lines are comments; their "if"/"or"/"for" aren't decisions
+    assert (views["loc"], views["code_loc"]) == (13, 7)
+    assert views["cyclomatic"] == 4  # if, and, for + one function
+    assert views["nesting"] == 3  # def > if > for; the continuation line doesn't nest
+    assert (views["fan_in"], views["fan_out"]) == (0, 1)
+
+    g = metrics.file("web/g.js")
+    assert (g["loc"], g["code_loc"], g["cyclomatic"], g["nesting"]) == (10, 6, 4, 2)
+    assert metrics.file("app/util.py")["fan_in"] == 1
+    assert metrics.file("missing.py") is None
+
+
+def test_batches_and_workers_agree(monkeypatch):
+    files = {f"pkg{i % 7}/m{i}.py": PYTHON * (i % 3 + 1) for i in range(100)}
+    files.update({f"web/f{i}.js": JAVASCRIPT for i in range(30)})
+    inline = compute_metrics(files, workers=1)
+    monkeypatch.setattr(code_metrics, "BATCH_CHARS", 2000)
+    batched = compute_metrics(files, workers=2)
+    assert batched.summary() == inline.summary()
+    assert inline.summary()["files"] == 130
+
+
+def test_summary_and_modules():
+    assert module_of("setup.py") == "."
+    assert module_of("src/gitbro/agents/x.py") == "src/gitbro/"
+    assert module_of("app/x.py") == "app/"
+
+    files = {"app/views.py": PYTHON, "app/util.py": "def call(a, b):\n    return a\n", "web/g.js": JAVASCRIPT}
+    summary = compute_metrics(files, build_import_graph(files)).summary(top=2)
+    assert summary["files"] == 3
+    assert summary["loc"] == 13 + 2 + 10
+    assert 0 < summary["complexity_score"] < 1
+    assert [f["path"] for f in summary["most_complex"]][0] == "app/views.py"
+    assert len(summary["most_complex"]) == 2
+    app = next(m for m in summary["modules"] if m["module"] == "app/")
+    # The views -> util import stays inside app/, so it isn't module coupling
+    assert (app["files"], app["fan_in"], app["fan_out"]) == (2, 0, 0)
+    assert summary["modules"][0]["module"] == "app/"
+
+    empty = compute_metrics({}).summary()
+    assert (empty["files"], empty["complexity_score"], empty["modules"]) == (0, 0.0, [])
@@ -0,0 +1,68 @@
+"""Tests for the end-to-end deadline and its per-stage budgets."""
+import asyncio
+import time
+
+from src import deadline, graph
+from src.deadline import STAGE_BUDGET_WEIGHTS, capped, deadline_from_now, stage_budget
+
+
+def test_budgets_split_what_is_left():
+    assert stage_budget(None, "clone") is None and deadline_from_now(None) is None
+    deadline_at = deadline_from_now(100)
+    budgets = {stage: stage_budget(deadline_at, stage) for stage in STAGE_BUDGET_WEIGHTS}
+    # With nothing spent yet, each stage's budget is its share of what is left from it on
+    assert abs(budgets["metadata"] - 100 * STAGE_BUDGET_WEIGHTS["metadata"] / sum(STAGE_BUDGET_WEIGHTS.values())) < 0.1
+    assert abs(budgets["orchestrator"] - 100) < 0.1
+    assert budgets["context"] > budgets["symbols"]
+    assert abs(stage_budget(deadline_at, "unlisted") - deadline.remaining(deadline_at)) < 0.1
+    assert stage_budget(time.monotonic() - 5, "navigator") == 0.0
+    assert capped(600, None) == 600 and capped(600, 12.5) == 12.5
+
+
+def test_agent_overrun_uses_its_fallback():
+    async def slow_agent(state):
+        await asyncio.sleep(1)
+        return {"mentor_guide": "late"}
+
+    def fallback(e, *args):
+        return {"mentor_guide": "fallback", "errors": [str(e)]}
+
+    late = asyncio.run(graph._run_within_budget("mentor", slow_agent, fallback,
+                                                {"deadline_at": time.monotonic() + 0.05}))
+    assert late["mentor_guide"] == "fallback" and "exceeded its" in late["errors"][0]
+    skipped = asyncio.run(graph._run_within_budget("mentor", slow_agent, fallback,
+                                                   {"deadline_at": time.monotonic() - 1}))
+    assert "deadline already passed" in skipped["errors"][0]
+
+
+def test_every_pipeline_stage_is_budgeted():
+    stages = {"metadata", "clone", "read", "symbols", "imports", "metrics", "manifests", "endpoints",
+              "search_index", "history", "git_api"} | {name for name, *_ in graph.AGENT_SEQUENCE}
+    assert stages == set(STAGE_BUDGET_WEIGHTS)
+
+
+def test_local_stage_overrun_falls_back():
+    errors = []
+
+    def slow(x):
+        time.sleep(0.3)
+        return x
+
+    async def run():
+        late = await graph._run_local("symbols", time.monotonic() + 0.05, errors, {}, slow, {"a": 1})
+        on_time = await graph._run_local("symbols", None, errors, {}, slow, {"b": 2})
+        return late, on_time
+
+    assert asyncio.run(run()) == ({}, {"b": 2})
+    assert len(errors) == 1 and errors[0].startswith("symbols stage exceeded its")
+
+
+def test_local_stage_failure_falls_back():
+    errors = []
+
+    def broken(code_samples):
+        raise ValueError("unexpected syntax")
+
+    result = asyncio.run(graph._run_local("endpoints", None, errors, ([], []), broken, {}))
+    assert result == ([], [])
+    assert errors == ["endpoints stage failed: unexpected syntax; analysis continues without it"]
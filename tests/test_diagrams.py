@@ -0,0 +1,49 @@
+"""Tests for the local architecture diagram generator."""
+from src.analysis.diagrams import build_diagram, render_all
+from src.analysis.import_graph import build_import_graph
+
+
+def _repo():
+    files = {
+        "main.py": "from app.api import routes\n",
+        "app/api/routes.py": "from app.models import user\nfrom app.models import order\n",
+        "app/api/auth.py": "from app.models import user\n",
+        "app/models/user.py": "from app.db import session\n",
+        "app/models/order.py": "from app.db import session\n",
+        "app/db/session.py": "",
+        "scripts/seed.py": "from app.db import session\n",
+        "docs/conf.py": "",
+    }
+    return files, build_import_graph(files)
+
+
+def test_clusters_follow_directories_and_imports():
+    files, graph = _repo()
+    diagram = build_diagram(files, graph, entry_points=["./main.py"], max_nodes=12)
+    names = {c.name for c in diagram.clusters}
+    assert {"app/api", "app/models", "app/db"} <= names
+    by_name = {c.name: i for i, c in enumerate(diagram.clusters)}
+    assert (by_name["app/api"], by_name["app/models"], 3) in diagram.edges
+    assert [c.files for c in diagram.clusters if c.entry] == [["main.py"]]
+
+
+def test_at_most_max_nodes():
+    files, graph = _repo()
+    diagram = build_diagram(files, graph, max_nodes=2)
+    assert len(diagram.clusters) == 2
+    assert sorted(f for c in diagram.clusters for f in c.files) == sorted(files)
+    assert build_diagram(files, graph, max_nodes=2).mermaid() == diagram.mermaid()
+
+
+def test_renderings():
+    files, graph = _repo()
+    diagram = build_diagram(files, graph, entry_points=["main.py"])
+    out = render_all(diagram, labels={"C0": 'Data "models"'})
+    assert out["mermaid"].startswith("graph TD\n")
+    assert '#quot;models#quot;' in out["mermaid"]
+    assert "class " in out["mermaid"] and " entry" in out["mermaid"]
+    assert out["dot"].startswith("digraph architecture {") and out["dot"].endswith("}")
+    assert '\\"models\\"' in out["dot"]
+    assert "imports)" in out["ascii"]
+    assert out["clusters"][0]["name"] == 'Data "models"'
+    assert build_diagram([], None).mermaid() == "graph TD"
@@ -0,0 +1,104 @@
+"""Tests for static endpoint and data-model extraction."""
+from src.analysis.endpoints import extract_all, extract_api
+
+
+def _routes(endpoints):
+    return [(e["method"], e["path"], e.get("handler", "")) for e in endpoints]
+
+
+def test_python_routes():
+    flask = '''
+from flask import Blueprint
+bp = Blueprint("users", __name__, url_prefix="/users")
+
+@bp.route("/", methods=["GET", "POST"])
+def users():
+    """List or create users."""
+
+@bp.get("/<int:id>")
+def user(id):
+    pass
+
+def setup(app):
+    app.add_url_rule("/health", view_func=health)
+'''
+    endpoints, _ = extract_api("app/users.py", flask)
+    assert _routes(endpoints) == [("GET", "/users/", "users"), ("POST", "/users/", "users"),
+                                  ("GET", "/users/<int:id>", "user"), ("GET", "/health", "health")]
+
+    fastapi = 'from fastapi import APIRouter\nrouter = APIRouter(prefix="/items")\n\n' \
+              '@router.delete("/{item_id}")\nasync def remove(item_id: int):\n    pass\n'
+    assert _routes(extract_api("api/items.py", fastapi)[0]) == [("DELETE", "/items/{item_id}", "remove")]
+
+    django = 'from django.urls import path, include\nfrom . import views\n\nurlpatterns = [\n' \
+             '    path("posts/<int:pk>/", views.detail, name="detail"),\n    path("api/", include("api.urls")),\n]\n'
+    assert _routes(extract_api("blog/urls.py", django)[0]) == [("ANY", "posts/<int:pk>/", "views.detail")]
+    # requests.get() and os.path calls are not routes
+    assert extract_api("client.py", 'import requests\nrequests.get("https://x.org/")\npath("a", b)\n') == ([], [])
+
+
+def test_python_models():
+    code = '''
+from dataclasses import dataclass
+from pydantic import BaseModel
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+class Base(DeclarativeBase):
+    pass
+
+class User(Base):
+    __tablename__ = "users"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    email = Column(String)
+
+class UserIn(BaseModel):
+    name: str
+    model_config = {"frozen": True}
+
+class AdminIn(UserIn):
+    level: int
+
+@dataclass
+class Point:
+    x: float
+    y: float
+
+class Handler(Base2):
+    timeout: int
+'''
+    _, models = extract_api("models.py", code)
+    assert [(m["name"], m["kind"], m["fields"]) for m in models] == [
+        ("User", "sqlalchemy", ["id", "email"]), ("UserIn", "pydantic", ["name"]),
+        ("AdminIn", "pydantic", ["level"]), ("Point", "dataclass", ["x", "y"])]
+
+
+def test_js_and_other_languages():
+    express = "const router = express.Router();\nrouter.get('/users/:id', getUser);\n" \
+              "router.route('/books').get(list).post(create);\nconst v = cache.get('/k');\n" \
+              "const User = mongoose.model('User', userSchema);\n" \
+              "const userSchema = new mongoose.Schema({\n  name: String,\n  email: { type: String },\n});\n"
+    endpoints, models = extract_api("server/routes.js", express)
+    assert _routes(endpoints) == [("GET", "/users/:id", ""), ("GET", "/books", ""), ("POST", "/books", "")]
+    assert [(m["name"], m["fields"]) for m in models] == [("User", ["name", "email"])]
+
+    nest = "@Controller('cats')\nexport class CatsController {\n  @Get(':id')\n  findOne() {}\n  @Post()\n  create() {}\n}\n"
+    assert _routes(extract_api("src/cats.controller.ts", nest)[0]) == [("GET", "/cats/:id", ""), ("POST", "/cats", "")]
+
+    nextjs = "export async function GET(req) {}\nexport async function POST(req) {}\n"
+    assert _routes(extract_api("app/api/(admin)/users/route.ts", nextjs)[0]) == [
+        ("GET", "/api/users", "GET"), ("POST", "/api/users", "POST")]
+
+    gin = 'r := gin.Default()\nr.GET("/ping", ping)\nhttp.HandleFunc("/health", health)\nhttp.Get("http://x")\n'
+    assert _routes(extract_api("main.go", gin)[0]) == [("GET", "/ping", ""), ("ANY", "/health", "")]
+
+    spring = '@RestController\n@RequestMapping("/api/orders")\npublic class OrderController {\n' \
+             '  @GetMapping("/{id}")\n  public Order get() {}\n}\n'
+    assert _routes(extract_api("OrderController.java", spring)[0]) == [("GET", "/api/orders/{id}", "")]
+
+
+def test_extract_all_in_parallel_matches_inline():
+    samples = {f"svc{i}/api.py": f'@app.get("/r{i}")\ndef r{i}():\n    pass\n' for i in range(80)}
+    samples["broken.py"] = "def ("
+    inline = extract_all(samples, workers=1)
+    assert len(inline[0]) == 80
+    assert extract_all(samples, workers=2) == inline
@@ -0,0 +1,51 @@
+"""Tests for local entry-point and architecture detection."""
+from src.analysis.entry_points import detect_structure
+from src.analysis.symbols import build_symbol_table
+
+
+def _detect(code_samples, config_files=None, file_tree=None):
+    return detect_structure(code_samples, config_files or {}, file_tree, build_symbol_table(code_samples))
+
+
+def test_flask_api_with_dockerfile():
+    code = {
+        "app/main.py": "from flask import Flask\napp = Flask(__name__)\n\nif __name__ == '__main__':\n    app.run()\n",
+        "app/routes.py": "from flask import Blueprint\n",
+        "app/models.py": "import sqlalchemy\n",
+        "tests/test_app.py": "if __name__ == '__main__':\n    pass\n",
+    }
+    configs = {"requirements.txt": "Flask==3.0\nSQLAlchemy>=2\n", "Dockerfile": 'CMD ["python", "app/main.py"]\n'}
+    result = _detect(code, configs)
+    assert result["entry_points"] == ["app/main.py"]
+    assert result["architecture_type"] == "Web API / REST Service"
+    assert result["confidence"]["overall"] >= 0.9
+    assert "Dockerfile CMD/ENTRYPOINT" in result["evidence"]["entry_points"]["app/main.py"]
+    assert result["core_modules"] == ["app/", "app/main.py"]
+
+
+def test_console_scripts_and_package_json():
+    code = {
+        "src/tool/cli.py": "import argparse\n\ndef main():\n    pass\n",
+        "src/tool/core.py": "def run():\n    pass\n",
+        "web/server.js": "const express = require('express');\nexpress().listen(3000);\n",
+        "web/client.js": "import React from 'react';\n",
+    }
+    configs = {
+        "pyproject.toml": '[project]\nname = "tool"\n\n[project.scripts]\ntool = "tool.cli:main"\n',
+        "web/package.json": '{"main": "server.js", "scripts": {"start": "node server.js"},'
+                            ' "dependencies": {"express": "^4", "react": "^18"}}',
+    }
+    result = _detect(code, configs)
+    assert set(result["entry_points"]) == {"src/tool/cli.py", "web/server.js"}
+    assert result["architecture_type"] == "Web Application (Full-Stack)"
+
+
+def test_gui_and_unknown():
+    gui = _detect({"main.py": "import tkinter as tk\nroot = tk.Tk()\nroot.mainloop()\n"})
+    assert gui["architecture_type"] == "Desktop GUI Application"
+    assert gui["entry_points"] == ["main.py"]
+    assert gui["confidence"]["overall"] < 0.9
+
+    nothing = _detect({"lib/a.py": "x = 1\n"})
+    assert nothing["entry_points"] == [] and nothing["architecture_type"] == "unknown"
+    assert nothing["confidence"]["overall"] == 0.0
@@ -0,0 +1,58 @@
+"""Tests that local analyses see every line of the source files read from a clone."""
+from src.analysis.code_metrics import compute_metrics
+from src.analysis.endpoints import extract_all
+from src.analysis.search_index import SearchIndex
+from src.analysis.symbols import build_symbol_table
+from src.github_client import GitHubClient
+
+FILLER = "".join(f"value_{i} = {i}\n" for i in range(880))
+LATE = '''
+
+@app.route("/late", methods=["POST"])
+def late_fn(request):
+    """Handle late requests."""
+    if request:
+        return 1
+    return 0
+'''
+
+
+def _read(tmp_path):
+    (tmp_path / "big.py").write_text("from flask import Flask\napp = Flask(__name__)\n" + FILLER + LATE)
+    client = GitHubClient(token="")
+    return client.read_all_source_files(str(tmp_path), client.walk_local_repo(str(tmp_path)))
+
+
+def test_files_are_read_whole(tmp_path):
+    code_samples = _read(tmp_path)
+    lines = code_samples["big.py"].splitlines()
+    assert len(lines) == 890 and "truncated" not in code_samples["big.py"]
+
+    functions = build_symbol_table(code_samples)["big.py"]["functions"]
+    assert [(f["name"], f["line"]) for f in functions] == [("late_fn", lines.index("def late_fn(request):") + 1)]
+
+    endpoints, _ = extract_all(code_samples)
+    assert [(e["method"], e["path"], e["handler"]) for e in endpoints] == [("POST", "/late", "late_fn")]
+
+    metrics = compute_metrics(code_samples)
+    assert int(metrics.code_loc[metrics.index["big.py"]]) > 880
+    assert int(metrics.cyclomatic[metrics.index["big.py"]]) >= 2
+
+    hits = SearchIndex.build(code_samples).search("late_fn")
+    assert [h.line for h in hits] == [lines.index("def late_fn(request):") + 1]
+
+
+def test_text_files_are_saved_for_the_chat(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "docs").mkdir(parents=True)
+    (repo / "README.md").write_text("# Demo\n")
+    (repo / "docs" / "deploy.yml").write_text("steps: []\n")
+    (repo / "app.py").write_text("print(1)\n")
+    (repo / "blob.dat").write_bytes(b"\x00\x01binary")
+    client = GitHubClient(token="")
+    dest = tmp_path / "saved"
+    (dest / "stale").mkdir(parents=True)
+
+    saved = client.save_text_files(str(repo), client.walk_local_repo(str(repo)), {"app.py"}, str(dest))
+    assert saved == 2
+    assert sorted(str(p.relative_to(dest)) for p in dest.rglob("*") if p.is_file()) == ["README.md", "docs/deploy.yml"]
@@ -0,0 +1,84 @@
+"""Tests for git history analytics."""
+import os
+import subprocess
+import time
+
+import pytest
+
+from src.analysis.git_history import CommitLog, load_history, parse_log
+
+DAY = 86400
+# Newest first, as git log prints it
+LOG = f"""\x1ec3\t{100 * DAY}\tBob
+
+5\t1\tsrc/{{util.py => helpers.py}}
+-\t-\tlogo.png
+\x1ec2\t{99 * DAY}\tAlice
+
+30\t0\tsrc/util.py
+2\t2\tsrc/app.py
+\x1ec1\t{-400 * DAY}\tAlice
+
+100\t0\tsrc/app.py
+""".split("\n")
+
+
+def test_parse_and_aggregate():
+    log = parse_log(LOG)
+    assert (log.head, len(log), log.authors) == ("c3", 3, ["Bob", "Alice"])
+    # util.py's history follows it to helpers.py; the year-old commit is outside the churn window
+    assert log.file_churn() == {"src/helpers.py": 2, "src/app.py": 1, "logo.png": 1}
+    assert log.owners() == {"src/helpers.py": "Alice", "src/app.py": "Alice", "logo.png": "Bob"}
+
+    hotspots = log.hotspots(complexity={"src/helpers.py": 0.2, "src/app.py": 0.9})
+    assert [h["path"] for h in hotspots] == ["src/app.py", "src/helpers.py"]
+    assert hotspots[1] == {"path": "src/helpers.py", "commits": 2, "lines_changed": 36, "authors": 2,
+                           "owner": "Alice", "score": 0.2}
+    assert [h["path"] for h in log.hotspots(paths=["logo.png"])] == ["logo.png"]
+    assert log.top_authors()[0] == {"name": "Alice", "commits": 2, "lines_changed": 134, "files": 2}
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), "-c", "user.name=Dev", "-c", "user.email=dev@example.com", *args],
+                   check=True, capture_output=True)
+
+
+def _commit(repo, name, text):
+    (repo / name).write_text(text)
+    _git(repo, "add", name)
+    _git(repo, "commit", "-q", "-m", f"edit {name}")
+
+
+def test_incremental_history_matches_full_rebuild(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _commit(repo, "a.py", "x = 1\n")
+    _commit(repo, "b.py", "y = 2\n")
+    cache = tmp_path / "history.npz"
+    first = load_history(str(repo / ".git"), str(cache))
+    assert len(first) == 2
+
+    _commit(repo, "a.py", "x = 1\nz = 3\n")
+    updated = load_history(str(repo / ".git"), str(cache))
+    rebuilt = load_history(str(repo / ".git"), str(tmp_path / "fresh.npz"))
+    assert len(updated) == len(rebuilt) == 3
+    assert updated.head == rebuilt.head
+    assert updated.file_churn() == rebuilt.file_churn() == {"a.py": 2, "b.py": 1}
+    assert updated.top_authors() == rebuilt.top_authors()
+
+    # Unchanged HEAD: served from the cache as is
+    cached = CommitLog.load(str(cache))
+    assert cached.head == updated.head and cached.files == updated.files
+
+
+def test_history_stops_at_the_deadline(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _commit(repo, "a.py", "x = 1\n")
+    cache = tmp_path / "history.npz"
+    with pytest.raises(TimeoutError):
+        load_history(str(repo / ".git"), str(cache), deadline=time.monotonic() - 1)
+    assert not os.path.exists(cache)
+    assert len(load_history(str(repo / ".git"), str(cache), deadline=time.monotonic() + 60)) == 1
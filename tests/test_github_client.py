@@ -0,0 +1,31 @@
+"""Tests for the GitHub client's async API calls."""
+import asyncio
+
+import httpx
+
+from src import github_client
+from src.github_client import GitHubClient
+
+
+def test_clients_share_one_connection_pool_per_loop(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("Authorization"))
+        return httpx.Response(200, json={"full_name": "octo/demo", "stargazers_count": 3})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(github_client.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs))
+
+    async def run():
+        first, second = GitHubClient(token="one"), GitHubClient(token="two")
+        await first.aget_repo_metadata("octo", "demo")
+        await second.aget_repo_metadata("octo", "demo")
+        return first._async_http(), second._async_http()
+
+    pools = asyncio.run(run())
+    assert pools[0] is pools[1]
+    # Each client still authenticates as itself
+    assert seen == ["token one", "token two"]
+    assert asyncio.run(run())[0] is not pools[0]
@@ -0,0 +1,38 @@
+"""
+Tests for the import graph (src/analysis/import_graph.py)
+"""
+from src.analysis.import_graph import build_import_graph
+
+CODE = {
+    "app.py": "import os\nfrom src.agents import navigator\nfrom src.state import State\n",
+    "src/state.py": "from typing import Dict\n",
+    "src/agents/navigator.py": "from ..state import State\nfrom . import helpers\n",
+    "src/agents/helpers.py": "import json\n",
+    "lib/pkg/core.py": "import pkg.util\n",
+    "lib/pkg/util.py": "",
+    "web/main.ts": 'import { api } from "./api";\nimport React from "react";\nimport "./styles/index.js";\n',
+    "web/api/index.ts": 'export const api = 1;\n',
+    "web/styles/index.ts": '',
+}
+
+
+def test_python_imports_resolve_to_files():
+    graph = build_import_graph(CODE)
+    assert graph.imports("app.py") == ["src/agents/navigator.py", "src/state.py"]
+    assert graph.imports("src/agents/navigator.py") == ["src/agents/helpers.py", "src/state.py"]
+    # Source roots: lib/pkg/core.py imports pkg.util
+    assert graph.imports("lib/pkg/core.py") == ["lib/pkg/util.py"]
+
+
+def test_js_imports_resolve_index_and_extension():
+    graph = build_import_graph(CODE)
+    assert graph.imports("web/main.ts") == ["web/api/index.ts", "web/styles/index.ts"]
+
+
+def test_reverse_edges_and_degrees():
+    graph = build_import_graph(CODE)
+    assert graph.importers("src/state.py") == ["app.py", "src/agents/navigator.py"]
+    assert graph.in_degree("src/state.py") == 2
+    assert graph.out_degree("src/state.py") == 0
+    assert graph.edge_count == 7
+    assert graph.most_imported(1) == [("src/state.py", 2)]
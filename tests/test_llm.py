@@ -0,0 +1,149 @@
+"""Tests for the LLM client factory and the shared call helpers: retries, rate limiting, caching and metrics."""
+import asyncio
+import sqlite3
+import sys
+import threading
+import types
+import weakref
+
+import pytest
+
+from src import llm
+from src.cache import SQLiteCache
+from src.metrics import collect_metrics
+from src.rate_limit import PRIORITY_INTERACTIVE, RateLimiter
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 120, "output_tokens": 30}
+        self.tool_calls = []
+
+
+class _FakeLLM:
+    """Fails the first `failures` calls, then echoes the prompt."""
+    model_name = "gpt-4o-mini"
+    temperature = 0.1
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    async def ainvoke(self, payload):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("boom")
+        return _Response(f"echo {payload if isinstance(payload, str) else len(payload)}")
+
+
+class _CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(rpm=1000, tpm=1_000_000)
+        self.priorities = []
+
+    async def aacquire(self, tokens, priority="batch"):
+        self.priorities.append(priority)
+        return await super().aacquire(tokens, priority)
+
+
+@pytest.fixture
+def limiter(monkeypatch, tmp_path):
+    limiter = _CountingLimiter()
+    monkeypatch.setattr(llm, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(llm, "RETRY_BACKOFF_S", 0.0)
+    monkeypatch.setattr(llm, "_response_cache", SQLiteCache(str(tmp_path / "llm.sqlite"), "llm_responses"))
+    return limiter
+
+
+def test_retries_go_through_the_limiter_and_are_recorded(limiter):
+    fake = _FakeLLM(failures=2)
+    with collect_metrics("context") as calls:
+        assert llm.invoke_llm(fake, "hello") == "echo hello"
+    assert fake.calls == 3 and limiter.priorities == ["batch"] * 3
+    assert [(c["stage"], c["retries"], c["prompt_tokens"], c["cached"]) for c in calls] == [("context", 2, 120, False)]
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(llm.ainvoke_llm(_FakeLLM(failures=5), "other", max_retries=1))
+
+
+def test_identical_calls_are_served_from_the_cache(limiter):
+    fake = _FakeLLM()
+    with collect_metrics("mentor") as calls:
+        assert asyncio.run(llm.ainvoke_llm(fake, "same")) == "echo same"
+        assert asyncio.run(llm.ainvoke_llm(fake, "same")) == "echo same"
+        asyncio.run(llm.ainvoke_llm(fake, "same", use_cache=False))
+    assert fake.calls == 2
+    assert [c["cached"] for c in calls] == [False, True, False]
+    # The key covers the sampling params, not just the prompt
+    warmer = _FakeLLM()
+    warmer.temperature = 0.9
+    assert llm._cache_key(warmer, "same") != llm._cache_key(fake, "same")
+
+
+def test_cache_io_runs_off_the_event_loop(limiter, monkeypatch, tmp_path):
+    threads = []
+
+    class _RecordingCache(SQLiteCache):
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value):
+            threads.append(threading.get_ident())
+            super().set(key, value)
+
+    async def call():
+        return threading.get_ident(), await llm.ainvoke_llm(_FakeLLM(), "hello")
+
+    monkeypatch.setattr(llm, "_response_cache", _RecordingCache(str(tmp_path / "rec.sqlite"), "llm_responses"))
+    loop_thread, _ = asyncio.run(call())
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_message_calls_are_never_cached(limiter):
+    fake = _FakeLLM(failures=1)
+    messages = [{"role": "user", "content": "hi"}]
+    for _ in range(2):
+        response = llm.invoke_llm_messages(fake, messages, priority=PRIORITY_INTERACTIVE)
+        assert response.content == "echo 1"
+    assert fake.calls == 3 and limiter.priorities == [PRIORITY_INTERACTIVE] * 3
+
+
+def test_unusable_cache_is_silent(monkeypatch, capsys):
+    def broken(*args, **kwargs):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(llm, "_response_cache", None)
+    monkeypatch.setattr(llm, "SQLiteCache", broken)
+    assert llm.get_llm_cache() is None
+    assert capsys.readouterr().out == ""
+
+
+class _FakeChatOpenAI:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+def test_clients_are_created_once_and_share_connection_pools(monkeypatch):
+    monkeypatch.setitem(sys.modules, "langchain_openai", types.SimpleNamespace(ChatOpenAI=_FakeChatOpenAI))
+    monkeypatch.setattr(llm, "_llms", {})
+    monkeypatch.setattr(llm, "_loop_llms", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(llm, "_loop_http_clients", weakref.WeakKeyDictionary())
+
+    chat, navigator = llm.get_llm("chat"), llm.get_llm("navigator")
+    assert llm.get_llm("chat") is chat and navigator is not chat
+    assert chat.kwargs["http_client"] is navigator.kwargs["http_client"]
+    assert chat.kwargs["http_async_client"] is None and chat.kwargs["max_retries"] == 0
+    assert navigator.kwargs["temperature"] == llm.LLM_CONFIG["navigator"]["temperature"]
+
+    async def in_loop():
+        return llm.get_llm("chat"), llm.get_llm("chat"), llm.get_llm("context")
+
+    first = asyncio.run(in_loop())
+    second = asyncio.run(in_loop())
+    # Inside a loop: one client per loop, all sharing that loop's async pool and the process-wide sync pool
+    assert first[0] is first[1] and first[0] is not chat and second[0] is not first[0]
+    assert first[0].kwargs["http_async_client"] is first[2].kwargs["http_async_client"]
+    assert first[0].kwargs["http_async_client"] is not second[0].kwargs["http_async_client"]
+    assert first[0].kwargs["http_client"] is chat.kwargs["http_client"]
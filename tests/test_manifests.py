@@ -0,0 +1,118 @@
+"""Tests for dependency manifest parsers."""
+from src.analysis import manifests
+from src.analysis.manifests import format_dependency, parse_manifests
+
+
+def _triples(deps):
+    return [(d["name"], d["spec"], d["scope"]) for d in deps]
+
+
+def test_python_manifests():
+    requirements = "# web\nFlask==3.1.2\nrequests[socks]>=2.31 ; python_version>'3.8'\n-r dev.txt\n" \
+                   "-e git+https://github.com/o/r.git#egg=mylib\nlocal @ file:///tmp/x\n"
+    assert _triples(manifests.parse_requirements(requirements)) == [
+        ("Flask", "==3.1.2", "runtime"), ("requests", ">=2.31", "runtime"),
+        ("mylib", "git+https://github.com/o/r.git", "runtime"), ("local", "file:///tmp/x", "runtime")]
+
+    # pip-compile style: continuation lines and per-requirement hash options
+    hashed = "numpy==1.26.4 \\\n    --hash=sha256:aaa \\\n    --hash=sha256:bbb\n    # via pandas\n" \
+             "pandas \\\n  >=2.0\nrich==13.0 --hash=sha256:ccc\n"
+    assert _triples(manifests.parse_requirements(hashed)) == [
+        ("numpy", "==1.26.4", "runtime"), ("pandas", ">=2.0", "runtime"), ("rich", "==13.0", "runtime")]
+
+    pyproject = """
+[project]
+name = "tool"
+dependencies = [
+    "httpx>=0.27",  # client
+    "pydantic",
+]
+[project.optional-dependencies]
+test = ["pytest>=8"]
+
+[tool.poetry.dependencies]
+python = "^3.9"
+rich = {version = "^13", optional = true}
+
+[tool.poetry.group.dev.dependencies]
+black = "*"
+"""
+    expected = [("httpx", ">=0.27", "runtime"), ("pydantic", "", "runtime"), ("pytest", ">=8", "test"),
+                ("rich", "^13", "optional"), ("black", "", "dev")]
+    assert _triples(manifests.parse_pyproject(pyproject)) == expected
+    # Truncated files still parse with the tolerant reader
+    assert _triples(manifests.parse_pyproject(pyproject + "\n[tool.x\n... [truncated]")) == expected
+
+    setup_cfg = "[options]\ninstall_requires =\n    click>=8\n    attrs\n[options.extras_require]\ndocs = sphinx\n"
+    assert _triples(manifests.parse_setup_cfg(setup_cfg)) == [
+        ("click", ">=8", "runtime"), ("attrs", "", "runtime"), ("sphinx", "", "dev")]
+
+    pipfile = '[packages]\ndjango = "~=4.2"\n\n[dev-packages]\npytest = "*"\n'
+    assert _triples(manifests.parse_pipfile(pipfile)) == [("django", "~=4.2", "runtime"), ("pytest", "", "dev")]
+
+
+def test_other_ecosystems():
+    package_json = '{"dependencies": {"react": "^19.2.0"}, "devDependencies": {"vite": "5"}}'
+    assert _triples(manifests.parse_package_json(package_json)) == [
+        ("react", "^19.2.0", "runtime"), ("vite", "5", "dev")]
+
+    go_mod = "module x\n\nrequire github.com/a/b v1.0.0\nrequire (\n\tgithub.com/c/d v0.2.0 // indirect\n)\n"
+    assert _triples(manifests.parse_go_mod(go_mod)) == [
+        ("github.com/a/b", "v1.0.0", "runtime"), ("github.com/c/d", "v0.2.0", "indirect")]
+
+    cargo = '[dependencies]\nserde = { version = "1", features = ["derive"] }\ntokio = "1.37"\n' \
+            '[dev-dependencies]\ninsta = "1"\n[target.\'cfg(unix)\'.dependencies]\nlibc = "0.2"\n'
+    assert _triples(manifests.parse_cargo_toml(cargo)) == [
+        ("serde", "1", "runtime"), ("tokio", "1.37", "runtime"), ("insta", "1", "dev"), ("libc", "0.2", "runtime")]
+
+    gemfile = "source 'https://rubygems.org'\ngem 'rails', '~> 7.1'\ngem 'rspec', group: :test\n" \
+              "group :development do\n  gem 'pry'\nend\n"
+    assert _triples(manifests.parse_gemfile(gemfile)) == [
+        ("rails", "~> 7.1", "runtime"), ("rspec", "", "test"), ("pry", "", "dev")]
+
+    pom = """<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <properties><junit.version>5.10.0</junit.version></properties>
+  <dependencies>
+    <dependency><groupId>org.springframework.boot</groupId><artifactId>spring-boot-starter-web</artifactId></dependency>
+    <dependency><groupId>org.junit.jupiter</groupId><artifactId>junit-jupiter</artifactId>
+      <version>${junit.version}</version><scope>test</scope></dependency>
+  </dependencies>
+</project>"""
+    assert _triples(manifests.parse_pom_xml(pom)) == [
+        ("org.springframework.boot:spring-boot-starter-web", "", "runtime"),
+        ("org.junit.jupiter:junit-jupiter", "5.10.0", "test")]
+
+
+def test_parse_manifests():
+    deps = parse_manifests({"web/package.json": '{"dependencies": {"react": "^19"}}',
+                            "requirements.txt": "flask==3.0\n", "README.md": "# x"})
+    assert [(d["manifest"], d["ecosystem"], format_dependency(d)) for d in deps] == [
+        ("requirements.txt", "pypi", "flask==3.0"), ("web/package.json", "npm", "react ^19")]
+    assert parse_manifests({"package.json": "{not json"}) == []
+
+
+def test_unexpected_shapes_are_skipped():
+    assert manifests.parse_pyproject('[project]\noptional-dependencies = ["a"]\n') == []
+    assert manifests.parse_pyproject('project = "x"\n') == []
+    assert manifests.parse_pyproject('[tool]\npoetry = 1\n') == []
+    assert manifests.parse_cargo_toml('dependencies = ["a"]\n') == []
+    assert manifests.parse_pipfile('packages = [1]\n') == []
+    assert manifests.parse_package_json('{"dependencies": {"a": null, "b": "1"}}')[0]["name"] == "b"
+    pom = "<project><dependencies><dependency><groupId>g</groupId></dependency></dependencies></project>"
+    assert manifests.parse_pom_xml(pom) == []
+
+    requirements = "https://example.com/pkg-1.0.whl\n--editable git+https://github.com/o/r.git#egg=lib\n" \
+                   "--index-url https://pypi.org/simple\n"
+    assert _triples(manifests.parse_requirements(requirements)) == [
+        ("lib", "git+https://github.com/o/r.git", "runtime")]
+
+
+def test_parse_manifests_records_failures(monkeypatch):
+    def broken(content, manifest):
+        raise ValueError("bad manifest")
+
+    monkeypatch.setitem(manifests.PARSERS, "go.mod", broken)
+    errors = []
+    deps = parse_manifests({"vendor/x/go.mod": "module x", "requirements.txt": "flask\n"}, errors)
+    assert [d["name"] for d in deps] == ["flask"]
+    assert errors == ["Parsing vendor/x/go.mod failed: bad manifest"]
@@ -0,0 +1,151 @@
+"""Tests for the context agent's map-reduce mode over repos too large for one prompt."""
+import asyncio
+import json
+import re
+import threading
+
+import pytest
+
+from src.agents import context_agent
+from src.cache import SQLiteCache
+
+CODE = {f"pkg/m{i}.py": "".join(f"def f{i}_{j}(x):\n    return x + {j}\n\n" for j in range(10)) for i in range(12)}
+
+
+def _state():
+    return {"code_samples": dict(CODE), "config_files": {}, "navigator_map": {}}
+
+
+@pytest.fixture
+def small_budget(monkeypatch, tmp_path):
+    # About 500 tokens of code per shard: four of the ~100-token (shortened) files each
+    overhead = context_agent.estimate_tokens(context_agent._render_shard_prompt("", 0))
+    monkeypatch.setitem(context_agent.LLM_CONFIG["context"], "prompt_budget", overhead + 500)
+    cache = SQLiteCache(str(tmp_path / "summaries.sqlite"), "file_summaries")
+    monkeypatch.setattr(context_agent, "_summary_cache", lambda: cache)
+    return cache
+
+
+def test_files_are_split_into_shards_within_budget(small_budget):
+    plan, report = context_agent._plan_map_reduce(_state(), CODE, sorted(CODE))
+    shard_budget = 500
+    assert len(plan.shards) == 3 and [len(s) for s in plan.shards] == [4, 4, 4]
+    for shard, prompt in zip(plan.shards, plan.prompts):
+        code = sum(context_agent.estimate_tokens(text) + context_agent.FILE_HEADER_TOKENS for _, text in shard)
+        assert code <= shard_budget
+        assert all(f"=== {path} ===" in prompt for path, _ in shard)
+    assert (report["shards"], report["files_included"], report["files_skipped"], report["files_truncated"]) == (
+        3, 12, 0, 12)
+
+    # However many shards it takes, every file is planned
+    many = {f"pkg/n{i}.py": text for i, text in enumerate(list(CODE.values()) * 6)}
+    plan, report = context_agent._plan_map_reduce({**_state(), "code_samples": many}, many, sorted(many))
+    assert len(plan.shards) == 18 and (report["files_included"], report["files_skipped"]) == (72, 0)
+
+
+def test_merge_results():
+    merged = context_agent._merge_results([
+        {"files_analyzed": 1, "technologies": ["Flask", "SQLAlchemy"], "patterns": ["MVC"], "complexity_score": 0.2,
+         "key_functions": [{"name": "run", "file": "a.py"}], "api_endpoints": [{"method": "GET", "path": "/x"}]},
+        {"files_analyzed": 1, "technologies": ["sqlalchemy "], "complexity_score": 0.8,
+         "key_functions": [{"name": "run", "file": "a.py"}, {"name": "run", "file": "b.py"}, "junk"],
+         "api_endpoints": [{"method": "get", "path": "/x"}]},
+    ], weights=[300, 100])
+    assert merged["files_analyzed"] == 2
+    assert merged["technologies"] == ["SQLAlchemy", "Flask"]  # most reported first
+    assert merged["key_functions"] == [{"name": "run", "file": "a.py"}, {"name": "run", "file": "b.py"}]
+    assert merged["api_endpoints"] == [{"method": "GET", "path": "/x"}]
+    assert merged["complexity_score"] == 0.35  # token-weighted mean
+    assert context_agent._merge_results([], [])["complexity_score"] == 0.5
+
+
+def test_shards_run_concurrently_and_a_failed_shard_is_reported(small_budget, monkeypatch):
+    in_flight, peak, prompts = [0], [0], []
+
+    async def fake_ainvoke_llm(llm, prompt, **kwargs):
+        prompts.append(prompt)
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        paths = re.findall(r"^=== (.+) ===$", prompt, re.M)
+        if "pkg/m0.py" in paths:
+            raise RuntimeError("rate limited")
+        return json.dumps({"files": {p: {"technologies": ["NumPy"], "complexity_score": 0.4} for p in paths}})
+
+    monkeypatch.setattr(context_agent, "get_llm", lambda name: None)
+    monkeypatch.setattr(context_agent, "ainvoke_llm", fake_ainvoke_llm)
+    monkeypatch.setattr(context_agent, "MAP_CONCURRENCY", 2)
+    update = asyncio.run(context_agent.acontext_agent(_state()))
+
+    assert len(prompts) == 3 and peak[0] == 2
+    assert update["context_output"]["files_analyzed"] == 8
+    assert update["context_output"]["technologies"] == ["NumPy"]
+    assert update["errors"] == ["Context agent shard 1/3 failed: rate limited"]
+    # The failed shard's files are reported as not analyzed
+    assert update["context_summary"].startswith("Analyzed 8 of 12 source files (4 not analyzed).")
+
+    # The two shards that succeeded were cached: a second run only re-sends the failed one
+    prompts.clear()
+    update = asyncio.run(context_agent.acontext_agent(_state()))
+    assert len(prompts) == 1
+    assert "1 shards, 8 file summaries cached" in update["messages"][0]
+
+
+def test_planning_and_summary_cache_io_run_off_the_event_loop(small_budget, monkeypatch, tmp_path):
+    threads = []
+
+    class _RecordingCache(SQLiteCache):
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value):
+            threads.append(threading.get_ident())
+            super().set(key, value)
+
+    async def fake_ainvoke_llm(llm, prompt, **kwargs):
+        paths = re.findall(r"^=== (.+) ===$", prompt, re.M)
+        return json.dumps({"files": {p: {"complexity_score": 0.4} for p in paths}})
+
+    async def run():
+        return threading.get_ident(), await context_agent.acontext_agent(_state())
+
+    cache = _RecordingCache(str(tmp_path / "recording.sqlite"), "file_summaries")
+    monkeypatch.setattr(context_agent, "_summary_cache", lambda: cache)
+    monkeypatch.setattr(context_agent, "get_llm", lambda name: None)
+    monkeypatch.setattr(context_agent, "ainvoke_llm", fake_ainvoke_llm)
+    loop_thread, update = asyncio.run(run())
+    assert update["context_output"]["files_analyzed"] == 12
+    assert len(threads) == 24 and loop_thread not in threads
+
+
+def test_files_are_ranked_once_per_run(small_budget, monkeypatch):
+    calls = []
+    rank_files = context_agent.rank_files
+
+    def counting_rank_files(*args):
+        calls.append(args)
+        return rank_files(*args)
+
+    async def fake_ainvoke_llm(llm, prompt, **kwargs):
+        paths = re.findall(r"^=== (.+) ===$", prompt, re.M)
+        return json.dumps({"files": {p: {"complexity_score": 0.4} for p in paths}})
+
+    symbol = {"name": "f", "line": 1, "doc": "", "params": [], "methods": []}
+    table = {path: {"functions": [symbol], "classes": []} for path in CODE}
+    monkeypatch.setattr(context_agent, "get_llm", lambda name: None)
+    monkeypatch.setattr(context_agent, "ainvoke_llm", fake_ainvoke_llm)
+    monkeypatch.setattr(context_agent, "rank_files", counting_rank_files)
+    update = asyncio.run(context_agent.acontext_agent({**_state(), "symbol_table": table}))
+    # Prompt packing, the symbols section, shard planning and the reduce step share one ranking
+    assert len(update["context_output"]["key_functions"]) == 12 and len(calls) == 1
+
+
+def test_a_planning_error_becomes_the_failure_update(monkeypatch):
+    def broken_plan(state):
+        raise ValueError("bad skeleton")
+
+    monkeypatch.setattr(context_agent, "_plan", broken_plan)
+    update = asyncio.run(context_agent.acontext_agent(_state()))
+    assert update["context_output"] == {} and update["errors"] == ["Context agent error: bad skeleton"]
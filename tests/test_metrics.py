@@ -0,0 +1,45 @@
+"""Tests for per-stage and per-LLM-call metrics."""
+import json
+
+from src.metrics import (collect_metrics, current_stage, estimate_cost, export_metrics_json, format_metrics_table,
+                         make_record, record_call, stage_record, totals)
+
+
+def _call(stage, prompt, completion, retries=0, cached=False):
+    return make_record(stage, "llm_call", 100.0, 1.5, prompt_tokens=prompt, completion_tokens=completion,
+                       retries=retries, cost_usd=estimate_cost("gpt-4o-mini", prompt, completion),
+                       model="gpt-4o-mini", cached=cached)
+
+
+def test_calls_land_in_the_innermost_stage():
+    record_call(_call("", 1, 1))  # outside any stage: dropped
+    assert current_stage() == ""
+    with collect_metrics("context") as outer:
+        record_call(_call(current_stage(), 10, 1))
+        with collect_metrics("mentor") as inner:
+            record_call(_call(current_stage(), 20, 2))
+        assert current_stage() == "context"
+    assert [c["stage"] for c in outer] == ["context"] and [c["stage"] for c in inner] == ["mentor"]
+
+
+def test_stage_rollup_and_totals(tmp_path):
+    calls = [_call("context", 1_000_000, 0, retries=1), _call("context", 0, 0, cached=True)]
+    stage = stage_record("context", 100.0, 4.0, 0.5, calls)
+    assert (stage["prompt_tokens"], stage["retries"], stage["cost_usd"], stage["model"]) == (
+        1_000_000, 1, 0.15, "gpt-4o-mini")
+    assert stage["ended_at"] == 104.0
+
+    metrics = calls + [stage, stage_record("clone", 99.0, 1.0)]
+    t = totals(metrics)
+    assert (t["wall_s"], t["queue_s"], t["cost_usd"], t["llm_calls"], t["cache_hits"], t["cache_hit_rate"]) == (
+        5.0, 0.5, 0.15, 2, 1, 0.5)
+
+    table = format_metrics_table(metrics)
+    assert "cache_hit" in table.splitlines()[3]
+    assert table.splitlines()[-2].startswith("TOTAL           2 calls")
+    assert table.endswith("LLM cache: 1/2 calls served from cache (50%)")
+
+    path = tmp_path / "metrics.json"
+    export_metrics_json(metrics, str(path))
+    exported = json.loads(path.read_text())
+    assert exported["totals"] == t and exported["records"] == metrics
@@ -0,0 +1,40 @@
+"""Tests for the navigator's fallback when its LLM call fails."""
+from src.agents import navigator_agent
+from src.analysis.manifests import parse_manifests
+
+
+def _state():
+    return {
+        "metadata": {"full_name": "o/r", "language": "Python", "description": "A tool"},
+        "file_tree": [{"path": "lib/a.py", "type": "blob"}],
+        "code_samples": {"lib/a.py": "x = 1\n"},
+        "config_files": {},
+        "readme_content": None,
+        "dependencies": parse_manifests({"requirements.txt": "flask==3.0\npytest\n",
+                                         "pyproject.toml": '[dependency-groups]\ndev = ["ruff"]\n'}),
+    }
+
+
+def test_failure_keeps_parsed_dependencies():
+    update = navigator_agent.failure_update(TimeoutError("navigator exceeded its 5.0s time budget"), _state())
+    assert update["navigator_map"]["dependencies"] == ["flask==3.0", "pytest"]
+    assert update["errors"] == ["Navigator error: navigator exceeded its 5.0s time budget"]
+    assert navigator_agent.failure_update(RuntimeError("x"))["navigator_map"]["dependencies"] == []
+
+
+def test_failure_keeps_local_detection():
+    state = _state()
+    state["code_samples"] = {"main.py": "import tkinter as tk\nroot = tk.Tk()\nroot.mainloop()\n"}
+    state["file_tree"] = [{"path": "main.py", "type": "blob"}]
+    detection, _ = navigator_agent._detect(state)
+    assert navigator_agent.SHRINK_CONFIDENCE <= detection["confidence"]["overall"] < navigator_agent.SKIP_CONFIDENCE
+
+    update = navigator_agent.failure_update(RuntimeError("rate limited"), state, detection)
+    nav_map = update["navigator_map"]
+    assert nav_map["entry_points"] == ["main.py"]
+    assert nav_map["architecture_type"] == detection["architecture_type"]
+    assert nav_map["dependencies"] == ["flask==3.0", "pytest"]
+    assert "LLM failed" in update["messages"][0]
+    assert update["errors"] == ["Navigator error: rate limited"]
+    # Without a detection at hand (deadline fallback) it is run again
+    assert navigator_agent.failure_update(TimeoutError("late"), state)["navigator_map"]["entry_points"] == ["main.py"]
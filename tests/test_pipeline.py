@@ -0,0 +1,115 @@
+"""Tests for the analysis pipeline, run end to end on a local repo with fake GitHub API and LLM."""
+import asyncio
+import shutil
+import tempfile
+
+import pytest
+
+from src import chat_tools, graph, llm
+from src.agents import context_agent, mentor_agent, navigator_agent, orchestrator_agent, visualizer_agent
+from src.cache import SQLiteCache
+from src.events import AgentOutput, AnalysisComplete, StageFinished, StageStarted
+from src.github_client import GitHubClient
+
+REPO = {
+    "README.md": "# demo\n\nA tiny web app.\n",
+    "requirements.txt": "flask>=2.0\n",
+    "app.py": "from flask import Flask\nfrom util import helper\n\napp = Flask(__name__)\n\n\n"
+              "@app.route('/items')\ndef items():\n    return helper()\n",
+    "util.py": "def helper():\n    return []\n",
+}
+AGENTS = [name for name, *_ in graph.AGENT_SEQUENCE]
+
+
+class _FakeClient(GitHubClient):
+    """GitHubClient that 'clones' a local directory and answers API calls with canned data."""
+
+    def __init__(self, source_dir):
+        super().__init__(token="test")
+        self.source_dir = source_dir
+
+    async def aget_repo_metadata(self, owner, repo, **kwargs):
+        return {"full_name": f"{owner}/{repo}", "stars": 1, "language": "Python", "description": "demo"}
+
+    async def aclone_repo(self, repo_url, **kwargs):
+        clone = tempfile.mkdtemp(prefix="gitbro_test_")
+        shutil.copytree(self.source_dir, clone, dirs_exist_ok=True)
+        return clone
+
+    async def aget_recent_commits(self, owner, repo, **kwargs):
+        return [{"sha": "abc1234", "message": "initial", "author": "Dev", "date": "2024-01-01"}]
+
+    async def aget_pull_requests(self, owner, repo, **kwargs):
+        return []
+
+
+class _FakeLLM:
+    model_name = "gpt-4o-mini"
+    temperature = 0.1
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"content": "{}", "usage_metadata": {"input_tokens": 10, "output_tokens": 2}})()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    source = tmp_path / "demo"
+    source.mkdir()
+    for path, content in REPO.items():
+        (source / path).write_text(content)
+
+    fake = _FakeLLM()
+    for module in (navigator_agent, context_agent, mentor_agent, visualizer_agent, orchestrator_agent):
+        monkeypatch.setattr(module, "get_llm", lambda name: fake)
+    monkeypatch.setattr(context_agent, "_summary_cache", lambda: None)
+    monkeypatch.setattr(llm, "_response_cache", SQLiteCache(str(tmp_path / "llm.sqlite"), "llm_responses"))
+    monkeypatch.setattr(llm, "RETRY_BACKOFF_S", 0.0)
+    monkeypatch.setattr(graph, "index_path", lambda owner, repo: str(tmp_path / "index.npz"))
+    for module in (graph, chat_tools):
+        monkeypatch.setattr(module, "saved_files_path", lambda owner, repo: str(tmp_path / "files" / repo))
+    client = _FakeClient(str(source))
+    client.fake_llm = fake
+    return client
+
+
+def test_stream_reports_every_stage_in_order(client):
+    events = list(graph.stream_analysis("https://github.com/octo/demo", client))
+
+    started = [e.stage for e in events if isinstance(e, StageStarted)]
+    finished = [e.stage for e in events if isinstance(e, StageFinished)]
+    assert started == finished
+    assert started == ["metadata", "clone", "scan", "read", "readme", "config", "docs", "symbols", "imports",
+                       "metrics", "manifests", "endpoints", "search_index", "git_api"] + AGENTS
+    # Each agent's output arrives right after its StageFinished, before the next stage starts
+    for name in AGENTS:
+        i = next(i for i, e in enumerate(events) if isinstance(e, StageFinished) and e.stage == name)
+        assert isinstance(events[i + 1], AgentOutput) and events[i + 1].agent == name
+    assert isinstance(events[-1], AnalysisComplete) and events[-1].elapsed > 0
+
+    state = events[-1].state
+    assert set(state["code_samples"]) == {"app.py", "util.py"}
+    assert [d["name"] for d in state["dependencies"]] == ["flask"]
+    # Files the analysis doesn't load are saved so the chat can still read them
+    assert chat_tools.build_repo_tools(state).read_file("README.md").endswith("3| A tiny web app.")
+    assert state["recent_commits"][0]["sha"] == "abc1234"
+    assert state["final_report"] == "{}"
+    assert len(state["messages"]) == len(AGENTS)
+
+
+def test_concurrent_async_analyses_share_one_loop(client):
+    async def run_two():
+        return await asyncio.gather(graph.arun_analysis("https://github.com/octo/demo", client),
+                                    graph.arun_analysis("https://github.com/octo/other", client, use_cache=False))
+
+    first, second = asyncio.run(run_two())
+    assert (first["metadata"]["full_name"], second["metadata"]["full_name"]) == ("octo/demo", "octo/other")
+    assert first["use_llm_cache"] and not second["use_llm_cache"]
+    # Each run keeps its own metrics: one record per stage, agent LLM calls tagged with their stage
+    for state in (first, second):
+        stages = [m["stage"] for m in state["metrics"] if m["kind"] == "stage"]
+        assert stages[-5:] == AGENTS
+        assert {m["stage"] for m in state["metrics"] if m["kind"] == "llm_call"} <= set(stages)
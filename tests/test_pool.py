@@ -0,0 +1,43 @@
+"""Tests for the process pool shared by the analysis stages."""
+import time
+
+import pytest
+
+from src.analysis import pool
+
+
+def _square(x):
+    return x * x
+
+
+def _slow(x):
+    time.sleep(0.2)
+    return x
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    pool.shutdown_pool()
+    yield
+    pool.shutdown_pool()
+
+
+def test_one_pool_is_shared_and_started_without_fork():
+    assert pool.pool_map(_square, range(10)) == [x * x for x in range(10)]
+    shared = pool.get_pool()
+    assert pool.pool_map(_square, [3]) == [9] and pool.get_pool() is shared
+    assert shared._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_a_stage_past_its_deadline_stops_and_cancels_queued_work():
+    items = list(range(pool.MAX_WORKERS * 4))
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.run_until(time.monotonic() + 0.1, pool.pool_map, _slow, items)
+    assert time.monotonic() - start < 1
+    # The pool is still usable, and queued chunks of the timed-out call were dropped:
+    # only those already running (0.2s each) are waited for, not 4 rounds of them
+    start = time.monotonic()
+    assert pool.pool_map(_square, [4]) == [16]
+    assert time.monotonic() - start < 0.6
+    assert pool.run_until(None, pool.pool_map, _square, [5]) == [25]
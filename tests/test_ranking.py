@@ -0,0 +1,41 @@
+"""Tests for static file ranking."""
+from src.analysis.import_graph import build_import_graph
+from src.analysis.ranking import entry_distances, pagerank, rank_files
+
+
+def _repo():
+    files = {
+        "aaa_unused.py": "x = 1\n" * 50,
+        "app/main.py": "from app import service\n",
+        "app/service.py": "from app import models\nfrom app import util\n",
+        "app/models.py": "from app import util\n" + "class Model:\n    pass\n" * 20,
+        "app/util.py": "def helper():\n    return 1\n",
+        "app/__init__.py": "",
+        "tests/test_service.py": "from app import service\nfrom app import util\n",
+    }
+    return files, build_import_graph(files)
+
+
+def test_pagerank_favours_widely_imported_files():
+    files, graph = _repo()
+    ranks = dict(zip(graph.paths, pagerank(graph)))
+    assert abs(sum(ranks.values()) - 1) < 1e-6
+    assert max(ranks, key=ranks.get) == "app/util.py"
+    assert ranks["app/service.py"] > ranks["tests/test_service.py"]
+
+
+def test_entry_distances():
+    files, graph = _repo()
+    assert entry_distances(graph, ["app/main.py"]) == {
+        "app/main.py": 0, "app/service.py": 1, "app/models.py": 2, "app/util.py": 2}
+
+
+def test_rank_files():
+    files, graph = _repo()
+    order = rank_files(files, graph, entry_points=["app/main.py"], file_churn={"app/models.py": 30})
+    assert order[0] == "app/main.py"
+    assert order.index("app/service.py") < order.index("tests/test_service.py")
+    assert order.index("app/util.py") < order.index("aaa_unused.py")
+    assert order[-1] == "app/__init__.py"
+    # Without any signal beyond size, the order is still deterministic
+    assert rank_files(files) == rank_files(dict(reversed(list(files.items()))))
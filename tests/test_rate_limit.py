@@ -0,0 +1,49 @@
+"""Tests for the shared LLM rate limiter."""
+import asyncio
+from src.rate_limit import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RateLimiter
+
+
+def test_batch_calls_leave_the_interactive_reserve():
+    limiter = RateLimiter(rpm=60, tpm=10000)
+    assert limiter._try_acquire(8000, PRIORITY_BATCH) == 0.0
+    # 2000 tokens left, 1000 of them reserved for interactive calls
+    assert limiter._try_acquire(1500, PRIORITY_BATCH) > 0
+    assert limiter._try_acquire(1500, PRIORITY_INTERACTIVE) == 0.0
+    assert limiter._tokens < 1000
+
+
+def test_oversized_batch_call_takes_the_whole_batch_share():
+    limiter = RateLimiter(rpm=60, tpm=10000)
+    assert limiter._try_acquire(9500, PRIORITY_BATCH) == 0.0
+    assert round(limiter._tokens) == 1000
+    assert RateLimiter(rpm=60, tpm=10000)._try_acquire(50000, PRIORITY_INTERACTIVE) == 0.0
+    assert RateLimiter(rpm=1, tpm=10000)._try_acquire(100, PRIORITY_BATCH) == 0.0
+
+
+def test_interactive_waiters_hold_batch_calls_back():
+    limiter = RateLimiter(rpm=60, tpm=10000)
+    limiter._interactive_waiting = 1
+    assert limiter._try_acquire(10, PRIORITY_BATCH) > 0
+    assert limiter._try_acquire(10, PRIORITY_INTERACTIVE) == 0.0
+
+
+def test_refill_and_wait():
+    limiter = RateLimiter(rpm=60, tpm=6000)
+    assert limiter._try_acquire(5400, PRIORITY_BATCH) == 0.0
+    wait = limiter._try_acquire(600, PRIORITY_BATCH)
+    assert 5.0 < wait <= 6.0  # 600 more tokens at 100 tokens/s
+    limiter._updated -= 6.0
+    assert limiter._try_acquire(600, PRIORITY_BATCH) == 0.0
+
+    limiter = RateLimiter(rpm=600, tpm=60000)
+    limiter._tokens = 6000 + 50  # 50 tokens short of the reserve plus the call, at 1000 tokens/s
+    assert 0 < asyncio.run(limiter.aacquire(100)) < 1.0
+    limiter.settle(100, 40)
+    assert limiter._tokens <= limiter.tpm
+
+
+def test_settle_returns_unused_tokens():
+    limiter = RateLimiter(rpm=60, tpm=10000)
+    limiter._try_acquire(2000, PRIORITY_BATCH)
+    limiter.settle(2000, 500)
+    assert round(limiter._tokens) == 9500
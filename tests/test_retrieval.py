@@ -0,0 +1,44 @@
+"""Tests for the BM25 retrieval index behind the chat prompt."""
+from src.retrieval import MAX_CHUNK_LINES, CodeIndex, build_chat_index, chunk_file, tokenize
+
+
+def test_tokenize_splits_identifiers_and_stems():
+    assert tokenize("How does getRepoMetadata work?") == ["getrepometadata", "get", "repo", "metadata", "work"]
+    assert tokenize("clone_repo cloning clones") == ["clone_repo", "clon", "repo", "clon", "clon"]
+
+
+def test_chunks_cut_at_top_level_definitions():
+    body = "".join(f"def f{i}():\n" + "    x = 1\n" * 11 for i in range(4))
+    chunks = chunk_file("m.py", body)
+    assert [(c.start_line, c.end_line) for c in chunks] == [(1, 24), (25, 48)]
+    assert chunks[1].text.startswith("def f2():")
+
+    flat = "x = 1\n" * (MAX_CHUNK_LINES * 2 + 5)
+    assert [(c.start_line, c.end_line) for c in chunk_file("data.py", flat)] == [(1, 60), (61, 120), (121, 125)]
+
+
+def test_retrieve_ranks_named_files_then_bm25_hits():
+    analysis = {
+        "code_samples": {
+            "src/github_client.py": "def clone_repo(url):\n    run_git_clone(url)\n",
+            "src/llm.py": "def get_llm(name):\n    return ChatOpenAI(name)\n",
+            "src/utils.py": "def slugify(text):\n    return text.lower()\n",
+        },
+        "config_files": {"requirements.txt": "httpx\n"},
+        "file_tree": [{"path": "src/llm.py"}, {"path": "src/utils.py"}],
+        "recent_commits": [{"sha": "abcdef123", "message": "Speed up cloning", "author": "Dev", "date": "d"}],
+        "mentor_guide": "Start with src/llm.py",
+    }
+    index = build_chat_index(analysis)
+    paths = [c.path for c in index.chunks]
+    assert paths[:4] == ["src/github_client.py", "src/llm.py", "src/utils.py", "requirements.txt"]
+    assert {"[file tree]", "[recent commits]", "[onboarding guide]"} <= set(paths)
+    assert "[pull requests]" not in paths  # empty sections are left out
+
+    assert [c.path for _, c in index.search("how is the repo cloned?", k=2)] == [
+        "src/github_client.py", "[recent commits]"]
+    # A file named in the question comes first even when it scores lower
+    assert index.retrieve("what does utils.py do when cloning?", k=2)[0].path == "src/utils.py"
+    assert index.retrieve("clone", k=8, max_chars=10)[0].path == "src/github_client.py"
+    assert len(index.retrieve("clone", k=8, max_chars=10)) == 1
+    assert CodeIndex([]).search("anything") == []
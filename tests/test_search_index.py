@@ -0,0 +1,54 @@
+"""Tests for the trigram search index."""
+import re
+
+import pytest
+
+from src.analysis import search_index
+from src.analysis.search_index import SearchIndex, plan_query
+
+FILES = {
+    "app/users.py": "def get_user(user_id):\n    return db.get(user_id)\n\n\nclass UserError(Exception):\n    pass\n",
+    "web/api.js": "function setUser(u) { return save(u) }\nconst USER_KEY = 'user';\n",
+    "README.md": "Nothing to see.\n",
+}
+
+
+def test_substring_and_regex_search():
+    index = SearchIndex.build(FILES)
+    assert [h.render() for h in index.search("get_user")] == ["app/users.py:1: def get_user(user_id):"]
+    assert [(h.path, h.line) for h in index.search("user_id")] == [("app/users.py", 1), ("app/users.py", 2)]
+    assert [h.path for h in index.search("user_key", ignore_case=True)] == ["web/api.js"]
+    assert index.search("user_key") == []
+
+    hits = index.search(r"(get|set)_?user\(", regex=True, ignore_case=True)
+    assert [(h.path, h.line) for h in hits] == [("app/users.py", 1), ("web/api.js", 1)]
+    assert [h.line for h in index.search(r"^class \w+Error", regex=True)] == [5]
+    # No literal of three characters: every file is scanned
+    assert len(index.search(r"\w+", regex=True, max_results=2)) == 2
+    with pytest.raises(re.error):
+        index.search("(", regex=True)
+
+
+def test_candidates_come_from_the_literals():
+    assert plan_query(r"foo.*bar(baz)+q?", regex=True) == ("and", [("lit", "foo"), ("lit", "bar"), ("lit", "baz")])
+    index = SearchIndex.build(FILES)
+    assert index.candidates("return") == ["app/users.py", "web/api.js"]
+    assert index.candidates(r"(get|set)_user", regex=True) == ["app/users.py"]
+    assert index.candidates(r"see|pass", regex=True) == ["README.md", "app/users.py"]
+    assert index.candidates("zzz") == []
+    assert len(index.candidates(r"x|.*", regex=True)) == 3
+
+
+def test_batched_build_and_persistence(tmp_path, monkeypatch):
+    files = {f"pkg/m{i}.py": f"def handler_{i}():\n    return {i}\n" for i in range(50)}
+    whole = SearchIndex.build(files)
+    monkeypatch.setattr(search_index, "BATCH_CHARS", 100)
+    batched = SearchIndex.build(files)
+    assert (batched.keys == whole.keys).all() and (batched.postings == whole.postings).all()
+
+    path = str(tmp_path / "index.npz")
+    batched.save(path)
+    loaded = SearchIndex.load(path)
+    assert loaded.paths == whole.paths and loaded.contents == whole.contents
+    assert [h.path for h in loaded.search("handler_42")] == ["pkg/m42.py"]
+    assert SearchIndex.load(str(tmp_path / "missing.npz")) is None
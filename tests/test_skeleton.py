@@ -0,0 +1,90 @@
+"""
+Tests for source skeletons (src/analysis/skeleton.py)
+"""
+from src.analysis.skeleton import skeletonize
+
+PYTHON_SOURCE = '''"""Users API.
+
+Longer description that should not be kept.
+"""
+import os
+from flask import Flask
+
+app = Flask(__name__)
+
+
+@app.route("/users/<int:user_id>")
+def get_user(user_id: int):
+    """Return one user as JSON."""
+    user = load(user_id)
+    return user.to_dict()
+
+
+class User:
+    """A registered user."""
+
+    table = "users"
+
+    def to_dict(self):
+        return {"id": self.id}
+
+
+def register(api):
+    api.add_url_rule("/health", view_func=lambda: "ok")
+    helper = 1
+'''
+
+TS_SOURCE = '''import express from "express";
+
+/** Application router. */
+export function buildRouter(db) {
+  const router = express.Router();
+  router.get("/items", (req, res) => res.json(db.all()));
+  for (const x of db) {
+    console.log(x);
+  }
+  return router;
+}
+
+export interface Item {
+  id: number;
+  name: string;
+}
+'''
+
+
+def test_python_skeleton_keeps_structure():
+    skeleton = skeletonize("api.py", PYTHON_SOURCE)
+    assert '"""Users API."""' in skeleton
+    assert "Longer description" not in skeleton
+    assert "import os" in skeleton
+    assert "app = Flask(__name__)" in skeleton
+    assert '@app.route("/users/<int:user_id>")' in skeleton
+    assert "def get_user(user_id: int):" in skeleton
+    assert '"""Return one user as JSON."""' in skeleton
+    assert 'table = "users"' in skeleton
+    assert "def to_dict(self):" in skeleton
+    assert 'api.add_url_rule("/health", view_func=lambda: "ok")' in skeleton
+
+
+def test_python_skeleton_drops_bodies():
+    skeleton = skeletonize("api.py", PYTHON_SOURCE)
+    assert "load(user_id)" not in skeleton
+    assert "return user.to_dict()" not in skeleton
+    assert "helper = 1" not in skeleton
+
+
+def test_invalid_python_falls_back_to_line_tokenizer():
+    skeleton = skeletonize("broken.py", "import os\ndef broken(:\n    pass\n")
+    assert "import os" in skeleton
+
+
+def test_generic_skeleton_keeps_routes_and_types():
+    skeleton = skeletonize("router.ts", TS_SOURCE)
+    assert 'import express from "express";' in skeleton
+    assert "export function buildRouter(db) {" in skeleton
+    assert "// Application router." in skeleton
+    assert 'router.get("/items"' in skeleton
+    assert "  name: string;" in skeleton
+    assert "console.log" not in skeleton
+    assert "for (const x of db)" not in skeleton
@@ -0,0 +1,33 @@
+"""Tests for the context agent's per-file summary cache."""
+import json
+import sqlite3
+from src.agents import context_agent
+
+
+class _BrokenCache:
+    def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    def set(self, key, value):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_unreadable_cache_is_a_miss(tmp_path):
+    assert context_agent._cached_summary(_BrokenCache(), "k") is None
+    assert context_agent._cached_summary(None, "k") is None
+
+    cache = context_agent.SQLiteCache(str(tmp_path / "s.sqlite"), "file_summaries")
+    cache.set("bad", "{not json")
+    cache.set("good", json.dumps({"patterns": ["MVC"]}))
+    assert context_agent._cached_summary(cache, "bad") is None
+    assert context_agent._cached_summary(cache, "good") == {"patterns": ["MVC"]}
+
+
+def test_plan_survives_a_locked_cache(monkeypatch):
+    monkeypatch.setattr(context_agent, "_summary_cache", lambda: _BrokenCache())
+    code = {f"pkg/m{i}.py": f"def f{i}():\n    return {i}\n" for i in range(3)}
+    state = {"code_samples": code, "config_files": {}, "navigator_map": {}}
+    skeletons = {path: content for path, content in code.items()}
+    plan, report = context_agent._plan_map_reduce(state, skeletons, sorted(code))
+    assert plan.cached == {} and report["files_cached"] == 0
+    assert sorted(path for shard in plan.shards for path, _ in shard) == sorted(code)
@@ -0,0 +1,157 @@
+"""
+Tests for the static symbol index (src/analysis/symbols.py)
+"""
+import ast
+
+from src.analysis.endpoints import extract_all
+from src.analysis.skeleton import skeletonize
+from src.analysis.symbols import build_symbol_table, count_symbols, extract_symbols, index_sources
+
+PYTHON_SOURCE = '''"""Users service."""
+import os
+from .models import User
+from . import db
+
+
+@app.get("/users")
+async def list_users(limit: int = 10, *args, active=True, **filters):
+    """List users.
+
+    More detail.
+    """
+    return []
+
+
+class UserRepo(Base):
+    def __init__(self, session):
+        self.session = session
+
+    def get(self, user_id):
+        return self.session.get(User, user_id)
+
+
+def _helper():
+    pass
+'''
+
+
+def test_python_functions_and_classes():
+    symbols = extract_symbols("svc/users.py", PYTHON_SOURCE)
+    functions = {f["name"]: f for f in symbols["functions"]}
+    assert list(functions) == ["list_users", "_helper"]
+    assert functions["list_users"]["line"] == 8
+    assert functions["list_users"]["params"] == ["limit", "*args", "active", "**filters"]
+    assert functions["list_users"]["decorators"] == ["app.get('/users')"]
+    assert functions["list_users"]["doc"] == "List users."
+
+    (repo,) = symbols["classes"]
+    assert repo["name"] == "UserRepo"
+    assert repo["bases"] == ["Base"]
+    assert repo["methods"] == ["__init__", "get"]
+    assert repo["doc"] == ""
+
+
+def test_python_imports_keep_relative_level():
+    symbols = extract_symbols("svc/users.py", PYTHON_SOURCE)
+    assert symbols["imports"] == ["os", ".models", "."]
+
+
+def test_unsupported_or_invalid_files_are_skipped():
+    table = build_symbol_table({
+        "svc/users.py": PYTHON_SOURCE,
+        "broken.py": "def broken(:\n",
+        "README.md": "# hi",
+    })
+    assert list(table) == ["svc/users.py"]
+    assert count_symbols(table) == (2, 1)
+
+
+def test_one_pass_parses_each_python_file_once(monkeypatch):
+    samples = {"svc/users.py": PYTHON_SOURCE, "broken.py": "def broken(:\n", "web/router.ts": TS_SOURCE}
+    parse = ast.parse
+    parsed = []
+
+    def counting_parse(source, *args, **kwargs):
+        parsed.append(source)
+        return parse(source, *args, **kwargs)
+
+    monkeypatch.setattr(ast, "parse", counting_parse)
+    index = index_sources(samples, workers=1)
+    assert parsed.count(PYTHON_SOURCE) == 1
+    monkeypatch.setattr(ast, "parse", parse)
+
+    # Same results as running each extractor on its own
+    assert index.symbol_table == build_symbol_table(samples)
+    assert index.skeletons == {path: skeletonize(path, content) for path, content in samples.items()}
+    assert set(index.python_api) == {"svc/users.py", "broken.py"}
+    assert extract_all(samples, known=index.python_api) == extract_all(samples)
+    assert extract_all(samples)[0][0]["path"] == "/users"
+
+
+TS_SOURCE = '''import express from "express";
+import { helper } from "./util";
+
+/** Builds the router. */
+export function buildRouter(db: Db, opts?: Options): Router {
+  const router = express.Router();
+  function inner() {}
+  return router;
+}
+
+export const handler = async (event, context) => {
+  return "function fake() {";
+};
+
+export default class ItemStore extends Base<Item> implements Store {
+  async get(id: string): Promise<Item> {
+    if (id) { return null; }
+  }
+  static create() { return new ItemStore(); }
+}
+'''
+
+GO_SOURCE = '''package repo
+
+import (
+\t"context"
+\tapi "github.com/x/api"
+)
+
+// Repo stores things.
+type Repo struct {
+\tdb *sql.DB
+}
+
+func (r *Repo) Get(ctx context.Context, id int) error {
+\treturn nil
+}
+
+func helper(a, b int) int { return a + b }
+'''
+
+
+def test_typescript_symbols():
+    symbols = extract_symbols("web/router.ts", TS_SOURCE)
+    functions = {f["name"]: f for f in symbols["functions"]}
+    assert list(functions) == ["buildRouter", "handler"]
+    assert functions["buildRouter"]["params"] == ["db", "opts"]
+    assert functions["buildRouter"]["line"] == 5
+    assert functions["buildRouter"]["doc"] == "Builds the router."
+
+    (store,) = symbols["classes"]
+    assert (store["name"], store["kind"]) == ("ItemStore", "class")
+    assert store["bases"] == ["Base", "Store"]
+    assert store["methods"] == ["get", "create"]
+    assert symbols["imports"] == ["express", "./util"]
+    assert symbols["exports"] == ["buildRouter", "handler", "ItemStore"]
+
+
+def test_go_receiver_methods_attach_to_type():
+    symbols = extract_symbols("repo/repo.go", GO_SOURCE)
+    assert [f["name"] for f in symbols["functions"]] == ["helper"]
+    assert symbols["functions"][0]["params"] == ["a", "b"]
+    (repo,) = symbols["classes"]
+    assert (repo["name"], repo["kind"], repo["methods"]) == ("Repo", "struct", ["Get"])
+    assert repo["doc"] == "Repo stores things."
+    assert symbols["imports"] == ["context", "github.com/x/api"]
+    assert symbols["exports"] == ["Repo"]
@@ -0,0 +1,34 @@
+"""Tests for the sync agent wrappers over the async agents."""
+from src.agents import mentor_agent, orchestrator_agent
+from src.metrics import collect_metrics, current_stage, make_record, record_call
+
+STATE = {"metadata": {"full_name": "o/r", "stars": 3, "language": "Python"}, "navigator_map": {},
+         "context_summary": "", "mentor_guide": "", "errors": [], "code_samples": {}}
+
+
+def test_sync_wrapper_runs_the_async_agent_in_the_callers_context(monkeypatch):
+    prompts = []
+
+    async def fake_ainvoke_llm(llm, prompt, **kwargs):
+        prompts.append(prompt)
+        record_call(make_record(current_stage(), "llm_call", 0.0, 0.1, prompt_tokens=10))
+        return "# o/r - Onboarding Report"
+
+    monkeypatch.setattr(orchestrator_agent, "get_llm", lambda name: None)
+    monkeypatch.setattr(orchestrator_agent, "ainvoke_llm", fake_ainvoke_llm)
+    with collect_metrics("orchestrator") as calls:
+        update = orchestrator_agent.orchestrator_agent(STATE)
+    assert update["final_report"] == "# o/r - Onboarding Report"
+    assert len(prompts) == 1 and "o/r" in prompts[0]
+    # Metrics recorded on the background loop land in the caller's collector
+    assert [(c["stage"], c["prompt_tokens"]) for c in calls] == [("orchestrator", 10)]
+
+
+def test_sync_wrapper_returns_the_fallback(monkeypatch):
+    async def failing(llm, prompt, **kwargs):
+        raise RuntimeError("rate limited")
+
+    monkeypatch.setattr(mentor_agent, "get_llm", lambda name: None)
+    monkeypatch.setattr(mentor_agent, "ainvoke_llm", failing)
+    update = mentor_agent.mentor_agent(STATE)
+    assert update["errors"] == ["Mentor agent error: rate limited"]
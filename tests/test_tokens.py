@@ -0,0 +1,61 @@
+"""Tests for token estimation and the prompt budget packer."""
+from src.tokens import MIN_PARTIAL_TOKENS, estimate_tokens, fit_text, pack
+
+CLASS = '''class Store:
+    """Key/value store."""
+
+    def get(self, key):
+        value = self.data[key]
+        return value
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.flush(key, value, retries=3, timeout=10, verbose=True)
+'''
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    # "hello" -> 2, "world" -> 2, "!" -> 1
+    assert estimate_tokens("hello world!") == 5
+    assert estimate_tokens("a.b(c)") == 6
+
+
+def test_fit_text_cuts_between_definitions():
+    functions = "".join(f"def f{i}(x):\n    return x + {i}\n\n" for i in range(20))
+    fitted = fit_text(functions, 60)
+    assert estimate_tokens(fitted) <= 60
+    assert fitted.startswith("def f0(x):\n    return x + 0\n") and fitted.endswith("more lines)")
+    # Every kept definition is whole
+    assert fitted.count("def ") == fitted.count("return")
+    assert fit_text(functions, 10_000) == functions
+
+    # A class that doesn't fit keeps its header and as many whole methods as fit, signatures for the rest
+    shortened = fit_text(CLASS, 80)
+    assert shortened.splitlines()[:6] == ["class Store:", '    """Key/value store."""', "",
+                                          "    def get(self, key):", "        value = self.data[key]",
+                                          "        return value"]
+    assert "    def put(self, key, value):\n        ..." in shortened
+
+    paragraphs = "\n\n".join(f"paragraph {i} " + "words " * 8 for i in range(3))
+    assert fit_text(paragraphs, 40, unit="paragraph") == paragraphs.split("\n")[0] + "\n... (4 more lines)"
+
+
+def test_pack_fills_the_budget_in_rank_order():
+    big = "".join(f"def f{i}(x):\n    return x + {i}\n\n" for i in range(200))
+    items = [("a.py", "def a():\n    pass\n"), ("big.py", big), ("c.py", "def c():\n    pass\n")]
+    result = pack(items, 400, overhead_tokens=5)
+    # The big item is shortened to fit; the small one after it still gets in
+    assert [key for key, _ in result.sections] == ["a.py", "big.py", "c.py"]
+    assert result.truncated == ["big.py"] and not result.skipped
+    assert result.used_tokens <= 400
+    assert result.report() == {"budget_tokens": 400, "used_tokens": result.used_tokens,
+                               "included": 3, "truncated": 1, "skipped": 0}
+
+    # Too little left for a useful partial: the big item is skipped and the small one after it still fits
+    small_budget = estimate_tokens(items[0][1]) + MIN_PARTIAL_TOKENS // 2
+    result = pack(items, small_budget)
+    assert [key for key, _ in result.sections] == ["a.py", "c.py"] and result.skipped == ["big.py"]
+
+    capped = pack([("big.py", big)], 10_000, max_item_tokens=200)
+    assert capped.truncated == ["big.py"] and capped.used_tokens <= 200
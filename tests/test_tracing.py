@@ -0,0 +1,64 @@
+"""Tests for spans and the Chrome trace export."""
+import json
+
+import pytest
+
+from src import tracing
+from src.aio import run_sync
+from src.tracing import configure_tracing, span
+
+
+def _events(path):
+    # The closing bracket is optional in the format; add it to parse the file as JSON
+    return json.loads(path.read_text().rstrip(",\n") + "]")
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_exporter", None)
+    monkeypatch.setattr(tracing, "_configured", False)
+    path = tmp_path / "trace.json"
+    configure_tracing(str(path))
+    return path
+
+
+def test_spans_nest_and_export(trace_file):
+    async def llm_call():
+        with span("llm_call", model="m") as s:
+            s.set_attribute("prompt_tokens", 12)
+
+    with span("analysis", category="pipeline", repo_url="u"):
+        with span("navigator", category="agent"):
+            run_sync(llm_call())  # runs on another thread, still a child of navigator
+        with pytest.raises(ValueError):
+            with span("context", category="agent"):
+                raise ValueError("bad")
+    with span("other"):
+        pass
+
+    events = {e["name"]: e for e in _events(trace_file)}
+    assert list(events) == ["llm_call", "navigator", "context", "analysis", "other"]
+    root, nav, call = events["analysis"], events["navigator"], events["llm_call"]
+    assert root["args"]["parent_id"] is None and root["args"]["repo_url"] == "u"
+    assert nav["args"]["parent_id"] == root["args"]["span_id"] and nav["cat"] == "agent"
+    assert call["args"]["parent_id"] == nav["args"]["span_id"] and call["args"]["prompt_tokens"] == 12
+    assert events["context"]["args"]["error"] == "ValueError('bad')"
+    # One row per trace: everything under the root shares its tid, a new root starts a new one
+    assert {e["tid"] for e in (root, nav, call, events["context"])} == {root["args"]["span_id"]}
+    assert events["other"]["tid"] != root["tid"]
+    assert root["ts"] <= nav["ts"] and nav["ts"] + nav["dur"] <= root["ts"] + root["dur"]
+
+    # Re-opening an existing trace appends instead of starting a new array
+    configure_tracing(str(trace_file))
+    with span("again"):
+        pass
+    assert [e["name"] for e in _events(trace_file)][-1] == "again"
+
+
+def test_disabled_tracing_is_a_noop(monkeypatch):
+    monkeypatch.setattr(tracing, "_exporter", None)
+    monkeypatch.setattr(tracing, "_configured", False)
+    monkeypatch.delenv("GITBRO_TRACE_FILE", raising=False)
+    with span("analysis") as s:
+        s.set_attributes({"a": 1})
+    assert s is tracing._NOOP_SPAN